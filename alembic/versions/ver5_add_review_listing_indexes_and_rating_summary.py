@@ -0,0 +1,59 @@
+"""add_review_listing_indexes_and_rating_summary
+
+Revision ID: ver5
+Revises: ver4
+Create Date: 2026-10-19 16:20:47.903112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ver5'
+down_revision: Union[str, None] = 'ver4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'product_rating_summaries',
+        sa.Column('product_id', sa.String(length=36), nullable=False),
+        sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('star_1', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('star_2', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('star_3', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('star_4', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('star_5', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index('ix_reviews_product_created', 'reviews', ['product_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_reviews_product_rating_created', 'reviews', ['product_id', 'rating', 'created_at', 'id'], unique=False)
+    # nạp tổng hợp từ các review hiện có (chưa xóa, số sao 1-5)
+    op.execute(
+        """
+        INSERT INTO product_rating_summaries
+            (product_id, rating_count, rating_sum, star_1, star_2, star_3, star_4, star_5)
+        SELECT product_id, COUNT(*), SUM(rating),
+               SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END)
+        FROM reviews
+        WHERE deleted_at IS NULL AND product_id IS NOT NULL AND rating BETWEEN 1 AND 5
+        GROUP BY product_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reviews_product_rating_created', table_name='reviews')
+    op.drop_index('ix_reviews_product_created', table_name='reviews')
+    op.drop_table('product_rating_summaries')
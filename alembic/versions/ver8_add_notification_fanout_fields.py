@@ -0,0 +1,53 @@
+"""add_notification_fanout_fields
+
+Revision ID: ver8
+Revises: ver7
+Create Date: 2026-10-19 21:03:47.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ver8'
+down_revision: Union[str, None] = 'ver7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # content là Boolean từ ver1 (nhầm kiểu), đổi sang Text
+    op.alter_column('notifications', 'content', existing_type=sa.Boolean(), type_=sa.Text(), existing_nullable=True)
+    op.add_column('notifications', sa.Column('audience', sa.String(length=20), server_default='user', nullable=False))
+    op.add_column('notifications', sa.Column('segment', sa.Text(), nullable=True))
+    op.add_column('notifications', sa.Column('status', sa.String(length=20), server_default='sent', nullable=False))
+    op.add_column('notifications', sa.Column('fanout_cursor', sa.String(length=36), nullable=True))
+    op.add_column('notifications', sa.Column('recipient_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('notifications', sa.Column('lease_until', sa.DateTime(), nullable=True))
+    op.add_column('notifications', sa.Column('sent_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_notifications_audience_created', 'notifications', ['audience', 'created_at'], unique=False)
+    op.create_index('ix_notifications_status', 'notifications', ['status'], unique=False)
+    op.add_column('user_notifications', sa.Column('is_read', sa.Boolean(), server_default='0', nullable=False))
+    op.add_column('user_notifications', sa.Column('read_at', sa.DateTime(), nullable=True))
+    op.create_index('uq_user_notifications_user_notification', 'user_notifications', ['user_id', 'notification_id'], unique=True)
+    op.create_index('ix_user_notifications_user_read', 'user_notifications', ['user_id', 'is_read'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_notifications_user_read', table_name='user_notifications')
+    op.drop_index('uq_user_notifications_user_notification', table_name='user_notifications')
+    op.drop_column('user_notifications', 'read_at')
+    op.drop_column('user_notifications', 'is_read')
+    op.drop_index('ix_notifications_status', table_name='notifications')
+    op.drop_index('ix_notifications_audience_created', table_name='notifications')
+    op.drop_column('notifications', 'sent_at')
+    op.drop_column('notifications', 'lease_until')
+    op.drop_column('notifications', 'recipient_count')
+    op.drop_column('notifications', 'fanout_cursor')
+    op.drop_column('notifications', 'status')
+    op.drop_column('notifications', 'segment')
+    op.drop_column('notifications', 'audience')
+    op.alter_column('notifications', 'content', existing_type=sa.Text(), type_=sa.Boolean(), existing_nullable=True)
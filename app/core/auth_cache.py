@@ -0,0 +1,115 @@
+"""Cache xác thực trong bộ nhớ mỗi worker.
+
+- `user_cache`: thông tin user đăng nhập (kèm version token). Middleware so `ver` trong access token
+  với `version` của user trong cache, nên thu hồi token (tăng `User.version`) không cần truy vấn DB
+  mỗi request. Worker thực hiện thu hồi xóa cache ngay sau commit; worker khác thấy version mới
+  chậm nhất sau `AUTH_USER_CACHE_SECONDS`.
+- `token_cache`: payload của các JWT đã kiểm tra chữ ký, để token dùng lại nhiều lần trong phiên
+  không phải giải mã và kiểm tra HMAC mỗi request. Mục cache hết hạn cùng `exp` của token.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+
+
+class UserCache:
+    def __init__(self, ttl: float, max_size: int, name: str = "auth_user"):
+        # nhãn `cache` trong `cache_requests_total`
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Tuple[float, SimpleNamespace]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[SimpleNamespace]:
+        user = self._lookup(user_id)
+        record_cache(self.name, user is not None)
+        return user
+
+    def _lookup(self, user_id: str) -> Optional[SimpleNamespace]:
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None:
+                return None
+            expires_at, user = item
+            if expires_at < time.monotonic():
+                del self._items[user_id]
+                return None
+            self._items.move_to_end(user_id)
+            return user
+
+    def set(self, user_id: str, user: SimpleNamespace) -> None:
+        with self._lock:
+            self._items[user_id] = (time.monotonic() + self.ttl, user)
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._items.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+class TokenCache:
+    """LRU: digest của token -> (exp, payload); chỉ chứa token đã kiểm tra chữ ký thành công"""
+
+    def __init__(self, max_size: int, name: str = "auth_token"):
+        self.name = name
+        self.max_size = max_size
+        self._items: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # digest cố định 16 byte thay vì cả token; token giả mạo (khác chữ ký) có digest khác
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        # cache tắt thì không tính vào tỉ lệ hit
+        if self.max_size <= 0:
+            return None
+        payload = self._lookup(self._key(token))
+        record_cache(self.name, payload is not None)
+        return payload
+
+    def _lookup(self, key: bytes) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, payload = item
+            if expires_at <= time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+        return dict(payload)
+
+    def set(self, token: str, payload: Dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        # token không có exp không được cache, để hết hạn/thu hồi không phụ thuộc kích thước cache
+        if self.max_size <= 0 or not isinstance(exp, (int, float)):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._items[key] = (float(exp), dict(payload))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_SECONDS, settings.AUTH_USER_CACHE_SIZE, name="auth_user")
+token_cache = TokenCache(settings.JWT_DECODE_CACHE_SIZE, name="auth_token")
@@ -1,6 +1,7 @@
 # app/core/config.py
+import json
 from functools import lru_cache
-from typing import List, Any
+from typing import List, Any, Optional
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,11 +17,162 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     DB_POOL_SIZE: int = 10
     DB_MAX_OVERFLOW: int = 20
+    # Số giây chờ lấy connection trước khi báo lỗi pool cạn
+    DB_POOL_TIMEOUT: float = 30.0
+    # Kiểm tra connection trước khi dùng (tránh lỗi "MySQL server has gone away")
+    DB_POOL_PRE_PING: bool = True
+    # Tái tạo connection sau số giây này, đặt nhỏ hơn wait_timeout của MySQL
+    DB_POOL_RECYCLE: int = 1800
+    # Cảnh báo khi checkout chờ lâu hơn ngưỡng này (ms)
+    DB_POOL_SLOW_CHECKOUT_MS: float = 100.0
+    # Danh sách replica chỉ đọc, dạng "url1,url2" hoặc JSON list
+    DATABASE_REPLICA_URLS: Any = []
+    # Sau khi ghi, các request của cùng user đọc từ primary trong khoảng này (giây)
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+    # Replica lỗi sẽ bị bỏ qua trong khoảng này trước khi kiểm tra lại (giây)
+    DB_REPLICA_RETRY_SECONDS: float = 30.0
+
+    # --- Product import ---
+    # Số dòng sản phẩm mỗi transaction khi import
+    PRODUCT_IMPORT_BATCH_SIZE: int = 1000
+    # Dung lượng file import tối đa (byte)
+    PRODUCT_IMPORT_MAX_BYTES: int = 200 * 1024 * 1024
+    # Số lỗi từng dòng tối đa được lưu cho mỗi job
+    PRODUCT_IMPORT_MAX_ERRORS: int = 1000
+    # Thư mục lưu file đã upload chờ job import xử lý; phải dùng chung giữa các worker
+    PRODUCT_IMPORT_DIR: str = "./data/product-imports"
+    # Thời gian chạy tối đa của một job import
+    PRODUCT_IMPORT_TIMEOUT_SECONDS: float = 3600.0
+
+    # --- Export ---
+    # Số dòng mỗi lần đọc từ server-side cursor khi export
+    EXPORT_YIELD_PER: int = 1000
 
     # --- Security & JWT ---
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    # Thời gian cache thông tin user (kèm version token) trong mỗi worker (giây);
+    # thu hồi token ở worker khác có hiệu lực chậm nhất sau khoảng này
+    AUTH_USER_CACHE_SECONDS: float = 30.0
+    AUTH_USER_CACHE_SIZE: int = 10000
+    # Thư viện kiểm tra chữ ký JWT: "auto" (PyJWT nếu đã cài, không thì python-jose), "pyjwt", "jose"
+    JWT_BACKEND: str = "auto"
+    # Số token đã kiểm tra được cache (payload giữ tới khi token hết hạn); 0 = tắt
+    JWT_DECODE_CACHE_SIZE: int = 10000
+    # File JSON ma trận role -> quyền (mặc định dùng ma trận trong app/core/permissions.py);
+    # file được đọc lại khi thay đổi, kiểm tra tối đa một lần mỗi PERMISSION_MATRIX_RELOAD_SECONDS
+    PERMISSION_MATRIX_PATH: Optional[str] = None
+    PERMISSION_MATRIX_RELOAD_SECONDS: float = 5.0
+
+    # --- Storage file tĩnh (ảnh review...) ---
+    # "local" (thư mục STORAGE_LOCAL_ROOT, app phục vụ tại STORAGE_BASE_URL) hoặc "s3" (cần boto3)
+    STORAGE_BACKEND: str = "local"
+    STORAGE_LOCAL_ROOT: str = "./media"
+    # Tiền tố URL trả cho client: đường dẫn (local) hoặc URL bucket/CDN (s3)
+    STORAGE_BASE_URL: str = "/media"
+    STORAGE_S3_BUCKET: str = ""
+    STORAGE_S3_PREFIX: str = ""
+    STORAGE_S3_ENDPOINT_URL: Optional[str] = None
+    STORAGE_S3_REGION: Optional[str] = None
+
+    # --- Ảnh review ---
+    REVIEW_MEDIA_MAX_BYTES: int = 10 * 1024 * 1024
+    REVIEW_MEDIA_MAX_PER_REVIEW: int = 5
+    # Từ chối ảnh nhiều điểm ảnh hơn mức này (chống ảnh nén nhỏ nhưng giải nén rất lớn)
+    REVIEW_MEDIA_MAX_PIXELS: int = 40_000_000
+    # Cạnh dài tối đa của bản hiển thị và thumbnail (WebP)
+    REVIEW_MEDIA_DISPLAY_SIZE: int = 1600
+    REVIEW_MEDIA_THUMBNAIL_SIZE: int = 320
+    REVIEW_MEDIA_WEBP_QUALITY: int = 80
+    # Process pool xử lý ảnh; 0 = xử lý trong threadpool
+    IMAGE_WORKERS: int = 1
+    IMAGE_MAX_PENDING: int = 16
+    IMAGE_NICE: int = 10
+
+    # --- Realtime (WebSocket/SSE) ---
+    # "memory" (pub/sub trong process, một worker) hoặc "redis" (nhiều worker, cần cài redis)
+    REALTIME_BROKER: str = "memory"
+    REALTIME_REDIS_URL: str = "redis://localhost:6379/0"
+    # Số kết nối tối đa mỗi worker
+    REALTIME_MAX_CONNECTIONS: int = 10000
+    # Số sự kiện chưa gửi tối đa của một kết nối; vượt quá thì đóng kết nối (client quá chậm)
+    REALTIME_SEND_QUEUE_SIZE: int = 100
+
+    # --- Chat ---
+    # Tin nhắn được ghi DB theo lô: mỗi CHAT_FLUSH_INTERVAL_MS hoặc khi đủ CHAT_FLUSH_BATCH_SIZE tin
+    CHAT_FLUSH_INTERVAL_MS: int = 50
+    CHAT_FLUSH_BATCH_SIZE: int = 500
+    # Số tin chờ ghi tối đa mỗi worker; vượt quá thì từ chối tin mới (503 / lỗi "busy")
+    CHAT_WRITE_QUEUE_SIZE: int = 10000
+    CHAT_MAX_MESSAGE_LENGTH: int = 2000
+
+    # --- Thông báo ---
+    # Số user mỗi lô fan-out (một INSERT ... SELECT, một transaction)
+    NOTIFICATION_FANOUT_CHUNK_SIZE: int = 1000
+    # Thời gian giữ quyền fan-out một thông báo (gia hạn sau mỗi lô)
+    NOTIFICATION_FANOUT_LEASE_SECONDS: float = 60.0
+    # Số user tối đa khi gửi trực tiếp (nhiều hơn thì dùng segment)
+    NOTIFICATION_DIRECT_MAX_USERS: int = 1000
+    # Cache số thông báo chưa đọc mỗi worker
+    NOTIFICATION_UNREAD_CACHE_SECONDS: float = 60.0
+    NOTIFICATION_UNREAD_CACHE_SIZE: int = 100000
+    # Khoảng gửi comment giữ kết nối SSE (proxy thường cắt kết nối im lặng sau 60 giây)
+    NOTIFICATION_SSE_HEARTBEAT_SECONDS: float = 15.0
+
+    # --- Job nền ---
+    # Số job chạy đồng thời mỗi worker; 0: worker chỉ thêm job, không chạy job
+    JOB_CONCURRENCY: int = 4
+    # Chu kỳ tìm job đến hạn (job thêm ở worker khác, job hẹn giờ); job thêm ở chính worker chạy ngay
+    JOB_POLL_SECONDS: float = 1.0
+    # Worker chạy job gia hạn lease mỗi JOB_LEASE_SECONDS / 4; worker chết thì job chạy lại sau tối đa ngần này
+    JOB_LEASE_SECONDS: float = 60.0
+    # Mặc định cho handler không tự khai báo
+    JOB_TIMEOUT_SECONDS: float = 300.0
+    JOB_MAX_ATTEMPTS: int = 5
+    # Retry sau JOB_RETRY_BASE_SECONDS * 2^(lần thử - 1) (có jitter), tối đa JOB_RETRY_MAX_SECONDS
+    JOB_RETRY_BASE_SECONDS: float = 5.0
+    JOB_RETRY_MAX_SECONDS: float = 3600.0
+    # Job đã xong được giữ lại (chống enqueue trùng theo idempotency key) trong ngần này giờ
+    JOB_RETENTION_HOURS: float = 168.0
+    # Khi tắt, chờ job đang chạy tối đa ngần này giây; job chưa xong được worker khác chạy lại
+    JOB_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+
+    # --- Idempotency-Key (request ghi gửi lại) ---
+    # "memory" (trong process, một worker) hoặc "redis" (nhiều worker, cần cài redis)
+    IDEMPOTENCY_BACKEND: str = "memory"
+    IDEMPOTENCY_REDIS_URL: str = "redis://localhost:6379/0"
+    # Response đã lưu được trả lại cho request cùng khóa trong ngần này giây
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0
+    # Khóa của request đang chạy tự hết hạn sau ngần này giây (worker chết giữa chừng)
+    IDEMPOTENCY_LOCK_SECONDS: float = 60.0
+    # Request trùng chờ request đang chạy tối đa ngần này giây, quá thì trả 409
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    # Body request/response tối đa (byte); request lớn hơn trả 413, response lớn hơn không được lưu
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 1_048_576
+    # Số khóa tối đa của backend memory (bỏ khóa cũ nhất khi vượt)
+    IDEMPOTENCY_MAX_KEYS: int = 100000
+
+    # --- Password hashing (Argon2) ---
+    # Số process băm mật khẩu; 0 = băm trong threadpool của request
+    PASSWORD_HASH_WORKERS: int = 2
+    # Số yêu cầu băm đang chờ tối đa, vượt quá trả 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # Giá trị nice của process băm (>0 để nhường CPU cho process phục vụ request)
+    PASSWORD_HASH_NICE: int = 19
+    # Tham số Argon2; khi đổi, hash cũ được băm lại lúc user đăng nhập
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+
+    # --- Email filter (Bloom filter email đã đăng ký) ---
+    EMAIL_FILTER_ENABLED: bool = True
+    # Số email dự kiến và tỉ lệ dương tính giả mong muốn (quyết định kích thước filter)
+    EMAIL_FILTER_CAPACITY: int = 1_000_000
+    EMAIL_FILTER_ERROR_RATE: float = 0.001
+    # Khoảng tối thiểu giữa hai lần đọc thêm email do worker khác tạo (giây)
+    EMAIL_FILTER_REFRESH_SECONDS: float = 1.0
     
     # --- Server Configuration ---
     DEBUG: bool = False
@@ -41,11 +193,58 @@ class Settings(BaseSettings):
             return v
         return []
 
+    @field_validator("DATABASE_REPLICA_URLS", mode="before")
+    @classmethod
+    def assemble_replica_urls(cls, v: Any) -> List[str]:
+        if isinstance(v, str) and v.startswith("["):
+            v = json.loads(v)
+        if isinstance(v, str):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        elif isinstance(v, list):
+            return v
+        return []
+
+    # --- Thanh toán ---
+    # Cổng giả lập để test (webhook ký HMAC-SHA256 bằng secret này); để trống thì tắt
+    PAYMENT_FAKE_SECRET: str = ""
+    # VNPay: để trống VNPAY_TMN_CODE thì tắt
+    VNPAY_TMN_CODE: str = ""
+    VNPAY_HASH_SECRET: str = ""
+    VNPAY_PAYMENT_URL: str = "https://sandbox.vnpayment.vn/paymentv2/vpcpay.html"
+    # Trang frontend khách được chuyển về sau khi thanh toán (kết quả chính thức đến qua IPN)
+    VNPAY_RETURN_URL: str = "http://localhost:3000/payment/return"
+    VNPAY_EXPIRE_MINUTES: int = 15
+
+    # --- Thống kê bán hàng ---
+    # Múi giờ (lệch so với UTC) để tính "ngày" của đơn trong bảng tổng hợp; đổi thì chạy lại backfill --rebuild
+    ANALYTICS_UTC_OFFSET_HOURS: int = 7
+
     # --- Mail Configuration (SMTP) ---
     SMTP_HOST: str = ""
     SMTP_PORT: int = 587
     SMTP_USER: str = ""
     SMTP_PASSWORD: str = ""
+    # 587: STARTTLS; 465: SMTP_SSL=true (TLS ngay khi kết nối)
+    SMTP_STARTTLS: bool = True
+    SMTP_SSL: bool = False
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    # smtp: gửi qua SMTP_HOST; console: chỉ ghi log (dev)
+    MAIL_BACKEND: str = "console"
+    MAIL_FROM: str = "WebMyPham <no-reply@webmypham.local>"
+    # Số kết nối SMTP giữ mở trên mỗi worker; mỗi kết nối gửi một lô tối đa MAIL_BATCH_SIZE email
+    MAIL_SMTP_CONNECTIONS: int = 2
+    MAIL_BATCH_SIZE: int = 50
+    # Chờ tối đa ngần này để gom email thành lô
+    MAIL_BATCH_WINDOW_MS: int = 100
+    # Giới hạn của nhà cung cấp SMTP (email/giây trên mỗi worker); 0 = không giới hạn
+    MAIL_RATE_PER_SECOND: float = 10.0
+    # Kết nối nhàn rỗi lâu hơn ngần này được kiểm tra bằng NOOP trước khi gửi (server thường tự cắt)
+    MAIL_SMTP_IDLE_SECONDS: float = 60.0
+    MAIL_TEMPLATE_DIR: str = "app/templates/mail"
+    # Thư mục lưu template đã biên dịch (module Python) để worker khởi động sau không biên dịch lại
+    MAIL_TEMPLATE_CACHE_DIR: str = ""
+    # Đọc lại template khi file thay đổi (dev)
+    MAIL_TEMPLATE_RELOAD: bool = False
 
 # Sử dụng lru_cache để đảm bảo Settings chỉ được khởi tạo một lần (Singleton pattern)
 @lru_cache
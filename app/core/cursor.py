@@ -0,0 +1,20 @@
+"""Cursor mờ cho phân trang keyset: id của dòng cuối trang kèm "kiểu" danh sách (vd. kiểu sắp xếp),
+để cursor của danh sách này không dùng nhầm cho danh sách khác."""
+import base64
+import json
+
+
+def encode_cursor(kind: str, row_id: str) -> str:
+    raw = json.dumps({"s": kind, "id": row_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: str) -> str:
+    """id trong cursor; cursor hỏng hoặc của kiểu khác báo ValueError"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if data["s"] != kind or not isinstance(data["id"], str):
+            raise ValueError
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("cursor không hợp lệ.")
+    return data["id"]
@@ -1,22 +1,239 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from app.core.config import settings 
-
-engine = create_engine(
-    settings.DATABASE_URL,
-    # Echo=True
-    echo=settings.DEBUG,           
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    future=True
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Hashable, List, Optional
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.sql import Select
+from app.core.config import settings
+from app.core.pool_metrics import InstrumentedQueuePool, PoolStats, instrument_engine
+
+logger = logging.getLogger("app")
+
+
+def _create_engine(url: str, name: str) -> Engine:
+    new_engine = create_engine(
+        url,
+        # Echo=True
+        echo=settings.DEBUG,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        future=True
+    )
+    new_engine.pool.stats = PoolStats(name, slow_checkout_ms=settings.DB_POOL_SLOW_CHECKOUT_MS)
+    instrument_engine(new_engine)
+    return new_engine
+
+
+engine = _create_engine(settings.DATABASE_URL, "primary")
+replica_engines: List[Engine] = [
+    _create_engine(url, f"replica-{i}") for i, url in enumerate(settings.DATABASE_REPLICA_URLS)
+]
+
+
+class ReplicaRouter:
+    """Chọn replica theo round-robin, bỏ qua replica lỗi và ghi nhớ các cửa sổ read-your-writes"""
+
+    def __init__(self, engines: List[Engine], retry_after: float, sticky_seconds: float):
+        self.engines = engines
+        self.retry_after = retry_after
+        self.sticky_seconds = sticky_seconds
+        self._cycle = itertools.cycle(engines) if engines else None
+        self._down_until: Dict[Engine, float] = {}
+        self._sticky: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def pick(self) -> Optional[Engine]:
+        """Trả về replica khỏe tiếp theo, hoặc None nếu không còn replica nào dùng được"""
+        if not self._cycle:
+            return None
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            with self._lock:
+                candidate = next(self._cycle)
+            down_until = self._down_until.get(candidate)
+            if down_until is None:
+                return candidate
+            if down_until <= now and self._probe(candidate):
+                self._down_until.pop(candidate, None)
+                logger.info(f"Replica {candidate.url!r} is back online")
+                return candidate
+        return None
+
+    def mark_down(self, replica: Engine) -> None:
+        if replica not in self._down_until:
+            logger.warning(f"Replica {replica.url!r} marked down for {self.retry_after:.0f}s")
+        self._down_until[replica] = time.monotonic() + self.retry_after
+
+    def _probe(self, replica: Engine) -> bool:
+        try:
+            with replica.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            self._down_until[replica] = time.monotonic() + self.retry_after
+            return False
+
+    def mark_write(self, key: Optional[Hashable]) -> None:
+        """Ghim các lần đọc của `key` (user/client) vào primary trong cửa sổ read-your-writes"""
+        if key is None or not self.engines:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._sticky[key] = now + self.sticky_seconds
+            if len(self._sticky) > 10000:
+                self._sticky = {k: v for k, v in self._sticky.items() if v > now}
+
+    def is_sticky(self, key: Optional[Hashable]) -> bool:
+        if key is None:
+            return False
+        until = self._sticky.get(key)
+        return until is not None and until > time.monotonic()
+
+
+router = ReplicaRouter(
+    replica_engines,
+    retry_after=settings.DB_REPLICA_RETRY_SECONDS,
+    sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
 )
 
+
+def _on_replica_error(context):
+    if context.is_disconnect or context.connection is None:
+        router.mark_down(context.engine)
+
+
+for _replica in replica_engines:
+    event.listen(_replica, "handle_error", _on_replica_error)
+
+
+_force_primary: ContextVar[bool] = ContextVar("force_primary", default=False)
+
+
+@contextmanager
+def use_primary():
+    """Buộc mọi truy vấn trong khối `with` đọc từ primary (bỏ qua replica)"""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+@contextmanager
+def unit_of_work(db: Session):
+    """Một transaction cho cả khối `with`: repository chỉ flush, khối ngoài cùng commit một lần.
+
+    - Lồng nhau được: chỉ khối ngoài cùng commit/rollback, khối trong chỉ tham gia transaction.
+    - Có exception thì rollback toàn bộ; transaction đã hỏng (flush lỗi bị bắt ở tầng dưới) cũng rollback.
+    - Không có gì để ghi (request chỉ đọc) thì không gửi COMMIT.
+    """
+    depth = db.info.get("uow_depth", 0)
+    db.info["uow_depth"] = depth + 1
+    try:
+        yield db
+        if depth == 0:
+            transaction = db.get_transaction()
+            if transaction is not None and not transaction.is_active:
+                db.rollback()
+            elif db.new or db.dirty or db.deleted or db.info.get("wrote"):
+                db.commit()
+    except BaseException:
+        if depth == 0:
+            db.rollback()
+        raise
+    finally:
+        db.info["uow_depth"] = depth
+
+
+class RoutingSession(Session):
+    """Session định tuyến SELECT sang replica, còn lại (ghi, flush, text SQL) về primary.
+
+    - `session.info["primary"] = True` ghim cả session vào primary (ví dụ request không phải GET).
+    - `session.info["sticky_key"]` xác định user/client để áp dụng cửa sổ read-your-writes.
+    - Khi session đã ghi, các lần đọc tiếp theo trong session cũng đi primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            not replica_engines
+            or self._flushing
+            or _force_primary.get()
+            or self.info.get("primary")
+            or self.info.get("wrote")
+            or not isinstance(clause, Select)
+            or router.is_sticky(self.info.get("sticky_key"))
+        ):
+            return engine
+        return router.pick() or engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_session_wrote(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _mark_session_executed_write(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session):
+    if session.info.get("wrote"):
+        router.mark_write(session.info.get("sticky_key"))
+
+
+def on_commit(db: Session, callback) -> None:
+    """Chạy `callback()` sau khi transaction hiện tại của session commit thành công (bỏ qua nếu rollback)"""
+    db.info.setdefault("on_commit", []).append(callback)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _run_on_commit(session):
+    for callback in session.info.pop("on_commit", []):
+        try:
+            callback()
+        except Exception:
+            logger.exception("on_commit callback failed")
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_on_commit(session):
+    session.info.pop("on_commit", None)
+
+
 # Tạo Session factory
 SessionLocal = sessionmaker(
+    class_=RoutingSession,
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
 
+def run_in_session(fn, *args):
+    """Chạy `fn(db, *args)` trên primary trong session và unit of work riêng.
+
+    Dùng cho code chạy ngoài request (WebSocket, worker nền), nơi không có `get_db`; gọi qua threadpool.
+    """
+    db = SessionLocal()
+    db.info["primary"] = True
+    try:
+        with unit_of_work(db):
+            return fn(db, *args)
+    finally:
+        db.close()
+
+
 Base = declarative_base()
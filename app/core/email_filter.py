@@ -0,0 +1,148 @@
+"""Bloom filter các email đã đăng ký, để loại sớm email chắc chắn chưa tồn tại.
+
+- `might_contain(email)` False nghĩa là email chưa đăng ký theo những gì worker này đã thấy:
+  register bỏ qua truy vấn kiểm tra trùng (email trùng vẫn bị unique index chặn, trả 409).
+  Filter có thể trượt email vừa tạo ở worker khác, nên login không dựa vào filter để trả 401.
+  True chỉ là "có thể": vẫn phải hỏi DB.
+- Nạp toàn bộ email lúc startup. Sau đó filter được cập nhật theo user ghi qua ORM trong process
+  (`after_insert`/`after_update`), và theo user do worker khác tạo, bằng cách đọc thêm các dòng
+  `created_at >= watermark - WATERMARK_OVERLAP` (transaction bắt đầu trước nhưng commit sau vẫn được
+  đọc). Việc đọc thêm chỉ xảy ra khi tra trượt và tối đa một lần mỗi `EMAIL_FILTER_REFRESH_SECONDS`.
+  Dòng có `created_at` lùi xa hơn (seed, script) không được đọc thêm; login tìm thấy thì bổ sung.
+- Bloom filter không xóa được phần tử: user bị xóa hoặc đổi email chỉ làm tăng tỉ lệ "có thể".
+- Chưa nạp xong (hoặc `EMAIL_FILTER_ENABLED=false`) thì mọi email đều là "có thể".
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import event, func, select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# đọc lùi lại so với watermark: dòng của transaction dài có created_at nhỏ hơn dòng đã commit trước nó
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # double hashing: h1 + i*h2 từ một digest 128 bit
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def _normalize(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+class EmailFilter:
+    def __init__(self, enabled: bool, capacity: int, error_rate: float, refresh_seconds: float):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self._bloom: Optional[BloomFilter] = None
+        self._watermark = None
+        self._refreshed_at = 0.0
+        # ghi bit không nguyên tử giữa các thread; đọc không cần lock
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+
+    def load(self) -> None:
+        """Nạp toàn bộ email từ primary (gọi lúc startup, chạy trong thread)"""
+        if not self.enabled:
+            return
+        with engine.connect() as conn:
+            total = conn.execute(select(func.count()).select_from(User)).scalar() or 0
+            # dư chỗ gấp đôi để tỉ lệ dương tính giả giữ được khi có thêm user mới
+            bloom = BloomFilter(max(self.capacity, total * 2), self.error_rate)
+            watermark = None
+            result = conn.execution_options(yield_per=10000).execute(select(User.email, User.created_at))
+            for email, created_at in result:
+                bloom.add(_normalize(email))
+                if created_at is not None and (watermark is None or created_at > watermark):
+                    watermark = created_at
+        with self._lock:
+            self._bloom = bloom
+            self._watermark = watermark
+            self._refreshed_at = time.monotonic()
+        logger.info("Email filter loaded: %s emails, %s KiB", bloom.count, len(bloom.bits) // 1024)
+
+    def add(self, email: str) -> None:
+        if self._bloom is None:
+            return
+        with self._lock:
+            self._bloom.add(_normalize(email))
+            if self._bloom.count == self._bloom.capacity + 1:
+                logger.warning("Email filter over capacity (%s emails), false positive rate rising",
+                               self._bloom.capacity)
+
+    def might_contain(self, email: str) -> bool:
+        bloom = self._bloom
+        return bloom is None or _normalize(email) in bloom
+
+    def refresh_due(self) -> bool:
+        return self._bloom is not None and time.monotonic() - self._refreshed_at >= self.refresh_seconds
+
+    def refresh(self) -> None:
+        """Đọc thêm email do process khác tạo kể từ lần nạp trước (chạy trong thread, đọc primary)"""
+        if not self.refresh_due() or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._refreshed_at = time.monotonic()
+            query = select(User.email, User.created_at)
+            if self._watermark is not None:
+                # đọc trùng các dòng trong khoảng lùi: thêm trùng vào Bloom filter không sao
+                query = query.where(User.created_at >= self._watermark - WATERMARK_OVERLAP)
+            with engine.connect() as conn:
+                rows = conn.execute(query).all()
+            for email, created_at in rows:
+                self._bloom.add(_normalize(email))
+                if created_at is not None and (self._watermark is None or created_at > self._watermark):
+                    self._watermark = created_at
+        finally:
+            self._lock.release()
+
+
+email_filter = EmailFilter(
+    settings.EMAIL_FILTER_ENABLED,
+    settings.EMAIL_FILTER_CAPACITY,
+    settings.EMAIL_FILTER_ERROR_RATE,
+    settings.EMAIL_FILTER_REFRESH_SECONDS,
+)
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+def _track_user_email(mapper, connection, target):
+    # thêm cả khi transaction rollback sau đó: chỉ làm tăng dương tính giả, không gây âm tính giả
+    email_filter.add(target.email)
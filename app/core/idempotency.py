@@ -0,0 +1,350 @@
+"""Header `Idempotency-Key` cho request ghi (POST/PUT/PATCH/DELETE): client gửi lại cùng request thì
+nhận lại response đã lưu, không chạy lại (không tạo đơn/tài khoản thứ hai, không cộng giỏ hai lần).
+
+- Khóa được tách theo user (id trong access token; request chưa đăng nhập dùng chung "anon") và đi kèm
+  dấu vân tay của request (method, path, query, body). Cùng khóa mà request khác thì trả 422.
+- Lần đầu: giữ khóa ở trạng thái đang chạy (tối đa `IDEMPOTENCY_LOCK_SECONDS`), chạy request rồi lưu
+  status, header và body trong `IDEMPOTENCY_TTL_SECONDS`. Response 5xx, lỗi giữa chừng hoặc body lớn hơn
+  `IDEMPOTENCY_MAX_BODY_BYTES` thì không lưu mà nhả khóa để client thử lại.
+- Bản trùng tới khi lần đầu đang chạy thì chờ lần đầu xong (tối đa `IDEMPOTENCY_WAIT_SECONDS`, quá thì
+  409) rồi nhận response của lần đầu, thay vì chạy song song.
+- `IDEMPOTENCY_BACKEND=memory`: lưu trong worker, đủ khi chạy một worker. `redis`: dùng chung cho nhiều
+  worker/máy (cần cài `redis`; giữ khóa bằng `SET NX`, bản trùng hỏi lại định kỳ).
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import idempotency_requests_total
+
+logger = logging.getLogger("app")
+
+HEADER = b"idempotency-key"
+METHODS = ("POST", "PUT", "PATCH", "DELETE")
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class StoredResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+@dataclass
+class Record:
+    fingerprint: str
+    # None: lần đầu đang chạy
+    response: Optional[StoredResponse] = None
+    # mã của lần chạy giữ khóa (chỉ lần đó được nhả khóa)
+    owner: str = ""
+
+
+@dataclass
+class _MemoryEntry:
+    record: Record
+    expires_at: float
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class MemoryIdempotencyStore:
+    """Lưu trong process; khóa hết hạn được dọn dần từ khóa cũ nhất (mọi khóa cùng TTL)"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+    def _evict(self, now: float) -> None:
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now and len(self._entries) <= self.max_keys:
+                break
+            self._entries.pop(key)
+            entry.done.set()
+
+    def _get(self, key: str, now: float) -> Optional[_MemoryEntry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._entries.pop(key)
+            entry.done.set()
+            return None
+        return entry
+
+    async def reserve(self, key: str, record: Record, lock_seconds: float) -> Optional[Record]:
+        """Giữ khóa cho `record`; trả về None nếu giữ được, ngược lại bản ghi đang có"""
+        now = time.monotonic()
+        self._evict(now)
+        entry = self._get(key, now)
+        if entry is not None:
+            return entry.record
+        self._entries[key] = _MemoryEntry(record, now + lock_seconds)
+        return None
+
+    async def complete(self, key: str, record: Record, ttl_seconds: float) -> None:
+        entry = self._entries.pop(key, None)
+        self._entries[key] = _MemoryEntry(record, time.monotonic() + ttl_seconds)
+        if entry is not None:
+            entry.done.set()
+
+    async def release(self, key: str, owner: str) -> None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.record.owner == owner:
+            self._entries.pop(key)
+            entry.done.set()
+
+    async def wait(self, key: str, timeout: float) -> None:
+        """Chờ lần đang chạy của `key` xong (lưu response hoặc nhả khóa) hoặc hết `timeout`"""
+        entry = self._get(key, time.monotonic())
+        if entry is None or entry.record.response is not None:
+            return
+        try:
+            await asyncio.wait_for(entry.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+# nhả khóa chỉ khi vẫn là của lần chạy này (khóa có thể đã hết hạn và bị lần khác giữ)
+_RELEASE_SCRIPT = """
+local value = redis.call('get', KEYS[1])
+if value and cjson.decode(value)['owner'] == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _encode(record: Record) -> str:
+    data = {"fingerprint": record.fingerprint, "owner": record.owner}
+    if record.response is not None:
+        data["status"] = record.response.status
+        data["headers"] = [[base64.b64encode(k).decode(), base64.b64encode(v).decode()]
+                           for k, v in record.response.headers]
+        data["body"] = base64.b64encode(record.response.body).decode()
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _decode(raw) -> Record:
+    data = json.loads(raw)
+    response = None
+    if "status" in data:
+        response = StoredResponse(
+            data["status"],
+            [(base64.b64decode(k), base64.b64decode(v)) for k, v in data["headers"]],
+            base64.b64decode(data["body"]),
+        )
+    return Record(data["fingerprint"], response, data.get("owner", ""))
+
+
+class RedisIdempotencyStore:
+    """Lưu trên Redis (dùng chung giữa các worker); bản trùng hỏi lại khóa mỗi `poll_seconds`"""
+
+    def __init__(self, url: str, prefix: str = "idempotency:", poll_seconds: float = 0.05):
+        self.url = url
+        self.prefix = prefix
+        self.poll_seconds = poll_seconds
+        self._redis = None
+
+    def _client(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(self.url)
+        return self._redis
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def reserve(self, key: str, record: Record, lock_seconds: float) -> Optional[Record]:
+        client = self._client()
+        while True:
+            if await client.set(self.prefix + key, _encode(record), nx=True, px=int(lock_seconds * 1000)):
+                return None
+            raw = await client.get(self.prefix + key)
+            # khóa vừa hết hạn giữa hai lệnh: thử giữ lại
+            if raw is not None:
+                return _decode(raw)
+
+    async def complete(self, key: str, record: Record, ttl_seconds: float) -> None:
+        await self._client().set(self.prefix + key, _encode(record), px=int(ttl_seconds * 1000))
+
+    async def release(self, key: str, owner: str) -> None:
+        await self._client().eval(_RELEASE_SCRIPT, 1, self.prefix + key, owner)
+
+    async def wait(self, key: str, timeout: float) -> None:
+        client = self._client()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            raw = await client.get(self.prefix + key)
+            if raw is None or _decode(raw).response is not None:
+                return
+            await asyncio.sleep(self.poll_seconds)
+
+
+def build_store():
+    if settings.IDEMPOTENCY_BACKEND == "redis":
+        return RedisIdempotencyStore(settings.IDEMPOTENCY_REDIS_URL)
+    if settings.IDEMPOTENCY_BACKEND != "memory":
+        raise ValueError(f"Unknown IDEMPOTENCY_BACKEND: {settings.IDEMPOTENCY_BACKEND!r}")
+    return MemoryIdempotencyStore(settings.IDEMPOTENCY_MAX_KEYS)
+
+
+store = build_store()
+
+
+def fingerprint(method: str, path: str, query: bytes, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query, body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def _principal(scope) -> str:
+    # AuthMiddleware (bao ngoài) đặt user vào request.state, tức scope["state"]
+    user = (scope.get("state") or {}).get("user")
+    return f"user:{user.id}" if user is not None else "anon"
+
+
+async def _send_json(send, status: int, detail: str, extra_headers=()) -> None:
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *extra_headers,
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send, response: StoredResponse) -> None:
+    await send({"type": "http.response.start", "status": response.status,
+                "headers": [*response.headers, (b"idempotent-replayed", b"true")]})
+    await send({"type": "http.response.body", "body": response.body})
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware thuần: chỉ xử lý request ghi có header `Idempotency-Key`, request khác đi thẳng"""
+
+    def __init__(self, app, store=None):
+        self.app = app
+        self._store = store
+
+    @property
+    def store(self):
+        return self._store if self._store is not None else store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in METHODS:
+            await self.app(scope, receive, send)
+            return
+        raw_key = next((value for name, value in scope["headers"] if name == HEADER), None)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        client_key = raw_key.decode("latin-1").strip()
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key phải dài 1-{MAX_KEY_LENGTH} ký tự.")
+            return
+
+        body, too_large = await _read_body(receive, settings.IDEMPOTENCY_MAX_BODY_BYTES)
+        if too_large:
+            idempotency_requests_total.inc(("too_large",))
+            await _send_json(send, 413, "Request quá lớn để dùng Idempotency-Key.")
+            return
+        key = f"{_principal(scope)}:{client_key}"
+        record = Record(fingerprint(scope["method"], scope["path"], scope.get("query_string", b""), body),
+                        owner=uuid.uuid4().hex)
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        waited = False
+        while True:
+            existing = await self.store.reserve(key, record, settings.IDEMPOTENCY_LOCK_SECONDS)
+            if existing is None:
+                break
+            if existing.fingerprint != record.fingerprint:
+                idempotency_requests_total.inc(("mismatch",))
+                await _send_json(send, 422, "Idempotency-Key đã được dùng cho một request khác.")
+                return
+            if existing.response is not None:
+                idempotency_requests_total.inc(("replayed_after_wait" if waited else "replayed",))
+                await _replay(send, existing.response)
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                idempotency_requests_total.inc(("in_progress",))
+                await _send_json(send, 409, "Request cùng Idempotency-Key đang được xử lý, vui lòng thử lại.",
+                                 [(b"retry-after", b"1")])
+                return
+            # lần đầu xong thì lấy response của nó; lần đầu lỗi (nhả khóa) thì lần này tự chạy
+            waited = True
+            await self.store.wait(key, remaining)
+
+        idempotency_requests_total.inc(("executed",))
+        await self._execute(scope, send, key, record, body)
+
+    async def _execute(self, scope, send, key: str, record: Record, body: bytes) -> None:
+        sent = False
+
+        async def replay_receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # như server thật: sau khi hết body thì chỉ còn chờ client ngắt kết nối
+            await asyncio.Event().wait()
+
+        start = None
+        chunks: List[bytes] = []
+        size = 0
+        complete = False
+
+        async def capture_send(message):
+            nonlocal start, size, complete
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= settings.IDEMPOTENCY_MAX_BODY_BYTES:
+                    chunks.append(chunk)
+                complete = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await self.store.release(key, record.owner)
+            raise
+        if (start is None or not complete or start["status"] >= 500
+                or size > settings.IDEMPOTENCY_MAX_BODY_BYTES):
+            await self.store.release(key, record.owner)
+            return
+        record.response = StoredResponse(start["status"], list(start.get("headers", [])), b"".join(chunks))
+        await self.store.complete(key, record, settings.IDEMPOTENCY_TTL_SECONDS)
+
+
+async def _read_body(receive, limit: int) -> Tuple[bytes, bool]:
+    chunks: List[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return b"", True
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks), False
@@ -0,0 +1,63 @@
+"""Xử lý ảnh upload (chạy trong process pool, xem `app/core/process_pool.py`).
+
+Module chỉ phụ thuộc Pillow để process con khởi động nhanh.
+"""
+import os
+from typing import Dict, Optional
+
+# chữ ký đầu file -> content type; không tin Content-Type/tên file do client gửi
+SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/gif": "gif", "image/webp": "webp"}
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Content type thật của ảnh theo vài byte đầu, None nếu không phải định dạng được nhận"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+def make_variants(src: str, out_dir: str, max_size: int, thumb_size: int, quality: int,
+                  max_pixels: int) -> Dict[str, dict]:
+    """Tạo bản WebP (cạnh dài tối đa `max_size`) và thumbnail WebP từ ảnh `src`.
+
+    Trả về {"display": {...}, "thumbnail": {...}} gồm đường dẫn file tạm, kích thước ảnh và số byte.
+    Ảnh lỗi, hoặc nhiều hơn `max_pixels` điểm ảnh (chống "bom giải nén"), báo ValueError.
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    variants = {}
+    try:
+        with Image.open(src) as img:
+            # chỉ đọc header: kiểm tra kích thước trước khi giải nén
+            if img.width * img.height > max_pixels:
+                raise ValueError(f"Ảnh quá lớn ({img.width}x{img.height})")
+            img.verify()
+        with Image.open(src) as img:
+            # xoay theo EXIF rồi bỏ metadata (vị trí GPS...) khi lưu lại
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "P") else "RGB")
+            for name, size in (("display", max_size), ("thumbnail", thumb_size)):
+                variant = img.copy()
+                variant.thumbnail((size, size), Image.LANCZOS)
+                path = os.path.join(out_dir, f"{os.path.basename(src)}.{name}.webp")
+                variant.save(path, "WEBP", quality=quality, method=4)
+                variants[name] = {"path": path, "width": variant.width, "height": variant.height,
+                                  "size": os.path.getsize(path)}
+            return variants
+    except BaseException as e:
+        for variant in variants.values():
+            os.remove(variant["path"])
+        if isinstance(e, (OSError, SyntaxError, Image.DecompressionBombError)):
+            raise ValueError(f"Ảnh không hợp lệ: {e}")
+        raise
@@ -0,0 +1,283 @@
+"""Job nền: việc không cần xong trong request (gửi email, fan-out thông báo...) chạy sau, ngoài request.
+
+- Hàng đợi là bảng `jobs`. `enqueue(db, ...)` thêm job trong transaction của request: request rollback
+  thì job không tồn tại, commit thì job chắc chắn được chạy (kể cả khi worker tắt ngay sau đó).
+- Handler đăng ký bằng `@job("tên")`. Handler đồng bộ nhận `(db, **payload)` và chạy trên threadpool
+  trong unit of work riêng; handler `async` nhận `(**payload)`.
+- `job_runner` chạy trong mỗi worker, tối đa `JOB_CONCURRENCY` job cùng lúc; loại job khai báo
+  `concurrency` có giới hạn riêng. Job được nhận bằng UPDATE có điều kiện nên nhiều worker dùng chung
+  một bảng. Job thêm ở worker này chạy ngay sau commit; job của worker khác và job hẹn giờ được tìm
+  mỗi `JOB_POLL_SECONDS`.
+- Lỗi thì chạy lại sau `JOB_RETRY_BASE_SECONDS * 2^(lần thử - 1)` (có jitter), tối đa `max_attempts`
+  lần; `PermanentJobError` thì dừng luôn. Worker chết giữa chừng thì job chạy lại khi lease hết hạn.
+  Job có thể chạy hơn một lần, nên handler phải idempotent.
+- `idempotency_key`: enqueue cùng key (trong `JOB_RETENTION_HOURS`) chỉ tạo một job.
+"""
+import asyncio
+import inspect
+import json
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import on_commit, run_in_session
+from app.core.metrics import (
+    REGISTRY, job_duration_seconds, job_queue_latency_seconds, jobs_enqueued_total, jobs_finished_total,
+    jobs_running, _format_labels,
+)
+from app.repositories.job_repository import JobRepository
+
+logger = logging.getLogger("app")
+
+
+class PermanentJobError(Exception):
+    """Handler báo lỗi không thể tự hết khi chạy lại (dữ liệu không tồn tại...): job dừng, không retry"""
+
+
+@dataclass
+class JobSpec:
+    name: str
+    fn: Callable
+    max_attempts: int
+    timeout: float
+    # > 0: loại job này có giới hạn riêng (số job chạy cùng lúc trên một worker), không tính vào
+    # JOB_CONCURRENCY; dùng cho job chủ yếu chờ I/O (vd. gửi mail theo lô). 0: dùng chung JOB_CONCURRENCY
+    concurrency: int = 0
+
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.fn)
+
+
+registry: Dict[str, JobSpec] = {}
+
+
+def job(name: str, max_attempts: Optional[int] = None, timeout: Optional[float] = None, concurrency: int = 0):
+    """Đăng ký handler cho job `name`"""
+    def decorator(fn: Callable) -> Callable:
+        if name in registry:
+            raise ValueError(f"Job {name!r} đã được đăng ký")
+        registry[name] = JobSpec(
+            name, fn,
+            max_attempts if max_attempts is not None else settings.JOB_MAX_ATTEMPTS,
+            timeout if timeout is not None else settings.JOB_TIMEOUT_SECONDS,
+            concurrency,
+        )
+        return fn
+    return decorator
+
+
+def enqueue(db: Session, name: str, payload: Optional[dict] = None, idempotency_key: Optional[str] = None,
+            delay: float = 0) -> str:
+    """Thêm job trong transaction hiện tại của `db`; trả về id job (job có sẵn nếu trùng `idempotency_key`)"""
+    spec = registry.get(name)
+    if spec is None:
+        # tên sai là lỗi lập trình: báo ngay thay vì để job nằm mãi trong hàng đợi
+        raise ValueError(f"Unknown job: {name!r}")
+    job_id, created = JobRepository(db).enqueue(
+        name, json.dumps(payload or {}, separators=(",", ":"), default=str),
+        datetime.utcnow() + timedelta(seconds=delay), spec.max_attempts, idempotency_key,
+    )
+    if created:
+        on_commit(db, lambda: _enqueued(name, delay))
+    return job_id
+
+
+def _enqueued(name: str, delay: float) -> None:
+    jobs_enqueued_total.inc((name,))
+    if delay <= 0:
+        job_runner.wake_threadsafe()
+
+
+def retry_delay(attempt: int) -> float:
+    """Backoff lũy thừa có jitter (50-100%) để các job lỗi cùng lúc không cùng chạy lại một lúc"""
+    delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** max(attempt - 1, 0), settings.JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _call_sync(db: Session, fn: Callable, payload: dict):
+    return fn(db, **payload)
+
+
+def _repo_call(db: Session, method: str, *args):
+    return getattr(JobRepository(db), method)(*args)
+
+
+def _repo(method: str, *args):
+    return run_in_threadpool(run_in_session, _repo_call, method, *args)
+
+
+class JobRunner:
+    def __init__(self, concurrency: int, poll_seconds: float, lease_seconds: float):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"[:64]
+        self.depth: Dict[tuple, int] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._running_by_name: Dict[str, int] = {}
+        # ghi kết quả job giữ tối đa ngần này kết nối DB, kể cả khi job có `concurrency` riêng lớn
+        # (vd. cả lô mail gửi xong cùng lúc)
+        self._record_slots = asyncio.Semaphore(max(concurrency, 1))
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        if self.concurrency <= 0:
+            return
+        self._stopping = False
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float) -> None:
+        """Ngừng nhận job, chờ job đang chạy tối đa `timeout` giây; job chưa xong được trả lại hàng đợi"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+        if self._running:
+            await asyncio.wait(list(self._running.values()), timeout=timeout)
+        unfinished = list(self._running)
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if unfinished:
+            try:
+                await _repo("release", self.worker_id, unfinished)
+            except Exception:
+                logger.exception("Jobs: cannot release %d unfinished jobs", len(unfinished))
+        self._loop = None
+
+    def wake_threadsafe(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _budgets(self) -> Dict[str, List[int]]:
+        """Số job còn nhận được theo tên; job không khai báo `concurrency` dùng chung `JOB_CONCURRENCY`"""
+        shared = [self.concurrency - sum(
+            count for name, count in self._running_by_name.items() if not registry[name].concurrency
+        )]
+        return {
+            name: [spec.concurrency - self._running_by_name.get(name, 0)] if spec.concurrency else shared
+            for name, spec in registry.items()
+        }
+
+    async def _run(self) -> None:
+        maintain_every = self.lease_seconds / 4
+        next_maintenance = 0.0
+        while not self._stopping:
+            self._wake.clear()
+            if time.monotonic() >= next_maintenance:
+                next_maintenance = time.monotonic() + maintain_every
+                await self._maintain()
+            budgets = self._budgets()
+            if any(budget[0] > 0 for budget in budgets.values()):
+                try:
+                    rows = await _repo("claim", self.worker_id, budgets, self.lease_seconds)
+                except Exception:
+                    logger.exception("Jobs: cannot claim jobs")
+                    rows = []
+                for row in rows:
+                    self._spawn(row)
+            # chờ job mới (enqueue ở worker này), một job chạy xong, hoặc tới lượt tìm job
+            try:
+                await asyncio.wait_for(self._wake.wait(), min(self.poll_seconds, maintain_every))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _maintain(self) -> None:
+        """Gia hạn lease của job đang chạy, dọn job hỏng/cũ, cập nhật số job trong hàng đợi"""
+        try:
+            await _repo("extend_leases", self.worker_id, list(self._running), self.lease_seconds)
+            await _repo("fail_abandoned")
+            before = datetime.utcnow() - timedelta(hours=settings.JOB_RETENTION_HOURS)
+            await _repo("purge_finished", before)
+            self.depth = await _repo("depth")
+        except Exception:
+            logger.exception("Jobs: maintenance failed")
+
+    def _spawn(self, row) -> None:
+        spec = registry[row.name]
+        self._running_by_name[spec.name] = self._running_by_name.get(spec.name, 0) + 1
+        jobs_running.inc((spec.name,))
+        self._running[row.id] = asyncio.create_task(self._execute(spec, row))
+
+    async def _record(self, method: str, *args) -> None:
+        async with self._record_slots:
+            await _repo(method, *args)
+
+    async def _execute(self, spec: JobSpec, row) -> None:
+        job_queue_latency_seconds.observe(max((datetime.utcnow() - row.run_at).total_seconds(), 0), (spec.name,))
+        started = time.perf_counter()
+        outcome = "succeeded"
+        try:
+            try:
+                payload = json.loads(row.payload or "{}")
+                if spec.is_async:
+                    await asyncio.wait_for(spec.fn(**payload), spec.timeout)
+                else:
+                    # thread của handler đồng bộ không dừng được khi quá timeout, chỉ lần chạy bị tính là lỗi
+                    await asyncio.wait_for(run_in_threadpool(run_in_session, _call_sync, spec.fn, payload),
+                                           spec.timeout)
+            except asyncio.CancelledError:
+                # worker đang tắt: job được trả lại hàng đợi (`stop`)
+                outcome = "cancelled"
+                raise
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"[:2000]
+                if isinstance(e, PermanentJobError) or row.attempts >= row.max_attempts:
+                    outcome = "failed"
+                    logger.exception("Job %s (%s) failed after %d attempts", spec.name, row.id, row.attempts)
+                    await self._record("fail", row.id, self.worker_id, row.attempts, error)
+                else:
+                    outcome = "retried"
+                    delay = retry_delay(row.attempts)
+                    logger.warning("Job %s (%s) attempt %d failed, retrying in %.0fs: %s",
+                                   spec.name, row.id, row.attempts, delay, error)
+                    await self._record("retry", row.id, self.worker_id, row.attempts,
+                                       datetime.utcnow() + timedelta(seconds=delay), error)
+            else:
+                await self._record("succeed", row.id, self.worker_id, row.attempts)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # không ghi được kết quả: job chạy lại khi lease hết hạn
+            logger.exception("Job %s (%s): cannot record result", spec.name, row.id)
+        finally:
+            if outcome != "cancelled":
+                jobs_finished_total.inc((spec.name, outcome))
+                job_duration_seconds.observe(time.perf_counter() - started, (spec.name, outcome))
+            jobs_running.dec((spec.name,))
+            self._running_by_name[spec.name] -= 1
+            self._running.pop(row.id, None)
+            if self._wake is not None:
+                self._wake.set()
+
+
+job_runner = JobRunner(settings.JOB_CONCURRENCY, settings.JOB_POLL_SECONDS, settings.JOB_LEASE_SECONDS)
+
+
+def _collect_depth() -> Iterable[str]:
+    yield "# HELP job_queue_depth Background jobs queued or running (all workers), refreshed every JOB_LEASE_SECONDS / 4."
+    yield "# TYPE job_queue_depth gauge"
+    for (name, status), count in sorted(job_runner.depth.items()):
+        yield f"job_queue_depth{_format_labels(('job', 'status'), (name, status))} {count}"
+
+
+REGISTRY.add_collector(_collect_depth)
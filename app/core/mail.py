@@ -0,0 +1,356 @@
+"""Gửi email: template biên dịch sẵn, hàng đợi trong bộ nhớ, kết nối SMTP giữ mở, gửi theo lô có giới hạn tốc độ.
+
+- Email nghiệp vụ đi qua job `mail.send` (`app/services/mail_service.py`): request chỉ thêm job trong
+  transaction của mình, không chờ SMTP.
+- `mail_templates`: template Mako ở `MAIL_TEMPLATE_DIR/<tên>/` (`subject.txt`, `body.txt`, `body.html` tùy
+  chọn). Mọi template được biên dịch thành module Python lúc khởi động (`compile_all`) và giữ trong bộ
+  nhớ; `MAIL_TEMPLATE_CACHE_DIR` lưu module đã biên dịch ra đĩa để lần khởi động sau không biên dịch lại.
+- `mailer`: `MAIL_SMTP_CONNECTIONS` kết nối SMTP giữ mở giữa các lô (không bắt tay TCP/TLS/AUTH cho mỗi
+  email). Mỗi kết nối gom tối đa `MAIL_BATCH_SIZE` email chờ trong `MAIL_BATCH_WINDOW_MS` rồi gửi liên
+  tiếp; tổng tốc độ giới hạn bởi `MAIL_RATE_PER_SECOND` (token bucket, theo hạn mức nhà cung cấp SMTP).
+- `MAIL_BACKEND=console`: chỉ ghi log. Thử với SMTP thật: `python -m app.tools.smtp_debug`.
+"""
+import asyncio
+import logging
+import os
+import smtplib
+import ssl
+import time
+from collections import deque
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid, parseaddr
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from mako.exceptions import TopLevelLookupException
+from mako.lookup import TemplateLookup
+
+from app.core.config import settings
+from app.core.metrics import mail_batch_size, mail_sent_total, smtp_connections_opened_total
+
+logger = logging.getLogger("app")
+
+
+class UnknownMailTemplate(LookupError):
+    """Không có template email với tên này"""
+
+
+class MailTemplates:
+    """Template email theo tên; phần text không escape, phần HTML escape mọi biểu thức `${...}`"""
+
+    def __init__(self, directory: str, module_directory: Optional[str] = None, reload: bool = False):
+        self.directory = directory
+        common = {"directories": [directory], "strict_undefined": True, "filesystem_checks": reload,
+                  "input_encoding": "utf-8", "collection_size": -1}
+        self._text = TemplateLookup(
+            module_directory=os.path.join(module_directory, "text") if module_directory else None,
+            default_filters=["str"], **common,
+        )
+        self._html = TemplateLookup(
+            module_directory=os.path.join(module_directory, "html") if module_directory else None,
+            default_filters=["str", "h"], **common,
+        )
+        # template không có phần HTML, để không tìm lại trên đĩa mỗi lần render
+        self._text_only: Dict[str, bool] = {}
+
+    def names(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.isfile(os.path.join(self.directory, name, "subject.txt"))
+        )
+
+    def compile_all(self) -> int:
+        """Biên dịch mọi template (gọi lúc khởi động); lỗi cú pháp làm app không khởi động được"""
+        names = self.names()
+        for name in names:
+            self._template(name, "subject.txt")
+            self._template(name, "body.txt")
+            self._template(name, "body.html")
+        return len(names)
+
+    def _template(self, name: str, part: str):
+        if not name or "/" in name or "\\" in name or name.startswith("."):
+            raise UnknownMailTemplate(name)
+        html = part.endswith(".html")
+        if html and self._text_only.get(name):
+            return None
+        try:
+            template = (self._html if html else self._text).get_template(f"/{name}/{part}")
+        except TopLevelLookupException:
+            if not html:
+                raise UnknownMailTemplate(name) from None
+            self._text_only[name] = True
+            return None
+        if html:
+            self._text_only[name] = False
+        return template
+
+    def render(self, name: str, context: dict) -> Tuple[str, str, Optional[str]]:
+        """(tiêu đề, nội dung text, nội dung HTML hoặc None); thiếu biến trong `context` thì báo NameError"""
+        subject = self._template(name, "subject.txt").render(**context)
+        text = self._template(name, "body.txt").render(**context)
+        html_template = self._template(name, "body.html")
+        html = html_template.render(**context) if html_template is not None else None
+        # tiêu đề là một dòng
+        return " ".join(subject.split()), text, html
+
+
+def message_id() -> str:
+    """Message-ID theo domain của `MAIL_FROM` (không tra DNS tên máy như mặc định của `make_msgid`)"""
+    domain = parseaddr(settings.MAIL_FROM)[1].rpartition("@")[2] or "localhost"
+    return make_msgid(domain=domain)
+
+
+def build_message(to: str, subject: str, text: str, html: Optional[str] = None,
+                  msg_id: Optional[str] = None) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.MAIL_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message["Date"] = formatdate(localtime=False)
+    message["Message-ID"] = msg_id or message_id()
+    message.set_content(text)
+    if html is not None:
+        message.add_alternative(html, subtype="html")
+    return message
+
+
+class RateLimiter:
+    """Token bucket: trung bình `rate` email/giây, dồn tối đa `burst`; `rate <= 0` là không giới hạn"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self, n: int) -> int:
+        """Chờ tới khi có ít nhất một lượt, lấy tối đa `n` lượt; trả về số lượt lấy được"""
+        if self.rate <= 0:
+            return n
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                taken = min(n, int(self._tokens))
+                self._tokens -= taken
+                return taken
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# lỗi của riêng một email: kết nối vẫn dùng tiếp được (smtplib đã gửi RSET)
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class SmtpTransport:
+    """Một kết nối SMTP giữ mở giữa các lô; chỉ dùng từ một thread tại một thời điểm"""
+
+    def __init__(self, host: str, port: int, user: str = "", password: str = "", starttls: bool = True,
+                 use_ssl: bool = False, timeout: float = 10.0, idle_seconds: float = 60.0):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.idle_seconds = idle_seconds
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> None:
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout,
+                                    context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.starttls and not self.use_ssl:
+                smtp.starttls(context=ssl.create_default_context())
+                smtp.ehlo()
+            if self.user:
+                smtp.login(self.user, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        smtp_connections_opened_total.inc()
+        self._smtp = smtp
+
+    def _ensure_connected(self) -> None:
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_seconds:
+            # server thường cắt kết nối nhàn rỗi mà không báo: kiểm tra trước khi gửi
+            try:
+                alive = self._smtp.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                alive = False
+            if not alive:
+                self.close()
+        if self._smtp is None:
+            self._connect()
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+    def _send(self, message: EmailMessage) -> Optional[Exception]:
+        for attempt in (1, 2):
+            try:
+                self._ensure_connected()
+                refused = self._smtp.send_message(message)
+            except MESSAGE_ERRORS as e:
+                return e
+            except smtplib.SMTPServerDisconnected as e:
+                # kết nối giữ mở đã bị server cắt: kết nối lại và gửi lại một lần. Nếu server cắt sau khi
+                # đã nhận email thì email có thể tới hai lần (cùng Message-ID)
+                self._drop()
+                if attempt == 2:
+                    return e
+            except (smtplib.SMTPException, OSError) as e:
+                self._drop()
+                return e
+            else:
+                # send_message chỉ báo lỗi khi mọi người nhận bị từ chối
+                return smtplib.SMTPRecipientsRefused(refused) if refused else None
+        return None
+
+    def _drop(self) -> None:
+        if self._smtp is not None:
+            self._smtp.close()
+            self._smtp = None
+
+    def send_batch(self, messages: Sequence[EmailMessage]) -> List[Optional[Exception]]:
+        """Gửi lần lượt trên cùng kết nối; trả về lỗi của từng email (None là đã gửi)"""
+        results: List[Optional[Exception]] = []
+        for message in messages:
+            error = self._send(message)
+            results.append(error)
+            if error is not None and self._smtp is None:
+                # không kết nối được: các email còn lại của lô chờ lần thử sau của job
+                results.extend([error] * (len(messages) - len(results)))
+                break
+        self._last_used = time.monotonic()
+        return results
+
+
+class ConsoleTransport:
+    """Chỉ ghi log (MAIL_BACKEND=console)"""
+
+    def send_batch(self, messages: Sequence[EmailMessage]) -> List[Optional[Exception]]:
+        for message in messages:
+            logger.info("Mail to %s: %s", message["To"], message["Subject"])
+        return [None] * len(messages)
+
+    def close(self) -> None:
+        pass
+
+
+class Mailer:
+    """Hàng đợi email của worker; mỗi kết nối là một task lấy lô từ hàng đợi và gửi trên threadpool"""
+
+    def __init__(self, transport_factory: Callable[[], object], connections: int, batch_size: int,
+                 batch_window: float, rate: float):
+        self.transport_factory = transport_factory
+        self.connections = connections
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.limiter = RateLimiter(rate, batch_size)
+        self._queue: Deque[Tuple[EmailMessage, asyncio.Future]] = deque()
+        self._ready: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    def start(self) -> None:
+        self._stopping = False
+        self._ready = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._sender(self.transport_factory()))
+                       for _ in range(max(self.connections, 1))]
+
+    async def stop(self) -> None:
+        """Gửi nốt email trong hàng đợi rồi đóng kết nối"""
+        if not self._tasks:
+            return
+        self._stopping = True
+        self._ready.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def send(self, message: EmailMessage) -> None:
+        """Chờ tới khi email được gửi; lỗi SMTP của email này được raise lại"""
+        if not self._tasks or self._stopping:
+            raise RuntimeError("Mailer is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((message, future))
+        self._ready.set()
+        await future
+
+    def _take(self) -> List[Tuple[EmailMessage, asyncio.Future]]:
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            message, future = self._queue.popleft()
+            # người gửi đã thôi chờ (job quá timeout): bỏ qua
+            if not future.done():
+                batch.append((message, future))
+        return batch
+
+    async def _sender(self, transport) -> None:
+        try:
+            while True:
+                if not self._queue:
+                    if self._stopping:
+                        return
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                if len(self._queue) < self.batch_size and not self._stopping:
+                    # chờ thêm email để gom lô
+                    await asyncio.sleep(self.batch_window)
+                batch = self._take()
+                if not batch:
+                    continue
+                allowed = await self.limiter.acquire(len(batch))
+                for item in reversed(batch[allowed:]):
+                    self._queue.appendleft(item)
+                batch = batch[:allowed]
+                mail_batch_size.observe(len(batch))
+                try:
+                    results = await run_in_threadpool(transport.send_batch, [message for message, _ in batch])
+                except Exception as e:
+                    results = [e] * len(batch)
+                for (message, future), error in zip(batch, results):
+                    mail_sent_total.inc(("sent" if error is None else "failed",))
+                    if future.done():
+                        continue
+                    if error is None:
+                        future.set_result(None)
+                    else:
+                        future.set_exception(error)
+        finally:
+            await run_in_threadpool(transport.close)
+
+
+def _transport():
+    if settings.MAIL_BACKEND == "smtp":
+        return SmtpTransport(
+            settings.SMTP_HOST, settings.SMTP_PORT, settings.SMTP_USER, settings.SMTP_PASSWORD,
+            starttls=settings.SMTP_STARTTLS, use_ssl=settings.SMTP_SSL, timeout=settings.SMTP_TIMEOUT_SECONDS,
+            idle_seconds=settings.MAIL_SMTP_IDLE_SECONDS,
+        )
+    return ConsoleTransport()
+
+
+mail_templates = MailTemplates(
+    settings.MAIL_TEMPLATE_DIR, settings.MAIL_TEMPLATE_CACHE_DIR or None, settings.MAIL_TEMPLATE_RELOAD
+)
+mailer = Mailer(
+    _transport, settings.MAIL_SMTP_CONNECTIONS, settings.MAIL_BATCH_SIZE,
+    settings.MAIL_BATCH_WINDOW_MS / 1000, settings.MAIL_RATE_PER_SECOND,
+)
@@ -0,0 +1,360 @@
+"""Metrics dạng Prometheus không dùng lock trên đường ghi.
+
+Mỗi metric giữ một "shard" (dict) riêng cho từng thread: thread chỉ ghi vào shard
+của mình nên không tranh chấp lock, còn lúc scrape thì cộng dồn các shard. Lock
+chỉ được dùng một lần khi thread ghi lần đầu (đăng ký shard mới).
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LabelValues = Tuple[str, ...]
+
+# Content-Type của Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Mốc histogram thời gian xử lý request (giây)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Mốc histogram thời gian chờ và thời gian chạy của job nền (giây)
+JOB_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+# Mốc histogram số email mỗi lô gửi SMTP
+MAIL_BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+# Mốc histogram số câu SQL mỗi request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._register_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            with self._register_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _snapshots(self) -> List[dict]:
+        # dict(shard) là thao tác nguyên tử dưới GIL, an toàn khi thread khác đang ghi
+        with self._register_lock:
+            shards = list(self._shards)
+        return [dict(s) for s in shards]
+
+    def collect(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        total: Dict[LabelValues, float] = {}
+        for snap in self._snapshots():
+            for labels, value in snap.items():
+                total[labels] = total.get(labels, 0) + value
+        return total
+
+    def collect(self) -> Iterable[str]:
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Gauge tăng/giảm; tổng các delta của mọi thread là giá trị hiện tại"""
+
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        shard = self._shard()
+        row = shard.get(labels)
+        if row is None:
+            # [bucket_0..bucket_n, +Inf, sum]
+            row = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def values(self) -> Dict[LabelValues, List[float]]:
+        total: Dict[LabelValues, List[float]] = {}
+        for snap in self._snapshots():
+            for labels, row in snap.items():
+                row = list(row)
+                acc = total.get(labels)
+                if acc is None:
+                    total[labels] = row
+                else:
+                    for i, v in enumerate(row):
+                        acc[i] += v
+        return total
+
+    def collect(self) -> Iterable[str]:
+        for labels, row in sorted(self.values().items()):
+            yield from render_histogram(self.name, self.labelnames, labels, self.buckets, row[:-1], row[-1])
+
+
+def render_histogram(name: str, labelnames: Sequence[str], labels: Sequence[str], buckets: Sequence[float],
+                     counts: Sequence[float], total: float) -> Iterable[str]:
+    """Render histogram từ số đếm từng bucket (không cộng dồn); phần tử cuối của `counts` là +Inf"""
+    cumulative = 0
+    bounds = [_format_value(float(b)) for b in buckets] + ["+Inf"]
+    for bound, count in zip(bounds, counts):
+        cumulative += count
+        le = f'le="{bound}"'
+        yield f"{name}_bucket{_format_labels(labelnames, labels, le)} {_format_value(cumulative)}"
+    yield f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(total)}"
+    yield f"{name}_count{_format_labels(labelnames, labels)} {_format_value(cumulative)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Collector tự render các dòng (đã gồm HELP/TYPE), dùng cho số liệu đọc lúc scrape"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests_total = REGISTRY.counter(
+    "http_requests_total", "Total HTTP requests.", ("method", "route", "status")
+)
+http_request_duration_seconds = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+http_requests_in_flight = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed."
+)
+http_request_db_queries = REGISTRY.histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request.", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+db_queries_total = REGISTRY.counter(
+    "db_queries_total", "Total SQL statements executed.", ("route",)
+)
+cache_requests_total = REGISTRY.counter(
+    "cache_requests_total", "Cache lookups by cache name and result (hit/miss).", ("cache", "result")
+)
+
+realtime_connections = REGISTRY.gauge(
+    "realtime_connections", "Open realtime (WebSocket/SSE) connections on this worker."
+)
+realtime_slow_consumers_total = REGISTRY.counter(
+    "realtime_slow_consumers_total", "Realtime connections closed because their send queue was full."
+)
+notification_recipients_total = REGISTRY.counter(
+    "notification_recipients_total", "UserNotification rows created by notification fan-out.", ("audience",)
+)
+
+jobs_enqueued_total = REGISTRY.counter(
+    "jobs_enqueued_total", "Background jobs enqueued (duplicates by idempotency key excluded).", ("job",)
+)
+jobs_finished_total = REGISTRY.counter(
+    "jobs_finished_total", "Background job attempts by outcome (succeeded/retried/failed).", ("job", "status")
+)
+jobs_running = REGISTRY.gauge(
+    "jobs_running", "Background jobs currently running on this worker.", ("job",)
+)
+job_queue_latency_seconds = REGISTRY.histogram(
+    "job_queue_latency_seconds", "Time from when a job was due to when a worker started it.", ("job",), JOB_BUCKETS
+)
+job_duration_seconds = REGISTRY.histogram(
+    "job_duration_seconds", "Background job run time.", ("job", "status"), JOB_BUCKETS
+)
+
+mail_sent_total = REGISTRY.counter(
+    "mail_sent_total", "Emails handed to the mail transport, by result.", ("status",)
+)
+mail_batch_size = REGISTRY.histogram(
+    "mail_batch_size", "Emails sent per batch on one SMTP connection.", (), MAIL_BATCH_BUCKETS
+)
+smtp_connections_opened_total = REGISTRY.counter(
+    "smtp_connections_opened_total", "SMTP connections opened (handshake, TLS and login)."
+)
+
+payment_webhooks_total = REGISTRY.counter(
+    "payment_webhooks_total", "Payment provider webhooks by result (applied/duplicate/ignored/...).",
+    ("provider", "result"),
+)
+
+idempotency_requests_total = REGISTRY.counter(
+    "idempotency_requests_total", "Requests with an Idempotency-Key by result (executed/replayed/mismatch/...).",
+    ("result",),
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    cache_requests_total.inc((cache, "hit" if hit else "miss"))
+
+
+# Bộ đếm số câu SQL của request hiện tại (list 1 phần tử để thread con cập nhật được)
+_request_queries: ContextVar[Optional[list]] = ContextVar("request_queries", default=None)
+
+
+def start_query_count() -> Tuple[list, object]:
+    holder = [0]
+    return holder, _request_queries.set(holder)
+
+
+def stop_query_count(token) -> None:
+    _request_queries.reset(token)
+
+
+def current_query_count() -> Optional[int]:
+    holder = _request_queries.get()
+    return holder[0] if holder is not None else None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    holder = _request_queries.get()
+    if holder is not None:
+        holder[0] += 1
+
+
+def _collect_pools() -> Iterable[str]:
+    from app.core.database import engine, replica_engines
+    from app.core.pool_metrics import InstrumentedQueuePool, WAIT_BUCKETS_MS
+
+    pools = [e.pool for e in [engine, *replica_engines] if isinstance(e.pool, InstrumentedQueuePool)]
+    gauges = (
+        ("db_pool_size", "Configured pool size.", "size"),
+        ("db_pool_checked_out", "Connections currently checked out.", "checked_out"),
+        ("db_pool_checked_in", "Idle connections in the pool.", "checked_in"),
+        ("db_pool_overflow", "Overflow connections currently open.", "overflow"),
+        ("db_pool_timeouts_total", "Checkout timeouts.", "timeouts"),
+        ("db_pool_saturated_checkouts_total", "Checkouts that left the pool fully used.", "saturated_checkouts"),
+        ("db_pool_connection_age_max_seconds", "Age of the oldest open connection.", None),
+    )
+    snapshots = [p.snapshot() for p in pools]
+    for name, doc, key in gauges:
+        kind = "counter" if name.endswith("_total") else "gauge"
+        yield f"# HELP {name} {doc}"
+        yield f"# TYPE {name} {kind}"
+        for snap in snapshots:
+            value = snap["connection_age"]["max_s"] if key is None else snap[key]
+            yield f"{name}{_format_labels(('pool',), (snap['name'],))} {_format_value(value)}"
+    yield "# HELP db_pool_checkout_wait_milliseconds Time spent waiting for a pooled connection."
+    yield "# TYPE db_pool_checkout_wait_milliseconds histogram"
+    for pool, snap in zip(pools, snapshots):
+        yield from render_histogram(
+            "db_pool_checkout_wait_milliseconds", ("pool",), (snap["name"],),
+            WAIT_BUCKETS_MS, pool.stats.wait_buckets, pool.stats.wait_sum_ms,
+        )
+
+
+REGISTRY.add_collector(_collect_pools)
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware thuần (không qua BaseHTTPMiddleware) để chi phí đo đạc thấp nhất.
+
+    Nhãn `route` là template của route (ví dụ `/api/v1/products/{product_id}`), không phải path thực.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        holder, token = start_query_count()
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            stop_query_count(token)
+            route = _route_template(scope)
+            method = scope["method"]
+            labels = (method, route, str(status_holder[0]))
+            http_requests_total.inc(labels)
+            http_request_duration_seconds.observe(elapsed, labels)
+            http_request_db_queries.observe(holder[0], (method, route))
+            if holder[0]:
+                db_queries_total.inc((route,), holder[0])
+
@@ -1,14 +1,63 @@
 import uuid
 import time
 from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.auth_cache import user_cache
+from app.core.permissions import permission_registry
 from app.core.security import decode_access_token
 from app.core.database import SessionLocal
 from app.models.user import User
 from types import SimpleNamespace
+from typing import Optional
 import logging
 
-logger = logging.getLogger("app")                                                                                           
+logger = logging.getLogger("app")
+
+
+def _load_user(user_id: str):
+    """Đọc user kèm roles thành object tách rời session (để cache dùng chung giữa các request)"""
+    db = SessionLocal()
+    db.info["sticky_key"] = user_id
+    try:
+        # User.id is a UUID string (see AuditMixin). Ensure we compare as str.
+        user = db.query(User).filter(User.id == user_id, User.deleted_at.is_(None)).first()
+        if not user:
+            return None
+        # load roles while session is open and build a lightweight detached user
+        roles_loaded = [SimpleNamespace(name=r.name) for r in getattr(user, "roles", [])]
+        return SimpleNamespace(
+            id=user.id,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            phone_number=user.phone_number,
+            roles=roles_loaded,
+            role_mask=permission_registry.role_mask(r.name for r in roles_loaded),
+            version=user.version or 1,
+        )
+    finally:
+        db.close()
+
+
+async def authenticate_token(token: str, payload: Optional[dict] = None):
+    """User (đã cache) ứng với access token, None nếu token không hợp lệ hoặc đã bị thu hồi"""
+    if payload is None:
+        payload = decode_access_token(token)
+    if not payload or not payload.get("sub"):
+        return None
+    user_id = str(payload["sub"])
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await run_in_threadpool(_load_user, user_id)
+        if user is not None:
+            user_cache.set(user_id, user)
+    # token phát hành trước lần thu hồi gần nhất (version tăng) không còn hiệu lực;
+    # token cũ không có "ver" tương ứng version 1
+    if user is not None and payload.get("ver", 1) == user.version:
+        return user
+    return None
+
 
 class AuthMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
@@ -21,26 +70,7 @@ class AuthMiddleware(BaseHTTPMiddleware):
             # attach raw token payload (contains user info) to request.state
             request.state.token_payload = payload
             if payload:
-                user_id = payload.get("sub")
-                if user_id:
-                    db = SessionLocal()
-                    try:
-                        # User.id is a UUID string (see AuditMixin). Ensure we compare as str.
-                        user = db.query(User).filter(User.id == str(user_id)).first()
-                        if user:
-                            # load roles while session is open and build a lightweight detached user
-                            roles_loaded = [SimpleNamespace(name=r.name) for r in getattr(user, "roles", [])]
-                            detached_user = SimpleNamespace(
-                                id=user.id,
-                                email=user.email,
-                                first_name=user.first_name,
-                                last_name=user.last_name,
-                                phone_number=user.phone_number,
-                                roles=roles_loaded,
-                            )
-                            request.state.user = detached_user
-                    finally:
-                        db.close()
+                request.state.user = await authenticate_token(token, payload)
 
         return await call_next(request)
     
@@ -0,0 +1,98 @@
+"""Đọc một field file từ body multipart/form-data theo từng chunk, ngay khi body đang được nhận.
+
+`request.form()` của Starlette ghi cả file ra file tạm rồi handler mới được chạy, và không giới hạn
+kích thước. Ở đây body được đưa qua parser của python-multipart từng chunk, nên nơi gọi ghi thẳng
+dữ liệu tới đích và dừng ngay khi vượt giới hạn.
+"""
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import Request
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+
+class MultipartError(Exception):
+    pass
+
+
+class MultipartFile:
+    """`async for chunk in MultipartFile(request, "file")`; `filename`/`content_type` có sau chunk đầu"""
+
+    def __init__(self, request: Request, field: str):
+        self.request = request
+        self.field = field
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._active = False
+        self._found = False
+        self._done = False
+        self._chunks: List[bytes] = []
+
+    # ---------- callback của parser ----------
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        if self._found:
+            return
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        if name == self.field and filename is not None:
+            self._active = self._found = True
+            self.filename = filename.decode("utf-8", "replace")
+            self.content_type = self._headers.get(b"content-type", b"").decode("latin-1") or None
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._active:
+            self._chunks.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._active:
+            self._active = False
+            self._done = True
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        content_type, params = parse_options_header(self.request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise MultipartError("Cần gửi multipart/form-data.")
+        parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+        async for body in self.request.stream():
+            try:
+                parser.write(body)
+            except MultipartParseError as e:
+                raise MultipartError(f"Body multipart không hợp lệ: {e}")
+            for chunk in self._chunks:
+                yield chunk
+            self._chunks = []
+            if self._done:
+                # phần body còn lại (các field sau) không cần đọc
+                return
+        parser.finalize()
+        if not self._found:
+            raise MultipartError(f"Thiếu field file `{self.field}`.")
+        if not self._done:
+            raise MultipartError("Body multipart bị cắt giữa chừng.")
@@ -0,0 +1,89 @@
+"""Băm và kiểm tra mật khẩu Argon2 trên process pool riêng.
+
+- Argon2 tốn hàng chục ms CPU mỗi lần; chạy trong threadpool của request thì một đợt đăng nhập
+  dồn dập chiếm hết thread, các endpoint sync khác phải xếp hàng. Băm trên `ProcessPool`
+  (`app/core/process_pool.py`); hàng đợi đầy thì báo `PasswordHasherBusy` (503).
+- Tham số Argon2 lấy từ settings. Hash tạo bằng tham số cũ vẫn kiểm tra được và được băm lại
+  khi user đăng nhập thành công (`verify_and_update`).
+- `PASSWORD_HASH_WORKERS=0` tắt process pool, băm trong threadpool (môi trường dev, script).
+"""
+import secrets
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.process_pool import ProcessPool, ProcessPoolBusy
+
+
+class PasswordHasherBusy(ProcessPoolBusy):
+    """Hàng đợi băm mật khẩu đã đầy"""
+
+
+def build_context() -> CryptContext:
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__time_cost=settings.ARGON2_TIME_COST,
+        argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.ARGON2_PARALLELISM,
+    )
+
+
+pwd_context = build_context()
+
+
+def hash_password(password: str) -> str:
+    """Băm mật khẩu (đồng bộ, chạy ngay trên thread/process hiện tại)"""
+    return pwd_context.hash(password)
+
+
+def verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Kiểm tra mật khẩu; trả về (đúng/sai, hash mới nếu tham số Argon2 đã đổi)"""
+    try:
+        return pwd_context.verify_and_update(password, hashed)
+    except (ValueError, TypeError):
+        # hash rỗng hoặc sai định dạng
+        return False, None
+
+
+_dummy_hash: Optional[str] = None
+
+
+def dummy_hash() -> str:
+    """Hash của một mật khẩu ngẫu nhiên (tạo một lần), để băm giả khi email không tồn tại"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(secrets.token_urlsafe(16))
+    return _dummy_hash
+
+
+class PasswordHasher(ProcessPool):
+    busy_error = PasswordHasherBusy
+
+    def __init__(self, workers: int, max_pending: int, nice: int = 0):
+        super().__init__("Password hashing", workers, max_pending, nice)
+
+    def start(self) -> None:
+        dummy_hash()
+        super().start()
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await self.run(verify_and_update, password, hashed)
+
+    async def verify_dummy(self, password: str) -> None:
+        """Tốn đúng một lần kiểm tra Argon2 như user có thật, kết quả luôn bị bỏ qua"""
+        global _dummy_hash
+        if _dummy_hash is None:
+            _dummy_hash = await self.hash(secrets.token_urlsafe(16))
+        await self.verify_and_update(password, _dummy_hash)
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_MAX_PENDING,
+    settings.PASSWORD_HASH_NICE,
+)
@@ -0,0 +1,202 @@
+"""Thanh toán: máy trạng thái đơn hàng/thanh toán và cổng thanh toán (provider).
+
+- `ORDER_STATES`, `PAYMENT_STATES`: các bước chuyển trạng thái hợp lệ. Mọi lần chuyển là một UPDATE có
+  điều kiện `WHERE status IN (trạng thái nguồn)`, nên hai request/webhook cùng lúc chỉ một bên áp dụng.
+- Provider tạo URL thanh toán (`checkout_url`) và đọc, kiểm tra chữ ký webhook (`parse_webhook`) thành
+  `WebhookEvent`; không truy cập DB. `acknowledge` trả phản hồi theo định dạng provider yêu cầu.
+- `fake`: cổng giả lập để test (webhook JSON ký HMAC-SHA256), bật khi có `PAYMENT_FAKE_SECRET`.
+- `vnpay`: VNPay 2.1.0 (URL ký HMAC-SHA512, IPN là GET), bật khi có `VNPAY_TMN_CODE`.
+"""
+import hashlib
+import hmac
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+from urllib.parse import urlencode
+
+from app.core.config import settings
+
+
+class StateMachine:
+    def __init__(self, name: str, transitions: Dict[str, Iterable[str]]):
+        self.name = name
+        self.transitions = {source: frozenset(targets) for source, targets in transitions.items()}
+        self._sources: Dict[str, Tuple[str, ...]] = {}
+        for source, targets in self.transitions.items():
+            for target in targets:
+                self._sources[target] = self._sources.get(target, ()) + (source,)
+        self.states = frozenset(self.transitions) | frozenset(self._sources)
+
+    def can(self, current: str, target: str) -> bool:
+        return target in self.transitions.get(current, ())
+
+    def sources(self, target: str) -> Tuple[str, ...]:
+        """Các trạng thái chuyển được sang `target` (điều kiện WHERE của UPDATE)"""
+        return self._sources.get(target, ())
+
+
+ORDER_STATES = StateMachine("order", {
+    # shipping từ pending: đơn COD giao trước, thu tiền khi giao
+    "pending": {"paid", "shipping", "cancelled"},
+    "paid": {"shipping", "refunded"},
+    "shipping": {"completed", "refunded"},
+    "completed": {"refunded"},
+})
+
+PAYMENT_STATES = StateMachine("payment", {
+    "pending": {"paid", "failed", "cancelled"},
+    # failed -> pending: khách thanh toán lại; failed -> paid: webhook thành công tới sau webhook lỗi
+    "failed": {"pending", "paid", "cancelled"},
+    "paid": {"refunded"},
+})
+
+
+class InvalidWebhook(Exception):
+    """Webhook sai chữ ký hoặc thiếu dữ liệu"""
+
+
+@dataclass
+class WebhookEvent:
+    provider: str
+    # mã giao dịch phía provider: webhook trùng (provider gửi lại) có cùng mã và trạng thái
+    transaction_id: str
+    # `ref` đã gửi cho provider khi tạo URL thanh toán (`payment_ref`)
+    ref: str
+    status: str
+    amount: float
+    raw: dict = field(default_factory=dict)
+
+    @property
+    def payment_id(self) -> str:
+        return self.ref.rsplit("-", 1)[0]
+
+
+def payment_ref(payment_id: str, attempt: int) -> str:
+    """Mã gửi cho provider: mỗi lần thanh toán lại một mã mới (VNPay không nhận mã trùng)"""
+    return f"{payment_id}-{attempt}"
+
+
+def _sign(secret: str, data: bytes, digest) -> str:
+    return hmac.new(secret.encode(), data, digest).hexdigest()
+
+
+class FakeGateway:
+    """Cổng giả lập: webhook là JSON `{ref, transaction_id, status, amount}`, header `X-Fake-Signature`"""
+
+    name = "fake"
+
+    def __init__(self, secret: str):
+        self.secret = secret
+
+    def checkout_url(self, ref: str, amount: float, description: str, client_ip: str) -> str:
+        return f"fake://checkout?{urlencode({'ref': ref, 'amount': f'{amount:.0f}'})}"
+
+    def build_webhook(self, ref: str, amount: float, status: str = "paid",
+                      transaction_id: Optional[str] = None) -> Tuple[bytes, Dict[str, str]]:
+        """Webhook đã ký như provider gửi (dùng trong test)"""
+        body = json.dumps({"ref": ref, "transaction_id": transaction_id or f"fake-{ref}", "status": status,
+                           "amount": amount}).encode()
+        return body, {"X-Fake-Signature": _sign(self.secret, body, hashlib.sha256)}
+
+    def parse_webhook(self, params: Mapping[str, str], body: bytes, headers: Mapping[str, str]) -> WebhookEvent:
+        signature = headers.get("x-fake-signature", "")
+        if not hmac.compare_digest(signature, _sign(self.secret, body, hashlib.sha256)):
+            raise InvalidWebhook("invalid signature")
+        try:
+            data = json.loads(body)
+            return WebhookEvent(self.name, str(data["transaction_id"]), str(data["ref"]), str(data["status"]),
+                                float(data["amount"]), data)
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidWebhook(f"invalid payload: {e}")
+
+    def acknowledge(self, result: str) -> Tuple[int, dict]:
+        return (400 if result == "invalid" else 200), {"result": result}
+
+
+# giờ Việt Nam (VNPay yêu cầu vnp_CreateDate/vnp_ExpireDate theo GMT+7)
+VN_TZ = timezone(timedelta(hours=7))
+
+VNPAY_CODES = {
+    "applied": ("00", "Confirm Success"),
+    "ignored": ("00", "Confirm Success"),
+    "duplicate": ("02", "Order already confirmed"),
+    "not_found": ("01", "Order not found"),
+    "amount_mismatch": ("04", "Invalid amount"),
+    "invalid": ("97", "Invalid signature"),
+}
+
+
+class VnpayGateway:
+    name = "vnpay"
+
+    def __init__(self, tmn_code: str, hash_secret: str, payment_url: str, return_url: str, expire_minutes: int):
+        self.tmn_code = tmn_code
+        self.hash_secret = hash_secret
+        self.payment_url = payment_url
+        self.return_url = return_url
+        self.expire_minutes = expire_minutes
+
+    def _hash(self, params: Mapping[str, str]) -> str:
+        query = urlencode(sorted(params.items()))
+        return _sign(self.hash_secret, query.encode(), hashlib.sha512)
+
+    def checkout_url(self, ref: str, amount: float, description: str, client_ip: str) -> str:
+        now = datetime.now(VN_TZ)
+        params = {
+            "vnp_Version": "2.1.0",
+            "vnp_Command": "pay",
+            "vnp_TmnCode": self.tmn_code,
+            # đơn vị của VNPay: đồng x 100
+            "vnp_Amount": str(int(round(amount * 100))),
+            "vnp_CurrCode": "VND",
+            "vnp_TxnRef": ref,
+            "vnp_OrderInfo": description,
+            "vnp_OrderType": "other",
+            "vnp_Locale": "vn",
+            "vnp_ReturnUrl": self.return_url,
+            "vnp_IpAddr": client_ip,
+            "vnp_CreateDate": now.strftime("%Y%m%d%H%M%S"),
+            "vnp_ExpireDate": (now + timedelta(minutes=self.expire_minutes)).strftime("%Y%m%d%H%M%S"),
+        }
+        return f"{self.payment_url}?{urlencode(sorted(params.items()))}&vnp_SecureHash={self._hash(params)}"
+
+    def parse_webhook(self, params: Mapping[str, str], body: bytes, headers: Mapping[str, str]) -> WebhookEvent:
+        data = {key: value for key, value in params.items() if key.startswith("vnp_")}
+        signature = data.pop("vnp_SecureHash", "")
+        data.pop("vnp_SecureHashType", None)
+        if not hmac.compare_digest(signature.lower(), self._hash(data)):
+            raise InvalidWebhook("invalid signature")
+        try:
+            ref = data["vnp_TxnRef"]
+            amount = int(data["vnp_Amount"]) / 100
+        except (KeyError, ValueError) as e:
+            raise InvalidWebhook(f"invalid payload: {e}")
+        paid = data.get("vnp_ResponseCode") == "00" and data.get("vnp_TransactionStatus") == "00"
+        # giao dịch lỗi có thể có vnp_TransactionNo = 0: dùng mã của lần thanh toán
+        transaction_id = data.get("vnp_TransactionNo") or "0"
+        if transaction_id == "0":
+            transaction_id = f"ref:{ref}"
+        return WebhookEvent(self.name, transaction_id, ref, "paid" if paid else "failed", amount, data)
+
+    def acknowledge(self, result: str) -> Tuple[int, dict]:
+        code, message = VNPAY_CODES.get(result, ("99", "Unknown error"))
+        return 200, {"RspCode": code, "Message": message}
+
+
+def build_providers() -> dict:
+    providers = {}
+    if settings.PAYMENT_FAKE_SECRET:
+        providers["fake"] = FakeGateway(settings.PAYMENT_FAKE_SECRET)
+    if settings.VNPAY_TMN_CODE:
+        providers["vnpay"] = VnpayGateway(
+            settings.VNPAY_TMN_CODE, settings.VNPAY_HASH_SECRET, settings.VNPAY_PAYMENT_URL,
+            settings.VNPAY_RETURN_URL, settings.VNPAY_EXPIRE_MINUTES,
+        )
+    return providers
+
+
+providers = build_providers()
+
+# thu tiền khi giao hàng: không qua provider
+OFFLINE_METHODS = ("cod",)
@@ -0,0 +1,168 @@
+"""Quyền truy cập biên dịch thành bitmask.
+
+- Mỗi quyền (`PERMISSIONS`) là một bit cố định trong code. Endpoint khai báo quyền cần có,
+  và mask của quyền được tính một lần lúc import.
+- Ma trận role -> quyền: mỗi role có một `bit` cố định và danh sách quyền (`"*"` = mọi quyền).
+  Principal (user đã đăng nhập) mang `role_mask` = OR bit các role của nó. Mask này được cache
+  cùng user và nhúng vào access token (claim `rm`).
+- Kiểm tra quyền: `permissions_for(role_mask) & required == required`. Quyền của mỗi `role_mask`
+  chỉ tính một lần, sau đó là một lần tra dict.
+- Ma trận mặc định nằm trong code. Khi đặt `PERMISSION_MATRIX_PATH` (file JSON cùng định dạng),
+  file được đọc lại khi mtime đổi (kiểm tra tối đa một lần mỗi `PERMISSION_MATRIX_RELOAD_SECONDS`),
+  nên đổi quyền không cần khởi động lại worker. Không đổi `bit` của role đang dùng:
+  mask trong cache user và token cũ sẽ trỏ sai role.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger("app")
+
+PERMISSIONS = (
+    "brands:read",
+    "brands:write",
+    "categories:read",
+    "categories:write",
+    "types:read",
+    "types:write",
+    "type_values:read",
+    "type_values:write",
+    "vouchers:read",
+    "vouchers:write",
+    "products:write",
+    "users:read",
+    "users:write",
+    "exports:read",
+    "metrics:read",
+    "reviews:write",
+    "chat:staff",
+    "notifications:write",
+    "orders:write",
+    "analytics:read",
+)
+PERMISSION_BITS: Dict[str, int] = {name: 1 << i for i, name in enumerate(PERMISSIONS)}
+ALL_PERMISSIONS = (1 << len(PERMISSIONS)) - 1
+
+DEFAULT_MATRIX = {
+    "roles": {
+        "ADMIN": {"bit": 0, "permissions": ["*"]},
+        "CLIENT": {
+            "bit": 1,
+            "permissions": ["brands:read", "categories:read", "types:read", "type_values:read", "vouchers:read"],
+        },
+    }
+}
+
+
+def permission_mask(names: Iterable[str]) -> int:
+    """Mask của các quyền; tên quyền không tồn tại là lỗi lập trình nên báo ngay"""
+    mask = 0
+    for name in names:
+        if name not in PERMISSION_BITS:
+            raise ValueError(f"Unknown permission: {name!r}")
+        mask |= PERMISSION_BITS[name]
+    return mask
+
+
+def compile_matrix(matrix: dict) -> Tuple[Dict[str, int], Dict[int, int]]:
+    """Ma trận JSON -> (tên role viết hoa -> bit role, bit role -> mask quyền)"""
+    role_bits: Dict[str, int] = {}
+    role_permissions: Dict[int, int] = {}
+    for name, spec in matrix.get("roles", {}).items():
+        bit = 1 << int(spec["bit"])
+        if bit in role_permissions:
+            raise ValueError(f"Duplicate role bit {spec['bit']} ({name})")
+        mask = 0
+        for permission in spec.get("permissions", []):
+            if permission == "*":
+                mask = ALL_PERMISSIONS
+            elif permission in PERMISSION_BITS:
+                mask |= PERMISSION_BITS[permission]
+            else:
+                logger.warning("Permission matrix: unknown permission %r for role %s, ignored", permission, name)
+        role_bits[name.upper()] = bit
+        role_permissions[bit] = mask
+    return role_bits, role_permissions
+
+
+class PermissionRegistry:
+    def __init__(self, path: Optional[str], reload_seconds: float):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._install(DEFAULT_MATRIX)
+        if path:
+            self.reload()
+
+    def _install(self, matrix: dict) -> None:
+        role_bits, role_permissions = compile_matrix(matrix)
+        # thay cả bộ trong một lần gán để thread khác không thấy trạng thái nửa cũ nửa mới
+        self._state = (role_bits, role_permissions, {}, {})
+
+    def reload(self) -> bool:
+        """Đọc lại file ma trận nếu mtime đổi; file lỗi thì giữ ma trận đang dùng"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return False
+            with open(self.path, encoding="utf-8") as f:
+                matrix = json.load(f)
+            old_bits = self._state[0]
+            self._install(matrix)
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.exception("Cannot load permission matrix %s, keeping current matrix", self.path)
+            return False
+        self._mtime = mtime
+        changed = {name for name, bit in self._state[0].items() if old_bits.get(name, bit) != bit}
+        if changed:
+            logger.warning("Permission matrix changed role bits of %s; cached masks are stale until refreshed",
+                           ", ".join(sorted(changed)))
+        logger.info("Permission matrix loaded from %s", self.path)
+        return True
+
+    def _maybe_reload(self) -> None:
+        if not self.path or time.monotonic() - self._checked_at < self.reload_seconds:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = time.monotonic()
+            self.reload()
+        finally:
+            self._lock.release()
+
+    def role_mask(self, role_names: Iterable[str]) -> int:
+        """Mask các role theo tên (không phân biệt hoa thường); role không có trong ma trận bị bỏ qua"""
+        self._maybe_reload()
+        role_bits, _, _, role_masks = self._state
+        key = tuple(role_names)
+        mask = role_masks.get(key)
+        if mask is None:
+            mask = 0
+            for name in key:
+                mask |= role_bits.get(name.upper(), 0)
+            role_masks[key] = mask
+        return mask
+
+    def permissions_for(self, role_mask: int) -> int:
+        """Mask quyền của principal có `role_mask`"""
+        self._maybe_reload()
+        _, role_permissions, permission_masks, _ = self._state
+        mask = permission_masks.get(role_mask)
+        if mask is None:
+            mask = 0
+            for bit, permissions in role_permissions.items():
+                if role_mask & bit:
+                    mask |= permissions
+            permission_masks[role_mask] = mask
+        return mask
+
+
+permission_registry = PermissionRegistry(settings.PERMISSION_MATRIX_PATH, settings.PERMISSION_MATRIX_RELOAD_SECONDS)
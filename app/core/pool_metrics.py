@@ -0,0 +1,147 @@
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger("app")
+
+# Mốc histogram thời gian chờ lấy connection (ms)
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolStats:
+    """Số liệu của một connection pool: thời gian chờ, timeout, tuổi connection"""
+
+    def __init__(self, name: str, slow_checkout_ms: float, log_interval: float = 10.0):
+        self.name = name
+        self.slow_checkout_ms = slow_checkout_ms
+        self.log_interval = log_interval
+        self.wait_buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_count = 0
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.timeouts = 0
+        self.saturated = 0
+        self.connects = 0
+        self._connected_at: Dict[int, float] = {}
+        self._last_log = 0.0
+        self._lock = threading.Lock()
+
+    def observe_wait(self, wait_ms: float) -> None:
+        idx = bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)
+        with self._lock:
+            self.wait_buckets[idx] += 1
+            self.wait_count += 1
+            self.wait_sum_ms += wait_ms
+            if wait_ms > self.wait_max_ms:
+                self.wait_max_ms = wait_ms
+
+    def on_connect(self, key: int) -> None:
+        self.connects += 1
+        self._connected_at[key] = time.monotonic()
+
+    def on_close(self, key: int) -> None:
+        self._connected_at.pop(key, None)
+
+    def connection_ages(self) -> Dict[str, float]:
+        now = time.monotonic()
+        ages = [now - t for t in list(self._connected_at.values())]
+        if not ages:
+            return {"count": 0, "max_s": 0.0, "avg_s": 0.0}
+        return {"count": len(ages), "max_s": round(max(ages), 3), "avg_s": round(sum(ages) / len(ages), 3)}
+
+    def should_log(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            return True
+        return False
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool đo thời gian chờ checkout và cảnh báo khi pool bão hòa"""
+
+    def __init__(self, creator, *args, **kw):
+        super().__init__(creator, *args, **kw)
+        # engine thay bằng PoolStats có tên sau khi tạo (xem app.core.database)
+        self.stats = PoolStats("default", slow_checkout_ms=100)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            if self.stats.should_log():
+                logger.error(
+                    f"DB pool '{self.stats.name}' exhausted: timed out after {self._timeout}s "
+                    f"({self.status()})"
+                )
+            raise
+        wait_ms = (time.perf_counter() - start) * 1000
+        self.stats.observe_wait(wait_ms)
+        limit = self.size() + max(self._max_overflow, 0)
+        if self._max_overflow >= 0 and self.checkedout() >= limit:
+            self.stats.saturated += 1
+            if self.stats.should_log():
+                logger.warning(f"DB pool '{self.stats.name}' saturated: {self.status()}")
+        elif wait_ms >= self.stats.slow_checkout_ms and self.stats.should_log():
+            logger.warning(f"DB pool '{self.stats.name}' slow checkout {wait_ms:.1f}ms: {self.status()}")
+        return conn
+
+    def snapshot(self) -> dict:
+        stats = self.stats
+        return {
+            "name": stats.name,
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "timeout_s": self._timeout,
+            "timeouts": stats.timeouts,
+            "saturated_checkouts": stats.saturated,
+            "connects": stats.connects,
+            "wait_ms": {
+                "count": stats.wait_count,
+                "sum": round(stats.wait_sum_ms, 3),
+                "max": round(stats.wait_max_ms, 3),
+                "buckets": dict(zip([str(b) for b in WAIT_BUCKETS_MS] + ["+Inf"], stats.wait_buckets)),
+            },
+            "connection_age": stats.connection_ages(),
+        }
+
+
+def instrument_engine(engine) -> None:
+    """Gắn event theo dõi vòng đời connection (connect/close) vào engine"""
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, record):
+        engine.pool.stats.on_connect(id(dbapi_conn))
+
+    @event.listens_for(engine, "close")
+    def _on_close(dbapi_conn, record):
+        engine.pool.stats.on_close(id(dbapi_conn))
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_conn, record, exception):
+        engine.pool.stats.on_close(id(dbapi_conn))
+
+
+def pool_snapshot(engine) -> dict:
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.snapshot()
+    return {"name": str(engine.url), "status": pool.status()}
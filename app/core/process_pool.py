@@ -0,0 +1,85 @@
+"""Process pool cho việc nặng CPU (băm mật khẩu, xử lý ảnh) tách khỏi process phục vụ request.
+
+- Handler chỉ `await` kết quả nên không giữ thread nào; việc chạy song song thật trên nhiều core.
+- Số process và số yêu cầu đang chờ đều bị giới hạn; hàng đợi đầy thì báo `busy_error` (thường map ra 503).
+- Process con chạy với `nice` cao hơn để khi thiếu core, CPU ưu tiên process phục vụ request.
+- `workers=0` tắt process pool, chạy trong threadpool (môi trường dev, script).
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessPoolBusy(Exception):
+    """Hàng đợi của process pool đã đầy"""
+
+
+def _init_worker(nice: int) -> None:
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+
+
+def _noop() -> None:
+    return None
+
+
+class ProcessPool:
+    busy_error = ProcessPoolBusy
+
+    def __init__(self, name: str, workers: int, max_pending: int, nice: int = 0):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.nice = nice
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn thay vì fork: process cha đã có thread (threadpool, pool DB) khi pool được tạo
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.nice,),
+            )
+        return self._executor
+
+    def start(self) -> None:
+        """Tạo sẵn các process (gọi lúc startup để request đầu không phải chờ spawn)"""
+        if self.workers <= 0:
+            return
+        executor = self._get_executor()
+        for future in [executor.submit(_noop) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable, *args):
+        if self.workers <= 0:
+            return await run_in_threadpool(fn, *args)
+        if self.pending >= self.max_pending:
+            raise self.busy_error()
+        # chỉ được đọc/ghi trên event loop nên không cần lock
+        self.pending += 1
+        try:
+            try:
+                return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+            except BrokenProcessPool:
+                # một process bị kill (OOM...): dựng lại pool và thử lại một lần
+                logger.warning("%s pool broken, restarting", self.name)
+                self._executor = None
+                return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            self.pending -= 1
@@ -0,0 +1,230 @@
+"""Đẩy sự kiện thời gian thực (WebSocket, SSE...) tới các kết nối đang mở.
+
+- Mỗi kết nối (`Connection`) đăng ký vào `hub` của worker theo các khóa: `user:<id>` và các nhóm
+  (vd. `group:staff`). Kết nối có hàng đợi gửi riêng, có giới hạn: client chậm không làm chậm việc phát
+  cho người khác; hàng đợi đầy thì kết nối bị đóng (client kết nối lại rồi tải lịch sử).
+- `hub.publish(keys, event)` không giao trực tiếp mà đi qua broker: mọi worker đăng ký cùng một kênh
+  và chỉ giao sự kiện cho kết nối của chính nó. Mỗi hub (chat, thông báo) dùng một kênh riêng
+  trên cùng một `broker`, nên khóa `user:<id>` của hub này không nhận sự kiện của hub kia.
+- `REALTIME_BROKER=memory`: broker trong process, đủ khi chạy một worker. Nhiều `ConnectionHub` dùng
+  chung một `MemoryBroker` mô phỏng nhiều worker (dùng khi test). `redis`: Redis pub/sub cho nhiều
+  worker/máy (cần cài `redis`).
+"""
+import asyncio
+import json
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import realtime_connections, realtime_slow_consumers_total
+
+logger = logging.getLogger("app")
+
+Handler = Callable[[dict], None]
+
+# lý do đóng kết nối, đặt vào hàng đợi gửi thay cho sự kiện
+CLOSE_SLOW_CONSUMER = "slow_consumer"
+CLOSE_SHUTDOWN = "shutdown"
+
+
+class MemoryBroker:
+    """Pub/sub trong process: `publish` gọi thẳng các handler đã đăng ký"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        self._handlers.clear()
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def unsubscribe(self, channel: str, handler: Handler) -> None:
+        handlers = self._handlers.get(channel, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    async def publish(self, channel: str, message: dict) -> None:
+        for handler in list(self._handlers.get(channel, ())):
+            handler(message)
+
+
+class RedisBroker:
+    """Pub/sub qua Redis: message được mã hóa JSON, một task đọc kênh cho cả worker"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._redis = None
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(self.url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        if self._redis is not None:
+            await self._redis.aclose()
+        self._handlers.clear()
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        if channel not in self._handlers:
+            await self._pubsub.subscribe(channel)
+        self._handlers.setdefault(channel, []).append(handler)
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def unsubscribe(self, channel: str, handler: Handler) -> None:
+        handlers = self._handlers.get(channel, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers and channel in self._handlers:
+            del self._handlers[channel]
+            await self._pubsub.unsubscribe(channel)
+
+    async def publish(self, channel: str, message: dict) -> None:
+        await self._redis.publish(channel, json.dumps(message, separators=(",", ":"), default=str))
+
+    async def _listen(self) -> None:
+        # `listen()` trả về ngay khi không còn kênh nào: dừng task (thay vì lặp không có `await` làm
+        # treo event loop), `subscribe` sau đó tạo task mới
+        while self._pubsub.subscribed:
+            try:
+                async for item in self._pubsub.listen():
+                    if item.get("type") != "message":
+                        continue
+                    channel = item["channel"].decode() if isinstance(item["channel"], bytes) else item["channel"]
+                    message = json.loads(item["data"])
+                    for handler in list(self._handlers.get(channel, ())):
+                        handler(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # mất kết nối Redis: redis-py tự kết nối và đăng ký lại kênh ở lần đọc sau
+                logger.exception("Realtime broker: Redis listener failed, retrying")
+                await asyncio.sleep(1)
+        self._task = None
+
+
+def build_broker():
+    if settings.REALTIME_BROKER == "redis":
+        return RedisBroker(settings.REALTIME_REDIS_URL)
+    if settings.REALTIME_BROKER != "memory":
+        raise ValueError(f"Unknown REALTIME_BROKER: {settings.REALTIME_BROKER!r}")
+    return MemoryBroker()
+
+
+class Connection:
+    """Một kết nối của client; nơi phục vụ kết nối đọc `queue` và gửi đi"""
+
+    def __init__(self, user_id: str, groups: Iterable[str] = (), max_queue: int = 100):
+        self.user_id = str(user_id)
+        self.keys = [f"user:{self.user_id}"] + [f"group:{group}" for group in groups]
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.max_queue = max_queue
+        self.closed: Optional[str] = None
+
+    def offer(self, event) -> None:
+        """Đưa sự kiện vào hàng đợi gửi; quá `max_queue` sự kiện chưa gửi thì đóng kết nối"""
+        if self.closed is not None:
+            return
+        if self.queue.qsize() >= self.max_queue:
+            realtime_slow_consumers_total.inc()
+            self.close(CLOSE_SLOW_CONSUMER)
+            return
+        self.queue.put_nowait(event)
+
+    def close(self, reason: str) -> None:
+        if self.closed is None:
+            self.closed = reason
+            # giá trị str trong hàng đợi báo nơi phục vụ đóng kết nối
+            self.queue.put_nowait(reason)
+
+
+class ConnectionLimitReached(Exception):
+    pass
+
+
+class ConnectionHub:
+    def __init__(self, broker, channel: str = "realtime", max_connections: int = 10000):
+        self.broker = broker
+        self.channel = channel
+        self.max_connections = max_connections
+        self.connections = 0
+        self._by_key: Dict[str, Set[Connection]] = {}
+
+    async def start(self) -> None:
+        """Đăng ký kênh của hub trên broker (broker đã được start)"""
+        await self.broker.subscribe(self.channel, self._deliver)
+
+    async def stop(self) -> None:
+        for connections in list(self._by_key.values()):
+            for connection in list(connections):
+                connection.close(CLOSE_SHUTDOWN)
+        await self.broker.unsubscribe(self.channel, self._deliver)
+
+    def register(self, connection: Connection) -> None:
+        if self.connections >= self.max_connections:
+            raise ConnectionLimitReached(f"Worker đã có {self.connections} kết nối")
+        self.connections += 1
+        realtime_connections.inc()
+        for key in connection.keys:
+            self._by_key.setdefault(key, set()).add(connection)
+
+    def unregister(self, connection: Connection) -> None:
+        removed = False
+        for key in connection.keys:
+            connections = self._by_key.get(key)
+            if connections and connection in connections:
+                connections.discard(connection)
+                removed = True
+                if not connections:
+                    del self._by_key[key]
+        if removed:
+            self.connections -= 1
+            realtime_connections.dec()
+
+    def is_online(self, key: str) -> bool:
+        """Khóa có kết nối trên worker này không (không biết về worker khác)"""
+        return key in self._by_key
+
+    def local_connections(self, key: str) -> Set[Connection]:
+        """Các kết nối của khóa trên worker này"""
+        return self._by_key.get(key, set())
+
+    async def publish(self, keys: Iterable[str], event: dict) -> None:
+        """Gửi `event` tới mọi kết nối (trên mọi worker) của các khóa `keys`"""
+        await self.broker.publish(self.channel, {"to": list(keys), "event": event})
+
+    def _deliver(self, message: dict) -> None:
+        self.deliver_local(message["to"], message["event"])
+
+    def deliver_local(self, keys: Iterable[str], event) -> None:
+        """Giao `event` cho các kết nối của `keys` trên worker này"""
+        delivered: Set[Connection] = set()
+        for key in keys:
+            for connection in self._by_key.get(key, ()):
+                # một kết nối có thể khớp nhiều khóa (user và nhóm): chỉ giao một lần
+                if connection not in delivered:
+                    delivered.add(connection)
+                    connection.offer(event)
+
+
+# một broker cho cả worker, mỗi hub (chat, thông báo...) một kênh riêng
+broker = build_broker()
+hub = ConnectionHub(broker, channel="chat", max_connections=settings.REALTIME_MAX_CONNECTIONS)
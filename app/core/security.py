@@ -1,20 +1,97 @@
+import hashlib
+import logging
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, Tuple
 
 from jose import jwt, JWTError
-from app.core.config import settings 
+from app.core.auth_cache import token_cache
+from app.core.config import settings
+
+logger = logging.getLogger("app")
+
+ACCESS = "access"
+REFRESH = "refresh"
+
 
 def create_access_token(data: Dict[str, Any], scopes: Optional[str] = None, expires_delta: Optional[timedelta] = None) -> Tuple[str, datetime]:
     to_encode = data.copy()
     if scopes:
         to_encode["scope"] = scopes
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": ACCESS})
+    token = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return token, expire
+
+
+def create_refresh_token(user_id: str, version: int) -> Tuple[str, datetime]:
+    """Refresh token ký bằng JWT; `jti` ngẫu nhiên để mỗi lần xoay là một token khác"""
+    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode = {"sub": user_id, "ver": version, "jti": uuid.uuid4().hex, "exp": expire, "type": REFRESH}
     token = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return token, expire
 
+
+def hash_token(token: str) -> str:
+    """Băm refresh token trước khi lưu DB (token đã đủ ngẫu nhiên nên SHA-256 là đủ)"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class JoseBackend:
+    name = "jose"
+
+    def decode(self, token: str) -> Optional[Dict[str, Any]]:
+        try:
+            return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+
+
+class PyJWTBackend:
+    """PyJWT: cùng định dạng token với python-jose nhưng kiểm tra nhanh hơn (ít lớp bọc hơn)"""
+    name = "pyjwt"
+
+    def __init__(self):
+        import jwt as pyjwt
+
+        self._jwt = pyjwt
+
+    def decode(self, token: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self._jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except self._jwt.PyJWTError:
+            return None
+
+
+def build_backend(name: str):
+    """Backend kiểm tra JWT theo `JWT_BACKEND`: `pyjwt`, `jose`, hoặc `auto` (PyJWT nếu đã cài)"""
+    if name in ("auto", "pyjwt"):
+        try:
+            return PyJWTBackend()
+        except ImportError:
+            if name == "pyjwt":
+                raise
+            logger.info("PyJWT is not installed, verifying JWT with python-jose")
+    elif name != "jose":
+        raise ValueError(f"Unknown JWT_BACKEND: {name!r}")
+    return JoseBackend()
+
+
+jwt_backend = build_backend(settings.JWT_BACKEND)
+
+
+def decode_token(token: str, token_type: str) -> Optional[Dict[str, Any]]:
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt_backend.decode(token)
+        if payload is None:
+            return None
+        token_cache.set(token, payload)
+    # token cũ (trước khi có refresh token) không có "type" và chỉ có thể là access token
+    if payload.get("type", ACCESS) != token_type:
+        return None
+    return payload
+
+
 def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
-    try:
-        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-    except JWTError:
-        return None
\ No newline at end of file
+    return decode_token(token, ACCESS)
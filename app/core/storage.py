@@ -0,0 +1,113 @@
+"""Lưu file tĩnh (ảnh review...) trên đĩa local hoặc S3-compatible (MinIO, R2...).
+
+- File được đưa vào storage từ một file tạm đã ghi xong (`put_file`), không đọc cả file vào RAM:
+  local thì `os.replace` (cùng ổ đĩa) hoặc copy từng khối, S3 thì `upload_fileobj` (multipart upload
+  theo khối).
+- Khóa (key) do nơi gọi đặt, ví dụ theo hash nội dung để file trùng chỉ lưu một lần.
+- `STORAGE_BACKEND=s3` cần cài `boto3`.
+"""
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+from app.core.config import settings
+
+
+class LocalStorage:
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key!r}")
+        return path
+
+    def temp_dir(self) -> str:
+        """Thư mục ghi file tạm: cùng ổ đĩa với storage để `put_file` chỉ là đổi tên.
+
+        Nằm cạnh (không nằm trong) `root`, vì `root` được phục vụ public: file dở dang hoặc
+        chưa kiểm tra không được lộ ra qua `STORAGE_BASE_URL`.
+        """
+        parent, name = os.path.split(self.root)
+        path = os.path.join(parent, f".{name}-tmp")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put_file(self, src: str, key: str, content_type: Optional[str] = None) -> None:
+        """Chuyển file `src` vào storage (file nguồn không còn sau khi gọi)"""
+        dest = self._path(key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        try:
+            os.replace(src, dest)
+        except OSError:
+            # khác ổ đĩa: copy qua file tạm cạnh đích rồi đổi tên, để không ai đọc được file dở dang
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest))
+            with os.fdopen(fd, "wb") as out, open(src, "rb") as f:
+                shutil.copyfileobj(f, out)
+            os.replace(tmp, dest)
+            os.remove(src)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+class S3Storage:
+    def __init__(self, bucket: str, prefix: str, base_url: str, endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None):
+        import boto3
+
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.base_url = base_url.rstrip("/")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def temp_dir(self) -> str:
+        return tempfile.gettempdir()
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, src: str, key: str, content_type: Optional[str] = None) -> None:
+        extra = {"ContentType": content_type} if content_type else None
+        try:
+            with open(src, "rb") as f:
+                self.client.upload_fileobj(f, self.bucket, self._key(key), ExtraArgs=extra)
+        finally:
+            os.remove(src)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{self._key(key)}"
+
+
+def build_storage():
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            settings.STORAGE_S3_BUCKET,
+            settings.STORAGE_S3_PREFIX,
+            settings.STORAGE_BASE_URL,
+            endpoint_url=settings.STORAGE_S3_ENDPOINT_URL,
+            region=settings.STORAGE_S3_REGION,
+        )
+    if settings.STORAGE_BACKEND != "local":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND!r}")
+    return LocalStorage(settings.STORAGE_LOCAL_ROOT, settings.STORAGE_BASE_URL)
+
+
+storage = build_storage()
@@ -1,9 +1,25 @@
+from fastapi import Request
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, unit_of_work
 
-def get_db():
+# Các method chỉ đọc được phép đọc từ replica
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def get_db(request: Request):
     db: Session = SessionLocal()
+    # request ghi (POST/PUT/DELETE...) đọc và ghi hoàn toàn trên primary
+    if request.method not in READ_ONLY_METHODS:
+        db.info["primary"] = True
+    # khóa read-your-writes: user đã đăng nhập, nếu không thì theo client
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        db.info["sticky_key"] = str(user.id)
+    elif request.client:
+        db.info["sticky_key"] = request.client.host
     try:
-        yield db
+        # cả request là một unit of work: repository chỉ flush, commit một lần khi handler xong
+        with unit_of_work(db):
+            yield db
     finally:
         db.close()
@@ -1,17 +1,47 @@
 from fastapi import Request, HTTPException, status
 
-def require_roles(*roles: str):
+from app.core.permissions import permission_mask, permission_registry
+
+
+def _get_user(request: Request):
+    user = getattr(request.state, "user", None)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+        )
+    return user
+
+
+def has_permission(user, *permissions: str) -> bool:
+    """User có đủ mọi quyền trong `permissions`"""
+    required = permission_mask(permissions)
+    return permission_registry.permissions_for(getattr(user, "role_mask", 0)) & required == required
+
+
+def require_permissions(*permissions: str):
+    # mask được tính một lần khi khai báo route; mỗi request chỉ còn một phép AND
+    required = permission_mask(permissions)
+
     def checker(request: Request):
-        user = getattr(request.state, "user", None)
-        if not user:
+        user = _get_user(request)
+        if permission_registry.permissions_for(getattr(user, "role_mask", 0)) & required != required:
             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Not authenticated",
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Forbidden",
             )
+        return user
+
+    return checker
 
-        user_role_names = [r.name.lower() for r in getattr(user, "roles", [])]
-        required_roles_lower = [role.lower() for role in roles]
-        if not any(role in user_role_names for role in required_roles_lower):
+
+def require_roles(*roles: str):
+    """User có ít nhất một trong các role (không phân biệt hoa thường)"""
+    roles = tuple(roles)
+
+    def checker(request: Request):
+        user = _get_user(request)
+        if not getattr(user, "role_mask", 0) & permission_registry.role_mask(roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Forbidden",
@@ -1,7 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import PlainTextResponse
+from fastapi.staticfiles import StaticFiles
+from app.core.config import settings
+from app.core.metrics import REGISTRY, CONTENT_TYPE, MetricsMiddleware
 from app.core.middleware import AuthMiddleware,TraceIdMiddleware
+from app.core.idempotency import IdempotencyMiddleware, store as idempotency_store
+from app.core.email_filter import email_filter
+from app.core.password import password_hasher
+from app.core.jobs import job_runner
+from app.core.mail import mail_templates, mailer
+from app.core.realtime import broker, hub
+from app.services.chat_service import message_writer
+from app.services.notification_service import notification_hub
+from app.services.review_media_service import image_pool
 from app.routers.v1.vouchers import router as vouchers_router
 from app.routers.v1.brands import router as brands_router
 from app.routers.v1.types import router as types_router
@@ -13,9 +29,46 @@ from app.routers.v1.users import router as users_router
 from app.routers.v1.categories import router as categories_router
 from app.routers.v1.review import router as reviews_router
 from app.routers.v1.product import router as product_router
+from app.routers.v1.order import router as order_router
+from app.routers.v1.payments import router as payments_router
+from app.routers.v1.analytics import router as analytics_router
+from app.routers.v1.metrics import router as metrics_router
+from app.routers.v1.exports import router as exports_router
+from app.routers.v1.chat import router as chat_router
+from app.routers.v1.notifications import router as notifications_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # tạo sẵn process băm mật khẩu để request đăng nhập đầu tiên không phải chờ spawn,
+    # nạp email filter để login/register loại sớm email chưa đăng ký/trùng
+    await run_in_threadpool(password_hasher.start)
+    await run_in_threadpool(image_pool.start)
+    await run_in_threadpool(email_filter.load)
+    # biên dịch sẵn template email: lỗi cú pháp template làm app không khởi động được
+    await run_in_threadpool(mail_templates.compile_all)
+    await broker.start()
+    await hub.start()
+    await notification_hub.start()
+    message_writer.start()
+    mailer.start()
+    job_runner.start()
+    yield
+    # đóng các kết nối realtime, ghi nốt tin nhắn đang chờ và chờ job đang chạy trước khi tắt
+    await hub.stop()
+    await notification_hub.stop()
+    await message_writer.stop()
+    await job_runner.stop(settings.JOB_SHUTDOWN_TIMEOUT_SECONDS)
+    await mailer.stop()
+    await broker.stop()
+    await idempotency_store.close()
+    await run_in_threadpool(password_hasher.shutdown)
+    await run_in_threadpool(image_pool.shutdown)
+
 
 app = FastAPI(
     title="WebMyPham API",
+    lifespan=lifespan,
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
@@ -43,6 +96,10 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+# Idempotency-Key: thêm đầu tiên để nằm trong cùng (sau Auth đã xác định user); response trả lại
+# vẫn đi qua CORS/TraceId nên có header CORS và trace id của lần gửi lại
+app.add_middleware(IdempotencyMiddleware)
+
 # CORS middleware - cho phép Frontend gọi API
 app.add_middleware(
     CORSMiddleware,
@@ -61,6 +118,8 @@ app.add_middleware(
 # middleware
 app.add_middleware(TraceIdMiddleware) 
 app.add_middleware(AuthMiddleware)
+# thêm sau cùng để bao ngoài mọi middleware khác (đo toàn bộ thời gian xử lý)
+app.add_middleware(MetricsMiddleware)
 
 # routers
 app.include_router(auth_router, prefix="/api/v1/auth", tags=["auth"])
@@ -74,7 +133,23 @@ app.include_router(carts_router, prefix="/api/v1/carts", tags=["carts"])
 app.include_router(wishlists_router, prefix="/api/v1/wishlists", tags=["wishlists"])
 app.include_router(reviews_router, prefix="/api/v1/reviews", tags=["reviews"])
 app.include_router(product_router, prefix="/api/v1/products", tags=["products"])
+app.include_router(order_router, prefix="/api/v1/orders", tags=["orders"])
+app.include_router(payments_router, prefix="/api/v1/payments", tags=["payments"])
+app.include_router(metrics_router, prefix="/api/v1/metrics", tags=["metrics"])
+app.include_router(exports_router, prefix="/api/v1/exports", tags=["exports"])
+app.include_router(chat_router, prefix="/api/v1/chat", tags=["chat"])
+app.include_router(notifications_router, prefix="/api/v1/notifications", tags=["notifications"])
+app.include_router(analytics_router, prefix="/api/v1/analytics", tags=["analytics"])
+
+# storage local: app tự phục vụ file (production nên để nginx/CDN phục vụ thư mục này)
+if settings.STORAGE_BACKEND == "local" and settings.STORAGE_BASE_URL.startswith("/"):
+    app.mount(settings.STORAGE_BASE_URL, StaticFiles(directory=settings.STORAGE_LOCAL_ROOT, check_dir=False), name="media")
 
 @app.get("/")
 def health_check():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -24,10 +24,15 @@ from app.models.wishlist import Wishlist
 from app.models.wishlistItem import WishlistItem
 from app.models.review import Review
 from app.models.reviewMedia import ReviewMedia
+from app.models.productRatingSummary import ProductRatingSummary
 from app.models.notification import Notification
 from app.models.userNotification import UserNotification
 from app.models.conversation import Conversation
 from app.models.message import Message
+from app.models.job import Job
+from app.models.paymentEvent import PaymentEvent
+from app.models.salesDailyRollup import SalesDailyRollup
+from app.models.productImport import ProductImport
 
 # Export Base để Alembic sử dụng
 __all__ = ["Base"]
\ No newline at end of file
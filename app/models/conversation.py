@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey, Column, Text, DateTime, func
+from sqlalchemy import String, ForeignKey, Column, Text, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.mixins import AuditMixin
@@ -10,3 +10,9 @@ class Conversation(AuditMixin, Base):
     last_message = Column(Text)
     updated_at = Column(DateTime, onupdate=func.now())
 
+    # hộp thư: hội thoại của một user, hội thoại mới cập nhật trước
+    __table_args__ = (
+        Index("ix_conversations_user1_updated", "user1_id", "updated_at"),
+        Index("ix_conversations_user2_updated", "user2_id", "updated_at"),
+        Index("ix_conversations_updated", "updated_at"),
+    )
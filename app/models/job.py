@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, DateTime, Integer, Text, Index
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class Job(AuditMixin, Base):
+    __tablename__ = "jobs"
+    # tên handler đăng ký bằng `@job(...)` (xem `app/core/jobs.py`)
+    name = Column(String(100), nullable=False)
+    # tham số của handler dạng JSON
+    payload = Column(Text, nullable=True)
+    # queued -> running -> succeeded | failed (lỗi thì quay về queued với `run_at` lùi lại)
+    status = Column(String(20), nullable=False, default="queued", server_default="queued")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False, default=5, server_default="5")
+    # chạy từ thời điểm này (hẹn giờ, chờ retry)
+    run_at = Column(DateTime, nullable=False)
+    # worker đang chạy job gia hạn lease định kỳ; hết hạn (worker chết) thì worker khác chạy lại
+    locked_until = Column(DateTime, nullable=True)
+    locked_by = Column(String(64), nullable=True)
+    last_error = Column(Text, nullable=True)
+    # 191 ký tự: giới hạn độ dài khóa index utf8mb4 của MySQL
+    idempotency_key = Column(String(191), nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # worker tìm job đến hạn theo (status, run_at)
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        # enqueue cùng key chỉ tạo một job
+        Index("uq_jobs_idempotency_key", "idempotency_key", unique=True),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey, Column, Text, Boolean
+from sqlalchemy import String, ForeignKey, Column, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.mixins import AuditMixin
@@ -10,3 +10,7 @@ class Message(AuditMixin, Base):
     message = Column(Text)
     is_read = Column(Boolean, default=False)
 
+    # lịch sử hội thoại phân trang keyset, mới nhất trước
+    __table_args__ = (
+        Index("ix_messages_conversation_created", "conversation_id", "created_at", "id"),
+    )
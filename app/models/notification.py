@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Text
+from sqlalchemy import Column, String, DateTime, Boolean, Text, Integer, Index
 from app.core.database import Base
 from app.models.mixins import AuditMixin
 
@@ -6,8 +6,26 @@ from app.models.mixins import AuditMixin
 class Notification(AuditMixin, Base):
     __tablename__ = "notifications"
     title = Column(String(200))
-    content = Column(Boolean)
+    content = Column(Text)
     type = Column(String(50))
     sender_id = Column(String(36))
     is_read = Column(Boolean, default=False)
     read_at = Column(DateTime)
+    # "user": gửi trực tiếp, "segment": theo nhóm user (fan-out nền), "all": broadcast (không fan-out)
+    audience = Column(String(20), nullable=False, default="user", server_default="user")
+    # điều kiện nhóm user dạng JSON khi audience = "segment"
+    segment = Column(Text, nullable=True)
+    # pending -> sending -> sent (segment); user/all được tạo ở trạng thái sent
+    status = Column(String(20), nullable=False, default="sent", server_default="sent")
+    # id user cuối cùng đã fan-out (tiếp tục từ đây nếu worker dừng giữa chừng)
+    fanout_cursor = Column(String(36), nullable=True)
+    recipient_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # worker đang fan-out giữ quyền tới thời điểm này; hết hạn thì worker khác nhận tiếp
+    lease_until = Column(DateTime, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # broadcast hiện trong hộp thư theo thời gian tạo; worker tìm việc fan-out theo status
+        Index("ix_notifications_audience_created", "audience", "created_at"),
+        Index("ix_notifications_status", "status"),
+    )
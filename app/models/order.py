@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Float
+from sqlalchemy import Column, String, ForeignKey, Float, Boolean, Index, false
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.mixins import AuditMixin
@@ -11,5 +11,13 @@ class Order(AuditMixin, Base):
     total_amount = Column(Float)
     discount_amount = Column(Float)
     final_amount = Column(Float)
+    # đơn đã được cộng vào `sales_daily_rollups` (đổi bằng UPDATE có điều kiện để không cộng hai lần)
+    sales_counted = Column(Boolean, nullable=False, default=False, server_default=false())
     details = relationship("OrderDetail", back_populates="order")
-    payment = relationship("Payment", uselist=False, back_populates="order")
\ No newline at end of file
+    payment = relationship("Payment", uselist=False, back_populates="order")
+
+    # lịch sử đơn của user phân trang keyset, mới nhất trước; lọc theo trạng thái dùng index thứ hai
+    __table_args__ = (
+        Index("ix_orders_user_created", "user_id", "created_at", "id"),
+        Index("ix_orders_user_status_created", "user_id", "status", "created_at", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Float, Integer
+from sqlalchemy import Column, String, ForeignKey, Float, Integer, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.mixins import AuditMixin
@@ -10,4 +10,7 @@ class OrderDetail(AuditMixin, Base):
     product_type_id = Column(String(36), ForeignKey("product_types.id"))
     price = Column(Float)
     number = Column(Integer)
-    order = relationship("Order", back_populates="details")
\ No newline at end of file
+    order = relationship("Order", back_populates="details")
+
+    # các dòng của một trang đơn hàng (`order_id IN (...)`), theo thứ tự thêm vào đơn
+    __table_args__ = (Index("ix_order_details_order_created", "order_id", "created_at", "id"),)
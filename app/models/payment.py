@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Float, Integer
+from sqlalchemy import Column, String, ForeignKey, Float, Integer, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.mixins import AuditMixin
@@ -7,6 +7,19 @@ from app.models.mixins import AuditMixin
 class Payment(AuditMixin, Base):
     __tablename__ = "payments"
     order_id = Column(String(36), ForeignKey("orders.id"))
+    # cod | tên provider (`app/core/payments.py`)
     method = Column(String(50))
+    # pending -> paid | failed | cancelled, paid -> refunded (xem PAYMENT_STATES)
     status = Column(String(50))
-    order = relationship("Order", back_populates="payment")
\ No newline at end of file
+    amount = Column(Float, nullable=True)
+    # số lần tạo URL thanh toán; mã gửi provider là `{id}-{attempts}`
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # mã giao dịch phía provider của lần thanh toán thành công
+    transaction_id = Column(String(100), nullable=True)
+    paid_at = Column(DateTime, nullable=True)
+    order = relationship("Order", back_populates="payment")
+
+    __table_args__ = (
+        # mỗi đơn một payment: thanh toán lại dùng lại dòng này
+        Index("uq_payments_order_id", "order_id", unique=True),
+    )
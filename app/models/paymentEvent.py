@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, ForeignKey, Float, Text, Index
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class PaymentEvent(AuditMixin, Base):
+    """Webhook đã xử lý; provider gửi lại cùng giao dịch thì bị loại nhờ unique index"""
+    __tablename__ = "payment_events"
+    provider = Column(String(50), nullable=False)
+    transaction_id = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False)
+    payment_id = Column(String(36), ForeignKey("payments.id"), nullable=True)
+    amount = Column(Float, nullable=True)
+    # applied | ignored | not_found | amount_mismatch
+    result = Column(String(20), nullable=False)
+    payload = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("uq_payment_events_provider_txn_status", "provider", "transaction_id", "status", unique=True),
+        Index("ix_payment_events_payment_id", "payment_id"),
+    )
@@ -15,4 +15,9 @@ class Product(AuditMixin, Base):
 
     brand = relationship("Brand", back_populates="products")
     category = relationship("Category", back_populates="products")
-    product_types = relationship("ProductType", back_populates="product")
+    # chỉ các variant chưa bị soft delete
+    product_types = relationship(
+        "ProductType",
+        back_populates="product",
+        primaryjoin="and_(Product.id == ProductType.product_id, ProductType.deleted_at.is_(None))",
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime, Integer, Text
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class ProductImport(AuditMixin, Base):
+    __tablename__ = "product_imports"
+    # csv | jsonl
+    format = Column(String(10), nullable=False)
+    # file đã upload trong PRODUCT_IMPORT_DIR; bị xóa khi import xong
+    path = Column(String(500), nullable=False)
+    # pending -> running -> completed | failed
+    status = Column(String(20), nullable=False, default="pending", server_default="pending")
+    rows = Column(Integer, nullable=False, default=0, server_default="0")
+    products_created = Column(Integer, nullable=False, default=0, server_default="0")
+    products_updated = Column(Integer, nullable=False, default=0, server_default="0")
+    variants_created = Column(Integer, nullable=False, default=0, server_default="0")
+    variants_updated = Column(Integer, nullable=False, default=0, server_default="0")
+    failed = Column(Integer, nullable=False, default=0, server_default="0")
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # lỗi từng dòng dạng JSON [{"row": ..., "error": ...}], tối đa PRODUCT_IMPORT_MAX_ERRORS
+    errors = Column(Text, nullable=True)
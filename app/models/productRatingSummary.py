@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
+from app.core.database import Base
+
+
+class ProductRatingSummary(Base):
+    """Tổng hợp đánh giá của một sản phẩm, cập nhật cộng dồn khi review được tạo/sửa/xóa"""
+    __tablename__ = "product_rating_summaries"
+    product_id = Column(String(36), ForeignKey("products.id"), primary_key=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    star_1 = Column(Integer, nullable=False, default=0)
+    star_2 = Column(Integer, nullable=False, default=0)
+    star_3 = Column(Integer, nullable=False, default=0)
+    star_4 = Column(Integer, nullable=False, default=0)
+    star_5 = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Integer
+from sqlalchemy import Column, String, ForeignKey, Integer, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.mixins import AuditMixin
@@ -12,3 +12,9 @@ class Review(AuditMixin, Base):
     comment = Column(String(255))
     medias = relationship("ReviewMedia", back_populates="review")
 
+    # phân trang keyset theo sản phẩm: mới nhất, hoặc theo số sao rồi mới nhất
+    __table_args__ = (
+        Index("ix_reviews_product_created", "product_id", "created_at", "id"),
+        Index("ix_reviews_product_rating_created", "product_id", "rating", "created_at", "id"),
+    )
+
@@ -7,6 +7,11 @@ from app.models.mixins import AuditMixin
 class ReviewMedia(AuditMixin, Base):
     __tablename__ = "review_medias"
     review_id = Column(String(36), ForeignKey("reviews.id"))
+    # URL bản WebP đã thu nhỏ (bản hiển thị) và thumbnail
     path = Column(String(255))
+    thumbnail_path = Column(String(255), nullable=True)
+    # sha256 của file gốc: ảnh giống nhau chỉ lưu một lần trong storage
+    content_hash = Column(String(64), nullable=True, index=True)
+    content_type = Column(String(50), nullable=True)
+    size_bytes = Column(Integer, nullable=True)
     review = relationship("Review", back_populates="medias")
-
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Date, DateTime, Float, Index, Integer, String, func
+from app.core.database import Base
+
+
+class SalesDailyRollup(Base):
+    """Doanh số một ngày theo một chiều (tổng, sản phẩm, thương hiệu, danh mục), cộng dồn khi đơn
+    vào/ra trạng thái đã bán (`app/services/analytics_service.py`)"""
+    __tablename__ = "sales_daily_rollups"
+    # total | product | brand | category
+    dimension = Column(String(20), primary_key=True)
+    # id sản phẩm/thương hiệu/danh mục; chuỗi rỗng với `total`
+    key = Column(String(36), primary_key=True)
+    day = Column(Date, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # dashboard: mọi dòng của một chiều trong khoảng ngày
+    __table_args__ = (Index("ix_sales_daily_rollups_dimension_day", "dimension", "day"),)
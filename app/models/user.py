@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from app.core.database import Base
 from app.models.mixins import AuditMixin
 from sqlalchemy.orm import relationship
@@ -6,6 +6,8 @@ from sqlalchemy.orm import relationship
 
 class User(AuditMixin, Base):
     __tablename__ = "users"
+    # email filter đọc thêm user mới theo created_at
+    __table_args__ = (Index("ix_users_created_at", "created_at"),)
     email = Column(String(100), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     phone_number = Column(String(20), unique=True, index=True, nullable=True)
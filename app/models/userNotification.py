@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Boolean, DateTime, Index
 from app.core.database import Base
 from app.models.mixins import AuditMixin
 
@@ -7,3 +7,12 @@ class UserNotification(AuditMixin, Base):
     __tablename__ = "user_notifications"
     user_id = Column(String(36), ForeignKey("users.id"))
     notification_id = Column(String(36), ForeignKey("notifications.id"))
+    is_read = Column(Boolean, nullable=False, default=False, server_default="0")
+    read_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # mỗi user nhận một thông báo một lần (fan-out chạy lại không tạo trùng);
+        # broadcast chỉ có dòng này khi user đã đọc
+        Index("uq_user_notifications_user_notification", "user_id", "notification_id", unique=True),
+        Index("ix_user_notifications_user_read", "user_id", "is_read"),
+    )
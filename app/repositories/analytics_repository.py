@@ -0,0 +1,155 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, bindparam, delete, func, insert, not_, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.brand import Brand
+from app.models.category import Category
+from app.models.order import Order
+from app.models.orderDetail import OrderDetail
+from app.models.product import Product
+from app.models.productType import ProductType
+from app.models.salesDailyRollup import SalesDailyRollup
+
+ORDER_COLUMNS = (Order.id, Order.status, Order.deleted_at, Order.sales_counted, Order.created_at, Order.final_amount)
+
+APPLY_LOOKUP_SIZE = 500
+
+_rollups = SalesDailyRollup.__table__
+# cộng dồn vào một dòng; tham số đặt tên riêng (`b_*`) để chạy executemany
+ACCUMULATE = (
+    update(_rollups)
+    .where(_rollups.c.dimension == bindparam("b_dimension"), _rollups.c.key == bindparam("b_key"),
+           _rollups.c.day == bindparam("b_day"))
+    .values(orders=_rollups.c.orders + bindparam("b_orders"), units=_rollups.c.units + bindparam("b_units"),
+            revenue=_rollups.c.revenue + bindparam("b_revenue"))
+)
+
+
+def _params(key: Tuple[str, str, date], values) -> dict:
+    dimension, rollup_key, day = key
+    orders, units, revenue = values
+    return {"b_dimension": dimension, "b_key": rollup_key, "b_day": day, "b_orders": orders, "b_units": units,
+            "b_revenue": revenue}
+
+
+# tên hiển thị của từng chiều trong dashboard
+NAMED_DIMENSIONS = {"product": Product, "brand": Brand, "category": Category}
+
+
+class AnalyticsRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---------- đồng bộ bảng tổng hợp ----------
+
+    def orders_after(self, after_id: Optional[str], limit: int) -> list:
+        """Một lô đơn theo khóa chính (keyset), chỉ các cột cần để tính doanh số"""
+        query = select(*ORDER_COLUMNS).order_by(Order.id).limit(limit)
+        if after_id is not None:
+            query = query.where(Order.id > after_id)
+        return self.db.execute(query).all()
+
+    def orders_by_id(self, order_ids: Iterable[str]) -> list:
+        return self.db.execute(select(*ORDER_COLUMNS).where(Order.id.in_(list(order_ids)))).all()
+
+    def lines(self, order_ids: Iterable[str]) -> list:
+        """Các dòng của các đơn kèm sản phẩm, thương hiệu, danh mục, trong một câu JOIN"""
+        return self.db.execute(
+            select(OrderDetail.order_id, Product.id.label("product_id"), Product.brand_id, Product.category_id,
+                   OrderDetail.number, OrderDetail.price)
+            .join(ProductType, ProductType.id == OrderDetail.product_type_id)
+            .join(Product, Product.id == ProductType.product_id)
+            .where(OrderDetail.order_id.in_(list(order_ids)), OrderDetail.deleted_at.is_(None))
+        ).all()
+
+    def set_counted(self, order_ids: List[str], counted: bool, sold_states: Tuple[str, ...]) -> int:
+        """Đổi cờ `sales_counted` của các đơn đang có giá trị ngược lại và trạng thái vẫn khớp (đã bán khi
+        `counted`, chưa/không còn bán khi không); trả về số đơn đã đổi"""
+        if not order_ids:
+            return 0
+        sold = and_(Order.status.in_(sold_states), Order.deleted_at.is_(None))
+        result = self.db.execute(
+            update(Order)
+            .where(Order.id.in_(order_ids), Order.sales_counted.is_(not counted),
+                   sold if counted else or_(Order.status.is_(None), not_(sold)))
+            .values(sales_counted=counted)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def apply(self, deltas: Dict[Tuple[str, str, date], List[float]]) -> None:
+        """Cộng dồn {(chiều, khóa, ngày): [đơn, số lượng, doanh thu]}.
+
+        Một câu đọc các dòng đã có, một UPDATE cộng dồn (executemany) cho các dòng đó và một INSERT
+        nhiều dòng cho phần còn lại, thay vì một câu cho mỗi khóa (backfill một lô có hàng nghìn khóa).
+        """
+        keys = list(deltas)
+        existing = set()
+        for i in range(0, len(keys), APPLY_LOOKUP_SIZE):
+            batch = keys[i:i + APPLY_LOOKUP_SIZE]
+            existing.update(tuple(row) for row in self.db.execute(
+                select(SalesDailyRollup.dimension, SalesDailyRollup.key, SalesDailyRollup.day)
+                .where(tuple_(SalesDailyRollup.dimension, SalesDailyRollup.key, SalesDailyRollup.day).in_(batch))
+            ))
+        updates = [_params(key, deltas[key]) for key in keys if key in existing]
+        if updates:
+            self.db.execute(ACCUMULATE, updates)
+        rows = [dict(zip(("dimension", "key", "day", "orders", "units", "revenue"), (*key, *deltas[key])))
+                for key in keys if key not in existing]
+        if not rows:
+            return
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(SalesDailyRollup.__table__), rows)
+        except IntegrityError:
+            # giao dịch song song vừa tạo một số dòng: cộng dồn từng dòng
+            for row in rows:
+                self._apply_one(row)
+
+    def _apply_one(self, row: dict) -> None:
+        params = _params((row["dimension"], row["key"], row["day"]), (row["orders"], row["units"], row["revenue"]))
+        if self.db.execute(ACCUMULATE, params).rowcount:
+            return
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(SalesDailyRollup.__table__), row)
+        except IntegrityError:
+            self.db.execute(ACCUMULATE, params)
+
+    def clear(self) -> None:
+        """Xóa bảng tổng hợp và cờ `sales_counted` (để nạp lại từ đầu)"""
+        self.db.execute(delete(SalesDailyRollup).execution_options(synchronize_session=False))
+        self.db.execute(update(Order).where(Order.sales_counted.is_(True)).values(sales_counted=False)
+                        .execution_options(synchronize_session=False))
+
+    # ---------- dashboard ----------
+
+    def series(self, dimension: str, key: str, date_from: date, date_to: date) -> list:
+        """(ngày, đơn, số lượng, doanh thu) của một khóa, theo ngày"""
+        return self.db.execute(
+            select(SalesDailyRollup.day, SalesDailyRollup.orders, SalesDailyRollup.units, SalesDailyRollup.revenue)
+            .where(SalesDailyRollup.dimension == dimension, SalesDailyRollup.key == key,
+                   SalesDailyRollup.day.between(date_from, date_to))
+            .order_by(SalesDailyRollup.day)
+        ).all()
+
+    def top(self, dimension: str, date_from: date, date_to: date, by: str, limit: int) -> list:
+        """(khóa, tên, đơn, số lượng, doanh thu) của `limit` khóa lớn nhất theo `by` trong khoảng ngày"""
+        totals = (
+            select(SalesDailyRollup.key, func.sum(SalesDailyRollup.orders).label("orders"),
+                   func.sum(SalesDailyRollup.units).label("units"),
+                   func.sum(SalesDailyRollup.revenue).label("revenue"))
+            .where(SalesDailyRollup.dimension == dimension, SalesDailyRollup.day.between(date_from, date_to))
+            .group_by(SalesDailyRollup.key)
+            .having(func.sum(SalesDailyRollup.orders) > 0)
+            .order_by(func.sum(getattr(SalesDailyRollup, by)).desc(), SalesDailyRollup.key)
+            .limit(limit)
+            .subquery()
+        )
+        model = NAMED_DIMENSIONS[dimension]
+        return self.db.execute(
+            select(totals.c.key, model.name, totals.c.orders, totals.c.units, totals.c.revenue)
+            .outerjoin(model, model.id == totals.c.key)
+            .order_by(getattr(totals.c, by).desc(), totals.c.key)
+        ).all()
@@ -1,12 +1,59 @@
-from typing import Generic, TypeVar, Optional, List, Type, Any
+import uuid
+from typing import Generic, TypeVar, Optional, List, Type, Any, Dict
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import String, and_, insert, or_, select, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 from datetime import datetime
 from app.core.database import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 
 
+class sql_uuid(FunctionElement):
+    """UUID dạng chuỗi 36 ký tự sinh trong DB, cho `INSERT ... SELECT` (id không thể sinh ở Python)"""
+    type = String(36)
+    name = "sql_uuid"
+    inherit_cache = True
+
+
+@compiles(sql_uuid)
+def _compile_uuid(element, compiler, **kw):
+    return "UUID()"
+
+
+@compiles(sql_uuid, "postgresql")
+def _compile_uuid_postgresql(element, compiler, **kw):
+    return "CAST(gen_random_uuid() AS VARCHAR(36))"
+
+
+@compiles(sql_uuid, "sqlite")
+def _compile_uuid_sqlite(element, compiler, **kw):
+    # SQLite không có hàm UUID: ghép từ randomblob theo định dạng UUID v4
+    return (
+        "(lower(hex(randomblob(4))) || '-' || lower(hex(randomblob(2))) || '-4' || "
+        "substr(lower(hex(randomblob(2))), 2) || '-' || substr('89ab', 1 + (abs(random()) % 4), 1) || "
+        "substr(lower(hex(randomblob(2))), 2) || '-' || lower(hex(randomblob(6))))"
+    )
+
+
+def keyset_after(model, keys, after_id: str) -> object:
+    """Điều kiện "đứng sau dòng `after_id`" theo thứ tự `keys` = [(cột, giảm dần?), ...] (hỗ trợ tăng/giảm lẫn lộn).
+
+    `keys` phải kết thúc bằng khóa chính để thứ tự là duy nhất. Giá trị mốc đọc bằng subquery theo
+    khóa chính thay vì truyền từ client, để phép so sánh dùng đúng giá trị đã lưu (SQLite lưu
+    datetime dạng chuỗi, chuỗi từ `now()` và từ Python khác định dạng).
+    """
+    values = [select(column).where(model.id == after_id).scalar_subquery() for column, _ in keys]
+    clauses = []
+    for i, (column, desc) in enumerate(keys):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, column < values[i] if desc else column > values[i]))
+    # cận của cột đầu tách riêng để index được đọc từ mốc (range scan), không quét từ đầu rồi lọc OR
+    first, desc = keys[0]
+    return and_(first <= values[0] if desc else first >= values[0], or_(*clauses))
+
+
 class BaseRepository(Generic[ModelType]):
     """Base repository với các method CRUD cơ bản"""
     
@@ -29,19 +76,27 @@ class BaseRepository(Generic[ModelType]):
             self.model.deleted_at.is_(None)
         ).offset(skip).limit(limit).all()
     
-    def create(self, obj_data: dict, created_by: Optional[str] = None) -> ModelType:
-        """Tạo mới một record"""
+    def _get_for_write(self, id: str) -> Optional[ModelType]:
+        """Lấy record để ghi: ưu tiên identity map của session, chỉ SELECT khi chưa được nạp"""
+        obj = self.db.get(self.model, id)
+        if obj is None or getattr(obj, 'deleted_at', None) is not None:
+            return None
+        return obj
+
+    def create(self, obj_data: dict, created_by: Optional[str] = None, refresh: bool = False) -> ModelType:
+        """Tạo mới một record (chỉ flush, commit do unit of work đảm nhận; `refresh=True` để nạp lại giá trị từ DB)"""
         obj = self.model(**obj_data)
         if created_by is not None and hasattr(obj, 'created_by'):
             obj.created_by = created_by
         self.db.add(obj)
-        self.db.commit()
-        self.db.refresh(obj)
+        self.db.flush()
+        if refresh:
+            self.db.refresh(obj)
         return obj
     
-    def update(self, id: str, obj_data: dict, updated_by: Optional[str] = None) -> Optional[ModelType]:
-        """Cập nhật một record"""
-        obj = self.get(id)
+    def update(self, id: str, obj_data: dict, updated_by: Optional[str] = None, refresh: bool = False) -> Optional[ModelType]:
+        """Cập nhật một record (chỉ flush)"""
+        obj = self._get_for_write(id)
         if not obj:
             return None
         
@@ -55,14 +110,14 @@ class BaseRepository(Generic[ModelType]):
         if hasattr(obj, 'updated_at'):
             obj.updated_at = datetime.utcnow()
         
-        self.db.add(obj)
-        self.db.commit()
-        self.db.refresh(obj)
+        self.db.flush()
+        if refresh:
+            self.db.refresh(obj)
         return obj
     
     def delete(self, id: str, deleted_by: Optional[str] = None) -> bool:
-        """Soft delete một record"""
-        obj = self.get(id)
+        """Soft delete một record (chỉ flush)"""
+        obj = self._get_for_write(id)
         if not obj:
             return False
         
@@ -71,18 +126,17 @@ class BaseRepository(Generic[ModelType]):
         if deleted_by is not None and hasattr(obj, 'deleted_by'):
             obj.deleted_by = deleted_by
         
-        self.db.add(obj)
-        self.db.commit()
+        self.db.flush()
         return True
     
     def hard_delete(self, id: str) -> bool:
-        """Hard delete một record (xóa vĩnh viễn)"""
-        obj = self.get(id)
+        """Hard delete một record (xóa vĩnh viễn, chỉ flush)"""
+        obj = self._get_for_write(id)
         if not obj:
             return False
         
         self.db.delete(obj)
-        self.db.commit()
+        self.db.flush()
         return True
     
     def count(self) -> int:
@@ -91,3 +145,56 @@ class BaseRepository(Generic[ModelType]):
             self.model.deleted_at.is_(None)
         ).count()
 
+    # ==================== Bulk (set-based) ====================
+
+    def get_existing_ids(self, ids: List[str]) -> List[str]:
+        """Các id trong `ids` đang tồn tại (chưa bị xóa), một truy vấn"""
+        if not ids:
+            return []
+        return [row[0] for row in self.db.query(self.model.id).filter(
+            self.model.id.in_(ids),
+            self.model.deleted_at.is_(None)
+        ).all()]
+
+    def insert_mappings(self, rows: List[dict], model: Optional[Type[Any]] = None) -> None:
+        """INSERT nhiều dòng bằng executemany, mỗi bộ cột khác nhau là một câu lệnh (không commit)"""
+        groups: Dict[tuple, List[dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        for group in groups.values():
+            self.db.execute(insert(model or self.model), group)
+
+    def update_mappings(self, rows: List[dict], model: Optional[Type[Any]] = None) -> None:
+        """UPDATE theo khóa chính cho nhiều dòng, mỗi dict phải có `id` (không commit)"""
+        if rows:
+            self.db.execute(update(model or self.model), rows)
+
+    def bulk_create(self, rows: List[dict], created_by: Optional[str] = None) -> List[str]:
+        """Tạo nhiều record bằng executemany (không commit), trả về danh sách id theo thứ tự đầu vào"""
+        prepared = [{**row, "id": row.get("id") or str(uuid.uuid4()), "created_by": created_by} for row in rows]
+        self.insert_mappings(prepared)
+        return [row["id"] for row in prepared]
+
+    def bulk_update(self, ids: List[str], values: dict, updated_by: Optional[str] = None) -> int:
+        """Gán cùng `values` cho mọi record trong `ids` bằng một câu UPDATE, trả về số dòng bị ảnh hưởng"""
+        if not ids:
+            return 0
+        result = self.db.execute(
+            update(self.model)
+            .where(self.model.id.in_(ids), self.model.deleted_at.is_(None))
+            .values(**values, updated_by=updated_by, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def bulk_soft_delete(self, ids: List[str], deleted_by: Optional[str] = None) -> int:
+        """Soft delete các record trong `ids` bằng một câu UPDATE, trả về số dòng bị ảnh hưởng"""
+        if not ids:
+            return 0
+        result = self.db.execute(
+            update(self.model)
+            .where(self.model.id.in_(ids), self.model.deleted_at.is_(None))
+            .values(deleted_at=datetime.utcnow(), deleted_by=deleted_by)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
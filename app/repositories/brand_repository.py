@@ -15,6 +15,13 @@ class BrandRepository(BaseRepository[Brand]):
             Brand.deleted_at.is_(None),
         ).first()
 
+    def get_existing_names(self, names: List[str]) -> List[str]:
+        """Các tên trong `names` đã được dùng bởi thương hiệu chưa bị xóa"""
+        return [row[0] for row in self.db.query(Brand.name).filter(
+            Brand.name.in_(names),
+            Brand.deleted_at.is_(None),
+        ).all()]
+
     def search(
         self,
         skip: int = 0,
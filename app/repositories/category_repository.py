@@ -15,6 +15,15 @@ class CategoryRepository(BaseRepository[Category]):
             Category.deleted_at.is_(None),
         ).first()
 
+    def get_ancestor_ids(self, category_id: str, max_depth: int = 50) -> List[str]:
+        """Danh sách id từ `category_id` đi ngược lên danh mục gốc (gồm chính nó)"""
+        ancestors = []
+        current = category_id
+        while current and len(ancestors) < max_depth:
+            ancestors.append(current)
+            current = self.db.query(Category.parent_id).filter(Category.id == current).scalar()
+        return ancestors
+
     def search(self, skip: int = 0, limit: int = 100, q: Optional[str] = None, sort_by: str = "id", sort_dir: str = "desc") -> Tuple[List[Category], int]:
         query = self.db.query(Category).filter(Category.deleted_at.is_(None))
         if q:
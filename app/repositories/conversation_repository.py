@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.orm import Session
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.repositories.base import BaseRepository, keyset_after
+
+# lịch sử hội thoại: mới nhất trước
+MESSAGE_ORDER = ((Message.created_at, True), (Message.id, True))
+
+
+class ConversationRepository(BaseRepository[Conversation]):
+    def __init__(self, db: Session):
+        super().__init__(Conversation, db)
+
+    def get_by_customer(self, customer_id: str) -> Optional[Conversation]:
+        """Hội thoại của khách hàng với shop (mỗi khách hàng một hội thoại)"""
+        return self.db.query(Conversation).filter(
+            Conversation.user1_id == customer_id,
+            Conversation.deleted_at.is_(None),
+        ).order_by(Conversation.created_at).first()
+
+    def list_for_user(self, user_id: Optional[str], skip: int = 0, limit: int = 20,
+                      unassigned: bool = False) -> Tuple[List[Conversation], int]:
+        """Hội thoại mới cập nhật trước; `user_id=None` là hộp thư chung của nhân viên"""
+        query = self.db.query(Conversation).filter(Conversation.deleted_at.is_(None))
+        if user_id is not None:
+            query = query.filter(or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id))
+        if unassigned:
+            query = query.filter(Conversation.user2_id.is_(None))
+        total = query.count()
+        items = query.order_by(Conversation.updated_at.desc(), Conversation.id.desc()).offset(skip).limit(limit).all()
+        return items, total
+
+    def claim(self, conversation_id: str, staff_id: str) -> bool:
+        """Gán nhân viên cho hội thoại chưa có người nhận; False nếu đã có người nhận trước"""
+        result = self.db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id, Conversation.user2_id.is_(None))
+            .values(user2_id=staff_id, updated_by=staff_id)
+            .execution_options(synchronize_session=False)
+        )
+        return bool(result.rowcount)
+
+    def set_last_messages(self, rows: List[dict]) -> None:
+        """Cập nhật `last_message` của nhiều hội thoại bằng một executemany.
+
+        Mỗi dòng: {"cid", "text", "at"}. Chỉ ghi đè khi tin mới hơn tin đang lưu, để lô ghi chậm
+        của worker khác không đè tin mới bằng tin cũ.
+        """
+        if not rows:
+            return
+        table = Conversation.__table__
+        self.db.execute(
+            update(table)
+            .where(table.c.id == bindparam("cid"),
+                   or_(table.c.updated_at.is_(None), table.c.updated_at <= bindparam("at")))
+            .values(last_message=bindparam("text"), updated_at=bindparam("at")),
+            rows,
+        )
+
+
+class MessageRepository(BaseRepository[Message]):
+    def __init__(self, db: Session):
+        super().__init__(Message, db)
+
+    def list_by_conversation(self, conversation_id: str, limit: int = 50,
+                             after_id: Optional[str] = None) -> Tuple[List[Message], bool]:
+        """Một trang tin nhắn (mới nhất trước) theo keyset; trả về (danh sách, còn tin cũ hơn hay không)"""
+        query = self.db.query(Message).filter(
+            Message.conversation_id == conversation_id,
+            Message.deleted_at.is_(None),
+        )
+        if after_id is not None:
+            query = query.filter(keyset_after(Message, MESSAGE_ORDER, after_id))
+        order = [column.desc() if desc else column.asc() for column, desc in MESSAGE_ORDER]
+        rows = query.order_by(*order).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+
+    def mark_read(self, conversation_id: str, reader_id: str) -> int:
+        """Đánh dấu đã đọc các tin của người kia trong hội thoại, trả về số tin được cập nhật"""
+        result = self.db.execute(
+            update(Message)
+            .where(Message.conversation_id == conversation_id, Message.sender_id != reader_id,
+                   Message.is_read.is_(False))
+            .values(is_read=True, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.job import Job
+from app.models.mixins import generate_uuid_str
+from app.repositories.base import BaseRepository
+
+CLAIMED_COLUMNS = (Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts, Job.run_at)
+
+
+def _due(now: datetime):
+    """Job chạy được: đến hạn, hoặc đang chạy mà lease đã hết hạn (worker chạy nó đã chết)"""
+    return or_(
+        and_(Job.status == "queued", Job.run_at <= now),
+        and_(Job.status == "running", Job.locked_until < now, Job.attempts < Job.max_attempts),
+    )
+
+
+class JobRepository(BaseRepository[Job]):
+    def __init__(self, db: Session):
+        super().__init__(Job, db)
+
+    def enqueue(self, name: str, payload: Optional[str], run_at: datetime, max_attempts: int,
+                idempotency_key: Optional[str] = None) -> Tuple[str, bool]:
+        """Thêm job; đã có job cùng `idempotency_key` thì trả về job đó. Trả về (id, có tạo mới không)"""
+        if idempotency_key is not None:
+            existing = self.db.scalar(select(Job.id).where(Job.idempotency_key == idempotency_key))
+            if existing is not None:
+                return existing, False
+        job_id = generate_uuid_str()
+        values = {"id": job_id, "name": name, "payload": payload, "status": "queued", "attempts": 0,
+                  "max_attempts": max_attempts, "run_at": run_at, "idempotency_key": idempotency_key}
+        if idempotency_key is None:
+            self.db.execute(insert(Job).values(**values))
+            return job_id, True
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(Job).values(**values))
+        except IntegrityError:
+            # request song song vừa thêm cùng key
+            return self.db.scalar(select(Job.id).where(Job.idempotency_key == idempotency_key)), False
+        return job_id, True
+
+    def claim(self, worker_id: str, budgets: Dict[str, List[int]], lease_seconds: float) -> List[tuple]:
+        """Nhận các job đến hạn có tên trong `budgets` (tên -> [số job còn nhận được]).
+
+        Các tên trỏ tới cùng một list dùng chung ngân sách đó.
+        """
+        now = datetime.utcnow()
+        names = [name for name, budget in budgets.items() if budget[0] > 0]
+        limit = sum(budget[0] for budget in {id(b): b for b in budgets.values()}.values() if budget[0] > 0)
+        if not names:
+            return []
+        candidates = self.db.execute(
+            select(Job.id, Job.name).where(_due(now), Job.name.in_(names)).order_by(Job.run_at).limit(limit * 2)
+        ).all()
+        claimed = []
+        for job_id, name in candidates:
+            if len(claimed) >= limit:
+                break
+            if budgets[name][0] <= 0:
+                continue
+            # UPDATE có điều kiện: hai worker cùng chọn một job thì chỉ một bên nhận được
+            result = self.db.execute(
+                update(Job)
+                .where(Job.id == job_id, _due(now))
+                .values(status="running", attempts=Job.attempts + 1, locked_by=worker_id,
+                        locked_until=now + timedelta(seconds=lease_seconds), updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                claimed.append(job_id)
+                budgets[name][0] -= 1
+        if not claimed:
+            return []
+        return self.db.execute(select(*CLAIMED_COLUMNS).where(Job.id.in_(claimed)).order_by(Job.run_at)).all()
+
+    def _finish(self, job_id: str, worker_id: str, attempt: int, values: dict) -> bool:
+        # chỉ worker đang giữ đúng lần chạy này được ghi kết quả (lease hết hạn thì lần chạy khác đã thay)
+        result = self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "running", Job.locked_by == worker_id, Job.attempts == attempt)
+            .values(locked_until=None, locked_by=None, updated_at=datetime.utcnow(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        return bool(result.rowcount)
+
+    def succeed(self, job_id: str, worker_id: str, attempt: int) -> bool:
+        return self._finish(job_id, worker_id, attempt, {"status": "succeeded", "finished_at": datetime.utcnow()})
+
+    def retry(self, job_id: str, worker_id: str, attempt: int, run_at: datetime, error: str) -> bool:
+        return self._finish(job_id, worker_id, attempt, {"status": "queued", "run_at": run_at, "last_error": error})
+
+    def fail(self, job_id: str, worker_id: str, attempt: int, error: str) -> bool:
+        return self._finish(job_id, worker_id, attempt,
+                            {"status": "failed", "finished_at": datetime.utcnow(), "last_error": error})
+
+    def extend_leases(self, worker_id: str, job_ids: List[str], lease_seconds: float) -> int:
+        if not job_ids:
+            return 0
+        return self.db.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), Job.status == "running", Job.locked_by == worker_id)
+            .values(locked_until=datetime.utcnow() + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    def release(self, worker_id: str, job_ids: List[str]) -> int:
+        """Trả job đang chạy dở (khi tắt worker) để worker khác nhận ngay, không chờ lease hết hạn"""
+        if not job_ids:
+            return 0
+        return self.db.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), Job.status == "running", Job.locked_by == worker_id)
+            .values(locked_until=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    def fail_abandoned(self) -> int:
+        """Job hết lần thử mà lần chạy cuối không ghi được kết quả (worker chết giữa chừng)"""
+        now = datetime.utcnow()
+        return self.db.execute(
+            update(Job)
+            .where(Job.status == "running", Job.locked_until < now, Job.attempts >= Job.max_attempts)
+            .values(status="failed", finished_at=now, locked_until=None, locked_by=None,
+                    last_error=func.coalesce(Job.last_error, "lease expired"))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    def purge_finished(self, before: datetime, limit: int = 1000) -> int:
+        """Xóa tối đa `limit` job đã xong trước `before` (theo lô để không khóa bảng lâu)"""
+        ids = self.db.scalars(
+            select(Job.id).where(Job.status.in_(("succeeded", "failed")), Job.finished_at < before).limit(limit)
+        ).all()
+        if not ids:
+            return 0
+        return self.db.execute(delete(Job).where(Job.id.in_(ids)).execution_options(synchronize_session=False)).rowcount
+
+    def depth(self) -> Dict[Tuple[str, str], int]:
+        """Số job đang chờ/đang chạy theo (tên, status)"""
+        rows = self.db.execute(
+            select(Job.name, Job.status, func.count()).where(Job.status.in_(("queued", "running")))
+            .group_by(Job.name, Job.status)
+        ).all()
+        return {(name, status): count for name, status, count in rows}
@@ -0,0 +1,208 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, exists, false, func, insert, literal, or_, select, true, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from app.models.notification import Notification
+from app.models.order import Order
+from app.models.role import Role
+from app.models.user import User
+from app.models.userNotification import UserNotification
+from app.models.userRole import UserRole
+from app.repositories.base import BaseRepository, keyset_after, sql_uuid
+
+# hộp thư: mới nhất trước
+INBOX_ORDER = ((Notification.created_at, True), (Notification.id, True))
+
+USER_NOTIFICATION_COLUMNS = ["id", "user_id", "notification_id", "is_read", "read_at", "created_at", "updated_at"]
+
+
+def segment_clauses(segment: dict) -> list:
+    """Điều kiện trên `users` của một nhóm user (các điều kiện kết hợp bằng AND)"""
+    clauses = [User.deleted_at.is_(None)]
+    if segment.get("roles"):
+        clauses.append(exists().where(
+            UserRole.user_id == User.id, UserRole.role_id == Role.id, Role.name.in_(segment["roles"])
+        ))
+    if segment.get("created_after"):
+        clauses.append(User.created_at >= segment["created_after"])
+    if segment.get("created_before"):
+        clauses.append(User.created_at < segment["created_before"])
+    if segment.get("has_orders") is not None:
+        has_orders = exists().where(Order.user_id == User.id, Order.deleted_at.is_(None))
+        clauses.append(has_orders if segment["has_orders"] else ~has_orders)
+    return clauses
+
+
+def _user_since(user_id: str):
+    # broadcast chỉ hiện với user tạo tài khoản trước thời điểm gửi
+    return select(User.created_at).where(User.id == user_id).scalar_subquery()
+
+
+def _visible_broadcasts(user_id: str) -> list:
+    return [
+        Notification.audience == "all",
+        Notification.deleted_at.is_(None),
+        Notification.created_at >= _user_since(user_id),
+    ]
+
+
+class LeaseLost(Exception):
+    """Worker khác đã nhận tiếp việc fan-out (lease hết hạn)"""
+
+
+class NotificationRepository(BaseRepository[Notification]):
+    def __init__(self, db: Session):
+        super().__init__(Notification, db)
+
+    # ==================== Fan-out ====================
+
+    def claim_fanout(self, notification_id: str, lease_seconds: float) -> bool:
+        """Nhận quyền fan-out thông báo segment đang chờ, hoặc đang gửi mà lease đã hết hạn"""
+        now = datetime.utcnow()
+        # UPDATE có điều kiện: hai lần chạy cùng lúc thì chỉ một bên nhận được
+        result = self.db.execute(
+            update(Notification)
+            .where(
+                Notification.id == notification_id,
+                Notification.audience == "segment",
+                Notification.deleted_at.is_(None),
+                or_(Notification.status == "pending",
+                    and_(Notification.status == "sending", Notification.lease_until < now)),
+            )
+            .values(status="sending", lease_until=now + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        return bool(result.rowcount)
+
+    def fan_out_chunk(self, notification: Notification, segment: dict, chunk_size: int,
+                      lease_seconds: float) -> List[str]:
+        """Tạo `UserNotification` cho tối đa `chunk_size` user tiếp theo của nhóm bằng một `INSERT ... SELECT`.
+
+        Tiến độ (id user cuối) được lưu cùng transaction, nên chạy lại không tạo trùng. Trả về id các
+        user trong lô; danh sách rỗng nghĩa là đã gửi xong.
+        """
+        after = notification.fanout_cursor
+        clauses = segment_clauses(segment)
+        if after is not None:
+            clauses.append(User.id > after)
+        user_ids = self.db.scalars(select(User.id).where(*clauses).order_by(User.id).limit(chunk_size)).all()
+        now = datetime.utcnow()
+        guard = [Notification.id == notification.id, Notification.status == "sending",
+                 Notification.fanout_cursor == after if after is not None else Notification.fanout_cursor.is_(None)]
+        if not user_ids:
+            values = {"status": "sent", "sent_at": now, "lease_until": None}
+            inserted = 0
+        else:
+            rows = select(
+                sql_uuid(), User.id, literal(notification.id), false(), literal(None), literal(now), literal(now),
+            ).where(*clauses, User.id <= user_ids[-1])
+            inserted = self.db.execute(
+                insert(UserNotification).from_select(USER_NOTIFICATION_COLUMNS, rows)
+            ).rowcount
+            values = {"fanout_cursor": user_ids[-1],
+                      "recipient_count": Notification.recipient_count + max(inserted, 0),
+                      "lease_until": now + timedelta(seconds=lease_seconds)}
+        result = self.db.execute(
+            update(Notification).where(*guard).values(**values).execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            raise LeaseLost(notification.id)
+        return list(user_ids)
+
+    # ==================== Hộp thư ====================
+
+    def existing_user_ids(self, user_ids: List[str]) -> List[str]:
+        return list(self.db.scalars(select(User.id).where(User.id.in_(user_ids), User.deleted_at.is_(None))))
+
+    def add_recipients(self, notification_id: str, user_ids: List[str]) -> None:
+        now = datetime.utcnow()
+        self.insert_mappings([
+            {"id": str(uuid.uuid4()), "user_id": user_id, "notification_id": notification_id,
+             "is_read": False, "created_at": now, "updated_at": now}
+            for user_id in user_ids
+        ], model=UserNotification)
+
+    def list_for_user(self, user_id: str, limit: int = 20,
+                      after_id: Optional[str] = None) -> Tuple[List[tuple], bool]:
+        """Một trang (Notification, is_read, read_at), gồm thông báo gửi tới user và broadcast"""
+        mine = aliased(UserNotification)
+        query = (
+            self.db.query(Notification, func.coalesce(mine.is_read, false()), mine.read_at)
+            .outerjoin(mine, and_(mine.notification_id == Notification.id, mine.user_id == user_id,
+                                  mine.deleted_at.is_(None)))
+            .filter(Notification.deleted_at.is_(None),
+                    or_(mine.id.isnot(None), and_(*_visible_broadcasts(user_id))))
+        )
+        if after_id is not None:
+            query = query.filter(keyset_after(Notification, INBOX_ORDER, after_id))
+        order = [column.desc() if desc else column.asc() for column, desc in INBOX_ORDER]
+        rows = query.order_by(*order).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+
+    def unread_count(self, user_id: str) -> int:
+        """Số tin chưa đọc: dòng `UserNotification` chưa đọc + broadcast chưa có dòng đã đọc của user"""
+        direct = self.db.scalar(
+            select(func.count()).select_from(UserNotification).join(
+                Notification, Notification.id == UserNotification.notification_id
+            ).where(UserNotification.user_id == user_id, UserNotification.is_read.is_(False),
+                    UserNotification.deleted_at.is_(None), Notification.deleted_at.is_(None))
+        )
+        broadcasts = self.db.scalar(
+            select(func.count()).select_from(Notification).where(
+                *_visible_broadcasts(user_id),
+                ~exists().where(UserNotification.notification_id == Notification.id,
+                                UserNotification.user_id == user_id),
+            )
+        )
+        return (direct or 0) + (broadcasts or 0)
+
+    def mark_read(self, user_id: str, notification_id: str) -> int:
+        """Đánh dấu đã đọc; broadcast chưa có dòng của user thì tạo dòng đã đọc. Trả về 1 nếu trước đó chưa đọc"""
+        now = datetime.utcnow()
+        result = self.db.execute(
+            update(UserNotification)
+            .where(UserNotification.user_id == user_id, UserNotification.notification_id == notification_id,
+                   UserNotification.is_read.is_(False))
+            .values(is_read=True, read_at=now, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return 1
+        broadcast = self.db.scalar(select(Notification.id).where(
+            Notification.id == notification_id, *_visible_broadcasts(user_id),
+            ~exists().where(UserNotification.notification_id == Notification.id,
+                            UserNotification.user_id == user_id),
+        ))
+        if broadcast is None:
+            return 0
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(UserNotification).values(
+                    id=sql_uuid(), user_id=user_id, notification_id=notification_id,
+                    is_read=True, read_at=now, created_at=now, updated_at=now,
+                ))
+        except IntegrityError:
+            # request song song đã đánh dấu trước
+            return 0
+        return 1
+
+    def mark_all_read(self, user_id: str) -> int:
+        """Đánh dấu đã đọc mọi thông báo của user (hai câu lệnh, không phụ thuộc số thông báo)"""
+        now = datetime.utcnow()
+        updated = self.db.execute(
+            update(UserNotification)
+            .where(UserNotification.user_id == user_id, UserNotification.is_read.is_(False))
+            .values(is_read=True, read_at=now, updated_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        rows = select(
+            sql_uuid(), literal(user_id), Notification.id, true(), literal(now), literal(now), literal(now),
+        ).where(
+            *_visible_broadcasts(user_id),
+            ~exists().where(UserNotification.notification_id == Notification.id,
+                            UserNotification.user_id == user_id),
+        )
+        inserted = self.db.execute(insert(UserNotification).from_select(USER_NOTIFICATION_COLUMNS, rows)).rowcount
+        return max(updated, 0) + max(inserted, 0)
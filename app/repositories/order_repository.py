@@ -1,21 +1,61 @@
-from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
 from app.models.order import Order
-from app.repositories.base import BaseRepository
-from sqlalchemy.orm import joinedload
+from app.models.orderDetail import OrderDetail
+from app.models.product import Product
+from app.models.productType import ProductType
+from app.repositories.base import BaseRepository, keyset_after
+
+# lịch sử đơn của user, mới nhất trước (index `ix_orders_user_created`, `ix_orders_user_status_created`)
+HISTORY_ORDER = ((Order.created_at, True), (Order.id, True))
+
 
 class OrderRepository(BaseRepository[Order]):
     def __init__(self, db: Session):
         super().__init__(Order, db)
 
-    # Thêm các method custom nếu cần, ví dụ lấy orders theo user, tra cứu lịch sử:
-
-    def get_by_user(self, user_id: str, skip: int = 0, limit: int = 20):
-        return self.db.query(Order)\
-            .filter(Order.user_id == user_id, Order.deleted_at.is_(None))\
-            .offset(skip).limit(limit).all()
+    def get_by_user(self, user_id: str, status: Optional[str] = None, limit: int = 20,
+                    after_id: Optional[str] = None) -> Tuple[List[Order], bool]:
+        """Một trang đơn của user (kèm payment) theo keyset; trả về (danh sách, còn trang sau hay không)"""
+        query = self.db.query(Order).options(joinedload(Order.payment)).filter(
+            Order.user_id == user_id,
+            Order.deleted_at.is_(None),
+        )
+        if status is not None:
+            query = query.filter(Order.status == status)
+        if after_id is not None:
+            query = query.filter(keyset_after(Order, HISTORY_ORDER, after_id))
+        order = [column.desc() if desc else column.asc() for column, desc in HISTORY_ORDER]
+        rows = query.order_by(*order).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
 
-    def get_detail(self, order_id: str):
+    def get_detail(self, order_id: str) -> Optional[Order]:
         return self.db.query(Order)\
-            .options(joinedload(Order.details))\
+            .options(joinedload(Order.payment))\
             .filter(Order.id == order_id, Order.deleted_at.is_(None))\
-            .first()
\ No newline at end of file
+            .first()
+
+    def get_items(self, order_ids: Iterable[str]) -> Dict[str, list]:
+        """Các dòng của nhiều đơn kèm tên, dung tích, ảnh sản phẩm trong một câu JOIN: {order_id: [dòng]}.
+
+        Ảnh là ảnh của variant, không có thì dùng thumbnail của sản phẩm.
+        """
+        order_ids = list(order_ids)
+        items: Dict[str, list] = {order_id: [] for order_id in order_ids}
+        if not order_ids:
+            return items
+        rows = self.db.query(
+            OrderDetail.order_id, OrderDetail.id, OrderDetail.product_type_id, ProductType.product_id,
+            Product.name.label("product_name"), ProductType.volume,
+            func.coalesce(ProductType.image_path, Product.thumbnail).label("image"),
+            OrderDetail.number.label("quantity"), OrderDetail.price,
+        )\
+            .outerjoin(ProductType, ProductType.id == OrderDetail.product_type_id)\
+            .outerjoin(Product, Product.id == ProductType.product_id)\
+            .filter(OrderDetail.order_id.in_(order_ids), OrderDetail.deleted_at.is_(None))\
+            .order_by(OrderDetail.order_id, OrderDetail.created_at, OrderDetail.id)\
+            .all()
+        for row in rows:
+            items[row.order_id].append(row)
+        return items
@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Iterable, Optional
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.order import Order
+from app.models.payment import Payment
+from app.models.paymentEvent import PaymentEvent
+from app.models.mixins import generate_uuid_str
+from app.repositories.base import BaseRepository
+
+
+class PaymentRepository(BaseRepository[Payment]):
+    def __init__(self, db: Session):
+        super().__init__(Payment, db)
+
+    def get_by_order(self, order_id: str) -> Optional[Payment]:
+        return self.db.scalar(select(Payment).where(Payment.order_id == order_id, Payment.deleted_at.is_(None)))
+
+    def start_attempt(self, order_id: str, method: str, amount: float, sources: Iterable[str]) -> Optional[Payment]:
+        """Tạo payment của đơn, hoặc mở lần thanh toán mới nếu payment đang ở một trong `sources`.
+
+        Trả về None nếu payment không ở trạng thái cho phép (đã thanh toán, đã hủy...).
+        """
+        if self.get_by_order(order_id) is None:
+            try:
+                with self.db.begin_nested():
+                    self.db.execute(insert(Payment).values(
+                        id=generate_uuid_str(), order_id=order_id, method=method, status="pending",
+                        amount=amount, attempts=1,
+                    ))
+                return self.get_by_order(order_id)
+            except IntegrityError:
+                # request song song vừa tạo payment cho đơn này
+                pass
+        result = self.db.execute(
+            update(Payment)
+            .where(Payment.order_id == order_id, Payment.status.in_(tuple(sources)))
+            .values(method=method, status="pending", amount=amount, attempts=Payment.attempts + 1,
+                    updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            return None
+        payment = self.get_by_order(order_id)
+        self.db.refresh(payment)
+        return payment
+
+    def transition(self, payment_id: str, target: str, sources: Iterable[str], **values) -> bool:
+        """UPDATE có điều kiện: chỉ chuyển sang `target` khi trạng thái hiện tại thuộc `sources`"""
+        result = self.db.execute(
+            update(Payment)
+            .where(Payment.id == payment_id, Payment.status.in_(tuple(sources)))
+            .values(status=target, updated_at=datetime.utcnow(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        return bool(result.rowcount)
+
+    def transition_order(self, order_id: str, target: str, sources: Iterable[str]) -> bool:
+        result = self.db.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status.in_(tuple(sources)), Order.deleted_at.is_(None))
+            .values(status=target, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        return bool(result.rowcount)
+
+    def record_event(self, provider: str, transaction_id: str, status: str, payment_id: Optional[str],
+                     amount: Optional[float], payload: Optional[str]) -> Optional[str]:
+        """Ghi webhook; trả về id sự kiện, None nếu giao dịch này đã được xử lý (webhook gửi lại)"""
+        event_id = generate_uuid_str()
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(PaymentEvent).values(
+                    id=event_id, provider=provider, transaction_id=transaction_id, status=status,
+                    payment_id=payment_id, amount=amount, result="pending", payload=payload,
+                ))
+        except IntegrityError:
+            return None
+        return event_id
+
+    def set_event_result(self, event_id: str, result: str) -> None:
+        self.db.execute(
+            update(PaymentEvent).where(PaymentEvent.id == event_id).values(result=result)
+            .execution_options(synchronize_session=False)
+        )
@@ -0,0 +1,16 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.productImport import ProductImport
+from app.repositories.base import BaseRepository
+
+
+class ProductImportRepository(BaseRepository[ProductImport]):
+    def __init__(self, db: Session):
+        super().__init__(ProductImport, db)
+
+    def save_progress(self, import_id: str, values: dict) -> None:
+        """Ghi trạng thái/tiến độ bằng một câu UPDATE (không commit)"""
+        self.db.execute(
+            update(ProductImport).where(ProductImport.id == import_id).values(**values)
+            .execution_options(synchronize_session=False)
+        )
@@ -1,6 +1,10 @@
+import uuid
+from datetime import datetime
 from typing import Optional, List, Tuple, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, asc, or_
+from sqlalchemy import func, desc, asc, or_, select, update
+from app.models.brand import Brand
+from app.models.category import Category
 from app.models.product import Product
 from app.models.productType import ProductType  
 from app.models.review import Review
@@ -124,4 +128,136 @@ class ProductRepository(BaseRepository[Product]):
             Product.is_active == True
         ).group_by(Product.id).order_by(
             desc('favorite_count')
-        ).limit(limit).all()
\ No newline at end of file
+        ).limit(limit).all()
+
+    # ==================== Ghi kèm variant ====================
+
+    VARIANT_COLUMNS = (
+        "type_value_id", "image_path", "price", "status", "quantity", "stock", "discount_price",
+        "volume", "ingredients", "usage", "skin_type", "origin",
+    )
+
+    def create_with_variants(self, product_data: dict, variants: List[dict],
+                             created_by: Optional[str] = None) -> str:
+        """
+        Tạo sản phẩm và toàn bộ variant trong một transaction (1 INSERT sản phẩm + 1 INSERT executemany).
+        Trả về id sản phẩm.
+        """
+        return self.create_many_with_variants([(product_data, variants)], created_by=created_by)[0]
+
+    def create_many_with_variants(self, items: List[Tuple[dict, List[dict]]],
+                                  created_by: Optional[str] = None) -> List[str]:
+        """Tạo nhiều sản phẩm kèm variant: 1 INSERT executemany cho sản phẩm, 1 cho variant (không commit)"""
+        product_rows, variant_rows = [], []
+        for product_data, variants in items:
+            product_id = str(uuid.uuid4())
+            product_rows.append({**product_data, "id": product_id, "created_by": created_by})
+            variant_rows.extend(
+                {**{c: v.get(c) for c in self.VARIANT_COLUMNS}, "id": str(uuid.uuid4()),
+                 "product_id": product_id, "created_by": created_by}
+                for v in variants
+            )
+        self.insert_mappings(product_rows)
+        self.insert_mappings(variant_rows, ProductType)
+        return [row["id"] for row in product_rows]
+
+    def update_with_variants(self, product_id: str, product_data: dict, variants: Optional[List[dict]],
+                             updated_by: Optional[str] = None) -> bool:
+        """
+        Cập nhật sản phẩm và đồng bộ variant trong transaction của unit of work hiện tại.
+        - `variants` là None: không đụng tới variant
+        - variant có `id`: cập nhật nếu có trường thay đổi; không có `id`: tạo mới
+        - variant hiện có nhưng không nằm trong danh sách: soft delete
+        Số câu lệnh không phụ thuộc số variant: 1 UPDATE sản phẩm, 1 SELECT variant,
+        tối đa 1 INSERT, 1 UPDATE (executemany) và 1 UPDATE soft delete.
+        Trả về False nếu sản phẩm không tồn tại; ValueError nếu `id` variant không thuộc sản phẩm.
+        """
+        now = datetime.utcnow()
+        result = self.db.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.deleted_at.is_(None))
+            .values(**product_data, updated_by=updated_by, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            return False
+
+        if variants is not None:
+            columns = [getattr(ProductType, c) for c in self.VARIANT_COLUMNS]
+            existing = {
+                row.id: row._asdict()
+                for row in self.db.execute(
+                    select(ProductType.id, *columns)
+                    .where(ProductType.product_id == product_id, ProductType.deleted_at.is_(None))
+                )
+            }
+            new_rows, changed_rows, kept = [], [], set()
+            for variant in variants:
+                variant_id = variant.get("id")
+                if variant_id is None:
+                    new_rows.append({**{c: variant.get(c) for c in self.VARIANT_COLUMNS}, "id": str(uuid.uuid4()),
+                                     "product_id": product_id, "created_by": updated_by})
+                    continue
+                current = existing.get(variant_id)
+                if current is None:
+                    # unit of work sẽ rollback cả UPDATE sản phẩm phía trên
+                    raise ValueError(f"Variant {variant_id} không thuộc sản phẩm này.")
+                kept.add(variant_id)
+                changes = {k: v for k, v in variant.items() if k in self.VARIANT_COLUMNS and current[k] != v}
+                if changes:
+                    # cùng một bộ cột cho mọi dòng để gộp thành một câu executemany
+                    merged = {c: current[c] for c in self.VARIANT_COLUMNS}
+                    changed_rows.append({**merged, **changes, "id": variant_id,
+                                         "updated_by": updated_by, "updated_at": now})
+            removed = [variant_id for variant_id in existing if variant_id not in kept]
+
+            self.insert_mappings(new_rows, ProductType)
+            self.update_mappings(changed_rows, ProductType)
+            if removed:
+                self.db.execute(
+                    update(ProductType)
+                    .where(ProductType.id.in_(removed))
+                    .values(deleted_at=now, deleted_by=updated_by)
+                    .execution_options(synchronize_session=False)
+                )
+        return True
+
+    # ==================== Import hàng loạt ====================
+
+    def get_brand_slug_map(self) -> Dict[str, str]:
+        """{slug: id} của các thương hiệu chưa bị xóa"""
+        return dict(self.db.execute(select(Brand.slug, Brand.id).where(Brand.deleted_at.is_(None))).all())
+
+    def get_category_slug_map(self) -> Dict[str, str]:
+        """{slug: id} của các danh mục chưa bị xóa"""
+        return dict(self.db.execute(select(Category.slug, Category.id).where(Category.deleted_at.is_(None))).all())
+
+    def find_for_import(self, ids: List[str], names: List[str]) -> List[Tuple[str, str]]:
+        """(id, name) của các sản phẩm khớp theo id hoặc tên, trong một câu truy vấn"""
+        conditions = []
+        if ids:
+            conditions.append(Product.id.in_(ids))
+        if names:
+            conditions.append(Product.name.in_(names))
+        if not conditions:
+            return []
+        return self.db.execute(
+            select(Product.id, Product.name)
+            .where(Product.deleted_at.is_(None), or_(*conditions))
+            .order_by(Product.created_at)
+        ).all()
+
+    def get_variant_keys(self, product_ids: List[str]) -> Dict[str, Dict[Any, str]]:
+        """{product_id: {variant_id | (volume, type_value_id): variant_id}} cho các sản phẩm"""
+        result: Dict[str, Dict[Any, str]] = {p_id: {} for p_id in product_ids}
+        if not product_ids:
+            return result
+        rows = self.db.execute(
+            select(ProductType.id, ProductType.product_id, ProductType.volume, ProductType.type_value_id)
+            .where(ProductType.product_id.in_(product_ids), ProductType.deleted_at.is_(None))
+        ).all()
+        for variant_id, product_id, volume, type_value_id in rows:
+            keys = result[product_id]
+            keys[variant_id] = variant_id
+            keys.setdefault((volume, type_value_id), variant_id)
+        return result
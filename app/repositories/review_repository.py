@@ -1,13 +1,74 @@
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from app.models.productRatingSummary import ProductRatingSummary
 from app.models.review import Review
-from app.repositories.base import BaseRepository
+from app.repositories.base import BaseRepository, keyset_after
+
+# thứ tự sắp xếp: danh sách (cột, giảm dần); luôn kết thúc bằng created_at, id để khóa keyset là duy nhất
+REVIEW_SORTS = {
+    "newest": ((Review.created_at, True), (Review.id, True)),
+    "rating_desc": ((Review.rating, True), (Review.created_at, True), (Review.id, True)),
+    "rating_asc": ((Review.rating, False), (Review.created_at, True), (Review.id, True)),
+}
+
 
 class ReviewRepository(BaseRepository[Review]):
     def __init__(self, db: Session):
         super().__init__(Review, db)
 
-    def get_by_product(self, product_id: str):
-        return self.db.query(Review).filter(
+    def list_by_product(self, product_id: str, sort: str = "newest", rating: Optional[int] = None,
+                        limit: int = 20, after_id: Optional[str] = None) -> Tuple[List[Review], bool]:
+        """Một trang review (kèm medias) theo keyset; trả về (danh sách, còn trang sau hay không)"""
+        keys = REVIEW_SORTS[sort]
+        query = self.db.query(Review).options(selectinload(Review.medias)).filter(
             Review.product_id == product_id,
-            Review.deleted_at.is_(None)
-        ).all()
\ No newline at end of file
+            Review.deleted_at.is_(None),
+        )
+        if rating is not None:
+            query = query.filter(Review.rating == rating)
+        if after_id is not None:
+            query = query.filter(keyset_after(Review, keys, after_id))
+        order = [column.desc() if desc else column.asc() for column, desc in keys]
+        rows = query.order_by(*order).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+
+    def get_rating_summary(self, product_id: str) -> Optional[ProductRatingSummary]:
+        return self.db.get(ProductRatingSummary, product_id)
+
+    def apply_rating_delta(self, product_id: str, removed: Optional[int] = None, added: Optional[int] = None) -> None:
+        """Cộng dồn thay đổi vào tổng hợp đánh giá bằng một câu UPDATE nguyên tử (không đọc-sửa-ghi)"""
+        values = {}
+        count = 0
+        total = 0
+        for rating, sign in ((removed, -1), (added, 1)):
+            if rating is None:
+                continue
+            column = getattr(ProductRatingSummary, f"star_{rating}")
+            values[column.key] = values.get(column.key, column) + sign
+            count += sign
+            total += sign * rating
+        if not values:
+            return
+        values["rating_count"] = ProductRatingSummary.rating_count + count
+        values["rating_sum"] = ProductRatingSummary.rating_sum + total
+        statement = (
+            update(ProductRatingSummary)
+            .where(ProductRatingSummary.product_id == product_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if self.db.execute(statement).rowcount:
+            return
+        # sản phẩm chưa có dòng tổng hợp: tạo mới; request song song tạo trước thì cộng dồn lại
+        row = ProductRatingSummary(product_id=product_id, rating_count=count, rating_sum=total,
+                                   **{f"star_{i}": 0 for i in range(1, 6)})
+        for rating, sign in ((removed, -1), (added, 1)):
+            if rating is not None:
+                setattr(row, f"star_{rating}", getattr(row, f"star_{rating}") + sign)
+        try:
+            with self.db.begin_nested():
+                self.db.add(row)
+        except IntegrityError:
+            self.db.execute(statement)
@@ -1,6 +1,6 @@
 from typing import Optional, List
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, func, update
 from app.models.user import User
 from app.models.role import Role
 from app.repositories.base import BaseRepository
@@ -21,6 +21,19 @@ class UserRepository(BaseRepository[User]):
             )
         ).first()
     
+    def get_by_email_with_roles(self, email: str) -> Optional[User]:
+        """Lấy user theo email kèm roles (nạp sẵn, không lazy load sau khi rời threadpool)"""
+        return self.db.query(User).options(selectinload(User.roles)).filter(
+            and_(
+                User.email == email,
+                User.deleted_at.is_(None)
+            )
+        ).first()
+    
+    def email_exists(self, email: str) -> bool:
+        """Email đã được dùng chưa, tính cả user đã xóa (unique index áp dụng cho mọi dòng)"""
+        return self.db.query(User.id).filter(User.email == email).first() is not None
+    
     def get_by_phone(self, phone_number: str) -> Optional[User]:
         """Lấy user theo số điện thoại (không bao gồm deleted)"""
         return self.db.query(User).filter(
@@ -39,6 +52,18 @@ class UserRepository(BaseRepository[User]):
             )
         ).first()
     
+    def bump_token_version(self, user_ids: List[str]) -> int:
+        """Tăng version (vô hiệu mọi token đã phát hành) và xóa refresh token, một câu UPDATE"""
+        if not user_ids:
+            return 0
+        result = self.db.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(version=func.coalesce(User.version, 1) + 1, refresh_token=None)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
     def assign_role(self, user: User, role_name: str) -> User:
         """Gán role cho user (tạo role nếu chưa tồn tại)"""
         role = self.db.query(Role).filter(Role.name.ilike(role_name)).first()
@@ -49,8 +74,7 @@ class UserRepository(BaseRepository[User]):
         
         if role not in user.roles:
             user.roles.append(role)
-            self.db.commit()
-            self.db.refresh(user)
+            self.db.flush()
         
         return user
     
@@ -59,7 +83,6 @@ class UserRepository(BaseRepository[User]):
         role = self.db.query(Role).filter(Role.name.ilike(role_name)).first()
         if role and role in user.roles:
             user.roles.remove(role)
-            self.db.commit()
-            self.db.refresh(user)
+            self.db.flush()
         return user
 
@@ -20,6 +20,15 @@ class VoucherRepository(BaseRepository[Voucher]):
             )
         ).first()
     
+    def get_existing_codes(self, codes: List[str]) -> List[str]:
+        """Các code trong `codes` đã được dùng (không bao gồm deleted)"""
+        return [row[0] for row in self.db.query(Voucher.code).filter(
+            and_(
+                Voucher.code.in_(codes),
+                Voucher.deleted_at.is_(None)
+            )
+        ).all()]
+
     def search(
         self,
         skip: int = 0,
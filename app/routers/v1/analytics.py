@@ -0,0 +1,96 @@
+from datetime import date, timedelta
+from enum import Enum
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.dependencies.database import get_db
+from app.dependencies.permission import require_permissions
+from app.schemas.response.analytics import RevenueSeriesResponse, TopItemResponse
+from app.schemas.response.base import BaseResponse
+from app.services.analytics_service import AnalyticsService, sales_day
+
+router = APIRouter()
+
+
+class Interval(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class TopMetric(str, Enum):
+    revenue = "revenue"
+    units = "units"
+    orders = "orders"
+
+
+def _range(date_from: Optional[date], date_to: Optional[date]):
+    """Mặc định 30 ngày gần nhất (theo ngày của bảng tổng hợp)"""
+    date_to = date_to or sales_day(None)
+    return date_from or date_to - timedelta(days=29), date_to
+
+
+@router.get("/revenue", response_model=BaseResponse[RevenueSeriesResponse])
+def get_revenue(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    interval: Interval = Query(Interval.day),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_permissions("analytics:read")),
+):
+    """Doanh thu, số đơn, số lượng bán theo ngày/tuần/tháng (Admin only)"""
+    date_from, date_to = _range(date_from, date_to)
+    try:
+        data = AnalyticsService(db).revenue(date_from, date_to, interval.value)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    meta = {"from": date_from, "to": date_to}
+    return BaseResponse(success=True, message="Lấy doanh thu thành công.", data=data, meta=meta)
+
+
+def _top(db: Session, dimension: str, date_from, date_to, by: TopMetric, limit: int):
+    date_from, date_to = _range(date_from, date_to)
+    try:
+        data = AnalyticsService(db).top(dimension, date_from, date_to, by.value, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    meta = {"from": date_from, "to": date_to, "by": by.value, "limit": limit}
+    return BaseResponse(success=True, message="Lấy thống kê thành công.", data=data, meta=meta)
+
+
+@router.get("/top-products", response_model=BaseResponse[List[TopItemResponse]])
+def get_top_products(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    by: TopMetric = Query(TopMetric.revenue),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_permissions("analytics:read")),
+):
+    """Sản phẩm bán chạy nhất theo doanh thu, số lượng hoặc số đơn (Admin only)"""
+    return _top(db, "product", date_from, date_to, by, limit)
+
+
+@router.get("/top-brands", response_model=BaseResponse[List[TopItemResponse]])
+def get_top_brands(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    by: TopMetric = Query(TopMetric.revenue),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_permissions("analytics:read")),
+):
+    return _top(db, "brand", date_from, date_to, by, limit)
+
+
+@router.get("/top-categories", response_model=BaseResponse[List[TopItemResponse]])
+def get_top_categories(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    by: TopMetric = Query(TopMetric.revenue),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_permissions("analytics:read")),
+):
+    return _top(db, "category", date_from, date_to, by, limit)
@@ -1,37 +1,81 @@
-from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.dependencies.database import get_db
-from app.schemas.request.auth import UserCreate, LoginRequest
+from app.dependencies.auth import get_current_user
+from app.schemas.request.auth import UserCreate, LoginRequest, RefreshTokenRequest
 from app.schemas.response.auth import UserResponse, TokenResponse
 from app.schemas.response.base import BaseResponse
-from app.services.auth_service import create_user, authenticate_user
-from app.core.security import create_access_token
-from app.core.config import settings
+from app.services.auth_service import (
+    create_user,
+    authenticate_user_async,
+    is_email_registered,
+    issue_tokens,
+    get_user_for_refresh,
+    revoke_user_tokens,
+)
+from app.core.password import PasswordHasherBusy, password_hasher
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Hệ thống đang bận, vui lòng thử lại sau.",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _register(db: Session, user_in: UserCreate, password_hash: str) -> UserResponse:
+    user = create_user(db, user_in, created_by=None, password_hash=password_hash)
+    # chuyển sang schema ngay trong threadpool để lazy load (nếu có) không chặn event loop
+    return UserResponse.model_validate(user, from_attributes=True)
+
+
+# Handler async: Argon2 chạy trên process pool, phần DB chạy trong threadpool,
+# nên một đợt đăng ký/đăng nhập không chiếm hết thread của các endpoint khác.
 @router.post("/register", response_model=BaseResponse[UserResponse], status_code=status.HTTP_201_CREATED)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
-    # note: service will hash password and create default role
-    user = create_user(db, user_in, created_by=None)
+async def register(user_in: UserCreate, db: Session = Depends(get_db)):
+    # loại email trùng trước khi tốn công băm
+    if await is_email_registered(db, user_in.email):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email đã được đăng ký.")
+    try:
+        password_hash = await password_hasher.hash(user_in.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    try:
+        user = await run_in_threadpool(_register, db, user_in, password_hash)
+    except IntegrityError:
+        # đăng ký đồng thời cùng email, hoặc trùng số điện thoại
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email hoặc số điện thoại đã được đăng ký.")
     return BaseResponse(success=True, message="Created", data=user)
 
 
 @router.post("/token", response_model=TokenResponse)
-def login(form_data: LoginRequest, db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.email, form_data.password)
+async def login(form_data: LoginRequest, db: Session = Depends(get_db)):
+    try:
+        user = await authenticate_user_async(db, form_data.email, form_data.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    token_data = {"sub": str(user.id), "email": user.email}
-    token, expire = create_access_token(token_data, expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    token_payload = {
-        "access_token": token,
-        "token_type": "bearer",
-        "scope": ",".join([r.name for r in getattr(user, "roles", [])]) if getattr(user, "roles", None) else "",
-        "expires_at": expire.isoformat(),
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-    }
-    return TokenResponse(**token_payload)
+    return TokenResponse(**issue_tokens(db, user))
+
+
+@router.post("/refresh", response_model=TokenResponse)
+def refresh(data: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """Đổi refresh token lấy cặp token mới; refresh token cũ hết hiệu lực (xoay token)"""
+    user = get_user_for_refresh(db, data.refresh_token)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    return TokenResponse(**issue_tokens(db, user))
+
+
+@router.post("/logout", response_model=BaseResponse[None])
+def logout(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """Đăng xuất khỏi mọi thiết bị: thu hồi toàn bộ access token và refresh token của user"""
+    revoke_user_tokens(db, [str(current_user.id)])
+    return BaseResponse(success=True, message="Đã đăng xuất.", data=None)
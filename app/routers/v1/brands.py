@@ -4,8 +4,10 @@ from sqlalchemy.orm import Session
 
 from app.dependencies.database import get_db
 from app.dependencies.pagination import get_pagination
-from app.dependencies.permission import require_roles
-from app.schemas.request.brand import BrandCreate, BrandUpdate, BrandResponse
+from app.dependencies.permission import require_permissions
+from app.schemas.request.brand import BrandCreate, BrandUpdate, BrandBulkUpdate, BrandResponse
+from app.schemas.request.bulk import BulkCreateRequest, BulkIdsRequest, BulkUpdateRequest
+from app.schemas.response.bulk import BulkResultResponse
 from app.schemas.response.base import BaseResponse
 from app.services.brand_service import (
     get_brand,
@@ -14,6 +16,9 @@ from app.services.brand_service import (
     create_brand,
     update_brand,
     soft_delete_brand,
+    bulk_create_brands,
+    bulk_update_brands,
+    bulk_delete_brands,
 )
 
 router = APIRouter(prefix="/brands", tags=["brands"])
@@ -24,7 +29,7 @@ def list_brands(
     params: dict = Depends(get_pagination),
     db: Session = Depends(get_db),
 ):
-    current_user = Depends(require_roles("CLIENT", "ADMIN")),
+    current_user = Depends(require_permissions("brands:read")),
     items, total = get_brands(
         db,
         skip=params.get("skip", 0),
@@ -46,7 +51,7 @@ def read_brand(brand_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("/", response_model=BaseResponse[BrandResponse], status_code=status.HTTP_201_CREATED)
-def create_brand_endpoint(brand_in: BrandCreate, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN")),):
+def create_brand_endpoint(brand_in: BrandCreate, db: Session = Depends(get_db), current_user = Depends(require_permissions("brands:write")),):
     if get_brand_by_name(db, brand_in.name):
         return BaseResponse(success=False, message="Tên thương hiệu đã tồn tại.", data=None)
     obj = create_brand(db, brand_in, created_by=str(current_user.id) if current_user else None)
@@ -54,7 +59,7 @@ def create_brand_endpoint(brand_in: BrandCreate, db: Session = Depends(get_db),
 
 
 @router.put("/{brand_id}", response_model=BaseResponse[BrandResponse])
-def update_brand_endpoint(brand_id: str, brand_in: BrandUpdate, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN")),):
+def update_brand_endpoint(brand_id: str, brand_in: BrandUpdate, db: Session = Depends(get_db), current_user = Depends(require_permissions("brands:write")),):
     obj = update_brand(db, brand_id, brand_in, updated_by=str(current_user.id) if current_user else None)
     if not obj:
         return BaseResponse(success=False, message="Không tìm thấy thương hiệu.", data=None)
@@ -62,8 +67,29 @@ def update_brand_endpoint(brand_id: str, brand_in: BrandUpdate, db: Session = De
 
 
 @router.delete("/{brand_id}", response_model=BaseResponse[None])
-def delete_brand_endpoint(brand_id: str, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN")),):
+def delete_brand_endpoint(brand_id: str, db: Session = Depends(get_db), current_user = Depends(require_permissions("brands:write")),):
     ok = soft_delete_brand(db, brand_id, deleted_by=str(current_user.id) if current_user else None)
     if not ok:
         return BaseResponse(success=False, message="Không tìm thấy thương hiệu.", data=None)
     return BaseResponse(success=True, message="Thương hiệu đã được xóa.", data=None)
+
+
+@router.post("/bulk", response_model=BaseResponse[BulkResultResponse], status_code=status.HTTP_201_CREATED)
+def bulk_create_brands_endpoint(data: BulkCreateRequest[BrandCreate], db: Session = Depends(get_db), current_user = Depends(require_permissions("brands:write")),):
+    try:
+        ids = bulk_create_brands(db, data.items, created_by=str(current_user.id) if current_user else None)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BaseResponse(success=True, message="Các thương hiệu đã được tạo.", data=BulkResultResponse(affected=len(ids), ids=ids))
+
+
+@router.patch("/bulk", response_model=BaseResponse[BulkResultResponse])
+def bulk_update_brands_endpoint(data: BulkUpdateRequest[BrandBulkUpdate], db: Session = Depends(get_db), current_user = Depends(require_permissions("brands:write")),):
+    affected = bulk_update_brands(db, data.ids, data.values, updated_by=str(current_user.id) if current_user else None)
+    return BaseResponse(success=True, message="Các thương hiệu đã được cập nhật.", data=BulkResultResponse(affected=affected))
+
+
+@router.post("/bulk-delete", response_model=BaseResponse[BulkResultResponse])
+def bulk_delete_brands_endpoint(data: BulkIdsRequest, db: Session = Depends(get_db), current_user = Depends(require_permissions("brands:write")),):
+    affected = bulk_delete_brands(db, data.ids, deleted_by=str(current_user.id) if current_user else None)
+    return BaseResponse(success=True, message="Các thương hiệu đã được xóa.", data=BulkResultResponse(affected=affected))
@@ -4,8 +4,10 @@ from sqlalchemy.orm import Session
 
 from app.dependencies.database import get_db
 from app.dependencies.pagination import get_pagination
-from app.dependencies.permission import require_roles
-from app.schemas.request.category import CategoryCreate, CategoryUpdate, CategoryResponse
+from app.dependencies.permission import require_permissions
+from app.schemas.request.category import CategoryCreate, CategoryUpdate, CategoryBulkUpdate, CategoryResponse
+from app.schemas.request.bulk import BulkCreateRequest, BulkIdsRequest, BulkUpdateRequest
+from app.schemas.response.bulk import BulkResultResponse
 from app.schemas.response.base import BaseResponse
 from app.services.category_service import (
     get_category,
@@ -15,6 +17,9 @@ from app.services.category_service import (
     delete_category,
     get_category_children,
     get_category_tree,
+    bulk_create_categories,
+    bulk_update_categories,
+    bulk_delete_categories,
 )
 
 router = APIRouter(prefix="/categories", tags=["categories"])
@@ -66,7 +71,7 @@ def read_category(category_id: str, db: Session = Depends(get_db)):
 def create_category_endpoint(
     category_in: CategoryCreate, 
     db: Session = Depends(get_db), 
-    current_user = Depends(require_roles("admin"))
+    current_user = Depends(require_permissions("categories:write"))
 ):
     """Tạo danh mục mới (Admin only)"""
     try:
@@ -81,7 +86,7 @@ def update_category_endpoint(
     category_id: str, 
     category_in: CategoryUpdate, 
     db: Session = Depends(get_db), 
-    current_user = Depends(require_roles("admin"))
+    current_user = Depends(require_permissions("categories:write"))
 ):
     """Cập nhật danh mục (Admin only)"""
     obj = update_category(db, category_id, category_in, updated_by=str(current_user.id) if current_user else None)
@@ -94,10 +99,49 @@ def update_category_endpoint(
 def delete_category_endpoint(
     category_id: str, 
     db: Session = Depends(get_db), 
-    current_user = Depends(require_roles("admin"))
+    current_user = Depends(require_permissions("categories:write"))
 ):
     """Xóa danh mục (Admin only)"""
     ok = delete_category(db, category_id, deleted_by=str(current_user.id) if current_user else None)
     if not ok:
         return BaseResponse(success=False, message="Không tìm thấy danh mục.", data=None)
     return BaseResponse(success=True, message="Danh mục đã được xóa.", data=None)
+
+
+@router.post("/bulk", response_model=BaseResponse[BulkResultResponse], status_code=status.HTTP_201_CREATED)
+def bulk_create_categories_endpoint(
+    data: BulkCreateRequest[CategoryCreate],
+    db: Session = Depends(get_db),
+    current_user = Depends(require_permissions("categories:write"))
+):
+    """Tạo nhiều danh mục trong một transaction (Admin only)"""
+    try:
+        ids = bulk_create_categories(db, data.items, created_by=str(current_user.id) if current_user else None)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BaseResponse(success=True, message="Các danh mục đã được tạo.", data=BulkResultResponse(affected=len(ids), ids=ids))
+
+
+@router.patch("/bulk", response_model=BaseResponse[BulkResultResponse])
+def bulk_update_categories_endpoint(
+    data: BulkUpdateRequest[CategoryBulkUpdate],
+    db: Session = Depends(get_db),
+    current_user = Depends(require_permissions("categories:write"))
+):
+    """Cập nhật hàng loạt danh mục bằng một câu UPDATE (Admin only)"""
+    try:
+        affected = bulk_update_categories(db, data.ids, data.values, updated_by=str(current_user.id) if current_user else None)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BaseResponse(success=True, message="Các danh mục đã được cập nhật.", data=BulkResultResponse(affected=affected))
+
+
+@router.post("/bulk-delete", response_model=BaseResponse[BulkResultResponse])
+def bulk_delete_categories_endpoint(
+    data: BulkIdsRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_permissions("categories:write"))
+):
+    """Xóa hàng loạt danh mục (soft delete) bằng một câu UPDATE (Admin only)"""
+    affected = bulk_delete_categories(db, data.ids, deleted_by=str(current_user.id) if current_user else None)
+    return BaseResponse(success=True, message="Các danh mục đã được xóa.", data=BulkResultResponse(affected=affected))
@@ -0,0 +1,225 @@
+import asyncio
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.middleware import authenticate_token
+from app.core.realtime import Connection, ConnectionLimitReached, hub
+from app.dependencies.auth import get_current_user
+from app.dependencies.database import get_db
+from app.dependencies.permission import has_permission
+from app.schemas.request.chat import ChatMessageCreate, ConversationCreate
+from app.schemas.response.base import BaseResponse
+from app.schemas.response.chat import ConversationResponse, MessageHistoryResponse, MessageResponse
+from app.services import chat_service
+from app.services.chat_service import ChatBusy, ChatForbidden, ChatService, ConversationNotFound
+
+router = APIRouter()
+
+# mã đóng WebSocket (4000-4999 dành cho ứng dụng)
+WS_UNAUTHORIZED = 4401
+WS_TRY_AGAIN_LATER = 1013
+
+
+def _is_staff(user) -> bool:
+    return has_permission(user, "chat:staff")
+
+
+def _get_accessible(service: ChatService, conversation_id: str, current_user):
+    conversation = service.get_conversation(conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hội thoại không tồn tại.")
+    if str(current_user.id) not in (conversation.user1_id, conversation.user2_id) and not _is_staff(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return conversation
+
+
+@router.get("/conversations", response_model=BaseResponse[List[ConversationResponse]])
+def list_conversations(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    unassigned: bool = Query(False, description="Nhân viên: chỉ hội thoại chưa có người nhận"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """Khách hàng: hội thoại của mình. Nhân viên (`chat:staff`): hộp thư chung của shop."""
+    service = ChatService(db)
+    user_id = None if _is_staff(current_user) else str(current_user.id)
+    items, total = service.list_conversations(user_id, skip=skip, limit=limit, unassigned=unassigned)
+    meta = {"skip": skip, "limit": limit, "total": total}
+    return BaseResponse(success=True, message="Lấy danh sách hội thoại thành công.", data=items, meta=meta)
+
+
+@router.post("/conversations", response_model=BaseResponse[ConversationResponse])
+def open_conversation(payload: ConversationCreate, db: Session = Depends(get_db),
+                      current_user = Depends(get_current_user)):
+    """Mở (hoặc lấy lại) hội thoại với shop; nhân viên truyền `user_id` để mở hội thoại với khách hàng"""
+    service = ChatService(db)
+    if payload.user_id is None or payload.user_id == str(current_user.id):
+        conversation = service.open_conversation(str(current_user.id))
+    elif _is_staff(current_user):
+        conversation = service.open_conversation(payload.user_id, staff_id=str(current_user.id))
+    else:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return BaseResponse(success=True, message="Mở hội thoại thành công.", data=conversation)
+
+
+@router.get("/conversations/{conversation_id}", response_model=BaseResponse[ConversationResponse])
+def get_conversation(conversation_id: str, db: Session = Depends(get_db),
+                     current_user = Depends(get_current_user)):
+    conversation = _get_accessible(ChatService(db), conversation_id, current_user)
+    return BaseResponse(success=True, message="Lấy thông tin hội thoại thành công.", data=conversation)
+
+
+@router.get("/conversations/{conversation_id}/messages", response_model=BaseResponse[MessageHistoryResponse])
+def get_messages(
+    conversation_id: str,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="`next_cursor` của trang trước (tin cũ hơn)"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    service = ChatService(db)
+    _get_accessible(service, conversation_id, current_user)
+    try:
+        page = service.history(conversation_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    meta = {"limit": limit, "next_cursor": page["next_cursor"]}
+    return BaseResponse(success=True, message="Lấy lịch sử tin nhắn thành công.", data=page, meta=meta)
+
+
+@router.post("/conversations/{conversation_id}/messages", response_model=BaseResponse[MessageResponse],
+             status_code=status.HTTP_201_CREATED)
+async def post_message(conversation_id: str, payload: ChatMessageCreate, current_user = Depends(get_current_user)):
+    """Gửi tin qua HTTP (khi không giữ WebSocket); trả về sau khi tin đã được lưu"""
+    try:
+        message, saved = await chat_service.send_message(
+            conversation_id, str(current_user.id), _is_staff(current_user), payload.message, payload.client_id
+        )
+        await saved
+    except ConversationNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hội thoại không tồn tại.")
+    except ChatForbidden:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except ChatBusy:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Hệ thống đang bận, vui lòng thử lại sau.", headers={"Retry-After": "1"})
+    return BaseResponse(success=True, message="Gửi tin nhắn thành công.", data=message)
+
+
+@router.post("/conversations/{conversation_id}/read", response_model=BaseResponse[int])
+async def read_conversation(conversation_id: str, current_user = Depends(get_current_user)):
+    """Đánh dấu đã đọc các tin của người kia, trả về số tin được đánh dấu"""
+    try:
+        count = await chat_service.mark_read(conversation_id, str(current_user.id), _is_staff(current_user))
+    except ConversationNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hội thoại không tồn tại.")
+    except ChatForbidden:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return BaseResponse(success=True, message="Đã đánh dấu đã đọc.", data=count)
+
+
+# ---------- WebSocket ----------
+
+async def _pump(websocket: WebSocket, connection: Connection) -> None:
+    """Task duy nhất ghi ra socket: gửi lần lượt sự kiện trong hàng đợi của kết nối"""
+    try:
+        while True:
+            event = await connection.queue.get()
+            if isinstance(event, str):
+                await websocket.close(code=WS_TRY_AGAIN_LATER, reason=event)
+                return
+            await websocket.send_text(json.dumps(event, separators=(",", ":"), ensure_ascii=False))
+    except Exception:
+        # client đã ngắt: vòng nhận sẽ thấy disconnect và dọn dẹp
+        return
+
+
+def _ack_when_saved(connection: Connection, message: dict):
+    def callback(future: asyncio.Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            connection.offer({"type": "error", "code": "not_saved", "client_id": message["client_id"],
+                              "detail": "Không lưu được tin nhắn, vui lòng gửi lại."})
+        else:
+            connection.offer({"type": "ack", "client_id": message["client_id"], "id": message["id"]})
+    return callback
+
+
+async def _handle_frame(connection: Connection, user, is_staff: bool, frame: dict) -> None:
+    kind = frame.get("type")
+    client_id = frame.get("client_id")
+    try:
+        if kind == "message":
+            message, saved = await chat_service.send_message(
+                str(frame.get("conversation_id") or ""), str(user.id), is_staff,
+                frame.get("message") if isinstance(frame.get("message"), str) else "", client_id,
+            )
+            saved.add_done_callback(_ack_when_saved(connection, message))
+        elif kind == "read":
+            await chat_service.mark_read(str(frame.get("conversation_id") or ""), str(user.id), is_staff)
+        elif kind == "ping":
+            connection.offer({"type": "pong"})
+        else:
+            raise ValueError(f"Loại sự kiện không hợp lệ: {kind!r}")
+    except ConversationNotFound:
+        connection.offer({"type": "error", "code": "not_found", "client_id": client_id,
+                          "detail": "Hội thoại không tồn tại."})
+    except ChatForbidden:
+        connection.offer({"type": "error", "code": "forbidden", "client_id": client_id, "detail": "Forbidden"})
+    except ChatBusy:
+        connection.offer({"type": "error", "code": "busy", "client_id": client_id,
+                          "detail": "Hệ thống đang bận, vui lòng thử lại sau."})
+    except ValueError as e:
+        connection.offer({"type": "error", "code": "invalid", "client_id": client_id, "detail": str(e)})
+
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """
+    WebSocket chat. Xác thực bằng access token (`?token=` vì trình duyệt không gửi được header,
+    hoặc header `Authorization: Bearer`).
+    - Client gửi: `{"type": "message", "conversation_id", "message", "client_id"}`,
+      `{"type": "read", "conversation_id"}`, `{"type": "ping"}`
+    - Server gửi: `message`, `ack` (tin đã lưu), `read`, `conversation` (hội thoại có người nhận),
+      `error`, `pong`
+    """
+    if token is None:
+        auth = websocket.headers.get("authorization", "")
+        token = auth[7:] if auth.startswith("Bearer ") else None
+    user = await authenticate_token(token) if token else None
+    if user is None:
+        await websocket.close(code=WS_UNAUTHORIZED)
+        return
+    is_staff = _is_staff(user)
+    connection = Connection(user.id, [chat_service.STAFF_GROUP] if is_staff else [], settings.REALTIME_SEND_QUEUE_SIZE)
+    try:
+        hub.register(connection)
+    except ConnectionLimitReached:
+        await websocket.close(code=WS_TRY_AGAIN_LATER)
+        return
+    sender = None
+    try:
+        await websocket.accept()
+        sender = asyncio.create_task(_pump(websocket, connection))
+        while connection.closed is None:
+            text = await websocket.receive_text()
+            try:
+                frame = json.loads(text)
+                if not isinstance(frame, dict):
+                    raise ValueError
+            except ValueError:
+                connection.offer({"type": "error", "code": "invalid", "detail": "Cần gửi một object JSON."})
+                continue
+            await _handle_frame(connection, user, is_staff, frame)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unregister(connection)
+        if sender is not None:
+            sender.cancel()
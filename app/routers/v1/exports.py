@@ -0,0 +1,68 @@
+from enum import Enum
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.dependencies.permission import require_permissions
+from app.services.export_service import ExportService
+
+router = APIRouter()
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.ndjson: "application/x-ndjson",
+}
+
+
+def _export(name: str, format: ExportFormat, gzip: bool) -> StreamingResponse:
+    service = ExportService()
+    filename = service.filename(name, format.value, gzip)
+    return StreamingResponse(
+        service.stream(name, format.value, gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/products")
+def export_products(
+    format: ExportFormat = Query(ExportFormat.csv, description="csv | ndjson"),
+    gzip: bool = Query(False, description="Nén gzip"),
+    current_user = Depends(require_permissions("exports:read"))
+):
+    """
+    Export toàn bộ sản phẩm, mỗi dòng là một variant (cùng định dạng với file import).
+    - Chỉ admin mới có quyền
+    """
+    return _export("products", format, gzip)
+
+
+@router.get("/orders")
+def export_orders(
+    format: ExportFormat = Query(ExportFormat.csv, description="csv | ndjson"),
+    gzip: bool = Query(False, description="Nén gzip"),
+    current_user = Depends(require_permissions("exports:read"))
+):
+    """
+    Export toàn bộ đơn hàng.
+    - Chỉ admin mới có quyền
+    """
+    return _export("orders", format, gzip)
+
+
+@router.get("/users")
+def export_users(
+    format: ExportFormat = Query(ExportFormat.csv, description="csv | ndjson"),
+    gzip: bool = Query(False, description="Nén gzip"),
+    current_user = Depends(require_permissions("exports:read"))
+):
+    """
+    Export toàn bộ người dùng (không gồm mật khẩu và token).
+    - Chỉ admin mới có quyền
+    """
+    return _export("users", format, gzip)
@@ -0,0 +1,16 @@
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends
+
+from app.core.database import engine, replica_engines
+from app.core.pool_metrics import pool_snapshot
+from app.dependencies.permission import require_permissions
+from app.schemas.response.base import BaseResponse
+
+router = APIRouter()
+
+
+@router.get("/pool", response_model=BaseResponse[List[Dict[str, Any]]])
+def get_pool_metrics(current_user = Depends(require_permissions("metrics:read"))):
+    """Trạng thái connection pool của primary và các replica (Admin only)"""
+    data = [pool_snapshot(e) for e in [engine, *replica_engines]]
+    return BaseResponse(success=True, message="OK", data=data)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.middleware import authenticate_token
+from app.core.realtime import Connection, ConnectionLimitReached
+from app.dependencies.auth import get_current_user
+from app.dependencies.database import get_db
+from app.dependencies.permission import require_permissions
+from app.schemas.request.notification import NotificationCreate
+from app.schemas.response.base import BaseResponse
+from app.schemas.response.notification import NotificationInboxResponse, NotificationResponse
+from app.services.notification_service import ALL_GROUP, NotificationService, notification_hub, unread
+
+router = APIRouter()
+
+
+@router.post("/", response_model=BaseResponse[NotificationResponse], status_code=status.HTTP_201_CREATED)
+def create_notification(payload: NotificationCreate, db: Session = Depends(get_db),
+                        current_user = Depends(require_permissions("notifications:write"))):
+    """Gửi thông báo. `audience=segment` trả về ngay ở trạng thái `pending`, fan-out chạy nền
+    (theo dõi qua `GET /{id}`)."""
+    try:
+        notification = NotificationService(db).create(payload, sender_id=str(current_user.id))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return BaseResponse(success=True, message="Tạo thông báo thành công.", data=notification)
+
+
+@router.get("/me", response_model=BaseResponse[NotificationInboxResponse])
+def get_my_notifications(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="`next_cursor` của trang trước"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """Hộp thư của user: thông báo gửi riêng, theo nhóm và broadcast, mới nhất trước"""
+    try:
+        page = NotificationService(db).inbox(str(current_user.id), limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    meta = {"limit": limit, "next_cursor": page["next_cursor"]}
+    return BaseResponse(success=True, message="Lấy danh sách thông báo thành công.", data=page, meta=meta)
+
+
+@router.get("/me/unread-count", response_model=BaseResponse[int])
+async def get_unread_count(current_user = Depends(get_current_user)):
+    count = await unread.get(str(current_user.id))
+    return BaseResponse(success=True, message="Lấy số thông báo chưa đọc thành công.", data=count)
+
+
+@router.post("/me/read-all", response_model=BaseResponse[int])
+def read_all_notifications(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """Đánh dấu đã đọc mọi thông báo, trả về số thông báo được đánh dấu"""
+    count = NotificationService(db).mark_all_read(str(current_user.id))
+    return BaseResponse(success=True, message="Đã đánh dấu đã đọc.", data=count)
+
+
+@router.post("/me/{notification_id}/read", response_model=BaseResponse[int])
+def read_notification(notification_id: str, db: Session = Depends(get_db),
+                      current_user = Depends(get_current_user)):
+    count = NotificationService(db).mark_read(str(current_user.id), notification_id)
+    return BaseResponse(success=True, message="Đã đánh dấu đã đọc.", data=count)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), ensure_ascii=False)}\n\n"
+
+
+async def _stream(request: Request, connection: Connection, user_id: str):
+    # client mất kết nối thì tự kết nối lại sau 3 giây
+    yield "retry: 3000\n" + _sse("unread", {"type": "unread", "unread": await unread.get(user_id)})
+    while True:
+        try:
+            event = await asyncio.wait_for(connection.queue.get(), settings.NOTIFICATION_SSE_HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+            if await request.is_disconnected():
+                return
+            # comment SSE: giữ kết nối qua proxy, trình duyệt bỏ qua
+            yield ": ping\n\n"
+            continue
+        if isinstance(event, str):
+            return
+        yield _sse(event["type"], {**event, "unread": await unread.get(user_id)})
+
+
+class _ConnectionStreamingResponse(StreamingResponse):
+    """Hủy đăng ký kết nối khi response kết thúc, kể cả khi generator chưa từng chạy
+    (client ngắt trước chunk đầu, gửi header lỗi...)"""
+
+    def __init__(self, connection: Connection, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection = connection
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            notification_hub.unregister(self.connection)
+
+
+@router.get("/me/stream")
+async def stream_notifications(request: Request, token: Optional[str] = Query(None)):
+    """
+    Server-Sent Events: `unread` (số chưa đọc, gửi ngay khi kết nối và khi thay đổi) và `notification`
+    (thông báo mới, kèm `unread`). `EventSource` không gửi được header nên nhận token qua `?token=`.
+    """
+    user = getattr(request.state, "user", None)
+    if user is None and token:
+        user = await authenticate_token(token)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    connection = Connection(user.id, [ALL_GROUP], settings.REALTIME_SEND_QUEUE_SIZE)
+    try:
+        notification_hub.register(connection)
+    except ConnectionLimitReached:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Hệ thống đang bận, vui lòng thử lại sau.", headers={"Retry-After": "5"})
+    return _ConnectionStreamingResponse(
+        connection,
+        _stream(request, connection, str(user.id)),
+        media_type="text/event-stream",
+        # tắt cache và buffer của nginx để sự kiện tới client ngay
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{notification_id}", response_model=BaseResponse[NotificationResponse])
+def get_notification(notification_id: str, db: Session = Depends(get_db),
+                     current_user = Depends(require_permissions("notifications:write"))):
+    """Trạng thái gửi (`pending`/`sending`/`sent`) và số người nhận đã fan-out"""
+    notification = NotificationService(db).get(notification_id)
+    if notification is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thông báo không tồn tại.")
+    return BaseResponse(success=True, message="Lấy thông tin thông báo thành công.", data=notification)
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.schemas.request.order import OrderCreate
-from app.schemas.response.order import OrderResponse
+from app.schemas.request.payment import OrderStatusUpdate
+from app.schemas.response.order import OrderHistoryPageResponse, OrderHistoryResponse, OrderResponse
 from app.services.order_service import OrderService
+from app.services.payment_service import PaymentConflict, PaymentService
+from app.dependencies.auth import get_current_user
 from app.dependencies.database import get_db
+from app.dependencies.permission import has_permission, require_permissions
 from app.schemas.response.base import BaseResponse
 
 router = APIRouter()
@@ -15,4 +20,44 @@ def create_order(order_in: OrderCreate, db: Session = Depends(get_db)):
         order = service.create_order(order_in)
         return BaseResponse(success=True, message="Đặt hàng thành công.", data=order)
     except Exception as e:
-        return BaseResponse(success=False, message=str(e), data=None)
\ No newline at end of file
+        return BaseResponse(success=False, message=str(e), data=None)
+
+
+@router.get("/me", response_model=BaseResponse[OrderHistoryPageResponse])
+def get_my_orders(
+    status_filter: Optional[str] = Query(None, alias="status", description="Chỉ lấy đơn ở trạng thái này"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="`next_cursor` của trang trước"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """Lịch sử đơn hàng của user, mới nhất trước, kèm các dòng (tên, ảnh sản phẩm) và trạng thái thanh toán"""
+    try:
+        page = OrderService(db).history(str(current_user.id), status=status_filter, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    meta = {"status": status_filter, "limit": limit, "next_cursor": page["next_cursor"]}
+    return BaseResponse(success=True, message="Lấy lịch sử đơn hàng thành công.", data=page, meta=meta)
+
+
+@router.get("/{order_id}", response_model=BaseResponse[OrderHistoryResponse])
+def get_order(order_id: str, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """Chi tiết đơn của mình (nhân viên có quyền `orders:write` xem được mọi đơn)"""
+    order = OrderService(db).get_detail(order_id)
+    if order is None or (order["user_id"] != str(current_user.id)
+                         and not has_permission(current_user, "orders:write")):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Đơn hàng không tồn tại.")
+    return BaseResponse(success=True, message="Lấy thông tin đơn hàng thành công.", data=order)
+
+
+@router.patch("/{order_id}/status", response_model=BaseResponse[OrderResponse])
+def update_order_status(order_id: str, payload: OrderStatusUpdate, db: Session = Depends(get_db),
+                        current_user = Depends(require_permissions("orders:write"))):
+    """Giao hàng / hoàn tất / hủy đơn theo máy trạng thái (`app/core/payments.py`)"""
+    try:
+        order = PaymentService(db).change_order_status(order_id, payload.status)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except PaymentConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return BaseResponse(success=True, message="Cập nhật trạng thái đơn hàng thành công.", data=order)
@@ -0,0 +1,77 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.core.database import run_in_session
+from app.core.metrics import payment_webhooks_total
+from app.core.payments import InvalidWebhook, providers
+from app.dependencies.auth import get_current_user
+from app.dependencies.database import get_db
+from app.dependencies.permission import has_permission
+from app.schemas.request.payment import PaymentCreate
+from app.schemas.response.base import BaseResponse
+from app.schemas.response.payment import CheckoutResponse, PaymentResponse
+from app.services.payment_service import PaymentConflict, PaymentService, available_methods
+
+router = APIRouter()
+
+
+@router.get("/methods", response_model=BaseResponse[List[str]])
+def get_payment_methods():
+    return BaseResponse(success=True, message="Lấy phương thức thanh toán thành công.",
+                        data=list(available_methods()))
+
+
+@router.post("/", response_model=BaseResponse[CheckoutResponse], status_code=status.HTTP_201_CREATED)
+def create_payment(payload: PaymentCreate, request: Request, db: Session = Depends(get_db),
+                   current_user = Depends(get_current_user)):
+    """Bắt đầu (hoặc thanh toán lại) đơn hàng của mình; chuyển khách tới `checkout_url` nếu có"""
+    client_ip = request.client.host if request.client else "127.0.0.1"
+    try:
+        payment, url = PaymentService(db).checkout(payload.order_id, str(current_user.id), payload.method, client_ip)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except PaymentConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return BaseResponse(success=True, message="Tạo thanh toán thành công.",
+                        data={"payment": payment, "checkout_url": url})
+
+
+@router.get("/{payment_id}", response_model=BaseResponse[PaymentResponse])
+def get_payment(payment_id: str, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """Trạng thái thanh toán (frontend hỏi lại sau khi khách quay về từ trang của provider)"""
+    payment = PaymentService(db).get(payment_id)
+    if payment is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thanh toán không tồn tại.")
+    if payment.order.user_id != str(current_user.id) and not has_permission(current_user, "orders:write"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thanh toán không tồn tại.")
+    return BaseResponse(success=True, message="Lấy thông tin thanh toán thành công.", data=payment)
+
+
+def _handle_webhook(db: Session, event) -> str:
+    return PaymentService(db).handle_webhook(event)
+
+
+@router.api_route("/webhooks/{provider}", methods=["GET", "POST"], include_in_schema=False)
+async def payment_webhook(provider: str, request: Request):
+    """Webhook/IPN của provider (VNPay gửi IPN bằng GET). Phản hồi theo định dạng provider yêu cầu;
+    webhook gửi lại được báo đã xử lý để provider thôi gửi."""
+    gateway = providers.get(provider)
+    if gateway is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    body = await request.body()
+    try:
+        event = gateway.parse_webhook(request.query_params, body, request.headers)
+    except InvalidWebhook:
+        payment_webhooks_total.inc((provider, "invalid"))
+        code, content = gateway.acknowledge("invalid")
+        return JSONResponse(content, status_code=code)
+    # ghi trên primary kể cả khi webhook là GET
+    result = await run_in_threadpool(run_in_session, _handle_webhook, event)
+    code, content = gateway.acknowledge(result)
+    return JSONResponse(content, status_code=code)
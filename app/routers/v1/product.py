@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+import os
+
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from enum import Enum
 
 from app.dependencies.database import get_db
 from app.dependencies.auth import get_current_user
-from app.dependencies.permission import require_roles
+from app.dependencies.permission import require_permissions
 from app.schemas.response.base import BaseResponse
-from app.schemas.response.product import ProductDetailResponse
+from app.schemas.response.product import ProductDetailResponse, ProductImportJobResponse
 from app.schemas.response.pagination import PaginatedResponse
-from app.schemas.request.product import ProductCreateRequest, ProductUpdateRequest
+from app.schemas.request.product import ProductCreateRequest, ProductUpdateRequest, ProductBulkUpdate
+from app.schemas.request.bulk import BulkCreateRequest, BulkIdsRequest, BulkUpdateRequest
+from app.schemas.response.bulk import BulkResultResponse
 from app.services.product_service import ProductService
+from app.services.product_import_service import ImportTooLarge, ProductImportService, detect_format, spool_upload
+from app.core.config import get_settings
+from app.core.multipart import MultipartError, MultipartFile
 
 router = APIRouter()
 
@@ -20,6 +28,11 @@ class SortOrder(str, Enum):
     desc = "desc"
 
 
+class ImportFormat(str, Enum):
+    csv = "csv"
+    jsonl = "jsonl"
+
+
 class ProductSortBy(str, Enum):
     created_at = "created_at"
     name = "name"
@@ -122,6 +135,15 @@ def get_products_by_category(
     return BaseResponse(success=True, message="Lấy sản phẩm theo category thành công.", data=products)
 
 
+@router.get("/import/{job_id}", response_model=BaseResponse[ProductImportJobResponse])
+def get_import_job(job_id: str, db: Session = Depends(get_db), current_user = Depends(require_permissions("products:write"))):
+    """Trạng thái job import: số dòng đã xử lý, số tạo mới/cập nhật, tốc độ (dòng/giây) và lỗi từng dòng"""
+    job = ProductImportService(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy job import.")
+    return BaseResponse(success=True, message="Lấy trạng thái import thành công.", data=job.to_dict())
+
+
 @router.get("/{product_id}", response_model=BaseResponse[ProductDetailResponse])
 def get_product_detail(product_id: str, db: Session = Depends(get_db)):
     service = ProductService(db)
@@ -137,17 +159,17 @@ def get_product_detail(product_id: str, db: Session = Depends(get_db)):
 def create_product(
     data: ProductCreateRequest,
     db: Session = Depends(get_db),
-    current_user = Depends(require_roles("admin"))
+    current_user = Depends(require_permissions("products:write"))
 ):
     """
-    Tạo sản phẩm mới.
+    Tạo sản phẩm mới kèm danh sách `product_types` (variant) trong cùng transaction.
     - Chỉ admin mới có quyền
     """
     service = ProductService(db)
-    product = service.create(data, created_by=current_user.id)
+    product_id = service.create(data, created_by=current_user.id)
     
     # Refresh để lấy thông tin đầy đủ
-    created_product = service.get_detail(product.id)
+    created_product = service.get_detail(product_id)
     return BaseResponse(
         success=True, 
         message="Tạo sản phẩm thành công.", 
@@ -155,36 +177,111 @@ def create_product(
     )
 
 
+@router.post("/bulk", response_model=BaseResponse[BulkResultResponse], status_code=status.HTTP_201_CREATED)
+def bulk_create_products(
+    data: BulkCreateRequest[ProductCreateRequest],
+    db: Session = Depends(get_db),
+    current_user = Depends(require_permissions("products:write"))
+):
+    """
+    Tạo nhiều sản phẩm (kèm variant) trong một transaction.
+    - Chỉ admin mới có quyền
+    """
+    try:
+        ids = ProductService(db).bulk_create(data.items, created_by=current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BaseResponse(success=True, message="Tạo sản phẩm thành công.", data=BulkResultResponse(affected=len(ids), ids=ids))
+
+
+@router.post("/import", response_model=BaseResponse[ProductImportJobResponse], status_code=status.HTTP_202_ACCEPTED)
+async def import_products(
+    request: Request,
+    format: Optional[ImportFormat] = Query(None, description="csv | jsonl (mặc định đoán từ tên file/Content-Type)"),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_permissions("products:write"))
+):
+    """
+    Import sản phẩm kèm variant từ file CSV hoặc JSONL.
+    - Gửi file dạng body thô (`Content-Type: text/csv` / `application/x-ndjson`) hoặc multipart field `file`
+    - File được ghi dần ra đĩa rồi xử lý bằng job nền; trả về job id để theo dõi qua `GET /products/import/{job_id}`
+    - Chỉ admin mới có quyền
+    """
+    settings = get_settings()
+    content_type = request.headers.get("content-type", "")
+    upload = None
+    if content_type.startswith("multipart/form-data"):
+        # đọc field `file` ngay khi body đang được nhận, dừng khi vượt PRODUCT_IMPORT_MAX_BYTES
+        upload = MultipartFile(request, "file")
+        stream = upload
+    else:
+        stream = request.stream()
+
+    try:
+        path = await spool_upload(stream, settings.PRODUCT_IMPORT_MAX_BYTES)
+    except MultipartError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ImportTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    if upload is not None:
+        content_type = upload.content_type
+    fmt = detect_format(format.value if format else None, upload.filename if upload else None, content_type)
+    if fmt is None:
+        os.remove(path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Không xác định được định dạng file (csv/jsonl).")
+
+    try:
+        # bản ghi import và job được commit cùng nhau khi request kết thúc (unit of work)
+        job = await run_in_threadpool(ProductImportService(db).submit, path, fmt, current_user.id)
+    except BaseException:
+        os.remove(path)
+        raise
+    return BaseResponse(success=True, message="Đã nhận file import.", data=job.to_dict())
+
+
 # ==================== PUT ====================
 
+@router.patch("/bulk", response_model=BaseResponse[BulkResultResponse])
+def bulk_update_products(
+    data: BulkUpdateRequest[ProductBulkUpdate],
+    db: Session = Depends(get_db),
+    current_user = Depends(require_permissions("products:write"))
+):
+    """
+    Cập nhật hàng loạt (ví dụ `{"ids": [...], "values": {"is_active": false}}`) bằng một câu UPDATE.
+    - Chỉ admin mới có quyền
+    """
+    try:
+        affected = ProductService(db).bulk_update(data.ids, data.values, updated_by=current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BaseResponse(success=True, message="Cập nhật sản phẩm thành công.", data=BulkResultResponse(affected=affected))
+
+
 @router.put("/{product_id}", response_model=BaseResponse[ProductDetailResponse])
 def update_product(
     product_id: str,
     data: ProductUpdateRequest,
     db: Session = Depends(get_db),
-    current_user = Depends(require_roles("admin"))
+    current_user = Depends(require_permissions("products:write"))
 ):
     """
     Cập nhật thông tin sản phẩm.
+    - Nếu gửi `product_types`: variant có `id` được cập nhật, không có `id` được tạo mới,
+      variant hiện có không nằm trong danh sách bị soft delete
     - Chỉ admin mới có quyền
     """
     service = ProductService(db)
-    
-    # Kiểm tra sản phẩm tồn tại
-    existing = service.get_detail(product_id)
-    if not existing:
+    try:
+        updated = service.update(product_id, data, updated_by=current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not updated:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Không tìm thấy sản phẩm."
         )
     
-    updated = service.update(product_id, data, updated_by=current_user.id)
-    if not updated:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cập nhật sản phẩm thất bại."
-        )
-    
     # Refresh để lấy thông tin đầy đủ
     updated_product = service.get_detail(product_id)
     return BaseResponse(
@@ -195,11 +292,25 @@ def update_product(
 
 # ==================== DELETE ====================
 
+@router.post("/bulk-delete", response_model=BaseResponse[BulkResultResponse])
+def bulk_delete_products(
+    data: BulkIdsRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_permissions("products:write"))
+):
+    """
+    Xóa hàng loạt sản phẩm (soft delete) bằng một câu UPDATE.
+    - Chỉ admin mới có quyền
+    """
+    affected = ProductService(db).bulk_delete(data.ids, deleted_by=current_user.id)
+    return BaseResponse(success=True, message="Xóa sản phẩm thành công.", data=BulkResultResponse(affected=affected))
+
+
 @router.delete("/{product_id}", response_model=BaseResponse)
 def delete_product(
     product_id: str,
     db: Session = Depends(get_db),
-    current_user = Depends(require_roles("admin"))
+    current_user = Depends(require_permissions("products:write"))
 ):
     """
     Xóa sản phẩm (soft delete).
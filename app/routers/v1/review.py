@@ -1,15 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from enum import Enum
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
 
+from app.core.config import settings
+from app.core.multipart import MultipartError, MultipartFile
+from app.core.process_pool import ProcessPoolBusy
+from app.dependencies.auth import get_current_user
 from app.dependencies.database import get_db
+from app.dependencies.permission import has_permission
 from app.schemas.response.base import BaseResponse
-from app.schemas.response.review import ReviewResponse
+from app.schemas.response.review import ProductReviewsResponse, ReviewMediaResponse, ReviewResponse
+from app.services.review_media_service import MediaTooLarge, ReviewMediaService, UnsupportedMedia, store_image
 from app.services.review_service import ReviewService
 from app.schemas.request.review import ReviewCreate, ReviewUpdate
 
 router = APIRouter()
 
+
+class ReviewSort(str, Enum):
+    newest = "newest"
+    rating_desc = "rating_desc"
+    rating_asc = "rating_asc"
+
+
 @router.post("/", response_model=BaseResponse[ReviewResponse])
 def create_review(review: ReviewCreate, db: Session = Depends(get_db)):
     service = ReviewService(db)
@@ -40,8 +55,64 @@ def delete_review(review_id: str, db: Session = Depends(get_db)):
         return BaseResponse(success=False, message="Review không tồn tại hoặc đã xóa.", data=False)
     return BaseResponse(success=True, message="Xóa review thành công.", data=True)
 
-@router.get("/product/{product_id}", response_model=BaseResponse[List[ReviewResponse]])
-def get_reviews_by_product(product_id: str, db: Session = Depends(get_db)):
+@router.get("/product/{product_id}", response_model=BaseResponse[ProductReviewsResponse])
+def get_reviews_by_product(
+    product_id: str,
+    sort: ReviewSort = Query(ReviewSort.newest, description="newest | rating_desc | rating_asc"),
+    rating: Optional[int] = Query(None, ge=1, le=5, description="Chỉ lấy review có số sao này"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="`next_cursor` của trang trước"),
+    db: Session = Depends(get_db),
+):
     service = ReviewService(db)
-    reviews = service.get_by_product(product_id)
-    return BaseResponse(success=True, message="Lấy danh sách review theo sản phẩm thành công.", data=reviews)
\ No newline at end of file
+    try:
+        page = service.list_by_product(product_id, sort=sort.value, rating=rating, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    meta = {"sort": sort.value, "rating": rating, "limit": limit, "next_cursor": page["next_cursor"]}
+    return BaseResponse(success=True, message="Lấy danh sách review theo sản phẩm thành công.", data=page, meta=meta)
+
+
+def _check_upload(service: ReviewMediaService, review_id: str, current_user) -> None:
+    review, count = service.get_review_for_upload(review_id)
+    if review is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review không tồn tại.")
+    if str(review.user_id) != str(current_user.id) and not has_permission(current_user, "reviews:write"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    if count >= settings.REVIEW_MEDIA_MAX_PER_REVIEW:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=f"Mỗi review tối đa {settings.REVIEW_MEDIA_MAX_PER_REVIEW} ảnh.")
+    # không giữ connection DB trong lúc nhận file và xử lý ảnh
+    service.db.close()
+
+
+def _add_media(service: ReviewMediaService, review_id: str, stored: dict, created_by: str) -> ReviewMediaResponse:
+    media = service.add_media(review_id, stored, created_by=created_by)
+    return ReviewMediaResponse.model_validate(media, from_attributes=True)
+
+
+@router.post("/{review_id}/medias", response_model=BaseResponse[ReviewMediaResponse], status_code=status.HTTP_201_CREATED)
+async def upload_review_media(review_id: str, request: Request, db: Session = Depends(get_db),
+                              current_user = Depends(get_current_user)):
+    """
+    Upload một ảnh cho review (multipart field `file`, JPEG/PNG/GIF/WebP).
+    - Chỉ người viết review (hoặc user có quyền `reviews:write`)
+    - Trả về URL bản WebP đã thu nhỏ (`path`) và thumbnail (`thumbnail_path`)
+    """
+    service = ReviewMediaService(db)
+    await run_in_threadpool(_check_upload, service, review_id, current_user)
+    try:
+        stored = await store_image(MultipartFile(request, "file"))
+    except MultipartError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except MediaTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except UnsupportedMedia as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except ProcessPoolBusy:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Hệ thống đang bận, vui lòng thử lại sau.", headers={"Retry-After": "1"})
+    media = await run_in_threadpool(_add_media, service, review_id, stored, str(current_user.id))
+    return BaseResponse(success=True, message="Tải ảnh lên thành công.", data=media)
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.dependencies.database import get_db
 from app.dependencies.pagination import get_pagination
-from app.dependencies.permission import require_roles
+from app.dependencies.permission import require_permissions
 from app.schemas.request.type import (
     TypeValueCreate,
     TypeValueUpdate,
@@ -23,14 +23,14 @@ router = APIRouter(prefix="/{type_id}/values", tags=["type-values"])
 
 
 @router.get("/", response_model=BaseResponse[List[TypeValueResponse]])
-def list_values(type_id: str, params: dict = Depends(get_pagination), db: Session = Depends(get_db), current_user = Depends(require_roles("CLIENT", "ADMIN"))):
+def list_values(type_id: str, params: dict = Depends(get_pagination), db: Session = Depends(get_db), current_user = Depends(require_permissions("type_values:read"))):
     items, total = list_type_values(db, type_id, skip=params.get("skip", 0), limit=params.get("limit", 100))
     meta = {**params, "total": total}
     return BaseResponse(success=True, message="OK", data=items, meta=meta)
 
 
 @router.post("/", response_model=BaseResponse[TypeValueResponse], status_code=status.HTTP_201_CREATED)
-def create_value(type_id: str, value_in: TypeValueCreate, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN"))):
+def create_value(type_id: str, value_in: TypeValueCreate, db: Session = Depends(get_db), current_user = Depends(require_permissions("type_values:write"))):
     try:
         obj = create_type_value(db, type_id, value_in, created_by=str(current_user.id) if current_user else None)
     except ValueError:
@@ -39,7 +39,7 @@ def create_value(type_id: str, value_in: TypeValueCreate, db: Session = Depends(
 
 
 @router.get("/{value_id}", response_model=BaseResponse[TypeValueResponse])
-def read_value(type_id: str, value_id: str, db: Session = Depends(get_db), current_user = Depends(require_roles("CLIENT", "ADMIN"))):
+def read_value(type_id: str, value_id: str, db: Session = Depends(get_db), current_user = Depends(require_permissions("type_values:read"))):
     obj = get_type_value(db, value_id)
     if not obj or obj.type_id != type_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Value not found")
@@ -47,7 +47,7 @@ def read_value(type_id: str, value_id: str, db: Session = Depends(get_db), curre
 
 
 @router.put("/{value_id}", response_model=BaseResponse[TypeValueResponse])
-def update_value(type_id: str, value_id: str, value_in: TypeValueUpdate, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN"))):
+def update_value(type_id: str, value_id: str, value_in: TypeValueUpdate, db: Session = Depends(get_db), current_user = Depends(require_permissions("type_values:write"))):
     obj = update_type_value(db, value_id, value_in, updated_by=str(current_user.id) if current_user else None)
     if not obj or obj.type_id != type_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Value not found")
@@ -55,7 +55,7 @@ def update_value(type_id: str, value_id: str, value_in: TypeValueUpdate, db: Ses
 
 
 @router.delete("/{value_id}", response_model=BaseResponse[None])
-def delete_value(type_id: str, value_id: str, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN"))):
+def delete_value(type_id: str, value_id: str, db: Session = Depends(get_db), current_user = Depends(require_permissions("type_values:write"))):
     obj = get_type_value(db, value_id)
     if not obj or obj.type_id != type_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Value not found")
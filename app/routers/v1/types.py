@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.dependencies.database import get_db
 from app.dependencies.pagination import get_pagination
-from app.dependencies.permission import require_roles
+from app.dependencies.permission import require_permissions
 from app.schemas.request.type import (
     TypeCreate,
     TypeUpdate,
@@ -23,7 +23,7 @@ router = APIRouter(prefix="/types", tags=["types"])
 
 
 @router.get("/", response_model=BaseResponse[List[TypeResponse]])
-def list_types(params: dict = Depends(get_pagination), db: Session = Depends(get_db), current_user = Depends(require_roles("CLIENT", "ADMIN"))):
+def list_types(params: dict = Depends(get_pagination), db: Session = Depends(get_db), current_user = Depends(require_permissions("types:read"))):
     items, total = get_types(
         db,
         skip=params.get("skip", 0),
@@ -37,7 +37,7 @@ def list_types(params: dict = Depends(get_pagination), db: Session = Depends(get
 
 
 @router.get("/{type_id}", response_model=BaseResponse[TypeResponse])
-def read_type(type_id: str, db: Session = Depends(get_db), current_user = Depends(require_roles("CLIENT", "ADMIN"))):
+def read_type(type_id: str, db: Session = Depends(get_db), current_user = Depends(require_permissions("types:read"))):
     obj = get_type(db, type_id)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Type not found")
@@ -45,13 +45,13 @@ def read_type(type_id: str, db: Session = Depends(get_db), current_user = Depend
 
 
 @router.post("/", response_model=BaseResponse[TypeResponse], status_code=status.HTTP_201_CREATED)
-def create_type_endpoint(type_in: TypeCreate, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN"))):
+def create_type_endpoint(type_in: TypeCreate, db: Session = Depends(get_db), current_user = Depends(require_permissions("types:write"))):
     obj = create_type(db, type_in, created_by=str(current_user.id) if current_user else None)
     return BaseResponse(success=True, message="Created", data=obj)
 
 
 @router.put("/{type_id}", response_model=BaseResponse[TypeResponse])
-def update_type_endpoint(type_id: str, type_in: TypeUpdate, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN"))):
+def update_type_endpoint(type_id: str, type_in: TypeUpdate, db: Session = Depends(get_db), current_user = Depends(require_permissions("types:write"))):
     obj = update_type(db, type_id, type_in, updated_by=str(current_user.id) if current_user else None)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Type not found")
@@ -59,7 +59,7 @@ def update_type_endpoint(type_id: str, type_in: TypeUpdate, db: Session = Depend
 
 
 @router.delete("/{type_id}", response_model=BaseResponse[None])
-def delete_type_endpoint(type_id: str, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN"))):
+def delete_type_endpoint(type_id: str, db: Session = Depends(get_db), current_user = Depends(require_permissions("types:write"))):
     ok = delete_type(db, type_id, deleted_by=str(current_user.id) if current_user else None)
     if not ok:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Type not found")
@@ -5,16 +5,18 @@ from sqlalchemy.orm import Session
 from app.dependencies.database import get_db
 from app.dependencies.auth import get_current_user
 from app.dependencies.pagination import get_pagination
-from app.dependencies.permission import require_roles
+from app.dependencies.permission import has_permission, require_permissions
 from app.schemas.request.auth import UserUpdate
 from app.schemas.response.auth import UserResponse
+from app.schemas.request.bulk import BulkIdsRequest
 from app.schemas.response.base import BaseResponse
-from app.services.user_service import get_user, list_users, update_user, delete_user
+from app.schemas.response.bulk import BulkResultResponse
+from app.services.user_service import get_user, list_users, update_user, delete_user, bulk_delete_users
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/", response_model=BaseResponse[List[UserResponse]])
-def list_users_endpoint(params: dict = Depends(get_pagination), db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN"))):
+def list_users_endpoint(params: dict = Depends(get_pagination), db: Session = Depends(get_db), current_user = Depends(require_permissions("users:read"))):
     items, total = list_users(db, skip=params.get("skip", 0), limit=params.get("limit", 100), q=params.get("q"))
     meta = {**params, "total": total}
     return BaseResponse(success=True, message="OK", data=items, meta=meta)
@@ -25,21 +27,28 @@ def read_user(user_id: str, db: Session = Depends(get_db), current_user = Depend
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     # allow admins or the user themself
-    user_roles = [r.name for r in getattr(current_user, "roles", [])]
-    if "ADMIN" not in user_roles and str(current_user.id) != str(user_id):
+    if not has_permission(current_user, "users:read") and str(current_user.id) != str(user_id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
     return BaseResponse(success=True, message="OK", data=obj)
 
 @router.put("/{user_id}", response_model=BaseResponse[UserResponse])
-def update_user_endpoint(user_id: str, user_in: UserUpdate, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN"))):
+def update_user_endpoint(user_id: str, user_in: UserUpdate, db: Session = Depends(get_db), current_user = Depends(require_permissions("users:write"))):
     obj = update_user(db, user_id, user_in, updated_by=str(current_user.id) if current_user else None)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return BaseResponse(success=True, message="Updated", data=obj)
 
 @router.delete("/{user_id}", response_model=BaseResponse[None])
-def delete_user_endpoint(user_id: str, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN"))):
+def delete_user_endpoint(user_id: str, db: Session = Depends(get_db), current_user = Depends(require_permissions("users:write"))):
     ok = delete_user(db, user_id, deleted_by=str(current_user.id) if current_user else None)
     if not ok:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return BaseResponse(success=True, message="Deleted", data=None)
+
+@router.post("/bulk-delete", response_model=BaseResponse[BulkResultResponse])
+def bulk_delete_users_endpoint(data: BulkIdsRequest, db: Session = Depends(get_db), current_user = Depends(require_permissions("users:write"))):
+    try:
+        affected = bulk_delete_users(db, data.ids, deleted_by=str(current_user.id) if current_user else None)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BaseResponse(success=True, message="Deleted", data=BulkResultResponse(affected=affected))
@@ -4,8 +4,10 @@ from sqlalchemy.orm import Session
 
 from app.dependencies.database import get_db
 from app.dependencies.pagination import get_pagination
-from app.dependencies.permission import require_roles
-from app.schemas.request.voucher import VoucherCreate, VoucherUpdate, VoucherResponse
+from app.dependencies.permission import require_permissions
+from app.schemas.request.voucher import VoucherCreate, VoucherUpdate, VoucherBulkUpdate, VoucherResponse
+from app.schemas.request.bulk import BulkCreateRequest, BulkIdsRequest, BulkUpdateRequest
+from app.schemas.response.bulk import BulkResultResponse
 from app.schemas.response.base import BaseResponse
 from app.services.voucher_service import (
     get_voucher,
@@ -14,6 +16,9 @@ from app.services.voucher_service import (
     create_voucher,
     update_voucher,
     soft_delete_voucher,
+    bulk_create_vouchers,
+    bulk_update_vouchers,
+    bulk_delete_vouchers,
 )
 
 router = APIRouter(prefix="/vouchers", tags=["vouchers"])
@@ -22,7 +27,7 @@ router = APIRouter(prefix="/vouchers", tags=["vouchers"])
 def list_vouchers(
     params: dict = Depends(get_pagination),
     db: Session = Depends(get_db),
-    current_user = Depends(require_roles("CLIENT", "ADMIN")),
+    current_user = Depends(require_permissions("vouchers:read")),
 ):
     items, total = get_vouchers(
         db,
@@ -38,29 +43,47 @@ def list_vouchers(
     return BaseResponse(success=True, message="OK", data=items, meta=meta)
 
 @router.get("/{voucher_id}", response_model=BaseResponse[VoucherResponse])
-def read_voucher(voucher_id: str, db: Session = Depends(get_db), current_user = Depends(require_roles("CLIENT", "ADMIN"))):
+def read_voucher(voucher_id: str, db: Session = Depends(get_db), current_user = Depends(require_permissions("vouchers:read"))):
     obj = get_voucher(db, voucher_id)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Voucher not found")
     return BaseResponse(success=True, message="OK", data=obj)
 
 @router.post("/", response_model=BaseResponse[VoucherResponse], status_code=status.HTTP_201_CREATED)
-def create_voucher_endpoint(voucher_in: VoucherCreate, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN")),):
+def create_voucher_endpoint(voucher_in: VoucherCreate, db: Session = Depends(get_db), current_user = Depends(require_permissions("vouchers:write")),):
     if get_voucher_by_code(db, voucher_in.code):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Voucher code already exists")
     obj = create_voucher(db, voucher_in, created_by=str(current_user.id) if current_user else None)
     return BaseResponse(success=True, message="Created", data=obj)
 
 @router.put("/{voucher_id}", response_model=BaseResponse[VoucherResponse])
-def update_voucher_endpoint(voucher_id: str, voucher_in: VoucherUpdate, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN")),):
+def update_voucher_endpoint(voucher_id: str, voucher_in: VoucherUpdate, db: Session = Depends(get_db), current_user = Depends(require_permissions("vouchers:write")),):
     obj = update_voucher(db, voucher_id, voucher_in, updated_by=str(current_user.id) if current_user else None)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Voucher not found")
     return BaseResponse(success=True, message="Updated", data=obj)
 
 @router.delete("/{voucher_id}", response_model=BaseResponse[None])
-def delete_voucher_endpoint(voucher_id: str, db: Session = Depends(get_db), current_user = Depends(require_roles("ADMIN")),):
+def delete_voucher_endpoint(voucher_id: str, db: Session = Depends(get_db), current_user = Depends(require_permissions("vouchers:write")),):
     ok = soft_delete_voucher(db, voucher_id, deleted_by=str(current_user.id) if current_user else None)
     if not ok:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Voucher not found")
-    return BaseResponse(success=True, message="Deleted", data=None)
\ No newline at end of file
+    return BaseResponse(success=True, message="Deleted", data=None)
+
+@router.post("/bulk", response_model=BaseResponse[BulkResultResponse], status_code=status.HTTP_201_CREATED)
+def bulk_create_vouchers_endpoint(data: BulkCreateRequest[VoucherCreate], db: Session = Depends(get_db), current_user = Depends(require_permissions("vouchers:write")),):
+    try:
+        ids = bulk_create_vouchers(db, data.items, created_by=str(current_user.id) if current_user else None)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BaseResponse(success=True, message="Created", data=BulkResultResponse(affected=len(ids), ids=ids))
+
+@router.patch("/bulk", response_model=BaseResponse[BulkResultResponse])
+def bulk_update_vouchers_endpoint(data: BulkUpdateRequest[VoucherBulkUpdate], db: Session = Depends(get_db), current_user = Depends(require_permissions("vouchers:write")),):
+    affected = bulk_update_vouchers(db, data.ids, data.values, updated_by=str(current_user.id) if current_user else None)
+    return BaseResponse(success=True, message="Updated", data=BulkResultResponse(affected=affected))
+
+@router.post("/bulk-delete", response_model=BaseResponse[BulkResultResponse])
+def bulk_delete_vouchers_endpoint(data: BulkIdsRequest, db: Session = Depends(get_db), current_user = Depends(require_permissions("vouchers:write")),):
+    affected = bulk_delete_vouchers(db, data.ids, deleted_by=str(current_user.id) if current_user else None)
+    return BaseResponse(success=True, message="Deleted", data=BulkResultResponse(affected=affected))
@@ -19,6 +19,12 @@ class BrandUpdate(BaseModel):
     description: Optional[str] = Field(None, max_length=255)
 
 
+class BrandBulkUpdate(BaseModel):
+    """Các trường được phép cập nhật hàng loạt (tên/slug là duy nhất nên không nằm trong đây)"""
+    image_path: Optional[str] = Field(None, max_length=255)
+    description: Optional[str] = Field(None, max_length=255)
+
+
 class BrandInDBBase(BrandBase):
     id: str
     slug: Optional[str] = None
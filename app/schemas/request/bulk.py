@@ -0,0 +1,24 @@
+from typing import Generic, List, TypeVar
+from pydantic import BaseModel, Field
+from pydantic.generics import GenericModel
+
+T = TypeVar("T")
+
+# Giới hạn số record mỗi thao tác hàng loạt
+MAX_BULK_ITEMS = 1000
+
+
+class BulkIdsRequest(BaseModel):
+    """Danh sách id cho thao tác hàng loạt (ví dụ soft delete)"""
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class BulkCreateRequest(GenericModel, Generic[T]):
+    """Tạo nhiều record trong một transaction"""
+    items: List[T] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class BulkUpdateRequest(GenericModel, Generic[T]):
+    """Gán cùng `values` cho mọi record trong `ids` (chỉ các trường được gửi lên)"""
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+    values: T
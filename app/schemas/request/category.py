@@ -21,6 +21,13 @@ class CategoryUpdate(BaseModel):
     parent_id: Optional[str] = None
 
 
+class CategoryBulkUpdate(BaseModel):
+    """Các trường được phép cập nhật hàng loạt (tên/slug là duy nhất nên không nằm trong đây)"""
+    image_path: Optional[str] = Field(None, max_length=255)
+    description: Optional[str] = None
+    parent_id: Optional[str] = None
+
+
 class CategoryInDBBase(CategoryBase):
     id: str
     slug: Optional[str] = None
@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class ConversationCreate(BaseModel):
+    # nhân viên mở hội thoại với khách hàng; khách hàng bỏ trống (hội thoại với shop)
+    user_id: Optional[str] = None
+
+class ChatMessageCreate(BaseModel):
+    message: str = Field(..., min_length=1)
+    # id tạm phía client, được gửi lại trong sự kiện/ack để client khớp tin đã gửi
+    client_id: Optional[str] = Field(None, max_length=64)
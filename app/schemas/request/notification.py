@@ -0,0 +1,33 @@
+from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+
+from app.core.config import settings
+
+class NotificationSegment(BaseModel):
+    # các điều kiện kết hợp bằng AND; bỏ trống cả nhóm nghĩa là mọi user hiện có
+    roles: Optional[List[str]] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    has_orders: Optional[bool] = None
+
+class NotificationCreate(BaseModel):
+    title: str = Field(..., min_length=1, max_length=200)
+    content: Optional[str] = None
+    type: Optional[str] = Field(None, max_length=50)
+    # user: gửi tới `user_ids`; segment: gửi tới nhóm `segment` (fan-out nền); all: broadcast
+    audience: Literal["user", "segment", "all"] = "user"
+    user_ids: List[str] = []
+    segment: Optional[NotificationSegment] = None
+
+    @model_validator(mode="after")
+    def check_audience(self):
+        if self.audience == "user":
+            if not self.user_ids:
+                raise ValueError("Cần `user_ids` khi audience = user.")
+            if len(self.user_ids) > settings.NOTIFICATION_DIRECT_MAX_USERS:
+                raise ValueError(f"Gửi trực tiếp tối đa {settings.NOTIFICATION_DIRECT_MAX_USERS} user, "
+                                 "nhiều hơn thì dùng segment.")
+        if self.audience == "segment" and self.segment is None:
+            raise ValueError("Cần `segment` khi audience = segment.")
+        return self
@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import Literal
+
+class PaymentCreate(BaseModel):
+    order_id: str
+    # cod hoặc tên provider đang bật (`app/core/payments.py`)
+    method: str = Field(..., max_length=50)
+
+class OrderStatusUpdate(BaseModel):
+    # hoàn tiền (refunded) chỉ đến từ webhook của provider
+    status: Literal["shipping", "completed", "cancelled"]
@@ -89,3 +89,29 @@ class ProductUpdateRequest(BaseModel):
                 "is_active": True
             }
         }
+
+
+class ProductTypeImportRow(ProductTypeCreateRequest):
+    """Variant trong file import; có `id` thì cập nhật đúng variant đó"""
+    id: Optional[str] = None
+
+
+class ProductImportRow(ProductCreateRequest):
+    """Một sản phẩm trong file import (CSV/JSONL).
+
+    Có `id` thì cập nhật sản phẩm đó, nếu không thì khớp theo `name`; brand/category
+    có thể truyền bằng slug thay cho id.
+    """
+    id: Optional[str] = None
+    brand_slug: Optional[str] = None
+    category_slug: Optional[str] = None
+    product_types: Optional[List[ProductTypeImportRow]] = Field(default=[])
+
+
+class ProductBulkUpdate(BaseModel):
+    """Các trường được phép cập nhật hàng loạt (ví dụ ẩn 500 sản phẩm, đổi danh mục)"""
+    brand_id: Optional[str] = Field(None, description="ID thương hiệu")
+    category_id: Optional[str] = Field(None, description="ID danh mục")
+    description: Optional[str] = Field(None, max_length=255, description="Mô tả sản phẩm")
+    thumbnail: Optional[str] = Field(None, max_length=255, description="Đường dẫn thumbnail")
+    is_active: Optional[bool] = Field(None, description="Trạng thái hoạt động")
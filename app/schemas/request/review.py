@@ -1,12 +1,12 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 class ReviewCreate(BaseModel):
     product_id: str
     user_id: str
-    rating: int
+    rating: int = Field(..., ge=1, le=5)
     comment: Optional[str] = None
 
 class ReviewUpdate(BaseModel):
-    rating: Optional[int] = None
+    rating: Optional[int] = Field(None, ge=1, le=5)
     comment: Optional[str] = None
\ No newline at end of file
@@ -28,6 +28,12 @@ class VoucherUpdate(BaseModel):
     description: Optional[str] = Field(None, max_length=255)
     quantity: Optional[int] = Field(None, ge=0)
 
+class VoucherBulkUpdate(BaseModel):
+    """Các trường được phép cập nhật hàng loạt (code là duy nhất nên không nằm trong đây)"""
+    discount: Optional[float] = Field(None, ge=0, le=1)
+    description: Optional[str] = Field(None, max_length=255)
+    quantity: Optional[int] = Field(None, ge=0)
+
 class VoucherInDBBase(VoucherBase):
     id: int
     created_by: Optional[int] = None
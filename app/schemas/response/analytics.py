@@ -0,0 +1,22 @@
+from datetime import date
+from pydantic import BaseModel
+from typing import List, Optional
+
+class SalesTotals(BaseModel):
+    orders: int = 0
+    units: int = 0
+    revenue: float = 0
+
+class SalesPoint(SalesTotals):
+    # ngày đầu của kỳ (ngày, thứ Hai của tuần, ngày 1 của tháng)
+    period: date
+
+class RevenueSeriesResponse(BaseModel):
+    # day | week | month
+    interval: str
+    points: List[SalesPoint] = []
+    totals: SalesTotals
+
+class TopItemResponse(SalesTotals):
+    id: str
+    name: Optional[str] = None
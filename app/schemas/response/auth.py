@@ -22,3 +22,5 @@ class TokenResponse(BaseModel):
     scope: Optional[str] = ""
     expires_at: Optional[str]
     expires_in: int
+    refresh_token: Optional[str] = None
+    refresh_expires_at: Optional[str] = None
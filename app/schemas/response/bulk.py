@@ -0,0 +1,8 @@
+from typing import List
+from pydantic import BaseModel
+
+
+class BulkResultResponse(BaseModel):
+    # số record bị ảnh hưởng (id không tồn tại hoặc đã xóa được bỏ qua)
+    affected: int
+    ids: List[str] = []
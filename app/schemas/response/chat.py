@@ -0,0 +1,32 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import List, Optional
+
+class ConversationResponse(BaseModel):
+    id: str
+    user1_id: Optional[str] = None
+    # None: hội thoại chưa có nhân viên nhận
+    user2_id: Optional[str] = None
+    last_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class MessageResponse(BaseModel):
+    id: str
+    conversation_id: str
+    sender_id: str
+    message: str
+    is_read: bool = False
+    created_at: Optional[datetime] = None
+    client_id: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+class MessageHistoryResponse(BaseModel):
+    items: List[MessageResponse] = []
+    # truyền vào `cursor` để lấy tin cũ hơn; None nghĩa là đã hết
+    next_cursor: Optional[str] = None
@@ -0,0 +1,33 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import List, Optional
+
+class NotificationResponse(BaseModel):
+    id: str
+    title: Optional[str] = None
+    content: Optional[str] = None
+    type: Optional[str] = None
+    sender_id: Optional[str] = None
+    audience: str
+    # pending | sending | sent
+    status: str
+    recipient_count: int = 0
+    created_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class InboxNotificationResponse(BaseModel):
+    id: str
+    title: Optional[str] = None
+    content: Optional[str] = None
+    type: Optional[str] = None
+    created_at: Optional[datetime] = None
+    is_read: bool = False
+    read_at: Optional[datetime] = None
+
+class NotificationInboxResponse(BaseModel):
+    items: List[InboxNotificationResponse] = []
+    # truyền vào `cursor` để lấy trang tiếp theo; None nghĩa là đã hết
+    next_cursor: Optional[str] = None
@@ -1,10 +1,12 @@
+from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class OrderItemResponse(BaseModel):
     id: str
     product_type_id: str
-    quantity: int
+    # cột trong bảng order_details là `number`
+    quantity: int = Field(validation_alias="number")
     price: Optional[float] = None
 
     class Config:
@@ -14,10 +16,49 @@ class OrderResponse(BaseModel):
     id: str
     user_id: str
     status: str
-    items: List[OrderItemResponse]
+    items: List[OrderItemResponse] = Field(default=[], validation_alias="details")
     total_amount: float
     discount_amount: Optional[float]
     final_amount: float
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class OrderLineResponse(BaseModel):
+    id: str
+    product_type_id: Optional[str] = None
+    product_id: Optional[str] = None
+    product_name: Optional[str] = None
+    volume: Optional[str] = None
+    # ảnh của variant, không có thì thumbnail của sản phẩm
+    image: Optional[str] = None
+    quantity: int
+    price: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+class OrderPaymentSummary(BaseModel):
+    method: Optional[str] = None
+    status: Optional[str] = None
+    paid_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class OrderHistoryResponse(BaseModel):
+    id: str
+    user_id: str
+    # pending | paid | shipping | completed | cancelled | refunded
+    status: str
+    total_amount: float
+    discount_amount: Optional[float] = None
+    final_amount: float
+    created_at: Optional[datetime] = None
+    payment: Optional[OrderPaymentSummary] = None
+    items: List[OrderLineResponse] = []
+
+class OrderHistoryPageResponse(BaseModel):
+    items: List[OrderHistoryResponse] = []
+    # truyền vào `cursor` để lấy trang tiếp theo; None nghĩa là đã hết
+    next_cursor: Optional[str] = None
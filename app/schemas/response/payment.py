@@ -0,0 +1,22 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+class PaymentResponse(BaseModel):
+    id: str
+    order_id: str
+    method: Optional[str] = None
+    # pending | paid | failed | cancelled | refunded
+    status: Optional[str] = None
+    amount: Optional[float] = None
+    attempts: int = 0
+    transaction_id: Optional[str] = None
+    paid_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class CheckoutResponse(BaseModel):
+    payment: PaymentResponse
+    # chuyển khách tới URL này để thanh toán; None với COD
+    checkout_url: Optional[str] = None
@@ -44,4 +44,23 @@ class ProductDetailResponse(BaseModel):
     category: Optional[CategoryResponse]
     product_types: List[ProductTypeResponse] = []
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class ProductImportErrorResponse(BaseModel):
+    row: int
+    error: str
+
+class ProductImportJobResponse(BaseModel):
+    id: str
+    status: str
+    format: str
+    rows: int
+    products_created: int
+    products_updated: int
+    variants_created: int
+    variants_updated: int
+    failed: int
+    rows_per_sec: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    errors: List[ProductImportErrorResponse] = []
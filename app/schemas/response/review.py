@@ -1,5 +1,16 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
+
+class ReviewMediaResponse(BaseModel):
+    id: str
+    path: Optional[str] = None
+    thumbnail_path: Optional[str] = None
+    content_type: Optional[str] = None
+    size_bytes: Optional[int] = None
+
+    class Config:
+        orm_mode = True
 
 class ReviewResponse(BaseModel):
     id: str
@@ -7,8 +18,21 @@ class ReviewResponse(BaseModel):
     user_id: str
     rating: int
     comment: Optional[str] = None
-    created_at: Optional[str] = None
-    updated_at: Optional[str] = None
+    medias: List[ReviewMediaResponse] = []
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class RatingSummaryResponse(BaseModel):
+    average: float = 0.0
+    count: int = 0
+    # số review theo số sao: {"1": ..., "5": ...}
+    histogram: Dict[str, int] = {}
+
+class ProductReviewsResponse(BaseModel):
+    summary: RatingSummaryResponse
+    items: List[ReviewResponse] = []
+    # truyền vào `cursor` để lấy trang tiếp theo; None nghĩa là đã hết
+    next_cursor: Optional[str] = None
@@ -0,0 +1,157 @@
+"""Thống kê bán hàng đọc từ bảng tổng hợp theo ngày (`sales_daily_rollups`), không quét `orders`.
+
+- Đơn được tính là đã bán khi ở trạng thái `SOLD_STATES` (chưa bị xóa). Mỗi lần đơn đổi trạng thái,
+  job `analytics.order_sales` đối chiếu trạng thái với cờ `orders.sales_counted` và cộng (hoặc trừ,
+  khi hủy/hoàn tiền) phần của đơn vào bảng tổng hợp.
+- Cờ được đổi bằng UPDATE có điều kiện trong cùng transaction với phần cộng dồn, nên job chạy lại,
+  chạy lệch thứ tự hay chạy song song với backfill cũng không cộng một đơn hai lần.
+- Ngày của đơn là ngày đặt (`created_at` theo giờ `ANALYTICS_UTC_OFFSET_HOURS`): đơn hoàn tiền được trừ
+  vào đúng ngày đã cộng.
+- Doanh thu của ngày (`total`) là `final_amount` (sau giảm giá); của sản phẩm/thương hiệu/danh mục là
+  tổng đơn giá x số lượng các dòng (trước giảm giá của cả đơn).
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import job
+from app.repositories.analytics_repository import AnalyticsRepository
+
+SOLD_STATES = ("paid", "shipping", "completed")
+TOP_DIMENSIONS = ("product", "brand", "category")
+INTERVALS = ("day", "week", "month")
+METRICS = ("revenue", "units", "orders")
+
+
+class RollupConflict(Exception):
+    """Đơn vừa được giao dịch khác đồng bộ: làm lại lô"""
+
+
+def sales_day(created_at: Optional[datetime]) -> date:
+    return ((created_at or datetime.utcnow()) + timedelta(hours=settings.ANALYTICS_UTC_OFFSET_HOURS)).date()
+
+
+def _is_sold(order) -> bool:
+    return order.status in SOLD_STATES and order.deleted_at is None
+
+
+def _period_start(day: date, interval: str) -> date:
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+class AnalyticsService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = AnalyticsRepository(db)
+
+    # ---------- đồng bộ ----------
+
+    def sync(self, orders: list) -> int:
+        """Cộng/trừ các đơn lệch giữa trạng thái và `sales_counted`; trả về số đơn đã đồng bộ.
+
+        Báo `RollupConflict` nếu giao dịch khác vừa đồng bộ một trong các đơn (transaction phải rollback).
+        """
+        added = [order for order in orders if _is_sold(order) and not order.sales_counted]
+        removed = [order for order in orders if not _is_sold(order) and order.sales_counted]
+        if not added and not removed:
+            return 0
+        # trạng thái vừa đọc được kiểm tra lại trong UPDATE: đơn vừa đổi trạng thái thì làm lại
+        if (self.repo.set_counted([order.id for order in added], True, SOLD_STATES) != len(added)
+                or self.repo.set_counted([order.id for order in removed], False, SOLD_STATES) != len(removed)):
+            raise RollupConflict("orders changed concurrently")
+
+        lines: Dict[str, list] = defaultdict(list)
+        for line in self.repo.lines(order.id for order in added + removed):
+            lines[line.order_id].append(line)
+        deltas: Dict[Tuple[str, str, date], List[float]] = defaultdict(lambda: [0, 0, 0.0])
+        for sign, group in ((1, added), (-1, removed)):
+            for order in group:
+                day = sales_day(order.created_at)
+                units = sum(line.number or 0 for line in lines[order.id])
+                _add(deltas[("total", "", day)], sign, units, order.final_amount or 0)
+                # mỗi đơn chỉ tính một lần cho mỗi sản phẩm/thương hiệu/danh mục dù có nhiều dòng
+                parts: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0, 0.0])
+                for line in lines[order.id]:
+                    for dimension, key in (("product", line.product_id), ("brand", line.brand_id),
+                                           ("category", line.category_id)):
+                        if key is not None:
+                            parts[(dimension, key)][0] += line.number or 0
+                            parts[(dimension, key)][1] += (line.price or 0) * (line.number or 0)
+                for (dimension, key), (part_units, part_revenue) in parts.items():
+                    _add(deltas[(dimension, key, day)], sign, part_units, part_revenue)
+        self.repo.apply(deltas)
+        return len(added) + len(removed)
+
+    def sync_order(self, order_id: str) -> int:
+        return self.sync(self.repo.orders_by_id([order_id]))
+
+    def sync_chunk(self, after_id: Optional[str], limit: int) -> Tuple[Optional[str], int, int]:
+        """Một lô backfill theo khóa chính; trả về (id cuối lô, None nếu hết; số đơn đã đọc; số đơn đã đồng bộ)"""
+        orders = self.repo.orders_after(after_id, limit)
+        if not orders:
+            return None, 0, 0
+        return orders[-1].id, len(orders), self.sync(orders)
+
+    def clear(self) -> None:
+        self.repo.clear()
+
+    # ---------- dashboard ----------
+
+    def revenue(self, date_from: date, date_to: date, interval: str = "day") -> dict:
+        """Doanh thu, số đơn, số lượng theo ngày/tuần/tháng (kỳ không có đơn vẫn có mặt với giá trị 0)"""
+        if interval not in INTERVALS:
+            raise ValueError(f"interval phải là một trong: {', '.join(INTERVALS)}")
+        _check_range(date_from, date_to)
+        periods: Dict[date, List[float]] = {}
+        day = date_from
+        while day <= date_to:
+            periods.setdefault(_period_start(day, interval), [0, 0, 0.0])
+            day += timedelta(days=1)
+        for row in self.repo.series("total", "", date_from, date_to):
+            _add(periods[_period_start(row.day, interval)], 1, row.units, row.revenue, row.orders)
+        points = [{"period": start, "orders": orders, "units": units, "revenue": revenue}
+                  for start, (orders, units, revenue) in periods.items()]
+        return {
+            "interval": interval,
+            "points": points,
+            "totals": {
+                "orders": sum(point["orders"] for point in points),
+                "units": sum(point["units"] for point in points),
+                "revenue": sum(point["revenue"] for point in points),
+            },
+        }
+
+    def top(self, dimension: str, date_from: date, date_to: date, by: str = "revenue", limit: int = 10) -> list:
+        if dimension not in TOP_DIMENSIONS:
+            raise ValueError(f"dimension phải là một trong: {', '.join(TOP_DIMENSIONS)}")
+        if by not in METRICS:
+            raise ValueError(f"by phải là một trong: {', '.join(METRICS)}")
+        _check_range(date_from, date_to)
+        return [{"id": row.key, "name": row.name, "orders": row.orders, "units": row.units, "revenue": row.revenue}
+                for row in self.repo.top(dimension, date_from, date_to, by, limit)]
+
+
+def _add(totals: List[float], sign: int, units: int, revenue: float, orders: int = 1) -> None:
+    totals[0] += sign * orders
+    totals[1] += sign * units
+    totals[2] += sign * revenue
+
+
+def _check_range(date_from: date, date_to: date) -> None:
+    if date_from > date_to:
+        raise ValueError("from phải trước hoặc bằng to.")
+    if (date_to - date_from).days > 366 * 3:
+        raise ValueError("Khoảng thời gian tối đa 3 năm.")
+
+
+@job("analytics.order_sales")
+def order_sales(db: Session, order_id: str) -> None:
+    """Đồng bộ doanh số của đơn sau khi đơn đổi trạng thái (`RollupConflict` thì job chạy lại)"""
+    AnalyticsService(db).sync_order(order_id)
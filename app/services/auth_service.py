@@ -1,15 +1,21 @@
-from typing import Optional
+import hmac
+from typing import List, Optional
 
-from passlib.context import CryptContext
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import user_cache
+from app.core.config import settings
+from app.core.database import on_commit
+from app.core.email_filter import email_filter
+from app.core.permissions import permission_registry
+from app.core.password import dummy_hash, hash_password, password_hasher, verify_and_update
+from app.core.security import REFRESH, create_access_token, create_refresh_token, decode_token, hash_token
 from app.models.user import User
 from app.repositories.user_repository import UserRepository
 from app.repositories.role_repository import RoleRepository
 from app.schemas.request.auth import UserCreate
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """Lấy user theo email (sử dụng repository)"""
@@ -19,18 +25,23 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
 
 def verify_password(plain: str, hashed: str) -> bool:
     """Xác thực password"""
-    try:
-        return pwd_context.verify(plain, hashed)
-    except Exception:
-        return False
+    return verify_and_update(plain, hashed)[0]
+
 
+def create_user(db: Session, user_in: UserCreate, role_name: str = "CLIENT", created_by: Optional[str] = None,
+                password_hash: Optional[str] = None) -> User:
+    """Tạo user mới và gán role (mặc định CLIENT). Tạo role nếu chưa tồn tại.
 
-def create_user(db: Session, user_in: UserCreate, role_name: str = "CLIENT", created_by: Optional[str] = None) -> User:
-    """Tạo user mới và gán role (mặc định CLIENT). Tạo role nếu chưa tồn tại."""
+    User và liên kết role được ghi trong cùng một flush; commit do unit of work của request đảm nhận.
+    `password_hash` đã băm sẵn (qua `password_hasher`) thì không băm lại trên thread hiện tại.
+    """
     user_repo = UserRepository(db)
     role_repo = RoleRepository(db)
     
-    hashed = pwd_context.hash(user_in.password)
+    hashed = password_hash or hash_password(user_in.password)
+    
+    # Lấy hoặc tạo role trước để gán ngay khi tạo user
+    role = role_repo.get_or_create(role_name, created_by=created_by)
     
     user_data = {
         "email": user_in.email,
@@ -38,24 +49,125 @@ def create_user(db: Session, user_in: UserCreate, role_name: str = "CLIENT", cre
         "first_name": user_in.first_name,
         "last_name": user_in.last_name,
         "phone_number": user_in.phone_number,
+        "roles": [role],
     }
     
-    user = user_repo.create(user_data, created_by=created_by)
-    
-    # Lấy hoặc tạo role
-    role = role_repo.get_or_create(role_name, created_by=created_by)
-    
-    # Gán role cho user
-    user = user_repo.assign_role(user, role.name)
-    
-    return user
+    return user_repo.create(user_data, created_by=created_by)
+
+
+def _email_exists(db: Session, email: str) -> bool:
+    exists = UserRepository(db).email_exists(email)
+    # trả connection về pool trước khi chờ băm mật khẩu
+    db.close()
+    return exists
+
+
+async def _known_after_refresh(email: str) -> bool:
+    # email có thể vừa được đăng ký ở worker khác: đọc thêm user mới, tối đa một lần mỗi khoảng refresh
+    if not email_filter.refresh_due():
+        return False
+    await run_in_threadpool(email_filter.refresh)
+    return email_filter.might_contain(email)
+
+
+async def is_email_registered(db: Session, email: str) -> bool:
+    """Kiểm tra trùng email trước khi băm; email không có trong filter thì không cần hỏi DB.
+
+    Filter trượt (user vừa tạo ở worker khác) thì INSERT vẫn bị unique index chặn: chỉ tốn thêm một lần băm.
+    """
+    if not email_filter.might_contain(email) and not await _known_after_refresh(email):
+        return False
+    return await run_in_threadpool(_email_exists, db, email)
 
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     """Xác thực user với email và password"""
     user = get_user_by_email(db, email)
     if not user:
+        # băm giả để thời gian phản hồi không lộ email có tồn tại hay không
+        verify_password(password, dummy_hash())
         return None
     if not verify_password(password, getattr(user, "password_hash", "")):
         return None
     return user
+
+
+def _find_login_user(db: Session, email: str) -> Optional[User]:
+    user = UserRepository(db).get_by_email_with_roles(email)
+    # trả connection về pool trước khi chờ Argon2 (có thể lâu khi hàng đợi băm dài);
+    # close() tách user khỏi session nhưng giữ nguyên các thuộc tính và roles đã nạp
+    db.close()
+    return user
+
+
+async def authenticate_user_async(db: Session, email: str, password: str) -> Optional[User]:
+    """Xác thực cho handler async: truy vấn chạy trong threadpool, Argon2 chạy trên process pool.
+
+    Luôn tra `users.email` (có index): email filter có thể trượt user vừa tạo ở worker khác hoặc chèn
+    bằng SQL, nên không dùng filter để trả 401. Mọi nhánh thất bại
+    đều tốn đúng một lần Argon2 để thời gian phản hồi không lộ email có tồn tại hay không.
+    Không giữ connection DB trong lúc chờ băm. Hash tạo bằng tham số Argon2 cũ được thay
+    bằng hash mới; unit of work của request sẽ commit.
+    """
+    user = await run_in_threadpool(_find_login_user, db, email)
+    if not user:
+        await password_hasher.verify_dummy(password)
+        return None
+    if not email_filter.might_contain(user.email):
+        # filter trượt: bổ sung để lần kiểm tra trùng khi đăng ký sau đó không bỏ sót
+        email_filter.add(user.email)
+    ok, new_hash = await password_hasher.verify_and_update(password, user.password_hash or "")
+    if not ok:
+        return None
+    if new_hash:
+        user.password_hash = new_hash
+        db.add(user)
+    return user
+
+
+def issue_tokens(db: Session, user: User) -> dict:
+    """Tạo access token + refresh token mới (dữ liệu cho `TokenResponse`).
+
+    Chỉ lưu hash của refresh token; token trước đó của user hết hiệu lực khi unit of work commit
+    (mỗi user giữ một refresh token, đăng nhập nơi khác sẽ thay thế).
+    """
+    version = user.version or 1
+    roles = getattr(user, "roles", None) or []
+    # rm: mask role để client/dịch vụ khác đọc quyền mà không cần hỏi API; server vẫn kiểm tra
+    # theo mask của user trong cache (đổi role có hiệu lực mà không cần phát lại token)
+    role_mask = permission_registry.role_mask(r.name for r in roles)
+    access_token, expire = create_access_token(
+        {"sub": str(user.id), "email": user.email, "ver": version, "rm": role_mask}
+    )
+    refresh_token, refresh_expire = create_refresh_token(str(user.id), version)
+    user.refresh_token = hash_token(refresh_token)
+    db.add(user)
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "scope": ",".join(r.name for r in roles),
+        "expires_at": expire.isoformat(),
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+        "refresh_expires_at": refresh_expire.isoformat(),
+    }
+
+
+def get_user_for_refresh(db: Session, refresh_token: str) -> Optional[User]:
+    """User sở hữu refresh token còn hiệu lực: chữ ký/hạn đúng, version khớp và là token mới nhất"""
+    payload = decode_token(refresh_token, REFRESH)
+    if not payload or not payload.get("sub"):
+        return None
+    user = UserRepository(db).get_with_roles(str(payload["sub"]))
+    if not user or payload.get("ver") != (user.version or 1) or not user.refresh_token:
+        return None
+    if not hmac.compare_digest(user.refresh_token, hash_token(refresh_token)):
+        return None
+    return user
+
+
+def revoke_user_tokens(db: Session, user_ids: List[str]) -> int:
+    """Thu hồi mọi access/refresh token của các user bằng cách tăng `User.version`"""
+    count = UserRepository(db).bump_token_version(user_ids)
+    on_commit(db, lambda: [user_cache.invalidate(str(user_id)) for user_id in user_ids])
+    return count
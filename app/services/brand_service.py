@@ -2,8 +2,8 @@ from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from app.models.brand import Brand
 from app.repositories.brand_repository import BrandRepository
-from app.schemas.request.brand import BrandCreate, BrandUpdate
-from slugify import slugify
+from app.schemas.request.brand import BrandCreate, BrandUpdate, BrandBulkUpdate
+from app.services.slugs import make_unique_slug, make_unique_slugs, slugify_name
 
 
 def get_brand(db: Session, brand_id: str) -> Optional[Brand]:
@@ -39,8 +39,8 @@ def create_brand(db: Session, brand_in: BrandCreate, created_by: Optional[str] =
     data = brand_in.dict()
     # generate slug from name
     name = data.get("name", "")
-    slug_base = _slugify(name)
-    slug = _make_unique_slug(db, Brand, slug_base)
+    slug_base = slugify_name(name)
+    slug = make_unique_slug(db, Brand, slug_base)
     data["slug"] = slug
     return repo.create(data, created_by=created_by)
 
@@ -50,28 +50,33 @@ def update_brand(db: Session, brand_id: str, brand_in: BrandUpdate, updated_by:
     update_data = brand_in.dict(exclude_unset=True)
     # if name updated and slug not explicitly provided, regenerate slug
     if "name" in update_data and "slug" not in update_data:
-        slug_base = _slugify(update_data.get("name"))
-        update_data["slug"] = _make_unique_slug(db, Brand, slug_base, exclude_id=brand_id)
+        slug_base = slugify_name(update_data.get("name"))
+        update_data["slug"] = make_unique_slug(db, Brand, slug_base, exclude_id=brand_id)
     return repo.update(brand_id, update_data, updated_by=updated_by)
 
 
-def _slugify(value: str) -> str:
-    return slugify(value or "", lowercase=True) or "n-a"
+def bulk_create_brands(db: Session, items: List[BrandCreate], created_by: Optional[str] = None) -> List[str]:
+    """Tạo nhiều thương hiệu trong một transaction; ValueError nếu tên bị trùng"""
+    repo = BrandRepository(db)
+    rows = [item.dict() for item in items]
+    names = [row["name"] for row in rows]
+    duplicates = sorted({n for n in names if names.count(n) > 1} | set(repo.get_existing_names(names)))
+    if duplicates:
+        raise ValueError(f"Tên thương hiệu đã tồn tại: {', '.join(duplicates)}")
+    slugs = make_unique_slugs(db, Brand, [slugify_name(name) for name in names])
+    for row, slug in zip(rows, slugs):
+        row["slug"] = slug
+    return repo.bulk_create(rows, created_by=created_by)
+
+
+def bulk_update_brands(db: Session, ids: List[str], values: BrandBulkUpdate, updated_by: Optional[str] = None) -> int:
+    repo = BrandRepository(db)
+    return repo.bulk_update(ids, values.dict(exclude_unset=True), updated_by=updated_by)
 
 
-def _make_unique_slug(db: Session, model, base: str, exclude_id: Optional[str] = None) -> str:
-    # if exact base exists (excluding optional id), find suffix
-    exists = db.query(model).filter(model.slug == base)
-    if exclude_id:
-        exists = exists.filter(model.id != exclude_id)
-    if exists.first():
-        # find max suffix
-        like_pattern = f"{base}-%"
-        rows = db.query(model.slug).filter(model.slug.ilike(like_pattern)).all()
-        suffixes = [int(r[0].rsplit("-", 1)[1]) for r in rows if r[0].rsplit("-", 1)[-1].isdigit()]
-        next_suffix = (max(suffixes) + 1) if suffixes else 2
-        return f"{base}-{next_suffix}"
-    return base
+def bulk_delete_brands(db: Session, ids: List[str], deleted_by: Optional[str] = None) -> int:
+    repo = BrandRepository(db)
+    return repo.bulk_soft_delete(ids, deleted_by=deleted_by)
 
 
 def soft_delete_brand(db: Session, brand_id: str, deleted_by: Optional[str] = None) -> bool:
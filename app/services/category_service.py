@@ -2,8 +2,8 @@ from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from app.models.category import Category
 from app.repositories.category_repository import CategoryRepository
-from app.schemas.request.category import CategoryCreate, CategoryUpdate
-from slugify import slugify
+from app.schemas.request.category import CategoryCreate, CategoryUpdate, CategoryBulkUpdate
+from app.services.slugs import make_unique_slug, make_unique_slugs, slugify_name
 
 
 def get_category(db: Session, category_id: str) -> Optional[Category]:
@@ -30,8 +30,8 @@ def create_category(db: Session, category_in: CategoryCreate, created_by: Option
             raise ValueError("Danh mục cha không tồn tại.")
     # generate slug from name
     name = data.get("name", "")
-    slug_base = _slugify(name)
-    slug = _make_unique_slug(db, Category, slug_base)
+    slug_base = slugify_name(name)
+    slug = make_unique_slug(db, Category, slug_base)
     data["slug"] = slug
     return repo.create(data, created_by=created_by)
 
@@ -41,8 +41,8 @@ def update_category(db: Session, category_id: str, category_in: CategoryUpdate,
     data = category_in.dict(exclude_unset=True)
     # if name updated and slug not explicitly provided, regenerate slug
     if "name" in data and "slug" not in data:
-        slug_base = _slugify(data.get("name"))
-        data["slug"] = _make_unique_slug(db, Category, slug_base, exclude_id=category_id)
+        slug_base = slugify_name(data.get("name"))
+        data["slug"] = make_unique_slug(db, Category, slug_base, exclude_id=category_id)
     return repo.update(category_id, data, updated_by=updated_by)
 
 
@@ -96,18 +96,36 @@ def get_category_tree(db: Session, max_depth: int = 3) -> List[dict]:
     return tree
 
 
-def _slugify(value: str) -> str:
-    return slugify(value or "", lowercase=True) or "n-a"
-
-
-def _make_unique_slug(db: Session, model, base: str, exclude_id: Optional[str] = None) -> str:
-    exists = db.query(model).filter(model.slug == base)
-    if exclude_id:
-        exists = exists.filter(model.id != exclude_id)
-    if exists.first():
-        like_pattern = f"{base}-%"
-        rows = db.query(model.slug).filter(model.slug.ilike(like_pattern)).all()
-        suffixes = [int(r[0].rsplit("-", 1)[1]) for r in rows if r[0].rsplit("-", 1)[-1].isdigit()]
-        next_suffix = (max(suffixes) + 1) if suffixes else 2
-        return f"{base}-{next_suffix}"
-    return base
+def bulk_create_categories(db: Session, items: List[CategoryCreate], created_by: Optional[str] = None) -> List[str]:
+    """Tạo nhiều danh mục trong một transaction; ValueError nếu danh mục cha không tồn tại"""
+    repo = CategoryRepository(db)
+    rows = [item.dict() for item in items]
+    for row in rows:
+        row["parent_id"] = row.get("parent_id") or None
+    parent_ids = {row["parent_id"] for row in rows if row["parent_id"]}
+    missing = parent_ids - set(repo.get_existing_ids(list(parent_ids)))
+    if missing:
+        raise ValueError(f"Danh mục cha không tồn tại: {', '.join(sorted(missing))}")
+    slugs = make_unique_slugs(db, Category, [slugify_name(row["name"]) for row in rows])
+    for row, slug in zip(rows, slugs):
+        row["slug"] = slug
+    return repo.bulk_create(rows, created_by=created_by)
+
+
+def bulk_update_categories(db: Session, ids: List[str], values: CategoryBulkUpdate, updated_by: Optional[str] = None) -> int:
+    """Cập nhật hàng loạt; khi đổi danh mục cha thì kiểm tra cha tồn tại và không tạo vòng"""
+    repo = CategoryRepository(db)
+    data = values.dict(exclude_unset=True)
+    if "parent_id" in data:
+        data["parent_id"] = data["parent_id"] or None
+        if data["parent_id"]:
+            if not repo.get(data["parent_id"]):
+                raise ValueError("Danh mục cha không tồn tại.")
+            if set(repo.get_ancestor_ids(data["parent_id"])) & set(ids):
+                raise ValueError("Danh mục cha không được là chính nó hoặc danh mục con của nó.")
+    return repo.bulk_update(ids, data, updated_by=updated_by)
+
+
+def bulk_delete_categories(db: Session, ids: List[str], deleted_by: Optional[str] = None) -> int:
+    repo = CategoryRepository(db)
+    return repo.bulk_soft_delete(ids, deleted_by=deleted_by)
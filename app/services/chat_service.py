@@ -0,0 +1,288 @@
+"""Chat khách hàng ↔ nhân viên shop.
+
+- Mỗi khách hàng có một hội thoại với shop (`user1_id`). Hội thoại chưa có nhân viên nhận (`user2_id`
+  rỗng) được gửi tới mọi nhân viên đang online (nhóm `staff`); nhân viên trả lời đầu tiên nhận hội thoại.
+- Tin nhắn được phát ngay qua `hub` (xem `app/core/realtime.py`), còn việc ghi DB đi qua `message_writer`:
+  tin được gom và ghi theo lô (một executemany INSERT cho tin nhắn, một executemany UPDATE cho
+  `last_message` của các hội thoại trong lô). Người gửi nhận "ack" khi lô chứa tin đã commit.
+- id và `created_at` của tin được tạo lúc nhận, nên thứ tự phát và thứ tự trong lịch sử là một.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.auth_cache import UserCache
+from app.core.config import settings
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.database import run_in_session
+from app.core.realtime import hub
+from app.models.conversation import Conversation
+from app.repositories.conversation_repository import ConversationRepository, MessageRepository
+from app.schemas.response.chat import MessageResponse
+
+logger = logging.getLogger("app")
+
+STAFF_GROUP = "staff"
+
+
+class ConversationNotFound(Exception):
+    pass
+
+
+class ChatForbidden(Exception):
+    pass
+
+
+class ChatBusy(Exception):
+    """Hàng đợi ghi tin nhắn đã đầy"""
+
+
+class ChatService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.conversations = ConversationRepository(db)
+        self.messages = MessageRepository(db)
+
+    def get_conversation(self, conversation_id: str) -> Optional[Conversation]:
+        return self.conversations.get(conversation_id)
+
+    def open_conversation(self, customer_id: str, staff_id: Optional[str] = None) -> Conversation:
+        """Hội thoại của khách hàng với shop, tạo mới nếu chưa có; nhân viên mở thì nhận luôn hội thoại"""
+        conversation = self.conversations.get_by_customer(customer_id)
+        if conversation is None:
+            return self.conversations.create(
+                {"user1_id": customer_id, "user2_id": staff_id, "updated_at": datetime.utcnow()},
+                created_by=staff_id or customer_id,
+            )
+        if staff_id is not None and conversation.user2_id is None and self.conversations.claim(conversation.id, staff_id):
+            self.db.refresh(conversation)
+        return conversation
+
+    def list_conversations(self, user_id: Optional[str], skip: int = 0, limit: int = 20,
+                           unassigned: bool = False) -> Tuple[List[Conversation], int]:
+        return self.conversations.list_for_user(user_id, skip=skip, limit=limit, unassigned=unassigned)
+
+    def history(self, conversation_id: str, limit: int = 50, cursor: Optional[str] = None) -> dict:
+        """Trang lịch sử, mới nhất trước (tin vừa gửi có thể chưa có trong DB tới `CHAT_FLUSH_INTERVAL_MS`)"""
+        after_id = decode_cursor(cursor, "messages") if cursor else None
+        items, has_more = self.messages.list_by_conversation(conversation_id, limit=limit, after_id=after_id)
+        return {
+            "items": items,
+            "next_cursor": encode_cursor("messages", items[-1].id) if has_more else None,
+        }
+
+    def claim(self, conversation_id: str, staff_id: str) -> bool:
+        return self.conversations.claim(conversation_id, staff_id)
+
+    def mark_read(self, conversation_id: str, reader_id: str) -> int:
+        return self.messages.mark_read(conversation_id, reader_id)
+
+    def save_messages(self, rows: List[dict]) -> None:
+        """Ghi một lô tin nhắn và cập nhật tin cuối của từng hội thoại trong lô"""
+        self.messages.insert_mappings(rows)
+        latest = {}
+        for row in rows:
+            latest[row["conversation_id"]] = row
+        self.conversations.set_last_messages([
+            {"cid": cid, "text": row["message"], "at": row["created_at"]} for cid, row in latest.items()
+        ])
+
+
+def _call(db: Session, fn, *args):
+    return fn(ChatService(db), *args)
+
+
+def _in_session(fn, *args):
+    """Chạy `fn(ChatService, *args)` trong một unit of work riêng (WebSocket không dùng `get_db`)"""
+    return run_in_session(_call, fn, *args)
+
+
+def _write_batch(rows: List[dict]) -> None:
+    _in_session(ChatService.save_messages, rows)
+
+
+class MessageWriter:
+    """Gom tin nhắn và ghi theo lô trên threadpool.
+
+    Lô được ghi sau `interval` giây kể từ tin đầu tiên, hoặc ngay khi đủ `batch_size` tin. `submit`
+    trả về future hoàn thành khi lô chứa tin đã commit (hoặc báo lỗi nếu ghi thất bại).
+    """
+
+    def __init__(self, interval: float, batch_size: int, max_pending: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._ready: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._last_at = datetime.min
+
+    def start(self) -> None:
+        self._stopping = False
+        self._ready = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Ghi nốt các tin đang chờ rồi dừng"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._ready.set()
+        self._full.set()
+        await self._task
+        self._task = None
+
+    def timestamp(self) -> datetime:
+        """`created_at` tăng dần trong worker (hai tin liên tiếp không trùng thời điểm)"""
+        now = datetime.utcnow()
+        if now <= self._last_at:
+            now = self._last_at + timedelta(microseconds=1)
+        self._last_at = now
+        return now
+
+    def submit(self, row: dict) -> asyncio.Future:
+        if self._task is None:
+            raise RuntimeError("MessageWriter chưa được start")
+        if len(self._pending) >= self.max_pending:
+            raise ChatBusy(f"Đang có {len(self._pending)} tin chờ ghi")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+        self._ready.set()
+        if len(self._pending) >= self.batch_size:
+            self._full.set()
+        return future
+
+    async def _run(self) -> None:
+        while True:
+            await self._ready.wait()
+            if not self._stopping:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush()
+            if self._stopping and not self._pending:
+                return
+
+    async def _flush(self) -> None:
+        while self._pending:
+            batch = self._pending[:self.batch_size]
+            self._pending = self._pending[self.batch_size:]
+            try:
+                await run_in_threadpool(_write_batch, [row for row, _ in batch])
+            except Exception as e:
+                logger.exception("Chat: cannot write %d messages", len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+        self._ready.clear()
+        self._full.clear()
+
+
+message_writer = MessageWriter(
+    settings.CHAT_FLUSH_INTERVAL_MS / 1000, settings.CHAT_FLUSH_BATCH_SIZE, settings.CHAT_WRITE_QUEUE_SIZE
+)
+
+# hội thoại -> (user1_id, user2_id): kiểm tra quyền và tìm người nhận không cần truy vấn mỗi tin;
+# nhân viên nhận hội thoại ở worker khác được thấy chậm nhất sau 60 giây (trong lúc đó tin vẫn tới nhóm staff)
+participants = UserCache(ttl=60, max_size=10000, name="chat_participants")
+
+
+def _load_participants(service: ChatService, conversation_id: str) -> Optional[Tuple[str, Optional[str]]]:
+    conversation = service.get_conversation(conversation_id)
+    if conversation is None:
+        return None
+    return conversation.user1_id, conversation.user2_id
+
+
+async def get_participants(conversation_id: str, refresh: bool = False) -> Tuple[str, Optional[str]]:
+    cached = None if refresh else participants.get(conversation_id)
+    if cached is None:
+        cached = await run_in_threadpool(_in_session, _load_participants, conversation_id)
+        if cached is None:
+            raise ConversationNotFound(conversation_id)
+        participants.set(conversation_id, cached)
+    return cached
+
+
+def recipients(user1_id: str, user2_id: Optional[str]) -> List[str]:
+    keys = [f"user:{user1_id}"]
+    keys.append(f"user:{user2_id}" if user2_id else f"group:{STAFF_GROUP}")
+    return keys
+
+
+async def _authorize(conversation_id: str, user_id: str, is_staff: bool) -> Tuple[str, Optional[str]]:
+    user1_id, user2_id = await get_participants(conversation_id)
+    if user_id in (user1_id, user2_id):
+        return user1_id, user2_id
+    if not is_staff:
+        raise ChatForbidden(conversation_id)
+    if user2_id is None:
+        # nhân viên đầu tiên trả lời nhận hội thoại; người khác nhận trước thì đọc lại người nhận
+        claimed = await run_in_threadpool(_in_session, ChatService.claim, conversation_id, user_id)
+        user1_id, user2_id = await get_participants(conversation_id, refresh=True)
+        if claimed:
+            await hub.publish([f"user:{user1_id}", f"group:{STAFF_GROUP}"], {
+                "type": "conversation", "conversation_id": conversation_id, "user2_id": user2_id,
+            })
+    return user1_id, user2_id
+
+
+async def can_access(conversation_id: str, user_id: str, is_staff: bool) -> bool:
+    """Người trong hội thoại hoặc nhân viên; hội thoại không tồn tại báo `ConversationNotFound`"""
+    user1_id, user2_id = await get_participants(conversation_id)
+    return is_staff or user_id in (user1_id, user2_id)
+
+
+async def send_message(conversation_id: str, sender_id: str, is_staff: bool, text: str,
+                       client_id: Optional[str] = None) -> Tuple[dict, asyncio.Future]:
+    """Phát tin tới người trong hội thoại và đưa vào hàng đợi ghi.
+
+    Trả về (tin nhắn dạng JSON, future hoàn thành khi tin đã được lưu).
+    """
+    if not text or not text.strip():
+        raise ValueError("Tin nhắn không được để trống.")
+    if len(text) > settings.CHAT_MAX_MESSAGE_LENGTH:
+        raise ValueError(f"Tin nhắn tối đa {settings.CHAT_MAX_MESSAGE_LENGTH} ký tự.")
+    user1_id, user2_id = await _authorize(conversation_id, sender_id, is_staff)
+    created_at = message_writer.timestamp()
+    row = {
+        "id": str(uuid.uuid4()),
+        "conversation_id": conversation_id,
+        "sender_id": sender_id,
+        "message": text,
+        "is_read": False,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "created_by": sender_id,
+    }
+    future = message_writer.submit(row)
+    message = MessageResponse.model_validate({**row, "client_id": client_id}).model_dump(mode="json")
+    await hub.publish(recipients(user1_id, user2_id) + [f"user:{sender_id}"], {"type": "message", "message": message})
+    return message, future
+
+
+async def mark_read(conversation_id: str, reader_id: str, is_staff: bool) -> int:
+    """Đánh dấu đã đọc tin của người kia và báo cho người trong hội thoại (đọc không nhận hội thoại)"""
+    user1_id, user2_id = await get_participants(conversation_id)
+    if not is_staff and reader_id not in (user1_id, user2_id):
+        raise ChatForbidden(conversation_id)
+    count = await run_in_threadpool(_in_session, ChatService.mark_read, conversation_id, reader_id)
+    if count:
+        await hub.publish(recipients(user1_id, user2_id), {
+            "type": "read", "conversation_id": conversation_id, "reader_id": reader_id,
+        })
+    return count
+
@@ -0,0 +1,155 @@
+"""Export toàn bộ sản phẩm/đơn hàng/người dùng dạng CSV hoặc NDJSON theo luồng.
+
+- Truy vấn Core với `yield_per` (server-side cursor, `stream_results`) nên chỉ giữ một lô dòng trong bộ nhớ.
+- Mỗi export dùng session riêng (session của `get_db` đã đóng trước khi response stream xong),
+  session chỉ đọc nên được định tuyến sang replica nếu có.
+- Dữ liệu được gom thành chunk ~64KB trước khi gửi; tùy chọn nén gzip theo luồng.
+- CSV sản phẩm cùng định dạng với file import (`POST /products/import`).
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import aliased
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.brand import Brand
+from app.models.category import Category
+from app.models.order import Order
+from app.models.product import Product
+from app.models.productType import ProductType
+from app.models.user import User
+
+settings = get_settings()
+
+FORMATS = ("csv", "ndjson")
+CHUNK_BYTES = 64 * 1024
+
+
+def _products_query() -> Select:
+    return (
+        select(
+            Product.id, Product.name, Brand.slug.label("brand_slug"), Category.slug.label("category_slug"),
+            Product.description, Product.thumbnail, Product.is_active,
+            ProductType.id.label("variant_id"), ProductType.price, ProductType.discount_price,
+            ProductType.quantity, ProductType.stock, ProductType.volume, ProductType.ingredients,
+            ProductType.usage, ProductType.skin_type, ProductType.origin, ProductType.image_path,
+            ProductType.type_value_id, ProductType.status,
+        )
+        .outerjoin(Brand, Brand.id == Product.brand_id)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .outerjoin(ProductType, (ProductType.product_id == Product.id) & ProductType.deleted_at.is_(None))
+        .where(Product.deleted_at.is_(None))
+        # các variant của cùng sản phẩm phải liền nhau để file import gom lại được
+        .order_by(Product.id, ProductType.id)
+    )
+
+
+def _orders_query() -> Select:
+    customer = aliased(User)
+    return (
+        select(
+            Order.id, Order.user_id, customer.email, Order.status, Order.total_amount,
+            Order.discount_amount, Order.final_amount, Order.created_at, Order.updated_at,
+        )
+        .outerjoin(customer, customer.id == Order.user_id)
+        .where(Order.deleted_at.is_(None))
+        .order_by(Order.created_at, Order.id)
+    )
+
+
+def _users_query() -> Select:
+    # không export password_hash và các token
+    return (
+        select(
+            User.id, User.email, User.phone_number, User.first_name, User.last_name, User.dob,
+            User.created_at, User.updated_at,
+        )
+        .where(User.deleted_at.is_(None))
+        .order_by(User.created_at, User.id)
+    )
+
+
+EXPORTS: Dict[str, Callable[[], Select]] = {
+    "products": _products_query,
+    "orders": _orders_query,
+    "users": _users_query,
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if value is None:
+        return ""
+    return value
+
+
+def _encode_csv(columns: List[str], rows: Iterable[Tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_value(v) for v in row])
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _encode_ndjson(columns: List[str], rows: Iterable[Tuple]) -> Iterator[str]:
+    parts: List[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(parts)
+            parts, size = [], 0
+    yield "".join(parts)
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: định dạng gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class ExportService:
+    def stream(self, name: str, fmt: str = "csv", gzip: bool = False) -> Iterator[bytes]:
+        """Generator bytes của export `name`; session được đóng khi generator kết thúc hoặc bị hủy"""
+        query = EXPORTS[name]()
+        encode = _encode_csv if fmt == "csv" else _encode_ndjson
+
+        def chunks() -> Iterator[bytes]:
+            db = SessionLocal()
+            try:
+                result = db.execute(query.execution_options(yield_per=settings.EXPORT_YIELD_PER))
+                columns = list(result.keys())
+                for text in encode(columns, result):
+                    if text:
+                        yield text.encode("utf-8")
+            finally:
+                db.close()
+
+        return _gzip(chunks()) if gzip else chunks()
+
+    @staticmethod
+    def filename(name: str, fmt: str, gzip: bool) -> str:
+        return f"{name}-{datetime.utcnow():%Y%m%d%H%M%S}.{fmt}" + (".gz" if gzip else "")
@@ -0,0 +1,45 @@
+"""Email nghiệp vụ (xác nhận đơn hàng, đặt lại mật khẩu...) gửi qua job nền `mail.send`.
+
+`send_template(db, ...)` thêm job trong transaction hiện tại nên request không chờ SMTP, và email chỉ
+được gửi khi request commit. Job render template rồi đưa email vào `mailer` (`app/core/mail.py`), nơi
+email của nhiều job được gom thành lô trên các kết nối SMTP giữ mở. Lỗi tạm thời (mất kết nối, 4xx) thì
+job chạy lại; lỗi 5xx hoặc template sai thì dừng.
+"""
+import smtplib
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import PermanentJobError, enqueue, job
+from app.core.mail import UnknownMailTemplate, build_message, mail_templates, mailer, message_id
+
+
+def send_template(db: Session, to: str, template: str, context: dict,
+                  idempotency_key: Optional[str] = None, delay: float = 0) -> str:
+    """Gửi email từ template `template` tới `to` sau khi transaction của `db` commit; trả về id job"""
+    # Message-ID cố định từ lúc thêm job: lần chạy lại của job gửi cùng Message-ID để phía nhận lọc trùng
+    payload = {"to": to, "template": template, "context": context, "message_id": message_id()}
+    return enqueue(db, "mail.send", payload, idempotency_key=idempotency_key, delay=delay)
+
+
+def _permanent(error: Exception) -> bool:
+    """Lỗi 5xx: server từ chối hẳn, gửi lại cũng vậy"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+# đủ job chạy cùng lúc để mọi kết nối SMTP gửi được lô đầy
+@job("mail.send", max_attempts=8, concurrency=settings.MAIL_SMTP_CONNECTIONS * settings.MAIL_BATCH_SIZE)
+async def send_mail(to: str, template: str, context: dict, message_id: Optional[str] = None) -> None:
+    try:
+        subject, text, html = mail_templates.render(template, context)
+    except (UnknownMailTemplate, NameError) as e:
+        raise PermanentJobError(f"Mail template {template!r}: {e}") from e
+    try:
+        await mailer.send(build_message(to, subject, text, html, message_id))
+    except smtplib.SMTPException as e:
+        if _permanent(e):
+            raise PermanentJobError(f"SMTP rejected {to}: {e}") from e
+        raise
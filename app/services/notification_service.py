@@ -0,0 +1,272 @@
+"""Thông báo: gửi trực tiếp, theo nhóm user (segment) và broadcast.
+
+- Trực tiếp (`audience = user`, tối đa `NOTIFICATION_DIRECT_MAX_USERS` user): một `Notification` và một
+  `UserNotification` cho mỗi người nhận, ghi cùng request (một executemany INSERT).
+- Broadcast (`all`): chỉ một dòng `Notification`. Trạng thái đọc được tạo lười: user đọc thì mới có dòng
+  `UserNotification` (đã đọc), nên gửi cho cả triệu user vẫn là một INSERT.
+- Segment: request chỉ lưu `Notification` ở trạng thái `pending` và thêm job `notifications.fan_out`
+  (xem `app/core/jobs.py`). Job tạo `UserNotification` theo lô `NOTIFICATION_FANOUT_CHUNK_SIZE` user bằng
+  `INSERT ... SELECT` (không nạp user vào Python); tiến độ lưu cùng lô nên job dừng giữa chừng thì
+  lần chạy lại làm tiếp.
+- Số chưa đọc được cache theo user (`unread`) và cập nhật theo sự kiện phát qua `notification_hub`
+  (thông báo mới +1, đánh dấu đã đọc -n), nên endpoint đếm và luồng SSE không truy vấn lại mỗi lần.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.database import on_commit, run_in_session
+from app.core.jobs import enqueue, job
+from app.core.metrics import notification_recipients_total, record_cache
+from app.core.realtime import ConnectionHub, broker
+from app.models.notification import Notification
+from app.repositories.notification_repository import NotificationRepository
+from app.schemas.request.notification import NotificationCreate
+from app.schemas.response.notification import InboxNotificationResponse
+
+logger = logging.getLogger("app")
+
+# nhóm của mọi kết nối SSE: broadcast phát tới khóa `group:all`
+ALL_GROUP = "all"
+
+
+def inbox_item(notification: Notification, is_read: bool = False, read_at: Optional[datetime] = None) -> dict:
+    return InboxNotificationResponse(
+        id=notification.id, title=notification.title, content=notification.content, type=notification.type,
+        created_at=notification.created_at, is_read=bool(is_read), read_at=read_at,
+    ).model_dump(mode="json")
+
+
+class NotificationService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.notifications = NotificationRepository(db)
+
+    def get(self, notification_id: str) -> Optional[Notification]:
+        return self.notifications.get(notification_id)
+
+    def create(self, payload: NotificationCreate, sender_id: Optional[str] = None) -> Notification:
+        """Tạo thông báo; người nhận được báo qua `notification_hub` sau khi commit"""
+        now = datetime.utcnow()
+        data = {
+            "title": payload.title, "content": payload.content, "type": payload.type,
+            "sender_id": sender_id, "audience": payload.audience, "status": "sent", "sent_at": now,
+        }
+        if payload.audience == "segment":
+            data.update(status="pending", sent_at=None,
+                        segment=json.dumps(payload.segment.model_dump(mode="json", exclude_none=True)))
+        if payload.audience == "user":
+            user_ids = self.notifications.existing_user_ids(list(dict.fromkeys(payload.user_ids)))
+            if not user_ids:
+                raise ValueError("Không có user nhận hợp lệ.")
+            data["recipient_count"] = len(user_ids)
+        # nạp lại `created_at` (giờ DB, cùng nguồn với `User.created_at` dùng để lọc broadcast)
+        notification = self.notifications.create(data, created_by=sender_id, refresh=True)
+        item = inbox_item(notification)
+        if payload.audience == "user":
+            self.notifications.add_recipients(notification.id, user_ids)
+            notification_recipients_total.inc(("user",), len(user_ids))
+            on_commit(self.db, lambda: notification_hub.publish_threadsafe(
+                [f"user:{user_id}" for user_id in user_ids], {"type": "notification", "notification": item}
+            ))
+        elif payload.audience == "all":
+            on_commit(self.db, lambda: notification_hub.publish_threadsafe(
+                [f"group:{ALL_GROUP}"], {"type": "notification", "notification": item}
+            ))
+        else:
+            enqueue(self.db, "notifications.fan_out", {"notification_id": notification.id},
+                    idempotency_key=f"notifications.fan_out:{notification.id}")
+        return notification
+
+    def inbox(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> dict:
+        after_id = decode_cursor(cursor, "notifications") if cursor else None
+        rows, has_more = self.notifications.list_for_user(user_id, limit=limit, after_id=after_id)
+        return {
+            "items": [inbox_item(notification, is_read, read_at) for notification, is_read, read_at in rows],
+            "next_cursor": encode_cursor("notifications", rows[-1][0].id) if has_more else None,
+        }
+
+    def unread_count(self, user_id: str) -> int:
+        return self.notifications.unread_count(user_id)
+
+    def mark_read(self, user_id: str, notification_id: str) -> int:
+        count = self.notifications.mark_read(user_id, notification_id)
+        if count:
+            on_commit(self.db, lambda: notification_hub.publish_threadsafe(
+                [f"user:{user_id}"], {"type": "unread", "delta": -count, "notification_id": notification_id}
+            ))
+        return count
+
+    def mark_all_read(self, user_id: str) -> int:
+        count = self.notifications.mark_all_read(user_id)
+        on_commit(self.db, lambda: notification_hub.publish_threadsafe(
+            [f"user:{user_id}"], {"type": "unread", "count": 0}
+        ))
+        return count
+
+    # ---------- fan-out (gọi từ job nền) ----------
+
+    def claim_fanout(self, notification_id: str) -> bool:
+        return self.notifications.claim_fanout(notification_id, settings.NOTIFICATION_FANOUT_LEASE_SECONDS)
+
+    def fanout_status(self, notification_id: str) -> Optional[str]:
+        notification = self.notifications.get(notification_id)
+        return notification.status if notification is not None else None
+
+    def fan_out_chunk(self, notification_id: str) -> Optional[Tuple[dict, List[str]]]:
+        """Fan-out lô tiếp theo; trả về (thông báo dạng JSON, id user trong lô), None nếu không còn việc"""
+        notification = self.notifications.get(notification_id)
+        if notification is None or notification.status != "sending":
+            return None
+        user_ids = self.notifications.fan_out_chunk(
+            notification, json.loads(notification.segment or "{}"),
+            settings.NOTIFICATION_FANOUT_CHUNK_SIZE, settings.NOTIFICATION_FANOUT_LEASE_SECONDS,
+        )
+        return inbox_item(notification), user_ids
+
+
+def _call(db: Session, fn, *args):
+    return fn(NotificationService(db), *args)
+
+
+def _in_session(fn, *args):
+    """Chạy `fn(NotificationService, *args)` trong một unit of work riêng (SSE, worker nền)"""
+    return run_in_session(_call, fn, *args)
+
+
+class UnreadCounter:
+    """Số chưa đọc theo user trong bộ nhớ worker (LRU có TTL).
+
+    Chỉ user đã có trong cache mới được cộng/trừ theo sự kiện; user chưa có được đếm lại từ DB khi cần.
+    Sự kiện tới trong lúc đang đếm từ DB có thể bị tính hai lần: sai lệch tự hết sau TTL.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def peek(self, user_id: str) -> Optional[int]:
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None:
+                return None
+            expires_at, count = item
+            if expires_at < time.monotonic():
+                del self._items[user_id]
+                return None
+            self._items.move_to_end(user_id)
+            return count
+
+    def set(self, user_id: str, count: int) -> None:
+        with self._lock:
+            self._items[user_id] = (time.monotonic() + self.ttl, max(count, 0))
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def adjust(self, user_id: str, delta: int) -> None:
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is not None:
+                self._items[user_id] = (item[0], max(item[1] + delta, 0))
+
+    def adjust_all(self, delta: int) -> None:
+        with self._lock:
+            for user_id, (expires_at, count) in self._items.items():
+                self._items[user_id] = (expires_at, max(count + delta, 0))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    async def get(self, user_id: str) -> int:
+        count = self.peek(user_id)
+        record_cache("notification_unread", count is not None)
+        if count is None:
+            count = await run_in_threadpool(_in_session, NotificationService.unread_count, user_id)
+            self.set(user_id, count)
+        return count
+
+
+unread = UnreadCounter(settings.NOTIFICATION_UNREAD_CACHE_SECONDS, settings.NOTIFICATION_UNREAD_CACHE_SIZE)
+
+
+class NotificationHub(ConnectionHub):
+    """Hub của luồng SSE; mọi worker nhận mọi sự kiện nên cập nhật `unread` trước khi giao cho kết nối"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        await super().start()
+
+    async def stop(self) -> None:
+        await super().stop()
+        self._loop = None
+
+    def publish_threadsafe(self, keys: Iterable[str], event: dict) -> None:
+        """`publish` từ thread khác (callback sau commit của endpoint đồng bộ); không chờ kết quả"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.publish(list(keys), event), self._loop)
+
+    def deliver_local(self, keys: Iterable[str], event) -> None:
+        keys = list(keys)
+        kind = event.get("type") if isinstance(event, dict) else None
+        if kind == "notification":
+            if f"group:{ALL_GROUP}" in keys:
+                unread.adjust_all(1)
+            else:
+                for key in keys:
+                    unread.adjust(key[5:], 1)
+        elif kind == "unread":
+            for key in keys:
+                if "count" in event:
+                    unread.set(key[5:], event["count"])
+                else:
+                    unread.adjust(key[5:], event["delta"])
+        super().deliver_local(keys, event)
+
+
+notification_hub = NotificationHub(
+    broker, channel="notifications", max_connections=settings.REALTIME_MAX_CONNECTIONS
+)
+
+
+class FanoutBusy(Exception):
+    """Lần chạy khác đang giữ quyền fan-out thông báo (lease chưa hết hạn)"""
+
+
+@job("notifications.fan_out", timeout=3600, max_attempts=10)
+async def fan_out_notification(notification_id: str) -> None:
+    """Fan-out thông báo segment theo lô, mỗi lô một transaction; chạy lại thì làm tiếp từ lô dở"""
+    if not await run_in_threadpool(_in_session, NotificationService.claim_fanout, notification_id):
+        if await run_in_threadpool(_in_session, NotificationService.fanout_status, notification_id) in (None, "sent"):
+            return
+        # job sẽ chạy lại sau khi lease hết hạn
+        raise FanoutBusy(notification_id)
+    while True:
+        result = await run_in_threadpool(_in_session, NotificationService.fan_out_chunk, notification_id)
+        if result is None:
+            return
+        item, user_ids = result
+        if not user_ids:
+            logger.info("Notification %s: fan-out finished", notification_id)
+            return
+        notification_recipients_total.inc(("segment",), len(user_ids))
+        await notification_hub.publish([f"user:{user_id}" for user_id in user_ids],
+                                       {"type": "notification", "notification": item})
@@ -1,9 +1,17 @@
+from typing import Optional
 from sqlalchemy.orm import Session
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.jobs import PermanentJobError, enqueue, job
+from app.core.payments import ORDER_STATES
+from app.schemas.request.notification import NotificationCreate
 from app.schemas.request.order import OrderCreate
 from app.models.order import Order
 from app.models.orderDetail import OrderDetail
 from app.models.productType import ProductType
 from app.repositories.order_repository import OrderRepository
+from app.repositories.user_repository import UserRepository
+from app.services.mail_service import send_template
+from app.services.notification_service import NotificationService
 
 class OrderService:
     def __init__(self, db: Session):
@@ -16,7 +24,8 @@ class OrderService:
         product_types = {
             pt.id: pt
             for pt in self.db.query(ProductType).filter(
-                ProductType.id.in_([item.product_type_id for item in order_in.items])
+                ProductType.id.in_([item.product_type_id for item in order_in.items]),
+                ProductType.deleted_at.is_(None)
             )
         }
         total = 0
@@ -49,13 +58,77 @@ class OrderService:
             od = OrderDetail(
                 order_id=order.id,
                 product_type_id=detail["product_type_id"],
-                quantity=detail["quantity"],
+                number=detail["quantity"],
                 price=detail["price"],
             )
             self.db.add(od)
-        self.db.commit()
-        self.db.refresh(order)
+        self.db.flush()
+        # việc sau đặt hàng (thông báo cho khách...) chạy nền, không làm chậm request
+        enqueue(self.db, "orders.created", {"order_id": order.id}, idempotency_key=f"orders.created:{order.id}")
         # => Sau này gọi payment gateway (VNPay/Momo) thì handle ở đây, chưa cần luôn xử lí ở code này
 
         # Nên trả về order (kèm list detail)
-        return order
\ No newline at end of file
+        return order
+
+    def history(self, user_id: str, status: Optional[str] = None, limit: int = 20,
+                cursor: Optional[str] = None) -> dict:
+        """Trang lịch sử đơn của user theo keyset: 1 câu đọc đơn (kèm payment) + 1 câu đọc mọi dòng của trang"""
+        if status is not None and status not in ORDER_STATES.states:
+            raise ValueError(f"status phải là một trong: {', '.join(sorted(ORDER_STATES.states))}")
+        after_id = decode_cursor(cursor, "orders") if cursor else None
+        orders, has_more = self.repo.get_by_user(user_id, status=status, limit=limit, after_id=after_id)
+        items = self.repo.get_items(order.id for order in orders)
+        return {
+            "items": [_history_item(order, items[order.id]) for order in orders],
+            "next_cursor": encode_cursor("orders", orders[-1].id) if has_more else None,
+        }
+
+    def get_detail(self, order_id: str) -> Optional[dict]:
+        """Đơn kèm payment và các dòng (tên, ảnh sản phẩm) trong 2 câu truy vấn"""
+        order = self.repo.get_detail(order_id)
+        if order is None:
+            return None
+        return _history_item(order, self.repo.get_items([order.id])[order.id])
+
+
+def _history_item(order: Order, items: list) -> dict:
+    return {
+        "id": order.id,
+        "user_id": order.user_id,
+        "status": order.status,
+        "total_amount": order.total_amount,
+        "discount_amount": order.discount_amount,
+        "final_amount": order.final_amount,
+        "created_at": order.created_at,
+        "payment": order.payment,
+        "items": items,
+    }
+
+
+@job("orders.created")
+def order_created(db: Session, order_id: str) -> None:
+    """Thông báo đặt hàng thành công cho khách (trong app và email xác nhận)"""
+    order = OrderRepository(db).get(order_id)
+    if order is None:
+        raise PermanentJobError(f"Order {order_id} not found")
+    NotificationService(db).create(NotificationCreate(
+        title="Đặt hàng thành công",
+        content=f"Đơn hàng {order.id} ({order.final_amount:,.0f}đ) đã được ghi nhận.",
+        type="order", audience="user", user_ids=[order.user_id],
+    ))
+    user = UserRepository(db).get(order.user_id)
+    if user is None or not user.email:
+        return
+    lines = [
+        {"name": line.product_name, "volume": line.volume, "number": line.quantity,
+         "price": f"{line.price:,.0f}đ", "total": f"{line.price * line.quantity:,.0f}đ"}
+        for line in OrderRepository(db).get_items([order.id])[order.id]
+    ]
+    send_template(db, user.email, "order_confirmation", {
+        "name": " ".join(part for part in (user.first_name, user.last_name) if part) or user.email,
+        "order_id": order.id,
+        "lines": lines,
+        "total_amount": f"{order.total_amount or 0:,.0f}đ",
+        "discount_amount": f"{order.discount_amount or 0:,.0f}đ",
+        "final_amount": f"{order.final_amount or 0:,.0f}đ",
+    }, idempotency_key=f"mail:order_confirmation:{order.id}")
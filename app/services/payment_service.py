@@ -0,0 +1,147 @@
+"""Luồng thanh toán: tạo lần thanh toán, xử lý webhook của provider, chuyển trạng thái đơn hàng.
+
+- Webhook được ghi vào `payment_events` trước khi xử lý; unique index `(provider, transaction_id, status)`
+  loại webhook provider gửi lại, kể cả khi hai bản tới cùng lúc (bản sau chờ bản trước commit rồi lỗi
+  trùng khóa).
+- Payment và đơn hàng được chuyển trạng thái bằng UPDATE có điều kiện (`app/core/payments.py`), nên
+  webhook trùng lọt qua bước trên (mã giao dịch khác) cũng không áp dụng hai lần.
+- Cả webhook là một transaction: lỗi giữa chừng thì rollback cả sự kiện, provider gửi lại sau.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.jobs import enqueue
+from app.core.metrics import payment_webhooks_total
+from app.core.payments import (
+    OFFLINE_METHODS, ORDER_STATES, PAYMENT_STATES, WebhookEvent, payment_ref, providers,
+)
+from app.models.order import Order
+from app.models.payment import Payment
+from app.repositories.order_repository import OrderRepository
+from app.repositories.payment_repository import PaymentRepository
+from app.services import analytics_service  # noqa: F401  (đăng ký job analytics.order_sales)
+
+logger = logging.getLogger("app")
+
+
+class PaymentConflict(Exception):
+    """Trạng thái đơn hàng/thanh toán vừa bị request khác thay đổi, hoặc không cho phép thao tác"""
+
+
+def available_methods() -> Tuple[str, ...]:
+    return OFFLINE_METHODS + tuple(providers)
+
+
+class PaymentService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.orders = OrderRepository(db)
+        self.payments = PaymentRepository(db)
+
+    def get(self, payment_id: str) -> Optional[Payment]:
+        return self.payments.get(payment_id)
+
+    def checkout(self, order_id: str, user_id: str, method: str, client_ip: str) -> Tuple[Payment, Optional[str]]:
+        """Bắt đầu thanh toán đơn của user; trả về (payment, URL thanh toán hoặc None nếu COD)"""
+        if method not in available_methods():
+            raise ValueError(f"Phương thức thanh toán không hỗ trợ: {method}")
+        order = self.orders.get(order_id)
+        if order is None or order.user_id != user_id:
+            raise LookupError("Đơn hàng không tồn tại.")
+        if order.status != "pending":
+            raise PaymentConflict("Đơn hàng không ở trạng thái chờ thanh toán.")
+        payment = self.payments.start_attempt(order.id, method, order.final_amount, ("pending", "failed"))
+        if payment is None:
+            raise PaymentConflict("Đơn hàng đã được thanh toán hoặc đã hủy.")
+        if method in OFFLINE_METHODS:
+            return payment, None
+        url = providers[method].checkout_url(
+            payment_ref(payment.id, payment.attempts), payment.amount, f"Thanh toan don hang {order.id}",
+            client_ip,
+        )
+        return payment, url
+
+    def _transition_order(self, order_id: str, target: str, sources) -> bool:
+        """Chuyển trạng thái đơn (UPDATE có điều kiện); thành công thì thêm job cập nhật thống kê bán hàng"""
+        if not self.payments.transition_order(order_id, target, sources):
+            return False
+        enqueue(self.db, "analytics.order_sales", {"order_id": order_id},
+                idempotency_key=f"analytics.order_sales:{order_id}:{target}")
+        return True
+
+    # ---------- webhook ----------
+
+    def handle_webhook(self, event: WebhookEvent) -> str:
+        """Áp dụng webhook; trả về applied | duplicate | ignored | not_found | amount_mismatch"""
+        payment = self.payments.get(event.payment_id)
+        event_id = self.payments.record_event(
+            event.provider, event.transaction_id, event.status, payment.id if payment else None, event.amount,
+            json.dumps(event.raw, separators=(",", ":"), ensure_ascii=False, default=str),
+        )
+        if event_id is None:
+            result = "duplicate"
+        elif payment is None or payment.method != event.provider:
+            result = "not_found"
+        elif event.status in ("paid", "refunded") and abs((payment.amount or 0) - event.amount) >= 0.5:
+            result = "amount_mismatch"
+        else:
+            result = self._apply(payment, event)
+        if event_id is not None:
+            self.payments.set_event_result(event_id, result)
+        payment_webhooks_total.inc((event.provider, result))
+        if result not in ("applied", "duplicate"):
+            logger.warning("Payment webhook %s %s (%s) for %s: %s", event.provider, event.transaction_id,
+                           event.status, event.ref, result)
+        return result
+
+    def _apply(self, payment: Payment, event: WebhookEvent) -> str:
+        if event.status == "paid":
+            if not self.payments.transition(payment.id, "paid", PAYMENT_STATES.sources("paid"),
+                                            transaction_id=event.transaction_id, paid_at=datetime.utcnow()):
+                if payment.status == "cancelled":
+                    logger.error("Payment %s: provider captured %s after the order was cancelled, refund manually",
+                                 payment.id, event.transaction_id)
+                return "ignored"
+            if not self._transition_order(payment.order_id, "paid", ("pending",)):
+                # đơn đã bị hủy trong lúc khách thanh toán: cần hoàn tiền thủ công
+                logger.error("Order %s: payment %s captured but order is no longer pending",
+                             payment.order_id, payment.id)
+            return "applied"
+        if event.status == "failed":
+            return "applied" if self.payments.transition(payment.id, "failed", ("pending",)) else "ignored"
+        if event.status == "refunded":
+            if not self.payments.transition(payment.id, "refunded", PAYMENT_STATES.sources("refunded")):
+                return "ignored"
+            self._transition_order(payment.order_id, "refunded", ORDER_STATES.sources("refunded"))
+            return "applied"
+        return "ignored"
+
+    # ---------- đơn hàng (admin) ----------
+
+    def change_order_status(self, order_id: str, target: str) -> Order:
+        """Chuyển trạng thái đơn (giao hàng, hoàn tất, hủy); hoàn tiền đi qua webhook của provider"""
+        order = self.orders.get(order_id)
+        if order is None:
+            raise LookupError("Đơn hàng không tồn tại.")
+        if target == "refunded" or not ORDER_STATES.can(order.status, target):
+            raise PaymentConflict(f"Không thể chuyển đơn hàng từ {order.status} sang {target}.")
+        payment = self.payments.get_by_order(order.id)
+        cod = payment is not None and payment.method in OFFLINE_METHODS
+        if target == "shipping" and order.status == "pending" and not cod:
+            raise PaymentConflict("Đơn hàng chưa được thanh toán.")
+        # so với trạng thái vừa đọc: request khác đổi trạng thái trước thì lần này không áp dụng
+        if not self._transition_order(order.id, target, (order.status,)):
+            raise PaymentConflict("Đơn hàng vừa được cập nhật, vui lòng thử lại.")
+        if payment is not None:
+            if target == "cancelled":
+                self.payments.transition(payment.id, "cancelled", PAYMENT_STATES.sources("cancelled"))
+            elif target == "completed" and cod:
+                # COD: thu tiền khi giao
+                self.payments.transition(payment.id, "paid", PAYMENT_STATES.sources("paid"),
+                                         paid_at=datetime.utcnow())
+        self.db.refresh(order)
+        return order
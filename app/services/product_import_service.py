@@ -0,0 +1,364 @@
+"""Import sản phẩm hàng loạt từ file CSV/JSONL.
+
+- Upload được ghi dần ra file trong `PRODUCT_IMPORT_DIR` (không giữ cả file trong RAM). Import chạy
+  bằng job nền `products.import` (`app/core/jobs.py`), trạng thái và tiến độ lưu ở bảng
+  `product_imports`, nên worker nào cũng trả lời được `GET /products/import/{id}`. Thư mục phải dùng
+  chung giữa các worker (cùng máy hoặc ổ mạng) vì job có thể chạy ở worker khác worker nhận file.
+- File được đọc từng dòng; mỗi `PRODUCT_IMPORT_BATCH_SIZE` sản phẩm là một transaction.
+- Brand/category được tra theo slug từ map nạp sẵn một lần ở đầu job.
+- Upsert: có `id` thì cập nhật sản phẩm đó, không thì khớp theo `name`; variant khớp theo
+  `variant_id` hoặc cặp (volume, type_value_id). Variant không có trong file được giữ nguyên.
+
+CSV: mỗi dòng là một variant, các dòng liên tiếp cùng `id`/`name` thuộc cùng một sản phẩm.
+Cột sản phẩm: id, name, brand_slug, category_slug, brand_id, category_id, description, thumbnail,
+is_active. Cột variant: variant_id và các trường của `ProductTypeCreateRequest`.
+JSONL: mỗi dòng là một `ProductImportRow` với `product_types` lồng bên trong.
+"""
+import csv
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.jobs import PermanentJobError, enqueue, job
+from app.models.productType import ProductType
+from app.repositories.product_import_repository import ProductImportRepository
+from app.repositories.product_repository import ProductRepository
+from app.schemas.request.product import ProductImportRow, ProductTypeCreateRequest
+
+logger = logging.getLogger("app")
+settings = get_settings()
+
+FORMATS = ("csv", "jsonl")
+PRODUCT_FIELDS = ("name", "brand_id", "category_id", "description", "thumbnail", "is_active")
+VARIANT_FIELDS = tuple(ProductTypeCreateRequest.model_fields)
+CHUNK_SIZE = 64 * 1024
+
+# (dòng đầu tiên, bản ghi, lỗi parse, số dòng của bản ghi)
+ParsedRecord = Tuple[int, Optional[dict], Optional[str], int]
+
+
+class ImportTooLarge(Exception):
+    pass
+
+
+@dataclass
+class ImportJob:
+    id: str
+    format: str
+    path: str
+    created_by: Optional[str] = None
+    status: str = "pending"
+    rows: int = 0
+    products_created: int = 0
+    products_updated: int = 0
+    variants_created: int = 0
+    variants_updated: int = 0
+    failed: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    errors: List[dict] = field(default_factory=list)
+
+    def add_error(self, row: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.PRODUCT_IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    @property
+    def rows_per_sec(self) -> float:
+        if not self.started_at:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return round(self.rows / elapsed, 1) if elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id, "status": self.status, "format": self.format, "rows": self.rows,
+            "products_created": self.products_created, "products_updated": self.products_updated,
+            "variants_created": self.variants_created, "variants_updated": self.variants_updated,
+            "failed": self.failed, "rows_per_sec": self.rows_per_sec,
+            "started_at": self.started_at, "finished_at": self.finished_at, "errors": self.errors,
+        }
+
+    def to_values(self) -> dict:
+        """Các cột của `product_imports`"""
+        return {
+            "status": self.status, "rows": self.rows,
+            "products_created": self.products_created, "products_updated": self.products_updated,
+            "variants_created": self.variants_created, "variants_updated": self.variants_updated,
+            "failed": self.failed, "started_at": _to_datetime(self.started_at),
+            "finished_at": _to_datetime(self.finished_at), "errors": json.dumps(self.errors, ensure_ascii=False),
+        }
+
+    @classmethod
+    def from_record(cls, record) -> "ImportJob":
+        return cls(
+            id=record.id, format=record.format, path=record.path, created_by=record.created_by,
+            status=record.status, rows=record.rows, products_created=record.products_created,
+            products_updated=record.products_updated, variants_created=record.variants_created,
+            variants_updated=record.variants_updated, failed=record.failed,
+            started_at=_to_timestamp(record.started_at), finished_at=_to_timestamp(record.finished_at),
+            errors=json.loads(record.errors) if record.errors else [],
+        )
+
+
+def _to_datetime(value: Optional[float]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(value) if value is not None else None
+
+
+def _to_timestamp(value: Optional[datetime]) -> Optional[float]:
+    return (value - datetime(1970, 1, 1)).total_seconds() if value is not None else None
+
+
+def detect_format(fmt: Optional[str], filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    if fmt:
+        return fmt
+    ext = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if ext in ("csv", "jsonl", "ndjson"):
+        return "csv" if ext == "csv" else "jsonl"
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/x-jsonlines"):
+        return "jsonl"
+    return None
+
+
+async def spool_upload(chunks: AsyncIterator[bytes], max_bytes: int) -> str:
+    """Ghi dần luồng upload ra file trong `PRODUCT_IMPORT_DIR` và trả về đường dẫn; dừng đọc ngay khi vượt
+    `max_bytes`"""
+    size = 0
+    os.makedirs(settings.PRODUCT_IMPORT_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="product-import-", dir=settings.PRODUCT_IMPORT_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImportTooLarge(f"File vượt quá {max_bytes} byte")
+                f.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def _clean(row: dict) -> dict:
+    return {k.strip(): v.strip() for k, v in row.items() if k and isinstance(v, str) and v.strip() != ""}
+
+
+def iter_csv(f) -> Iterator[ParsedRecord]:
+    """Gom các dòng liên tiếp cùng sản phẩm thành một bản ghi có `product_types`"""
+    current_key, current, first_line, lines = None, None, 0, 0
+    for line_no, raw in enumerate(csv.DictReader(f), start=2):
+        row = _clean(raw)
+        variant = {k: row.pop(k) for k in VARIANT_FIELDS if k in row}
+        if "variant_id" in row:
+            variant["id"] = row.pop("variant_id")
+        key = row.get("id") or row.get("name")
+        if current is not None and key and key == current_key:
+            if variant:
+                current["product_types"].append(variant)
+            lines += 1
+            continue
+        if current is not None:
+            yield first_line, current, None, lines
+        current_key, first_line, lines = key, line_no, 1
+        current = {**row, "product_types": [variant] if variant else []}
+    if current is not None:
+        yield first_line, current, None, lines
+
+
+def iter_jsonl(f) -> Iterator[ParsedRecord]:
+    for line_no, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"JSON không hợp lệ: {e}", 1
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Mỗi dòng phải là một object JSON", 1
+            continue
+        yield line_no, record, None, 1
+
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+
+
+class ProductImportService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.imports = ProductImportRepository(db)
+
+    def create(self, path: str, fmt: str, created_by: Optional[str] = None) -> ImportJob:
+        """Ghi bản ghi import (chưa chạy); không commit"""
+        record = self.imports.create({"format": fmt, "path": path, "status": "pending"}, created_by=created_by)
+        return ImportJob.from_record(record)
+
+    def submit(self, path: str, fmt: str, created_by: Optional[str] = None) -> ImportJob:
+        """Ghi bản ghi import và thêm job chạy nó, trong transaction của request"""
+        import_job = self.create(path, fmt, created_by=created_by)
+        enqueue(self.db, "products.import", {"import_id": import_job.id},
+                idempotency_key=f"products.import:{import_job.id}")
+        return import_job
+
+    def get_job(self, import_id: str) -> Optional[ImportJob]:
+        record = self.imports.get(import_id)
+        return ImportJob.from_record(record) if record else None
+
+    def _save(self, job: ImportJob) -> None:
+        self.imports.save_progress(job.id, job.to_values())
+        self.db.commit()
+
+    def run(self, import_id: str) -> ImportJob:
+        """Chạy import đồng bộ (từ job `products.import` hoặc trực tiếp trong script).
+
+        Chạy lại (worker chết giữa chừng) thì import lại từ đầu file: upsert nên không tạo trùng.
+        """
+        record = self.imports.get(import_id)
+        if record is None:
+            raise PermanentJobError(f"Product import {import_id} not found")
+        job = ImportJob.from_record(record)
+        if job.status in ("completed", "failed"):
+            return job
+        job = ImportJob(id=job.id, format=job.format, path=job.path, created_by=job.created_by,
+                        status="running", started_at=time.time())
+        self._save(job)
+        repo = ProductRepository(self.db)
+        try:
+            brands, categories = repo.get_brand_slug_map(), repo.get_category_slug_map()
+            reader = iter_csv if job.format == "csv" else iter_jsonl
+            batch: List[ParsedRecord] = []
+            with open(job.path, encoding="utf-8-sig", newline="") as f:
+                for record in reader(f):
+                    job.rows += record[3]
+                    batch.append(record)
+                    if len(batch) >= settings.PRODUCT_IMPORT_BATCH_SIZE:
+                        self._flush(repo, job, batch, brands, categories)
+                        self._save(job)
+                        batch = []
+                if batch:
+                    self._flush(repo, job, batch, brands, categories)
+            job.status = "completed"
+        except Exception:
+            logger.exception(f"Product import {job.id} failed")
+            self.db.rollback()
+            job.status = "failed"
+        job.finished_at = time.time()
+        self._save(job)
+        if os.path.exists(job.path):
+            os.remove(job.path)
+        logger.info(f"Product import {job.id} {job.status}: {job.rows} rows, {job.failed} failed, "
+                    f"{job.rows_per_sec} rows/s")
+        return job
+
+    def _validate(self, job: ImportJob, batch: List[ParsedRecord], brands: Dict[str, str],
+                  categories: Dict[str, str]) -> List[Tuple[int, ProductImportRow]]:
+        valid = []
+        for line, record, error, _ in batch:
+            if error:
+                job.add_error(line, error)
+                continue
+            try:
+                item = ProductImportRow.model_validate(record)
+            except ValidationError as e:
+                job.add_error(line, _format_validation_error(e))
+                continue
+            if item.brand_slug:
+                if item.brand_slug not in brands:
+                    job.add_error(line, f"Không tìm thấy thương hiệu '{item.brand_slug}'")
+                    continue
+                item.brand_id = brands[item.brand_slug]
+            if item.category_slug:
+                if item.category_slug not in categories:
+                    job.add_error(line, f"Không tìm thấy danh mục '{item.category_slug}'")
+                    continue
+                item.category_id = categories[item.category_slug]
+            valid.append((line, item))
+        return valid
+
+    def _flush(self, repo: ProductRepository, job: ImportJob, batch: List[ParsedRecord],
+               brands: Dict[str, str], categories: Dict[str, str]) -> None:
+        valid = self._validate(job, batch, brands, categories)
+        if not valid:
+            return
+        items = [item for _, item in valid]
+        now = datetime.utcnow()
+        existing = repo.find_for_import(
+            ids=[i.id for i in items if i.id], names=[i.name for i in items if not i.id]
+        )
+        by_id = {p_id: p_id for p_id, _ in existing}
+        by_name: Dict[str, str] = {}
+        for p_id, name in existing:
+            by_name.setdefault(name, p_id)
+        variants_by_product = repo.get_variant_keys([p_id for p_id, _ in existing])
+
+        new_products, product_updates, new_variants, variant_updates = [], [], [], []
+        counts = {"pc": 0, "pu": 0, "vc": 0, "vu": 0}
+        for item in items:
+            product_id = by_id.get(item.id) if item.id else by_name.get(item.name)
+            fields = item.model_dump(include=set(PRODUCT_FIELDS))
+            if product_id is None:
+                product_id = item.id or str(uuid.uuid4())
+                new_products.append({"id": product_id, **fields, "created_by": job.created_by})
+                by_id[product_id] = by_name[item.name] = product_id
+                variants_by_product.setdefault(product_id, {})
+                counts["pc"] += 1
+            else:
+                changed = {k: fields[k] for k in PRODUCT_FIELDS if k in item.model_fields_set or
+                           (k in ("brand_id", "category_id") and fields[k] is not None)}
+                product_updates.append({"id": product_id, **changed, "updated_by": job.created_by, "updated_at": now})
+                counts["pu"] += 1
+
+            known = variants_by_product[product_id]
+            for variant in item.product_types or []:
+                key = (variant.volume, variant.type_value_id)
+                variant_id = known.get(variant.id) if variant.id else known.get(key)
+                if variant_id is None:
+                    variant_id = variant.id or str(uuid.uuid4())
+                    new_variants.append({**variant.model_dump(exclude={"id"}), "id": variant_id,
+                                         "product_id": product_id, "created_by": job.created_by})
+                    known[variant_id] = known[key] = variant_id
+                    counts["vc"] += 1
+                else:
+                    changed = variant.model_dump(include=variant.model_fields_set - {"id"})
+                    variant_updates.append({"id": variant_id, **changed, "updated_by": job.created_by,
+                                            "updated_at": now})
+                    counts["vu"] += 1
+
+        try:
+            repo.insert_mappings(new_products)
+            repo.update_mappings(product_updates)
+            repo.insert_mappings(new_variants, ProductType)
+            repo.update_mappings(variant_updates, ProductType)
+            repo.db.commit()
+        except SQLAlchemyError as e:
+            repo.db.rollback()
+            message = f"Lỗi database: {getattr(e, 'orig', None) or e}"
+            for line, _ in valid:
+                job.add_error(line, message)
+            return
+        job.products_created += counts["pc"]
+        job.products_updated += counts["pu"]
+        job.variants_created += counts["vc"]
+        job.variants_updated += counts["vu"]
+
+
+@job("products.import", timeout=settings.PRODUCT_IMPORT_TIMEOUT_SECONDS)
+def import_products(db: Session, import_id: str) -> None:
+    """Chạy một import đã upload; mỗi lô sản phẩm là một transaction, tiến độ ghi sau mỗi lô"""
+    ProductImportService(db).run(import_id)
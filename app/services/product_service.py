@@ -1,10 +1,13 @@
 from sqlalchemy.orm import Session
 from typing import Optional, List, Tuple
+from app.repositories.brand_repository import BrandRepository
+from app.repositories.category_repository import CategoryRepository
 from app.repositories.product_repository import ProductRepository
-from app.schemas.request.product import ProductCreateRequest, ProductUpdateRequest
+from app.schemas.request.product import ProductCreateRequest, ProductUpdateRequest, ProductBulkUpdate
 
 class ProductService:
     def __init__(self, db: Session):
+        self.db = db
         self.repo = ProductRepository(db)
 
     def get_detail(self, id: str):
@@ -41,16 +44,52 @@ class ProductService:
             limit=limit
         )
 
-    def create(self, data: ProductCreateRequest, created_by: Optional[str] = None):
-        """Tạo sản phẩm mới"""
+    def create(self, data: ProductCreateRequest, created_by: Optional[str] = None) -> str:
+        """Tạo sản phẩm mới kèm các variant trong cùng transaction, trả về id sản phẩm"""
         product_data = data.model_dump(exclude={"product_types"})
-        product = self.repo.create(product_data, created_by=created_by)
-        return product
+        variants = [v.model_dump() for v in data.product_types or []]
+        return self.repo.create_with_variants(product_data, variants, created_by=created_by)
 
-    def update(self, id: str, data: ProductUpdateRequest, updated_by: Optional[str] = None):
-        """Cập nhật sản phẩm"""
+    def update(self, id: str, data: ProductUpdateRequest, updated_by: Optional[str] = None) -> bool:
+        """
+        Cập nhật sản phẩm; nếu gửi `product_types` thì đồng bộ variant theo danh sách đó
+        (có id: cập nhật, không id: tạo mới, thiếu trong danh sách: soft delete).
+        """
         update_data = data.model_dump(exclude_unset=True, exclude={"product_types"})
-        return self.repo.update(id, update_data, updated_by=updated_by)
+        variants = None
+        if data.product_types is not None:
+            variants = [v.model_dump(exclude_unset=True) for v in data.product_types]
+        return self.repo.update_with_variants(id, update_data, variants, updated_by=updated_by)
+
+    def _check_references(self, brand_ids, category_ids) -> None:
+        """ValueError nếu thương hiệu/danh mục được tham chiếu không tồn tại (mỗi loại một truy vấn),
+        thay vì để câu INSERT/UPDATE hàng loạt lỗi khóa ngoại"""
+        for repo, ids, label in ((BrandRepository(self.db), brand_ids, "Thương hiệu"),
+                                 (CategoryRepository(self.db), category_ids, "Danh mục")):
+            ids = {i for i in ids if i}
+            missing = ids - set(repo.get_existing_ids(list(ids)))
+            if missing:
+                raise ValueError(f"{label} không tồn tại: {', '.join(sorted(missing))}")
+
+    def bulk_create(self, items: List[ProductCreateRequest], created_by: Optional[str] = None) -> List[str]:
+        """Tạo nhiều sản phẩm (kèm variant) trong một transaction; ValueError nếu thương hiệu/danh mục không tồn tại"""
+        self._check_references([item.brand_id for item in items], [item.category_id for item in items])
+        return self.repo.create_many_with_variants(
+            [(item.model_dump(exclude={"product_types"}), [v.model_dump() for v in item.product_types or []])
+             for item in items],
+            created_by=created_by,
+        )
+
+    def bulk_update(self, ids: List[str], values: ProductBulkUpdate, updated_by: Optional[str] = None) -> int:
+        """Cập nhật hàng loạt (ví dụ ẩn nhiều sản phẩm) bằng một câu UPDATE; ValueError nếu thương hiệu/danh mục
+        không tồn tại"""
+        data = values.model_dump(exclude_unset=True)
+        self._check_references([data.get("brand_id")], [data.get("category_id")])
+        return self.repo.bulk_update(ids, data, updated_by=updated_by)
+
+    def bulk_delete(self, ids: List[str], deleted_by: Optional[str] = None) -> int:
+        """Soft delete hàng loạt bằng một câu UPDATE"""
+        return self.repo.bulk_soft_delete(ids, deleted_by=deleted_by)
 
     def delete(self, id: str, deleted_by: Optional[str] = None) -> bool:
         """Soft delete sản phẩm"""
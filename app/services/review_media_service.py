@@ -0,0 +1,122 @@
+"""Upload ảnh review.
+
+- File nhận từng chunk từ body multipart và ghi dần ra file tạm trong storage (không giữ cả file
+  trong RAM), đồng thời tính sha256 và chặn ngay khi vượt `REVIEW_MEDIA_MAX_BYTES`.
+- Định dạng xác định theo chữ ký đầu file (JPEG/PNG/GIF/WebP), không theo Content-Type client gửi.
+- Ảnh được lưu theo hash nội dung: `reviews/<2 ký tự đầu>/<sha256>.<ext>` (bản gốc), `.webp`
+  (bản hiển thị) và `_thumb.webp`. Ảnh đã có trong storage thì bỏ qua bước xử lý và lưu.
+- Tạo bản WebP/thumbnail tốn CPU nên chạy trên process pool riêng (`IMAGE_WORKERS`).
+"""
+import hashlib
+import os
+import tempfile
+from typing import AsyncIterator, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.images import EXTENSIONS, make_variants, sniff_image_type
+from app.core.process_pool import ProcessPool
+from app.core.storage import storage
+from app.models.review import Review
+from app.models.reviewMedia import ReviewMedia
+
+image_pool = ProcessPool("Image processing", settings.IMAGE_WORKERS, settings.IMAGE_MAX_PENDING, settings.IMAGE_NICE)
+
+
+class MediaTooLarge(Exception):
+    pass
+
+
+class UnsupportedMedia(Exception):
+    pass
+
+
+async def spool_media(chunks: AsyncIterator[bytes], max_bytes: int) -> Tuple[str, str, int, bytes]:
+    """Ghi dần luồng upload ra file tạm; trả về (đường dẫn, sha256, số byte, 16 byte đầu)"""
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    fd, path = tempfile.mkstemp(prefix="review-media-", dir=storage.temp_dir())
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise MediaTooLarge(f"File vượt quá {max_bytes} byte")
+                if len(head) < 16:
+                    head += chunk[:16 - len(head)]
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest(), size, head
+
+
+async def store_image(chunks: AsyncIterator[bytes]) -> dict:
+    """Nhận, xử lý và lưu một ảnh; trả về các trường của `ReviewMedia`"""
+    path, content_hash, size, head = await spool_media(chunks, settings.REVIEW_MEDIA_MAX_BYTES)
+    try:
+        content_type = sniff_image_type(head)
+        if content_type is None:
+            raise UnsupportedMedia("Chỉ nhận ảnh JPEG, PNG, GIF hoặc WebP.")
+        base = f"reviews/{content_hash[:2]}/{content_hash}"
+        original_key = f"{base}.{EXTENSIONS[content_type]}"
+        display_key = f"{base}.webp"
+        thumbnail_key = f"{base}_thumb.webp"
+        # bản hiển thị được lưu sau cùng: đã có nó nghĩa là đủ cả bộ
+        if not await run_in_threadpool(storage.exists, display_key):
+            variants = await image_pool.run(
+                make_variants, path, os.path.dirname(path),
+                settings.REVIEW_MEDIA_DISPLAY_SIZE, settings.REVIEW_MEDIA_THUMBNAIL_SIZE,
+                settings.REVIEW_MEDIA_WEBP_QUALITY, settings.REVIEW_MEDIA_MAX_PIXELS,
+            )
+            await run_in_threadpool(_put_all, [
+                (path, original_key, content_type),
+                (variants["thumbnail"]["path"], thumbnail_key, "image/webp"),
+                (variants["display"]["path"], display_key, "image/webp"),
+            ])
+        return {
+            "path": storage.url(display_key),
+            "thumbnail_path": storage.url(thumbnail_key),
+            "content_hash": content_hash,
+            "content_type": content_type,
+            "size_bytes": size,
+        }
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _put_all(files) -> None:
+    try:
+        for src, key, content_type in files:
+            storage.put_file(src, key, content_type)
+    finally:
+        for src, _, _ in files:
+            if os.path.exists(src):
+                os.remove(src)
+
+
+class ReviewMediaService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_review_for_upload(self, review_id: str) -> Tuple[Optional[Review], int]:
+        """Review (chưa xóa) và số ảnh hiện có của nó"""
+        review = self.db.query(Review).filter(Review.id == review_id, Review.deleted_at.is_(None)).first()
+        if review is None:
+            return None, 0
+        count = self.db.query(func.count(ReviewMedia.id)).filter(
+            ReviewMedia.review_id == review_id, ReviewMedia.deleted_at.is_(None)
+        ).scalar()
+        return review, count
+
+    def add_media(self, review_id: str, stored: dict, created_by: Optional[str] = None) -> ReviewMedia:
+        media = ReviewMedia(review_id=review_id, created_by=created_by, **stored)
+        self.db.add(media)
+        self.db.flush()
+        return media
@@ -1,5 +1,7 @@
+from typing import Optional
 from sqlalchemy.orm import Session
-from app.repositories.review_repository import ReviewRepository
+from app.core.cursor import decode_cursor, encode_cursor
+from app.repositories.review_repository import REVIEW_SORTS, ReviewRepository
 from app.schemas.request.review import ReviewCreate, ReviewUpdate
 
 class ReviewService:
@@ -7,16 +9,54 @@ class ReviewService:
         self.repo = ReviewRepository(db)
 
     def create(self, review_in: ReviewCreate):
-        return self.repo.create(review_in.dict())
+        review = self.repo.create(review_in.dict())
+        self.repo.apply_rating_delta(review.product_id, added=review.rating)
+        return review
 
     def get(self, review_id: str):
         return self.repo.get(review_id)
 
     def update(self, review_id: str, review_in: ReviewUpdate):
-        return self.repo.update(review_id, review_in.dict(exclude_unset=True))
+        data = review_in.dict(exclude_unset=True)
+        existing = self.repo.get(review_id)
+        if not existing:
+            return None
+        old_rating = existing.rating
+        review = self.repo.update(review_id, data)
+        if review and review.rating != old_rating:
+            self.repo.apply_rating_delta(review.product_id, removed=old_rating, added=review.rating)
+        return review
 
     def delete(self, review_id: str):
-        return self.repo.delete(review_id)
+        existing = self.repo.get(review_id)
+        if not existing:
+            return False
+        deleted = self.repo.delete(review_id)
+        if deleted:
+            self.repo.apply_rating_delta(existing.product_id, removed=existing.rating)
+        return deleted
 
-    def get_by_product(self, product_id: str):
-        return self.repo.get_by_product(product_id)
\ No newline at end of file
+    def list_by_product(self, product_id: str, sort: str = "newest", rating: Optional[int] = None,
+                        limit: int = 20, cursor: Optional[str] = None) -> dict:
+        """Trang review theo keyset kèm tổng hợp đánh giá (đọc sẵn, không tính lại mỗi request)"""
+        if sort not in REVIEW_SORTS:
+            raise ValueError(f"sort phải là một trong: {', '.join(REVIEW_SORTS)}")
+        after_id = decode_cursor(cursor, sort) if cursor else None
+        items, has_more = self.repo.list_by_product(product_id, sort=sort, rating=rating, limit=limit,
+                                                    after_id=after_id)
+        next_cursor = encode_cursor(sort, items[-1].id) if has_more else None
+        return {
+            "summary": _summary(self.repo.get_rating_summary(product_id)),
+            "items": items,
+            "next_cursor": next_cursor,
+        }
+
+
+def _summary(row) -> dict:
+    if row is None or not row.rating_count:
+        return {"average": 0.0, "count": 0, "histogram": {str(i): 0 for i in range(1, 6)}}
+    return {
+        "average": round(row.rating_sum / row.rating_count, 2),
+        "count": row.rating_count,
+        "histogram": {str(i): getattr(row, f"star_{i}") for i in range(1, 6)},
+    }
@@ -0,0 +1,38 @@
+from typing import List, Optional
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from slugify import slugify
+
+
+def slugify_name(value: str) -> str:
+    return slugify(value or "", lowercase=True) or "n-a"
+
+
+def make_unique_slug(db: Session, model, base: str, exclude_id: Optional[str] = None) -> str:
+    # if exact base exists (excluding optional id), find suffix
+    exists = db.query(model).filter(model.slug == base)
+    if exclude_id:
+        exists = exists.filter(model.id != exclude_id)
+    if exists.first():
+        # find max suffix
+        like_pattern = f"{base}-%"
+        rows = db.query(model.slug).filter(model.slug.ilike(like_pattern)).all()
+        suffixes = [int(r[0].rsplit("-", 1)[1]) for r in rows if r[0].rsplit("-", 1)[-1].isdigit()]
+        next_suffix = (max(suffixes) + 1) if suffixes else 2
+        return f"{base}-{next_suffix}"
+    return base
+
+
+def make_unique_slugs(db: Session, model, bases: List[str]) -> List[str]:
+    """Sinh slug duy nhất cho nhiều tên bằng một truy vấn (tránh trùng cả trong chính danh sách)"""
+    taken = {
+        r[0] for r in db.query(model.slug).filter(or_(*[model.slug.like(f"{b}%") for b in set(bases)])).all()
+    }
+    result = []
+    for base in bases:
+        slug, suffix = base, 2
+        while slug in taken:
+            slug, suffix = f"{base}-{suffix}", suffix + 1
+        taken.add(slug)
+        result.append(slug)
+    return result
@@ -1,5 +1,7 @@
 from typing import Optional, Tuple, List
 from sqlalchemy.orm import Session
+from app.core.auth_cache import user_cache
+from app.core.database import on_commit
 from app.models.user import User
 from app.repositories.user_repository import UserRepository
 from app.schemas.request.auth import UserUpdate
@@ -28,11 +30,25 @@ def update_user(db: Session, user_id: str, user_in: UserUpdate, updated_by: Opti
     if not user_id:
         raise UserNotFoundException(user_id)
     data = user_in.dict(exclude_unset=True)
-    return repo.update(user_id, data, updated_by=updated_by)
+    user = repo.update(user_id, data, updated_by=updated_by)
+    # middleware cache thông tin user đăng nhập: xóa sau commit để request sau thấy dữ liệu mới
+    on_commit(db, lambda: user_cache.invalidate(str(user_id)))
+    return user
 
 
 def delete_user(db: Session, user_id: str, deleted_by: Optional[str] = None) -> bool:
     repo = UserRepository(db)
     if not user_id:
         raise UserNotFoundException(user_id)
-    return repo.delete(user_id, deleted_by=deleted_by)
+    deleted = repo.delete(user_id, deleted_by=deleted_by)
+    on_commit(db, lambda: user_cache.invalidate(str(user_id)))
+    return deleted
+
+
+def bulk_delete_users(db: Session, ids: List[str], deleted_by: Optional[str] = None) -> int:
+    if deleted_by and deleted_by in ids:
+        raise ValueError("Không thể tự xóa tài khoản của chính mình.")
+    repo = UserRepository(db)
+    count = repo.bulk_soft_delete(ids, deleted_by=deleted_by)
+    on_commit(db, lambda: [user_cache.invalidate(str(user_id)) for user_id in ids])
+    return count
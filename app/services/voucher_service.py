@@ -2,7 +2,7 @@ from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from app.models.voucher import Voucher
 from app.repositories.voucher_repository import VoucherRepository
-from app.schemas.request.voucher import VoucherCreate, VoucherUpdate
+from app.schemas.request.voucher import VoucherCreate, VoucherUpdate, VoucherBulkUpdate
 
 
 def get_voucher(db: Session, voucher_id: str) -> Optional[Voucher]:
@@ -56,4 +56,26 @@ def update_voucher(db: Session, voucher_id: str, voucher_in: VoucherUpdate, upda
 def soft_delete_voucher(db: Session, voucher_id: str, deleted_by: Optional[str] = None) -> bool:
     """Soft delete voucher (sử dụng repository)"""
     voucher_repo = VoucherRepository(db)
-    return voucher_repo.delete(voucher_id, deleted_by=deleted_by)
\ No newline at end of file
+    return voucher_repo.delete(voucher_id, deleted_by=deleted_by)
+
+
+def bulk_create_vouchers(db: Session, items: List[VoucherCreate], created_by: Optional[str] = None) -> List[str]:
+    """Tạo nhiều voucher trong một transaction; ValueError nếu code bị trùng"""
+    voucher_repo = VoucherRepository(db)
+    codes = [item.code for item in items]
+    duplicates = sorted({c for c in codes if codes.count(c) > 1} | set(voucher_repo.get_existing_codes(codes)))
+    if duplicates:
+        raise ValueError(f"Voucher code already exists: {', '.join(duplicates)}")
+    return voucher_repo.bulk_create([item.dict() for item in items], created_by=created_by)
+
+
+def bulk_update_vouchers(db: Session, ids: List[str], values: VoucherBulkUpdate, updated_by: Optional[str] = None) -> int:
+    """Cập nhật hàng loạt voucher bằng một câu UPDATE"""
+    voucher_repo = VoucherRepository(db)
+    return voucher_repo.bulk_update(ids, values.dict(exclude_unset=True), updated_by=updated_by)
+
+
+def bulk_delete_vouchers(db: Session, ids: List[str], deleted_by: Optional[str] = None) -> int:
+    """Soft delete hàng loạt voucher bằng một câu UPDATE"""
+    voucher_repo = VoucherRepository(db)
+    return voucher_repo.bulk_soft_delete(ids, deleted_by=deleted_by)
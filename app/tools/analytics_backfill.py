@@ -0,0 +1,89 @@
+"""Nạp đơn cũ vào bảng tổng hợp doanh số (`sales_daily_rollups`).
+
+- Đọc `orders` theo khóa chính từng lô `--chunk-size` đơn (keyset, không OFFSET); mỗi lô là một
+  transaction riêng nên không giữ khóa lâu và chạy được khi app đang nhận đơn.
+- Đơn đã đồng bộ (`sales_counted` khớp trạng thái) được bỏ qua: chạy lại, hoặc dừng giữa chừng rồi chạy
+  tiếp, không cộng hai lần. Lô đụng job `analytics.order_sales` đang chạy thì được làm lại.
+- `--rebuild` xóa bảng tổng hợp và cờ `sales_counted` rồi nạp lại từ đầu (sau khi đổi
+  `ANALYTICS_UTC_OFFSET_HOURS` hoặc sửa dữ liệu trực tiếp trong DB).
+
+    python -m app.tools.analytics_backfill
+    python -m app.tools.analytics_backfill --chunk-size 2000 --pause-ms 50
+"""
+import argparse
+import logging
+import sys
+import time
+
+logger = logging.getLogger("app")
+
+MAX_RETRIES = 5
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--pause-ms", type=float, default=0, help="Nghỉ giữa các lô để giảm tải cho database")
+    parser.add_argument("--rebuild", action="store_true", help="Xóa bảng tổng hợp và nạp lại từ đầu")
+    return parser.parse_args(argv)
+
+
+def _chunk(db, after_id, limit):
+    from app.services.analytics_service import AnalyticsService
+
+    return AnalyticsService(db).sync_chunk(after_id, limit)
+
+
+def _clear(db):
+    from app.services.analytics_service import AnalyticsService
+
+    AnalyticsService(db).clear()
+
+
+def backfill(chunk_size: int, pause: float = 0) -> tuple:
+    """Đồng bộ mọi đơn; trả về (số đơn đã đọc, số đơn đã cộng/trừ)"""
+    from app.core.database import run_in_session
+    from app.services.analytics_service import RollupConflict
+
+    after_id, scanned, synced = None, 0, 0
+    started = time.perf_counter()
+    while True:
+        for attempt in range(MAX_RETRIES):
+            try:
+                last_id, count, changed = run_in_session(_chunk, after_id, chunk_size)
+                break
+            except RollupConflict:
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                time.sleep(0.1 * (attempt + 1))
+        if last_id is None:
+            break
+        after_id = last_id
+        scanned += count
+        synced += changed
+        if scanned // chunk_size % 50 == 0:
+            logger.info(f"scanned {scanned:,} orders, synced {synced:,} ({time.perf_counter() - started:.1f}s)")
+        if pause:
+            time.sleep(pause)
+    return scanned, synced
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from app.core.database import run_in_session
+
+    if args.rebuild:
+        run_in_session(_clear)
+        logger.info("cleared sales rollups")
+    started = time.perf_counter()
+    scanned, synced = backfill(args.chunk_size, args.pause_ms / 1000)
+    elapsed = time.perf_counter() - started
+    logger.info(f"done: scanned {scanned:,} orders, synced {synced:,} in {elapsed:.1f}s "
+                f"({scanned / elapsed if elapsed else 0:,.0f} orders/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,506 @@
+"""Sinh dữ liệu giả lập cho mọi bảng trong `app/models/` và chèn hàng loạt bằng Core INSERT.
+
+- Dữ liệu tất định: cùng `--seed` và cùng quy mô luôn cho cùng dữ liệu, kể cả UUID.
+- UUID của bản ghi thứ i được tính từ (seed, bảng, i) nên khóa ngoại luôn trỏ đúng mà không
+  cần giữ toàn bộ id trong bộ nhớ; các dòng được sinh dần theo lô (generator).
+- Mỗi lô là một câu INSERT nhiều dòng (executemany) và được commit riêng.
+
+    python -m app.tools.seed --scale small --create-tables
+    python -m app.tools.seed --products 250000 --variants-per-product 4 --batch-size 5000
+"""
+import argparse
+import hashlib
+import logging
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Table, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("app")
+
+WORDS = [
+    "kem", "duong", "am", "serum", "vitamin", "sua", "rua", "mat", "toner", "tay", "trang", "chong", "nang",
+    "mat-na", "son", "moi", "phan", "nuoc", "hoa", "hong", "tra", "xanh", "collagen", "retinol", "niacinamide",
+    "hyaluronic", "lo-hoi", "nghe", "than", "hoat-tinh", "dau", "tay-trang", "sua-tam", "kem-nen", "cushion",
+]
+ORIGINS = ["Hàn Quốc", "Nhật Bản", "Pháp", "Mỹ", "Việt Nam", "Thái Lan"]
+SKIN_TYPES = ["Da dầu", "Da khô", "Da hỗn hợp", "Da nhạy cảm", "Mọi loại da"]
+VOLUMES = ["30ml", "50ml", "100ml", "150ml", "200ml"]
+PROVINCES = ["Hà Nội", "TP. Hồ Chí Minh", "Đà Nẵng", "Hải Phòng", "Cần Thơ"]
+ORDER_STATUSES = ["pending", "completed", "completed", "completed", "cancelled"]
+PAYMENT_METHODS = ["cod", "vnpay", "momo"]
+ROLES = ["ADMIN", "CLIENT"]
+
+DEFAULT_PASSWORD = "Seed@12345"
+BASE_TIME = datetime(2025, 1, 1)
+
+
+@dataclass
+class Scale:
+    brands: int = 50
+    categories: int = 30
+    products: int = 2000
+    variants_per_product: int = 3
+    users: int = 500
+    carts: int = 200
+    cart_items_per_cart: int = 2
+    wishlist_items_per_user: int = 2
+    vouchers: int = 50
+    orders: int = 2000
+    items_per_order: int = 3
+    reviews: int = 5000
+    notifications: int = 20
+    conversations: int = 100
+    messages_per_conversation: int = 10
+
+
+SCALES: Dict[str, Scale] = {
+    "tiny": Scale(brands=5, categories=6, products=100, users=50, carts=20, vouchers=5, orders=100, reviews=200,
+                  notifications=3, conversations=10),
+    "small": Scale(),
+    "medium": Scale(brands=200, categories=80, products=20000, users=5000, carts=1000, vouchers=200, orders=20000,
+                    reviews=50000, notifications=100, conversations=1000),
+    "large": Scale(brands=500, categories=150, products=250000, variants_per_product=4, users=100000, carts=20000,
+                   vouchers=1000, orders=500000, reviews=1000000, notifications=500, conversations=20000),
+}
+
+
+class Seeder:
+    """Sinh và chèn dữ liệu theo thứ tự phụ thuộc khóa ngoại"""
+
+    def __init__(self, engine: Engine, scale: Scale, seed: int = 42, batch_size: int = 2000,
+                 password_hash: Optional[str] = None):
+        from app.models import Base
+
+        self.engine = engine
+        self.scale = scale
+        self.seed = seed
+        self.batch_size = batch_size
+        self.password_hash = password_hash or _default_password_hash()
+        self.tables = Base.metadata.tables
+        self.rng = random.Random(seed)
+        self.counts: Dict[str, int] = {}
+        self._id_cache: Dict[str, List[str]] = {}
+
+    # ---------- id tất định ----------
+    def id(self, table: str, index: int) -> str:
+        digest = hashlib.blake2b(f"{self.seed}:{table}:{index}".encode(), digest_size=16).digest()
+        return str(uuid.UUID(bytes=digest, version=4))
+
+    def ids(self, table: str, count: int) -> List[str]:
+        """Danh sách id của bảng nhỏ (được cache để tra cứu nhanh khi sinh khóa ngoại)"""
+        cached = self._id_cache.get(table)
+        if cached is None or len(cached) != count:
+            cached = self._id_cache[table] = [self.id(table, i) for i in range(count)]
+        return cached
+
+    @property
+    def variant_count(self) -> int:
+        return self.scale.products * self.scale.variants_per_product
+
+    @staticmethod
+    def variant_price(index: int) -> float:
+        return float(((index * 7919) % 1950 + 50) * 1000)
+
+    def _audit(self, table: str, index: int, created_at: Optional[datetime] = None) -> dict:
+        ts = created_at or BASE_TIME + timedelta(seconds=index * 37 % (365 * 86400))
+        return {"id": self.id(table, index), "created_at": ts, "updated_at": ts, "deleted_at": None,
+                "created_by": None, "updated_by": None, "deleted_by": None}
+
+    def _words(self, n: int) -> str:
+        choice = self.rng.choice
+        return " ".join(choice(WORDS) for _ in range(n))
+
+    # ---------- ghi theo lô ----------
+    def _write(self, conn, name: str, rows: Iterable[dict]) -> None:
+        table: Table = self.tables[name]
+        batch: List[dict] = []
+        total = 0
+        started = time.perf_counter()
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                conn.execute(table.insert(), batch)
+                conn.commit()
+                total += len(batch)
+                batch = []
+        if batch:
+            conn.execute(table.insert(), batch)
+            conn.commit()
+            total += len(batch)
+        self.counts[name] = total
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0
+        logger.info(f"seeded {name}: {total} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+    def run(self) -> Dict[str, int]:
+        with self.engine.connect() as conn:
+            if conn.dialect.name == "mysql":
+                # dữ liệu đã nhất quán khóa ngoại theo cách sinh, tắt kiểm tra để nạp nhanh hơn
+                conn.execute(text("SET FOREIGN_KEY_CHECKS=0"))
+            for name, generator in self._plan():
+                self._write(conn, name, generator())
+            if conn.dialect.name == "mysql":
+                conn.execute(text("SET FOREIGN_KEY_CHECKS=1"))
+        return self.counts
+
+    def _plan(self) -> List[tuple]:
+        return [
+            ("roles", self._roles),
+            ("users", self._users),
+            ("user_roles", self._user_roles),
+            ("addresses", self._addresses),
+            ("brands", self._brands),
+            ("categories", self._categories),
+            ("types", self._types),
+            ("type_values", self._type_values),
+            ("products", self._products),
+            ("product_types", self._product_types),
+            ("vouchers", self._vouchers),
+            ("carts", self._carts),
+            ("cart_items", self._cart_items),
+            ("wishlists", self._wishlists),
+            ("wishlist_items", self._wishlist_items),
+            ("orders", self._orders),
+            ("order_details", self._order_details),
+            ("order_vouchers", self._order_vouchers),
+            ("payments", self._payments),
+            ("payment_events", self._payment_events),
+            ("sales_daily_rollups", self._sales_rollups),
+            ("reviews", self._reviews),
+            ("review_medias", self._review_medias),
+            ("product_rating_summaries", self._rating_summaries),
+            ("notifications", self._notifications),
+            ("user_notifications", self._user_notifications),
+            ("conversations", self._conversations),
+            ("messages", self._messages),
+        ]
+
+    # ---------- generators ----------
+    def _roles(self) -> Iterator[dict]:
+        for i, name in enumerate(ROLES):
+            yield {**self._audit("roles", i), "name": name, "description": None}
+
+    def _users(self) -> Iterator[dict]:
+        for i in range(self.scale.users):
+            yield {**self._audit("users", i), "email": f"user{i}@seed.local", "password_hash": self.password_hash,
+                   "phone_number": f"09{i:08d}", "first_name": "User", "last_name": str(i), "dob": None,
+                   "access_token": None, "refresh_token": None, "reset_password_token": None, "version": 1}
+
+    def _user_roles(self) -> Iterator[dict]:
+        admin, client = self.id("roles", 0), self.id("roles", 1)
+        for i in range(self.scale.users):
+            yield {**self._audit("user_roles", i), "user_id": self.id("users", i),
+                   "role_id": admin if i == 0 else client}
+
+    def _addresses(self) -> Iterator[dict]:
+        for i in range(self.scale.users):
+            yield {**self._audit("addresses", i), "province": self.rng.choice(PROVINCES), "district": "Quận 1",
+                   "ward": "Phường 1", "detail": f"{i} Đường số {i % 100}", "is_default": True,
+                   "user_id": self.id("users", i)}
+
+    def _brands(self) -> Iterator[dict]:
+        for i in range(self.scale.brands):
+            yield {**self._audit("brands", i), "name": f"Brand {i}", "slug": f"brand-{i}", "image_path": None,
+                   "description": self._words(6)}
+
+    def _categories(self) -> Iterator[dict]:
+        roots = max(1, self.scale.categories // 3)
+        for i in range(self.scale.categories):
+            # 1/3 là danh mục gốc, còn lại là con của một danh mục gốc
+            parent = None if i < roots else self.id("categories", self.rng.randrange(roots))
+            yield {**self._audit("categories", i), "name": f"Category {i}", "slug": f"category-{i}",
+                   "image_path": None, "description": self._words(8), "parent_id": parent}
+
+    def _types(self) -> Iterator[dict]:
+        yield {**self._audit("types", 0), "name": "Dung tích"}
+
+    def _type_values(self) -> Iterator[dict]:
+        type_id = self.id("types", 0)
+        for i, volume in enumerate(VOLUMES):
+            yield {**self._audit("type_values", i), "name": volume, "type_id": type_id}
+
+    def _products(self) -> Iterator[dict]:
+        brands = self.ids("brands", self.scale.brands)
+        categories = self.ids("categories", self.scale.categories)
+        randrange = self.rng.randrange
+        # (thương hiệu, danh mục) theo sản phẩm để sinh bảng tổng hợp doanh số
+        self._product_refs: List[Tuple[int, int]] = []
+        for i in range(self.scale.products):
+            name, description = f"{self._words(3).title()} {i}", self._words(12)
+            brand, category = randrange(len(brands)), randrange(len(categories))
+            self._product_refs.append((brand, category))
+            yield {**self._audit("products", i), "name": name, "description": description,
+                   "brand_id": brands[brand], "category_id": categories[category],
+                   "thumbnail": f"/images/products/{i}.jpg", "is_active": True}
+
+    def _product_types(self) -> Iterator[dict]:
+        type_values = self.ids("type_values", len(VOLUMES))
+        per_product = self.scale.variants_per_product
+        rng = self.rng
+        for k in range(self.variant_count):
+            product_index, slot = divmod(k, per_product)
+            price = self.variant_price(k)
+            yield {**self._audit("product_types", k), "product_id": self.id("products", product_index),
+                   "type_value_id": type_values[slot % len(type_values)], "image_path": None, "price": price,
+                   "discount_price": price * 0.9 if rng.random() < 0.3 else None, "status": "active",
+                   "quantity": 1_000_000, "stock": 1_000_000, "volume": VOLUMES[slot % len(VOLUMES)],
+                   "ingredients": self._words(10), "usage": self._words(8),
+                   "skin_type": rng.choice(SKIN_TYPES), "origin": rng.choice(ORIGINS)}
+
+    def _vouchers(self) -> Iterator[dict]:
+        for i in range(self.scale.vouchers):
+            yield {**self._audit("vouchers", i), "code": f"SEED{i:06d}", "discount": round(0.05 + (i % 6) * 0.05, 2),
+                   "description": self._words(5), "quantity": 1000, "min_order_amount": 100000.0,
+                   "max_discount": 200000.0, "limit": 1}
+
+    def _carts(self) -> Iterator[dict]:
+        for i in range(min(self.scale.carts, self.scale.users)):
+            yield {**self._audit("carts", i), "user_id": self.id("users", i)}
+
+    def _cart_items(self) -> Iterator[dict]:
+        n = 0
+        for i in range(min(self.scale.carts, self.scale.users)):
+            for _ in range(self.scale.cart_items_per_cart):
+                yield {**self._audit("cart_items", n), "cart_id": self.id("carts", i),
+                       "product_type_id": self.id("product_types", self.rng.randrange(self.variant_count)),
+                       "quantity": self.rng.randint(1, 3)}
+                n += 1
+
+    def _wishlists(self) -> Iterator[dict]:
+        for i in range(self.scale.users):
+            yield {**self._audit("wishlists", i), "user_id": self.id("users", i)}
+
+    def _wishlist_items(self) -> Iterator[dict]:
+        n = 0
+        for i in range(self.scale.users):
+            for _ in range(self.scale.wishlist_items_per_user):
+                yield {**self._audit("wishlist_items", n), "wishlist_id": self.id("wishlists", i),
+                       "product_type_id": self.id("product_types", self.rng.randrange(self.variant_count))}
+                n += 1
+
+    def _order_time(self, index: int) -> datetime:
+        return BASE_TIME + timedelta(seconds=index * (365 * 86400) // max(1, self.scale.orders))
+
+    def _order_lines(self, index: int) -> List[tuple]:
+        """Các dòng (variant_index, số lượng) của đơn thứ `index`, tính lại được từ index"""
+        rng = random.Random(f"{self.seed}:order:{index}")
+        return [(rng.randrange(self.variant_count), rng.randint(1, 3)) for _ in range(self.scale.items_per_order)]
+
+    def _order_amounts(self, index: int) -> Tuple[float, float]:
+        """(tổng tiền, giảm giá) của đơn thứ `index`"""
+        total = sum(self.variant_price(k) * n for k, n in self._order_lines(index))
+        return total, (round(total * 0.1, 2) if index % 10 == 0 and self.scale.vouchers else 0.0)
+
+    def _orders(self) -> Iterator[dict]:
+        from app.services.analytics_service import SOLD_STATES
+
+        for i in range(self.scale.orders):
+            total, discount = self._order_amounts(i)
+            status = ORDER_STATUSES[i % len(ORDER_STATUSES)]
+            yield {**self._audit("orders", i, self._order_time(i)),
+                   "user_id": self.id("users", self.rng.randrange(self.scale.users)),
+                   "status": status, "total_amount": total, "discount_amount": discount,
+                   "final_amount": total - discount, "sales_counted": status in SOLD_STATES}
+
+    def _order_details(self) -> Iterator[dict]:
+        n = 0
+        for i in range(self.scale.orders):
+            created = self._order_time(i)
+            order_id = self.id("orders", i)
+            for k, number in self._order_lines(i):
+                yield {**self._audit("order_details", n, created), "order_id": order_id,
+                       "product_type_id": self.id("product_types", k), "price": self.variant_price(k),
+                       "number": number}
+                n += 1
+
+    def _order_vouchers(self) -> Iterator[dict]:
+        if not self.scale.vouchers:
+            return
+        n = 0
+        for i in range(0, self.scale.orders, 10):
+            yield {**self._audit("order_vouchers", n, self._order_time(i)), "order_id": self.id("orders", i),
+                   "voucher_id": self.id("vouchers", n % self.scale.vouchers)}
+            n += 1
+
+    def _payments(self) -> Iterator[dict]:
+        for i in range(self.scale.orders):
+            status = ORDER_STATUSES[i % len(ORDER_STATUSES)]
+            total, discount = self._order_amounts(i)
+            yield {**self._audit("payments", i, self._order_time(i)), "order_id": self.id("orders", i),
+                   "method": PAYMENT_METHODS[i % len(PAYMENT_METHODS)],
+                   "status": "paid" if status == "completed" else status,
+                   "amount": total - discount, "attempts": 1}
+
+    def _payment_events(self) -> Iterator[dict]:
+        """Webhook đã xử lý của các payment online đã thanh toán"""
+        n = 0
+        for i in range(self.scale.orders):
+            method = PAYMENT_METHODS[i % len(PAYMENT_METHODS)]
+            if method == "cod" or ORDER_STATUSES[i % len(ORDER_STATUSES)] != "completed":
+                continue
+            total, discount = self._order_amounts(i)
+            yield {**self._audit("payment_events", n, self._order_time(i)), "provider": method,
+                   "transaction_id": f"SEED{i:010d}", "status": "paid", "payment_id": self.id("payments", i),
+                   "amount": total - discount, "result": "applied", "payload": None}
+            n += 1
+
+    def _sales_rollups(self) -> Iterator[dict]:
+        """Bảng tổng hợp doanh số của các đơn đã bán, như sau khi chạy `app.tools.analytics_backfill`.
+
+        Đơn được sinh theo thời gian tăng dần nên chỉ cần giữ số liệu của một ngày trong bộ nhớ.
+        """
+        from app.services.analytics_service import SOLD_STATES, sales_day
+
+        brands = self.ids("brands", self.scale.brands)
+        categories = self.ids("categories", self.scale.categories)
+        per_product = self.scale.variants_per_product
+        day, totals = None, {}
+        for i in range(self.scale.orders):
+            if ORDER_STATUSES[i % len(ORDER_STATUSES)] not in SOLD_STATES:
+                continue
+            order_day = sales_day(self._order_time(i))
+            if order_day != day:
+                yield from self._rollup_rows(day, totals)
+                day, totals = order_day, {}
+            lines = self._order_lines(i)
+            total, discount = self._order_amounts(i)
+            _accumulate(totals, ("total", ""), sum(n for _, n in lines), total - discount)
+            # mỗi đơn chỉ tính một lần cho mỗi sản phẩm/thương hiệu/danh mục dù có nhiều dòng
+            parts: Dict[Tuple[str, str], List[float]] = {}
+            for k, number in lines:
+                product = k // per_product
+                brand, category = self._product_refs[product]
+                for key in (("product", self.id("products", product)), ("brand", brands[brand]),
+                            ("category", categories[category])):
+                    part = parts.setdefault(key, [0, 0.0])
+                    part[0] += number
+                    part[1] += self.variant_price(k) * number
+            for key, (units, revenue) in parts.items():
+                _accumulate(totals, key, units, revenue)
+        yield from self._rollup_rows(day, totals)
+
+    @staticmethod
+    def _rollup_rows(day, totals: Dict[Tuple[str, str], List[float]]) -> Iterator[dict]:
+        for (dimension, key), (orders, units, revenue) in totals.items():
+            yield {"dimension": dimension, "key": key, "day": day, "orders": orders, "units": units,
+                   "revenue": revenue, "updated_at": BASE_TIME}
+
+    def _reviews(self) -> Iterator[dict]:
+        rng = self.rng
+        # đếm số sao theo sản phẩm để sinh bảng tổng hợp đánh giá
+        self._ratings: Dict[int, List[int]] = {}
+        for i in range(self.scale.reviews):
+            product = rng.randrange(self.scale.products)
+            rating = rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 3, 6, 9])[0]
+            self._ratings.setdefault(product, [0] * 5)[rating - 1] += 1
+            yield {**self._audit("reviews", i), "product_id": self.id("products", product),
+                   "user_id": self.id("users", rng.randrange(self.scale.users)),
+                   "rating": rating, "comment": self._words(10)}
+
+    def _review_medias(self) -> Iterator[dict]:
+        n = 0
+        for i in range(0, self.scale.reviews, 5):
+            yield {**self._audit("review_medias", n), "review_id": self.id("reviews", i),
+                   "path": f"/uploads/reviews/{i}.jpg"}
+            n += 1
+
+    def _rating_summaries(self) -> Iterator[dict]:
+        for product, stars in sorted(self._ratings.items()):
+            yield {"product_id": self.id("products", product), "rating_count": sum(stars),
+                   "rating_sum": sum(star * n for star, n in enumerate(stars, 1)),
+                   **{f"star_{star}": n for star, n in enumerate(stars, 1)}, "updated_at": BASE_TIME}
+
+    def _notifications(self) -> Iterator[dict]:
+        admin = self.id("users", 0)
+        for i in range(self.scale.notifications):
+            yield {**self._audit("notifications", i), "title": f"Khuyến mãi {i}", "content": self._words(12),
+                   "type": "promotion", "sender_id": admin, "is_read": False, "read_at": None,
+                   "audience": "segment", "segment": "{}", "status": "sent",
+                   "recipient_count": len(range(i % 10, self.scale.users, 10)), "sent_at": BASE_TIME}
+
+    def _user_notifications(self) -> Iterator[dict]:
+        n = 0
+        for i in range(self.scale.notifications):
+            notification_id = self.id("notifications", i)
+            for u in range(i % 10, self.scale.users, 10):
+                yield {**self._audit("user_notifications", n), "user_id": self.id("users", u),
+                       "notification_id": notification_id, "is_read": u % 2 == 0}
+                n += 1
+
+    def _conversations(self) -> Iterator[dict]:
+        staff = self.id("users", 0)
+        for i in range(min(self.scale.conversations, max(self.scale.users - 1, 0))):
+            yield {**self._audit("conversations", i), "user1_id": self.id("users", i + 1), "user2_id": staff,
+                   "last_message": self._words(6)}
+
+    def _messages(self) -> Iterator[dict]:
+        staff = self.id("users", 0)
+        n = 0
+        for i in range(min(self.scale.conversations, max(self.scale.users - 1, 0))):
+            customer = self.id("users", i + 1)
+            conversation_id = self.id("conversations", i)
+            for m in range(self.scale.messages_per_conversation):
+                yield {**self._audit("messages", n), "conversation_id": conversation_id,
+                       "sender_id": customer if m % 2 == 0 else staff, "message": self._words(8), "is_read": True}
+                n += 1
+
+
+def _accumulate(totals: Dict[Tuple[str, str], List[float]], key: Tuple[str, str], units: int,
+                revenue: float) -> None:
+    row = totals.setdefault(key, [0, 0, 0.0])
+    row[0] += 1
+    row[1] += units
+    row[2] += revenue
+
+
+def _default_password_hash() -> str:
+    from app.core.password import hash_password
+
+    return hash_password(DEFAULT_PASSWORD)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="small", choices=sorted(SCALES))
+    for f in fields(Scale):
+        parser.add_argument(f"--{f.name.replace('_', '-')}", type=int, dest=f.name, help=f"Ghi đè {f.name}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--create-tables", action="store_true", help="Tạo bảng bằng metadata (không qua Alembic)")
+    parser.add_argument("--drop", action="store_true", help="Xóa toàn bộ bảng trước khi seed (cẩn thận!)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from app.core.database import engine
+    from app.models import Base
+
+    scale = SCALES[args.scale]
+    overrides = {f.name: getattr(args, f.name) for f in fields(Scale) if getattr(args, f.name) is not None}
+    scale = Scale(**{**scale.__dict__, **overrides})
+
+    if args.drop:
+        Base.metadata.drop_all(engine)
+    if args.create_tables or args.drop:
+        Base.metadata.create_all(engine)
+
+    started = time.perf_counter()
+    counts = Seeder(engine, scale, seed=args.seed, batch_size=args.batch_size).run()
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    logger.info(f"done: {total:,} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
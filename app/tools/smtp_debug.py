@@ -0,0 +1,155 @@
+"""Server SMTP để thử gửi mail ở máy dev: nhận mọi email, in tóm tắt, không gửi đi đâu.
+
+Chỉ hỗ trợ SMTP thường (không STARTTLS/AUTH), nên chạy app với:
+
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_STARTTLS=false SMTP_USER= MAIL_BACKEND=smtp
+
+    python -m app.tools.smtp_debug --port 1025 --out /tmp/mails
+    python -m app.tools.smtp_debug --reject-domain invalid.test --latency-ms 20 --drop-after 100
+
+- `--out`: lưu từng email thành file `.eml`.
+- `--reject-domain`: trả 550 cho người nhận thuộc domain này (thử lỗi vĩnh viễn).
+- `--latency-ms`: chờ trước mỗi phản hồi, giả lập độ trễ mạng tới nhà cung cấp SMTP.
+- `--drop-after`: cắt kết nối sau mỗi N email (thử kết nối lại).
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import time
+from email import message_from_bytes, policy
+from typing import List, Optional
+
+
+class DebugSmtpServer:
+    def __init__(self, out: Optional[str] = None, reject_domains: List[str] = (), latency: float = 0.0,
+                 drop_after: int = 0, quiet: bool = False):
+        self.out = out
+        self.reject_domains = {domain.lower() for domain in reject_domains}
+        self.latency = latency
+        self.drop_after = drop_after
+        self.quiet = quiet
+        self.received = 0
+        self.connections = 0
+        self._ids = itertools.count(1)
+
+    async def _reply(self, writer: asyncio.StreamWriter, line: str) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        writer.write(line.encode() + b"\r\n")
+        await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        sender, recipients, sent_here = None, [], 0
+        try:
+            await self._reply(writer, "220 smtp-debug ESMTP ready")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command, _, arg = line.decode("utf-8", "replace").strip().partition(" ")
+                command = command.upper()
+                if command == "EHLO":
+                    await self._reply(writer, "250-smtp-debug\r\n250-8BITMIME\r\n250-SMTPUTF8\r\n250 SIZE 52428800")
+                elif command == "HELO":
+                    await self._reply(writer, "250 smtp-debug")
+                elif command == "MAIL":
+                    sender, recipients = _address(arg), []
+                    await self._reply(writer, "250 OK")
+                elif command == "RCPT":
+                    recipient = _address(arg)
+                    if recipient.rpartition("@")[2].lower() in self.reject_domains:
+                        await self._reply(writer, f"550 5.1.1 <{recipient}>: mailbox unavailable")
+                    else:
+                        recipients.append(recipient)
+                        await self._reply(writer, "250 OK")
+                elif command == "DATA":
+                    if sender is None or not recipients:
+                        await self._reply(writer, "503 5.5.1 need MAIL and RCPT first")
+                        continue
+                    await self._reply(writer, "354 end data with <CR><LF>.<CR><LF>")
+                    data = await _read_data(reader)
+                    self._store(sender, recipients, data)
+                    sender, recipients = None, []
+                    sent_here += 1
+                    await self._reply(writer, "250 OK queued")
+                    if self.drop_after and sent_here % self.drop_after == 0:
+                        return
+                elif command == "RSET":
+                    sender, recipients = None, []
+                    await self._reply(writer, "250 OK")
+                elif command == "NOOP":
+                    await self._reply(writer, "250 OK")
+                elif command == "QUIT":
+                    await self._reply(writer, "221 bye")
+                    return
+                else:
+                    await self._reply(writer, f"502 5.5.2 {command} not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _store(self, sender: str, recipients: List[str], data: bytes) -> None:
+        self.received += 1
+        number = next(self._ids)
+        if self.out:
+            with open(os.path.join(self.out, f"{int(time.time() * 1000)}-{number:06d}.eml"), "wb") as f:
+                f.write(data)
+        if not self.quiet:
+            message = message_from_bytes(data, policy=policy.default)
+            print(f"#{number} {sender} -> {', '.join(recipients)}: {message['Subject']} ({len(data)} bytes)",
+                  flush=True)
+
+
+def _address(arg: str) -> str:
+    # "FROM:<a@b> SIZE=123" -> a@b
+    value = arg.partition(":")[2].strip()
+    return value.split(">", 1)[0].lstrip("<").strip()
+
+
+async def _read_data(reader: asyncio.StreamReader) -> bytes:
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("connection closed during DATA")
+        if line in (b".\r\n", b".\n"):
+            return b"".join(lines)
+        # bỏ dấu chấm được client thêm vào đầu dòng (dot-stuffing)
+        lines.append(line[1:] if line.startswith(b"..") else line)
+
+
+async def serve(host: str, port: int, server: DebugSmtpServer):
+    return await asyncio.start_server(server.handle, host, port)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--out", help="Thư mục lưu email (.eml)")
+    parser.add_argument("--reject-domain", action="append", default=[], help="Trả 550 cho người nhận thuộc domain này")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Chờ trước mỗi phản hồi (ms)")
+    parser.add_argument("--drop-after", type=int, default=0, help="Cắt kết nối sau mỗi N email")
+    parser.add_argument("--quiet", action="store_true", help="Không in từng email")
+    return parser.parse_args(argv)
+
+
+async def main(args) -> None:
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    server = DebugSmtpServer(args.out, args.reject_domain, args.latency_ms / 1000, args.drop_after, args.quiet)
+    listener = await serve(args.host, args.port, server)
+    print(f"SMTP debug server on {args.host}:{args.port}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(parse_args()))
+    except KeyboardInterrupt:
+        sys.exit(0)
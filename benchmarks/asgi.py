@@ -0,0 +1,132 @@
+"""Client ASGI tối giản để gọi `app.main:app` trong cùng process (không cần server, không cần httpx)."""
+import asyncio
+import json
+from typing import Dict, Optional, Tuple
+
+
+class ASGIResponse:
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    @property
+    def ok(self) -> bool:
+        """2xx và (nếu là BaseResponse) `success` khác False"""
+        if not 200 <= self.status < 300:
+            return False
+        if self.headers.get("content-type", "").startswith("application/json"):
+            payload = self.json()
+            if isinstance(payload, dict) and payload.get("success") is False:
+                return False
+        return True
+
+
+class ASGIClient:
+    def __init__(self, app, client: Tuple[str, int] = ("127.0.0.1", 50000)):
+        self.app = app
+        self.client = client
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        json_body=None,
+        body: bytes = b"",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> ASGIResponse:
+        path, _, query = url.partition("?")
+        raw_headers = [(b"host", b"benchmark")]
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            raw_headers.append((b"content-type", b"application/json"))
+        if body:
+            raw_headers.append((b"content-length", str(len(body)).encode()))
+        for key, value in (headers or {}).items():
+            raw_headers.append((key.lower().encode(), value.encode()))
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method.upper(),
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": raw_headers,
+            "client": self.client,
+            "server": ("benchmark", 80),
+        }
+
+        request_sent = False
+        response_done = asyncio.Event()
+        status = 500
+        response_headers: Dict[str, str] = {}
+        chunks = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # chỉ báo disconnect sau khi response đã gửi xong (giống server thật)
+            await response_done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for key, value in message.get("headers", []):
+                    response_headers[key.decode().lower()] = value.decode()
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    response_done.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            response_done.set()
+        return ASGIResponse(status, response_headers, b"".join(chunks))
+
+    async def get(self, url: str, **kw) -> ASGIResponse:
+        return await self.request("GET", url, **kw)
+
+    async def post(self, url: str, **kw) -> ASGIResponse:
+        return await self.request("POST", url, **kw)
+
+
+class Lifespan:
+    """Chạy startup/shutdown của ứng dụng ASGI (`async with Lifespan(app): ...`)"""
+
+    def __init__(self, app):
+        self.app = app
+        self._receive_queue: asyncio.Queue = asyncio.Queue()
+        self._send_queue: asyncio.Queue = asyncio.Queue()
+        self._task = None
+
+    async def _receive(self):
+        return await self._receive_queue.get()
+
+    async def _send(self, message):
+        await self._send_queue.put(message)
+
+    async def __aenter__(self):
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._task = asyncio.create_task(self.app(scope, self._receive, self._send))
+        await self._receive_queue.put({"type": "lifespan.startup"})
+        message = await self._send_queue.get()
+        if message["type"] == "lifespan.startup.failed":
+            raise RuntimeError(message.get("message", "startup failed"))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._receive_queue.put({"type": "lifespan.shutdown"})
+        await self._send_queue.get()
+        await self._task
@@ -0,0 +1,126 @@
+"""Đo chi phí xác thực của AuthMiddleware trên mỗi request.
+
+Phần 1 đo riêng bước kiểm tra JWT (µs/lần): python-jose, PyJWT (nếu đã cài) và cache token.
+Phần 2 gọi `GET /` qua ASGI với các trường hợp:
+- `no-token`: không có header Authorization (mốc so sánh)
+- `cold`: xóa cache token và cache user trước mỗi request (giải mã JWT + truy vấn user)
+- `warm`: cache đã có token và user (trường hợp thường gặp trong một phiên)
+
+Chi phí xác thực = thời gian mỗi request trừ đi `no-token`.
+
+    python -m benchmarks.auth_cost
+    python -m benchmarks.auth_cost --requests 5000 --jwt-backend jose
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.run import configure_environment, percentile
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Mặc định: SQLite tạm")
+    parser.add_argument("--iterations", type=int, default=20000, help="Số lần giải mã ở phần 1")
+    parser.add_argument("--requests", type=int, default=2000, help="Số request mỗi trường hợp ở phần 2")
+    parser.add_argument("--jwt-backend", help="Ghi đè JWT_BACKEND cho phần 2")
+    return parser.parse_args(argv)
+
+
+def time_per_call(fn: Callable[[], object], iterations: int) -> float:
+    """Thời gian trung bình mỗi lần gọi (µs)"""
+    fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def bench_decode(token: str, iterations: int) -> None:
+    from app.core.auth_cache import TokenCache
+    from app.core.security import JoseBackend, PyJWTBackend
+
+    print("JWT verification (µs/lần):")
+    print(f"  python-jose   {time_per_call(lambda: JoseBackend().decode(token), iterations):8.1f}")
+    try:
+        backend = PyJWTBackend()
+    except ImportError:
+        print("  pyjwt         (chưa cài)")
+    else:
+        print(f"  pyjwt         {time_per_call(lambda: backend.decode(token), iterations):8.1f}")
+    cache = TokenCache(10)
+    cache.set(token, JoseBackend().decode(token))
+    print(f"  cache hit     {time_per_call(lambda: cache.get(token), iterations):8.1f}")
+
+
+async def bench_requests(client, cases, requests: int) -> Dict[str, List[float]]:
+    # xen kẽ các trường hợp để nhiễu (GC, nhiệt độ CPU...) chia đều cho mọi trường hợp
+    results: Dict[str, List[float]] = {name: [] for name, _, _ in cases}
+    for _ in range(requests):
+        for name, headers, before in cases:
+            before()
+            started = time.perf_counter()
+            resp = await client.get("/", headers=headers)
+            results[name].append((time.perf_counter() - started) * 1e6)
+            assert resp.ok, resp.status
+    return results
+
+
+async def run(args) -> None:
+    from sqlalchemy import insert
+
+    from app.core.auth_cache import token_cache, user_cache
+    from app.core.database import engine
+    from app.core.security import create_access_token, jwt_backend
+    from app.main import app
+    from app.models import Base
+    from app.models.user import User
+    from benchmarks.asgi import ASGIClient, Lifespan
+
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": "auth-cost", "email": "auth.cost@example.com", "password_hash": "x"}])
+    token, _ = create_access_token({"sub": "auth-cost", "ver": 1})
+    bench_decode(token, args.iterations)
+
+    def clear_caches() -> None:
+        token_cache.clear()
+        user_cache.clear()
+
+    client = ASGIClient(app)
+    headers = {"Authorization": f"Bearer {token}"}
+    cases = [
+        ("no-token", {}, lambda: None),
+        ("cold", headers, clear_caches),
+        ("warm", headers, lambda: None),
+    ]
+    async with Lifespan(app):
+        # làm nóng import/route trước khi đo
+        await bench_requests(client, cases, 50)
+        results = await bench_requests(client, cases, args.requests)
+
+    base = sum(results["no-token"]) / len(results["no-token"])
+    print(f"\nGET / qua AuthMiddleware (JWT backend: {jwt_backend.name}, µs/request):")
+    for name, latencies in results.items():
+        mean = sum(latencies) / len(latencies)
+        print(f"  {name:9} mean {mean:8.1f}  p50 {percentile(latencies, 50):8.1f}  "
+              f"p99 {percentile(latencies, 99):8.1f}  auth cost {mean - base:8.1f}")
+
+
+def main() -> int:
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='auth-cost-'), 'auth.db')}"
+    configure_environment(database_url)
+    if args.jwt_backend:
+        os.environ["JWT_BACKEND"] = args.jwt_backend
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Đo ảnh hưởng của một đợt đăng nhập dồn dập tới độ trễ các endpoint không liên quan.
+
+Mỗi lần chạy gồm hai pha cùng thời lượng:
+1. baseline: chỉ có client "probe" gọi các endpoint sync không liên quan (`GET /`, danh sách brand)
+2. storm: probe chạy song song với `--logins` client gọi `POST /auth/token` liên tục
+
+Script in p50/p99 của probe ở từng pha và throughput đăng nhập. `--compare` chạy lần lượt
+chế độ băm trong threadpool (`PASSWORD_HASH_WORKERS=0`, như trước đây) và process pool:
+
+    python -m benchmarks.login_storm --compare
+    python -m benchmarks.login_storm --hash-workers 4 --logins 100 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+from benchmarks.run import configure_environment, percentile
+
+PASSWORD = "Storm@12345"
+PROBE_URLS = ["/", "/api/v1/brands/brands/?skip=0&limit=20"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Mặc định: SQLite tạm")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=64, help="Số client đăng nhập đồng thời trong pha storm")
+    parser.add_argument("--probes", type=int, default=4, help="Số client gọi endpoint không liên quan")
+    parser.add_argument("--duration", type=float, default=5.0, help="Thời lượng mỗi pha (giây)")
+    parser.add_argument("--hash-workers", type=int, help="Ghi đè PASSWORD_HASH_WORKERS (0 = threadpool)")
+    parser.add_argument("--hash-nice", type=int, help="Ghi đè PASSWORD_HASH_NICE")
+    parser.add_argument("--compare", action="store_true", help="Chạy cả threadpool và process pool rồi so sánh")
+    parser.add_argument("--json", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+async def probe_loop(client, stop_at: float, latencies: List[float], errors: List[int]) -> None:
+    i = 0
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        resp = await client.get(PROBE_URLS[i % len(PROBE_URLS)])
+        latencies.append((time.perf_counter() - started) * 1000)
+        if resp.status != 200:
+            errors.append(resp.status)
+        i += 1
+
+
+async def login_loop(client, emails: List[str], offset: int, stop_at: float, counts: dict) -> None:
+    i = offset
+    while time.perf_counter() < stop_at:
+        resp = await client.post("/api/v1/auth/auth/token",
+                                 json_body={"email": emails[i % len(emails)], "password": PASSWORD})
+        counts[resp.status] = counts.get(resp.status, 0) + 1
+        i += 1
+
+
+async def run_phase(client, emails: List[str], args, storm: bool) -> dict:
+    stop_at = time.perf_counter() + args.duration
+    latencies: List[float] = []
+    errors: List[int] = []
+    counts: dict = {}
+    tasks = [probe_loop(client, stop_at, latencies, errors) for _ in range(args.probes)]
+    if storm:
+        tasks += [login_loop(client, emails, n, stop_at, counts) for n in range(args.logins)]
+    await asyncio.gather(*tasks)
+    return {
+        "probe_requests": len(latencies),
+        "probe_p50_ms": percentile(latencies, 50),
+        "probe_p99_ms": percentile(latencies, 99),
+        "probe_errors": len(errors),
+        "logins_ok": counts.get(200, 0),
+        "logins_per_sec": counts.get(200, 0) / args.duration,
+        "logins_rejected": sum(v for k, v in counts.items() if k != 200),
+    }
+
+
+async def run(args) -> dict:
+    from sqlalchemy import insert
+
+    from app.core.config import settings
+    from app.core.database import engine
+    from app.core.password import hash_password
+    from app.main import app
+    from app.models import Base
+    from app.models.user import User
+    from benchmarks.asgi import ASGIClient, Lifespan
+
+    Base.metadata.create_all(engine)
+    emails = [f"storm{i}@example.com" for i in range(args.users)]
+    password_hash = hash_password(PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": f"storm-{i}", "email": email, "password_hash": password_hash, "phone_number": f"09{i:08d}"}
+            for i, email in enumerate(emails)
+        ])
+
+    client = ASGIClient(app)
+    async with Lifespan(app):
+        baseline = await run_phase(client, emails, args, storm=False)
+        storm = await run_phase(client, emails, args, storm=True)
+    return {"hash_workers": settings.PASSWORD_HASH_WORKERS, "baseline": baseline, "storm": storm}
+
+
+def print_result(result: dict) -> None:
+    mode = "threadpool" if result["hash_workers"] <= 0 else f"process pool x{result['hash_workers']}"
+    base, storm = result["baseline"], result["storm"]
+    print(f"[{mode}]")
+    print(f"  baseline: probe p50 {base['probe_p50_ms']:.1f}ms p99 {base['probe_p99_ms']:.1f}ms "
+          f"({base['probe_requests']} req)")
+    print(f"  storm:    probe p50 {storm['probe_p50_ms']:.1f}ms p99 {storm['probe_p99_ms']:.1f}ms "
+          f"({storm['probe_requests']} req), logins {storm['logins_per_sec']:.1f}/s, "
+          f"503 {storm['logins_rejected']}")
+    ratio = storm["probe_p99_ms"] / base["probe_p99_ms"] if base["probe_p99_ms"] else 0.0
+    print(f"  p99 storm/baseline: x{ratio:.1f}")
+
+
+def run_child(argv: List[str]) -> dict:
+    command = [sys.executable, "-m", "benchmarks.login_storm", *argv, "--json"]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    args = parse_args()
+    if args.compare:
+        argv = [a for a in sys.argv[1:] if a != "--compare"]
+        # lần đầu ép băm trong threadpool; lần sau dùng PASSWORD_HASH_WORKERS (hoặc --hash-workers)
+        print_result(run_child(argv + ["--hash-workers", "0"]))
+        print_result(run_child(argv))
+        return 0
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='login-storm-'), 'storm.db')}"
+    configure_environment(database_url)
+    if args.hash_workers is not None:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.hash_workers)
+    if args.hash_nice is not None:
+        os.environ["PASSWORD_HASH_NICE"] = str(args.hash_nice)
+    # hàng đợi đủ chỗ cho mọi client đăng nhập, để đo độ trễ thay vì tỉ lệ 503
+    os.environ.setdefault("PASSWORD_HASH_MAX_PENDING", str(max(args.logins, 64)))
+
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print_result(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""So sánh gửi mail mở kết nối SMTP cho mỗi email với `Mailer` (kết nối giữ mở, gửi theo lô).
+
+Script chạy `app.tools.smtp_debug` trong cùng process với độ trễ `--latency-ms` trên mỗi phản hồi SMTP
+(giả lập khoảng cách tới nhà cung cấp), rồi gửi `--messages` email theo hai cách:
+1. `per_message`: mỗi email một kết nối (EHLO, MAIL, RCPT, DATA, QUIT), `--connections` luồng song song;
+2. `pooled`: `Mailer` với `--connections` kết nối giữ mở và lô `--batch-size` email.
+
+    python -m benchmarks.mail_delivery --messages 500 --latency-ms 20
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.run import configure_environment
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Độ trễ mỗi phản hồi SMTP")
+    parser.add_argument("--connections", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--port", type=int, default=2525)
+    return parser.parse_args(argv)
+
+
+def start_server(port: int, latency: float):
+    from app.tools.smtp_debug import DebugSmtpServer, serve
+
+    server = DebugSmtpServer(latency=latency, quiet=True)
+    ready = threading.Event()
+
+    def run():
+        async def main():
+            await serve("127.0.0.1", port, server)
+            ready.set()
+            await asyncio.Event().wait()
+        asyncio.run(main())
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return server
+
+
+def messages(n: int):
+    from app.core.mail import build_message
+
+    return [build_message(f"user{i}@example.com", f"Benchmark {i}", "Xin chào,\n\nĐây là email thử.\n")
+            for i in range(n)]
+
+
+def per_message(args, server) -> dict:
+    from app.core.mail import SmtpTransport
+
+    def send(message):
+        transport = SmtpTransport("127.0.0.1", args.port, starttls=False)
+        error = transport.send_batch([message])[0]
+        transport.close()
+        if error is not None:
+            raise error
+
+    before, opened = server.received, server.connections
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.connections) as pool:
+        list(pool.map(send, messages(args.messages)))
+    return {"elapsed": time.perf_counter() - started, "received": server.received - before,
+            "connections": server.connections - opened}
+
+
+async def pooled(args, server) -> dict:
+    from app.core.mail import Mailer, SmtpTransport
+
+    mailer = Mailer(lambda: SmtpTransport("127.0.0.1", args.port, starttls=False), args.connections,
+                    args.batch_size, 0.01, 0)
+    mailer.start()
+
+    before, opened = server.received, server.connections
+    started = time.perf_counter()
+    await asyncio.gather(*(mailer.send(message) for message in messages(args.messages)))
+    elapsed = time.perf_counter() - started
+    await mailer.stop()
+    return {"elapsed": elapsed, "received": server.received - before, "connections": server.connections - opened}
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    configure_environment("sqlite://")
+    server = start_server(args.port, args.latency_ms / 1000)
+    print(f"{args.messages} emails, SMTP latency {args.latency_ms:.0f}ms/reply, {args.connections} connections")
+    # ms/email: thời gian một kết nối bận cho mỗi email
+    print(f"{'mode':<12} {'emails/s':>9} {'connections':>12} {'ms/email':>9}")
+    for name, result in (("per_message", per_message(args, server)), ("pooled", asyncio.run(pooled(args, server)))):
+        print(f"{name:<12} {result['received'] / result['elapsed']:>9.1f} {result['connections']:>12} "
+              f"{result['elapsed'] * args.connections / result['received'] * 1000:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,145 @@
+"""Độ trễ lịch sử đơn hàng (`GET /api/v1/orders/me`, `GET /api/v1/orders/{id}`) khi số đơn tăng dần.
+
+Với mỗi kích thước trong `--sizes`, script seed lại một database SQLite tạm với ngần ấy đơn (50 user,
+nên user có nhiều đơn nhất có khoảng `size / 50` đơn) rồi đo p50 của user đó cho 4 request:
+trang đầu, trang ở giữa lịch sử (cursor), trang đầu lọc theo trạng thái, chi tiết một đơn.
+Mỗi kích thước đo hai lần: có index lịch sử đơn (`ix_orders_user_*`, `ix_order_details_order_created`)
+và sau khi xóa các index đó.
+
+Thoát với mã 1 nếu, khi có index, p50 ở kích thước lớn nhất vượt `--max-growth` lần kích thước nhỏ nhất:
+
+    python -m benchmarks.order_history
+    python -m benchmarks.order_history --sizes 1000,10000,100000 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.run import configure_environment, percentile
+
+HISTORY_INDEXES = ("ix_orders_user_created", "ix_orders_user_status_created", "ix_order_details_order_created")
+REQUESTS = ("first_page", "middle_page", "status_page", "detail")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Số đơn của mỗi lần đo")
+    parser.add_argument("--requests", type=int, default=100, help="Số lần gọi mỗi request")
+    parser.add_argument("--max-growth", type=float, default=2.0,
+                        help="p50 ở kích thước lớn nhất / nhỏ nhất tối đa khi có index")
+    return parser.parse_args()
+
+
+def seed(engine, orders: int) -> None:
+    from dataclasses import replace
+
+    from app.models import Base
+    from app.tools.seed import SCALES, Seeder
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Seeder(engine, replace(SCALES["tiny"], users=50, orders=orders)).run()
+
+
+def targets(engine) -> Dict[str, str]:
+    """User có nhiều đơn nhất, token của user, cursor ở giữa lịch sử và id một đơn"""
+    from sqlalchemy import func, select
+
+    from app.core.cursor import encode_cursor
+    from app.core.security import create_access_token
+    from app.models.order import Order
+
+    with engine.connect() as conn:
+        user_id, count = conn.execute(
+            select(Order.user_id, func.count()).group_by(Order.user_id).order_by(func.count().desc()).limit(1)
+        ).one()
+        middle = conn.scalar(
+            select(Order.id).where(Order.user_id == user_id)
+            .order_by(Order.created_at.desc(), Order.id.desc()).offset(count // 2).limit(1)
+        )
+    token, _ = create_access_token({"sub": user_id})
+    return {"token": token, "count": count, "cursor": encode_cursor("orders", middle), "order_id": middle}
+
+
+def set_indexes(engine, present: bool) -> None:
+    from app.models import Base
+
+    indexes = [index for table in Base.metadata.tables.values() for index in table.indexes
+               if index.name in HISTORY_INDEXES]
+    with engine.begin() as conn:
+        for index in indexes:
+            (index.create if present else index.drop)(conn, checkfirst=True)
+
+
+async def measure(client, target: Dict[str, str], requests: int) -> Dict[str, float]:
+    headers = {"Authorization": f"Bearer {target['token']}"}
+    urls = {
+        "first_page": "/api/v1/orders/me?limit=20",
+        "middle_page": f"/api/v1/orders/me?limit=20&cursor={target['cursor']}",
+        "status_page": "/api/v1/orders/me?limit=20&status=cancelled",
+        "detail": f"/api/v1/orders/{target['order_id']}",
+    }
+    result = {}
+    for name, url in urls.items():
+        # lần đầu: nạp user vào cache xác thực, làm nóng page cache của SQLite
+        resp = await client.get(url, headers=headers)
+        assert resp.ok, resp.body
+        timings: List[float] = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            await client.get(url, headers=headers)
+            timings.append((time.perf_counter() - started) * 1000)
+        result[name] = percentile(timings, 50)
+    return result
+
+
+def main() -> int:
+    args = parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    workdir = tempfile.mkdtemp(prefix="order-history-")
+    configure_environment(f"sqlite:///{os.path.join(workdir, 'order_history.db')}")
+
+    from app.core.database import engine
+    from app.main import app
+    from benchmarks.asgi import ASGIClient, Lifespan
+
+    rows = []
+    for size in sizes:
+        print(f"Seeding {size} orders ...", flush=True)
+        seed(engine, size)
+        target = targets(engine)
+
+        async def run() -> Dict[str, Dict[str, float]]:
+            async with Lifespan(app):
+                client = ASGIClient(app)
+                indexed = await measure(client, target, args.requests)
+                set_indexes(engine, False)
+                unindexed = await measure(client, target, args.requests)
+                set_indexes(engine, True)
+                return {"index": indexed, "no index": unindexed}
+
+        for mode, result in asyncio.run(run()).items():
+            rows.append((size, target["count"], mode, result))
+
+    print(f"\n{'orders':>8} {'user orders':>12} {'mode':<9} " + " ".join(f"{name:>12}" for name in REQUESTS)
+          + "   (p50 ms)")
+    for size, count, mode, result in rows:
+        print(f"{size:>8} {count:>12} {mode:<9} " + " ".join(f"{result[name]:>12.2f}" for name in REQUESTS))
+
+    indexed = [result for _, _, mode, result in rows if mode == "index"]
+    failed = False
+    for name in REQUESTS:
+        growth = indexed[-1][name] / indexed[0][name]
+        if growth > args.max_growth:
+            failed = True
+            print(f"FLAT CHECK {name}: p50 grew {growth:.1f}x from {sizes[0]} to {sizes[-1]} orders "
+                  f"(max {args.max_growth:.1f}x)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Tìm điểm bão hòa connection pool theo số worker đồng thời.
+
+Mỗi worker (thread) lặp lại: lấy connection, chạy một truy vấn, giữ connection
+`--hold-ms` mili giây (mô phỏng thời gian xử lý của handler) rồi trả về pool.
+Với mỗi mức đồng thời, script in throughput, thời gian chờ checkout (p50/p95/max),
+số connection lớn nhất đang dùng, overflow và số lần timeout.
+
+    python -m benchmarks.pool_saturation --workers 5,10,20,40,80 --hold-ms 20
+    python -m benchmarks.pool_saturation --database-url sqlite:///./bench.db --pool-size 5 --max-overflow 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="5,10,20,40,80", help="Các mức đồng thời, phân tách bằng dấu phẩy")
+    parser.add_argument("--duration", type=float, default=5.0, help="Thời gian chạy mỗi mức (giây)")
+    parser.add_argument("--hold-ms", type=float, default=20.0, help="Thời gian giữ connection mỗi lần (ms)")
+    parser.add_argument("--database-url", help="Ghi đè DATABASE_URL")
+    parser.add_argument("--pool-size", type=int, help="Ghi đè DB_POOL_SIZE")
+    parser.add_argument("--max-overflow", type=int, help="Ghi đè DB_MAX_OVERFLOW")
+    parser.add_argument("--pool-timeout", type=float, help="Ghi đè DB_POOL_TIMEOUT")
+    return parser.parse_args()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+def run_level(engine, workers: int, duration: float, hold_s: float) -> dict:
+    from sqlalchemy import exc, text
+
+    waits = []
+    done = [0]
+    timeouts = [0]
+    peak = [0]
+    peak_overflow = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker():
+        local_waits = []
+        local_done = 0
+        local_timeouts = 0
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn = engine.connect()
+            except exc.TimeoutError:
+                local_timeouts += 1
+                continue
+            local_waits.append((time.perf_counter() - start) * 1000)
+            try:
+                conn.execute(text("SELECT 1"))
+                checked_out = engine.pool.checkedout()
+                if checked_out > peak[0]:
+                    peak[0] = checked_out
+                    peak_overflow[0] = max(peak_overflow[0], engine.pool.overflow())
+                if hold_s:
+                    time.sleep(hold_s)
+            finally:
+                conn.close()
+            local_done += 1
+        with lock:
+            waits.extend(local_waits)
+            done[0] += local_done
+            timeouts[0] += local_timeouts
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "workers": workers,
+        "throughput": done[0] / elapsed if elapsed else 0.0,
+        "wait_p50_ms": percentile(waits, 50),
+        "wait_p95_ms": percentile(waits, 95),
+        "wait_max_ms": max(waits) if waits else 0.0,
+        "peak_checked_out": peak[0],
+        "overflow": peak_overflow[0],
+        "timeouts": timeouts[0],
+    }
+
+
+def main():
+    args = parse_args()
+    overrides = {
+        "DATABASE_URL": args.database_url,
+        "DB_POOL_SIZE": args.pool_size,
+        "DB_MAX_OVERFLOW": args.max_overflow,
+        "DB_POOL_TIMEOUT": args.pool_timeout,
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            os.environ[key] = str(value)
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    from app.core.config import settings
+    from app.core.database import engine
+
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    print(f"pool_size={settings.DB_POOL_SIZE} max_overflow={settings.DB_MAX_OVERFLOW} "
+          f"capacity={capacity} hold={args.hold_ms}ms duration={args.duration}s")
+    header = f"{'workers':>8} {'req/s':>10} {'wait p50':>10} {'wait p95':>10} {'wait max':>10} {'peak':>6} {'overflow':>9} {'timeouts':>9}"
+    print(header)
+    print("-" * len(header))
+
+    saturated_at = None
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        row = run_level(engine, workers, args.duration, args.hold_ms / 1000.0)
+        print(f"{row['workers']:>8} {row['throughput']:>10.1f} {row['wait_p50_ms']:>9.2f}ms "
+              f"{row['wait_p95_ms']:>9.2f}ms {row['wait_max_ms']:>9.2f}ms {row['peak_checked_out']:>6} "
+              f"{row['overflow']:>9} {row['timeouts']:>9}")
+        if saturated_at is None and (row["peak_checked_out"] >= capacity or row["timeouts"]):
+            saturated_at = workers
+
+    if saturated_at is None:
+        print("Pool chưa bão hòa ở các mức đã thử.")
+    else:
+        print(f"Pool bão hòa từ {saturated_at} worker đồng thời "
+              f"(capacity {capacity}); tăng DB_POOL_SIZE/DB_MAX_OVERFLOW hoặc giảm số worker.")
+    engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
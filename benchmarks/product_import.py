@@ -0,0 +1,97 @@
+"""Đo tốc độ import sản phẩm (dòng/giây) trên file CSV hoặc JSONL sinh tự động.
+
+    python -m benchmarks.product_import --rows 100000
+    python -m benchmarks.product_import --rows 100000 --format jsonl --batch-size 2000
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.run import DEFAULT_DATABASE_URL, configure_environment
+
+BRANDS = 20
+CATEGORIES = 10
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--rows", type=int, default=100000, help="Số dòng (variant) trong file")
+    parser.add_argument("--variants-per-product", type=int, default=2)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--batch-size", type=int, help="Ghi đè PRODUCT_IMPORT_BATCH_SIZE")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def write_file(path: str, fmt: str, rows: int, per_product: int, rng: random.Random) -> None:
+    volumes = ["30ml", "50ml", "100ml", "150ml", "200ml"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = None
+        product = None
+        for i in range(rows):
+            p, v = divmod(i, per_product)
+            if v == 0:
+                product = {"name": f"Import product {p}", "brand_slug": f"import-brand-{rng.randrange(BRANDS)}",
+                           "category_slug": f"import-category-{rng.randrange(CATEGORIES)}",
+                           "description": "Sản phẩm import", "is_active": "true", "product_types": []}
+            variant = {"price": rng.randrange(50, 2000) * 1000, "stock": rng.randrange(1000),
+                       "volume": volumes[v % len(volumes)], "origin": "Việt Nam"}
+            if fmt == "csv":
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=[k for k in product if k != "product_types"] + list(variant))
+                    writer.writeheader()
+                writer.writerow({**{k: val for k, val in product.items() if k != "product_types"}, **variant})
+            else:
+                product["product_types"].append(variant)
+                if v == per_product - 1 or i == rows - 1:
+                    f.write(json.dumps(product, ensure_ascii=False) + "\n")
+
+
+def main() -> int:
+    args = parse_args()
+    configure_environment(args.database_url)
+    if args.batch_size:
+        os.environ["PRODUCT_IMPORT_BATCH_SIZE"] = str(args.batch_size)
+
+    from sqlalchemy import insert, select
+    from app.core.database import engine
+    from app.models import Base
+    from app.models.brand import Brand
+    from app.models.category import Category
+    from app.core.database import run_in_session
+    from app.services.product_import_service import ProductImportService
+
+    Base.metadata.create_all(engine)
+    brand_rows = [{"name": f"Import brand {i}", "slug": f"import-brand-{i}"} for i in range(BRANDS)]
+    category_rows = [{"name": f"Import category {i}", "slug": f"import-category-{i}"} for i in range(CATEGORIES)]
+    with engine.begin() as conn:
+        for model, rows in ((Brand, brand_rows), (Category, category_rows)):
+            existing = set(conn.execute(select(model.slug)).scalars())
+            missing = [r for r in rows if r["slug"] not in existing]
+            if missing:
+                conn.execute(insert(model), missing)
+
+    fd, path = tempfile.mkstemp(suffix=f".{args.format}")
+    os.close(fd)
+    write_file(path, args.format, args.rows, args.variants_per_product, random.Random(args.seed))
+    print(f"Generated {args.rows} rows ({os.path.getsize(path) / 1e6:.1f} MB) -> importing into {args.database_url}")
+
+    # Lần chạy đầu tạo mới toàn bộ; chạy lại cùng database sẽ đo nhánh cập nhật
+    started = time.perf_counter()
+    import_id = run_in_session(lambda db: ProductImportService(db).create(path, args.format).id)
+    job = run_in_session(lambda db: ProductImportService(db).run(import_id))
+    elapsed = time.perf_counter() - started
+    print(f"status={job.status} products +{job.products_created}/~{job.products_updated} "
+          f"variants +{job.variants_created}/~{job.variants_updated} failed={job.failed}")
+    print(f"{args.rows / elapsed:,.0f} rows/s ({elapsed:.1f}s)")
+    return 0 if job.status == "completed" and not job.failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Đếm số round trip tới database (câu lệnh SQL + COMMIT) của các luồng ghi chính.
+
+Chạy trên một database SQLite tạm và thoát với mã 1 nếu luồng nào vượt ngân sách,
+dùng để phát hiện sớm khi có commit/refresh thừa quay lại repository:
+
+    python -m benchmarks.round_trips
+    python -m benchmarks.round_trips --verbose
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from typing import List
+
+from benchmarks.run import configure_environment
+
+# Ngân sách cho mỗi request, đã gồm truy vấn xác thực của middleware/get_current_user
+BUDGETS = {
+    "register": 4,   # SELECT role, INSERT user, INSERT user_roles, COMMIT
+    "cart_add": 7,   # user đã nằm trong cache xác thực (request tạo giỏ trước đó), 5 SELECT kiểm tra giỏ/variant/tồn kho, INSERT, COMMIT
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="In ra từng câu lệnh")
+    return parser.parse_args()
+
+
+class RoundTripCounter:
+    """Ghi lại câu lệnh gửi tới engine; COMMIT được đếm như một round trip"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.statements: List[str] = []
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(" ".join(statement.split())[:120])
+
+    def _on_commit(self, conn):
+        self.statements.append("COMMIT")
+
+    def reset(self) -> None:
+        self.statements = []
+
+
+async def scenario(client, counter: RoundTripCounter, variant_id: str) -> dict:
+    from app.core.security import create_access_token
+
+    def register_body(email: str, phone: str) -> dict:
+        return {"email": email, "password": "Secret@123", "first_name": "Round", "last_name": "Trip",
+                "phone_number": phone}
+
+    counts = {}
+    # lần đăng ký đầu tạo thêm role CLIENT; đo từ lần thứ hai (trạng thái thường gặp)
+    resp = await client.request("POST", "/api/v1/auth/auth/register", json_body=register_body("warmup@example.com", "0900000000"))
+    assert resp.ok, resp.body
+    counter.reset()
+    resp = await client.request("POST", "/api/v1/auth/auth/register", json_body=register_body("round.trip@example.com", "0900000001"))
+    assert resp.ok, resp.body
+    counts["register"] = list(counter.statements)
+
+    user_id = resp.json()["data"]["id"]
+    token, _ = create_access_token({"sub": user_id})
+    headers = {"Authorization": f"Bearer {token}"}
+    resp = await client.request("POST", "/api/v1/carts/carts/", headers=headers)
+    assert resp.ok, resp.body
+    cart_id = resp.json()["data"]["id"]
+
+    counter.reset()
+    resp = await client.request("POST", f"/api/v1/carts/carts/{cart_id}/items", headers=headers,
+                                json_body={"product_type_id": variant_id, "quantity": 1})
+    assert resp.ok, resp.body
+    counts["cart_add"] = list(counter.statements)
+    return counts
+
+
+def main() -> int:
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="round-trips-")
+    configure_environment(f"sqlite:///{os.path.join(workdir, 'round_trips.db')}")
+
+    from sqlalchemy import insert
+    from app.core.database import engine
+    from app.main import app
+    from app.models import Base
+    from app.models.product import Product
+    from app.models.productType import ProductType
+    from benchmarks.asgi import ASGIClient, Lifespan
+
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Product), [{"id": "rt-product", "name": "Round trip product"}])
+        conn.execute(insert(ProductType), [{"id": "rt-variant", "product_id": "rt-product", "price": 100000, "stock": 10}])
+
+    async def run() -> dict:
+        # chạy trong lifespan để email filter và pool băm mật khẩu đã sẵn sàng như khi chạy thật
+        async with Lifespan(app):
+            counter = RoundTripCounter(engine)
+            return await scenario(ASGIClient(app), counter, "rt-variant")
+
+    counts = asyncio.run(run())
+
+    failed = False
+    for name, statements in counts.items():
+        budget = BUDGETS[name]
+        status = "ok" if len(statements) <= budget else "OVER BUDGET"
+        failed = failed or len(statements) > budget
+        print(f"{name:<10} {len(statements):>3} round trips (budget {budget}) {status}")
+        if args.verbose or len(statements) > budget:
+            for statement in statements:
+                print(f"    {statement}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
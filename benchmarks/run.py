@@ -0,0 +1,270 @@
+"""Benchmark API: chạy `app.main:app` trong cùng process qua ASGI trên một database đã seed.
+
+Kịch bản: tìm kiếm sản phẩm, chi tiết sản phẩm, cây danh mục, thêm vào giỏ hàng, đặt hàng.
+Mỗi kịch bản báo cáo req/s, p50/p95/p99 (ms), số câu SQL trung bình mỗi request và số lỗi.
+
+    python -m benchmarks.run --scale small
+    python -m benchmarks.run --scale medium --concurrency 16 --requests 2000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Dict, List
+
+DEFAULT_DATABASE_URL = "sqlite:///./benchmarks/bench.db"
+SCENARIOS = ["product_search", "product_detail", "category_tree", "cart_add", "checkout"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--scale", default="small", help="tiny | small | medium | large")
+    parser.add_argument("--seed", type=int, default=42, help="Seed sinh dữ liệu và chọn request")
+    parser.add_argument("--reseed", action="store_true", help="Xóa và seed lại database")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="Số request mỗi kịch bản")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--output", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--baseline", help="File JSON baseline để so sánh")
+    parser.add_argument("--save-baseline", help="Lưu kết quả lần chạy này làm baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Ngưỡng hồi quy (0.10 = 10%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    return parser.parse_args()
+
+
+def configure_environment(database_url: str) -> None:
+    """Phải gọi trước khi import `app` vì settings được đọc lúc import"""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ["DEBUG"] = "false"
+    os.environ.setdefault("DB_POOL_SIZE", "20")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(pct / 100.0 * len(values) + 0.5)) - 1))
+    return values[k]
+
+
+class Context:
+    def __init__(self, app, info, rng: random.Random):
+        from app.core.security import create_access_token
+
+        self.app = app
+        self.info = info
+        self.rng = rng
+        self.tokens: Dict[str, str] = {}
+        self.cart_users = list(info.cart_by_user)
+        self._create_token = create_access_token
+
+    def path(self, name: str, **params) -> str:
+        return self.app.url_path_for(name, **params)
+
+    def route_template(self, name: str) -> str:
+        for route in self.app.routes:
+            if getattr(route, "name", None) == name:
+                return route.path
+        raise KeyError(name)
+
+    def auth_header(self, user_id: str) -> Dict[str, str]:
+        token = self.tokens.get(user_id)
+        if token is None:
+            token, _ = self._create_token({"sub": user_id})
+            self.tokens[user_id] = token
+        return {"Authorization": f"Bearer {token}"}
+
+
+# Mỗi kịch bản: (tên route, method, hàm tạo request)
+def _product_search(ctx: Context, client):
+    keyword = ctx.rng.choice(ctx.info.keywords)
+    return client.get(f"{ctx.path('get_all_products')}?keyword={keyword}&limit=20")
+
+
+def _product_detail(ctx: Context, client):
+    return client.get(ctx.path("get_product_detail", product_id=ctx.rng.choice(ctx.info.product_ids)))
+
+
+def _category_tree(ctx: Context, client):
+    return client.get(ctx.path("category_tree"))
+
+
+def _cart_add(ctx: Context, client):
+    user_id = ctx.rng.choice(ctx.cart_users)
+    cart_id = ctx.info.cart_by_user[user_id]
+    body = {"product_type_id": ctx.rng.choice(ctx.info.variant_ids), "quantity": 1}
+    return client.post(ctx.path("add_item", cart_id=cart_id), json_body=body, headers=ctx.auth_header(user_id))
+
+
+def _checkout(ctx: Context, client):
+    user_id = ctx.rng.choice(ctx.info.user_ids)
+    items = [{"product_type_id": v, "quantity": 1} for v in ctx.rng.sample(ctx.info.variant_ids, 2)]
+    return client.post(ctx.path("create_order"), json_body={"user_id": user_id, "items": items},
+                       headers=ctx.auth_header(user_id))
+
+
+SCENARIO_DEFS: Dict[str, tuple] = {
+    "product_search": ("get_all_products", "GET", _product_search),
+    "product_detail": ("get_product_detail", "GET", _product_detail),
+    "category_tree": ("category_tree", "GET", _category_tree),
+    "cart_add": ("add_item", "POST", _cart_add),
+    "checkout": ("create_order", "POST", _checkout),
+}
+
+
+def _db_query_totals(method: str, route: str):
+    from app.core.metrics import http_request_db_queries
+
+    row = http_request_db_queries.values().get((method, route))
+    if not row:
+        return 0.0, 0
+    return row[-1], sum(row[:-1])
+
+
+async def run_scenario(ctx: Context, client, name: str, requests: int, concurrency: int, warmup: int) -> dict:
+    route_name, method, build = SCENARIO_DEFS[name]
+    for _ in range(warmup):
+        await build(ctx, client)
+
+    template = ctx.route_template(route_name)
+    sql_before, count_before = _db_query_totals(method, template)
+    latencies: List[float] = []
+    errors = 0
+    remaining = [requests]
+
+    async def worker():
+        nonlocal errors
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            start = time.perf_counter()
+            response = await build(ctx, client)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not response.ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    sql_after, count_after = _db_query_totals(method, template)
+    measured = count_after - count_before
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "sql_per_request": round((sql_after - sql_before) / measured, 2) if measured else 0.0,
+    }
+
+
+def print_report(results: Dict[str, dict], baseline: Dict[str, dict] = None) -> None:
+    header = f"{'scenario':<16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'sql/req':>8} {'errors':>7}"
+    if baseline:
+        header += f" {'Δ req/s':>9} {'Δ p95':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in results.items():
+        line = (f"{name:<16} {row['rps']:>9.1f} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                f"{row['p99_ms']:>9.2f} {row['sql_per_request']:>8.1f} {row['errors']:>7}")
+        base = (baseline or {}).get(name)
+        if base:
+            line += f" {_delta(row['rps'], base['rps']):>9} {_delta(row['p95_ms'], base['p95_ms']):>8}"
+        print(line)
+
+
+def _delta(current: float, previous: float) -> str:
+    if not previous:
+        return "n/a"
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+
+def find_regressions(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    problems = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base["rps"] and row["rps"] < base["rps"] * (1 - tolerance):
+            problems.append(f"{name}: req/s {row['rps']} < baseline {base['rps']}")
+        if base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {row['p95_ms']}ms > baseline {base['p95_ms']}ms")
+        if row["sql_per_request"] > base.get("sql_per_request", 0) + 0.5:
+            problems.append(f"{name}: sql/req {row['sql_per_request']} > baseline {base['sql_per_request']}")
+    return problems
+
+
+async def run(args) -> int:
+    configure_environment(args.database_url)
+
+    from app.core.database import engine
+    from app.main import app
+    from app.models import Base
+    from app.core.password import hash_password
+    from benchmarks.asgi import ASGIClient, Lifespan
+    from benchmarks.seed import SCALES, is_seeded, load_seed_info, seed_catalog
+
+    if args.reseed:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    if args.reseed or not is_seeded(engine):
+        scale = SCALES[args.scale]
+        print(f"Seeding '{args.scale}' catalog into {args.database_url} ...")
+        started = time.perf_counter()
+        info = seed_catalog(engine, scale, seed=args.seed, password_hash=hash_password("Benchmark@123"))
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+    else:
+        info = load_seed_info(engine)
+
+    ctx = Context(app, info, random.Random(args.seed))
+    client = ASGIClient(app)
+    results: Dict[str, dict] = {}
+    async with Lifespan(app):
+        for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            results[name] = await run_scenario(ctx, client, name, args.requests, args.concurrency, args.warmup)
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_report(results, baseline)
+
+    report = {
+        "meta": {
+            "scale": args.scale,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "database": engine.url.get_backend_name(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+
+    if baseline:
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for problem in regressions:
+            print(f"REGRESSION {problem}")
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+def main() -> int:
+    return asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
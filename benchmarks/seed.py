@@ -0,0 +1,51 @@
+"""Seed catalog cho benchmark: dùng lại bộ sinh dữ liệu `app.tools.seed` và trả về các id cần cho kịch bản.
+
+Dữ liệu được chèn bằng Core `INSERT` theo lô và sinh từ một seed cố định nên các lần
+chạy cùng tham số luôn cho cùng một bộ dữ liệu.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from sqlalchemy import func, select
+
+from app.tools.seed import SCALES, WORDS, Scale, Seeder  # noqa: F401  (SCALES/Scale dùng bởi benchmarks.run)
+
+
+@dataclass
+class SeedInfo:
+    product_ids: List[str] = field(default_factory=list)
+    variant_ids: List[str] = field(default_factory=list)
+    category_ids: List[str] = field(default_factory=list)
+    user_ids: List[str] = field(default_factory=list)
+    cart_by_user: Dict[str, str] = field(default_factory=dict)
+    keywords: List[str] = field(default_factory=lambda: list(WORDS))
+
+
+def seed_catalog(engine, scale: Scale, seed: int = 42, password_hash: str = "") -> SeedInfo:
+    """Chèn toàn bộ dữ liệu giả lập vào database của `engine` (bảng phải tồn tại và đang rỗng)"""
+    Seeder(engine, scale, seed=seed, password_hash=password_hash or None).run()
+    return load_seed_info(engine)
+
+
+def load_seed_info(engine, sample: int = 5000) -> SeedInfo:
+    """Đọc lại id từ database đã seed trước đó (dùng khi không seed lại)"""
+    from app.models import Base
+
+    tables = Base.metadata.tables
+    info = SeedInfo()
+    with engine.connect() as conn:
+        info.product_ids = list(conn.execute(select(tables["products"].c.id).limit(sample)).scalars())
+        info.variant_ids = list(conn.execute(select(tables["product_types"].c.id).limit(sample)).scalars())
+        info.category_ids = list(conn.execute(select(tables["categories"].c.id)).scalars())
+        carts = conn.execute(select(tables["carts"].c.user_id, tables["carts"].c.id).limit(sample)).all()
+        info.cart_by_user = {user_id: cart_id for user_id, cart_id in carts}
+        info.user_ids = list(info.cart_by_user)
+    return info
+
+
+def is_seeded(engine) -> bool:
+    from app.models import Base
+
+    products = Base.metadata.tables["products"]
+    with engine.connect() as conn:
+        return bool(conn.execute(select(func.count()).select_from(products)).scalar())
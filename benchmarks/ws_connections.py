@@ -0,0 +1,207 @@
+"""Đo số kết nối WebSocket chat đồng thời mà một worker giữ được.
+
+Script chạy `uvicorn app.main:app` (một worker) trong process con trên database tạm, rồi:
+1. mở `--connections` kết nối của khách hàng (mỗi người một hội thoại) và một kết nối nhân viên,
+   báo thời gian mở kết nối và RAM (RSS) của worker tăng thêm trên mỗi kết nối;
+2. trong `--duration` giây, `--senders` khách hàng gửi tin liên tục (`--rate` tin/giây mỗi người):
+   báo số tin/giây, độ trễ tới lúc nhận lại sự kiện `message` (đi qua hub) và `ack` (đã ghi DB),
+   và số tin kết nối nhân viên nhận được.
+
+Client chạy cùng máy nên tranh CPU với worker: con số là mức sàn, không phải giới hạn của worker.
+
+    python -m benchmarks.ws_connections --connections 2000
+    python -m benchmarks.ws_connections --connections 5000 --senders 200 --rate 2 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict, List
+
+from benchmarks.run import configure_environment, percentile
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Mặc định: SQLite tạm")
+    parser.add_argument("--connections", type=int, default=1000, help="Số kết nối khách hàng")
+    parser.add_argument("--connect-concurrency", type=int, default=50, help="Số kết nối mở cùng lúc")
+    parser.add_argument("--senders", type=int, default=100, help="Số khách hàng gửi tin ở pha 2")
+    parser.add_argument("--rate", type=float, default=1.0, help="Số tin/giây của mỗi người gửi")
+    parser.add_argument("--duration", type=float, default=5.0, help="Thời lượng pha 2 (giây)")
+    parser.add_argument("--no-deflate", action="store_true",
+                        help="Tắt nén permessage-deflate (mỗi kết nối nén giữ buffer zlib riêng)")
+    return parser.parse_args(argv)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def prepare_database(customers: int) -> List[str]:
+    """Tạo user (nhân viên đầu danh sách) và hội thoại; trả về access token theo thứ tự user"""
+    from sqlalchemy import insert
+
+    from app.core.database import engine
+    from app.core.security import create_access_token
+    from app.models import Base
+    from app.models.conversation import Conversation
+    from app.models.role import Role
+    from app.models.user import User
+    from app.models.userRole import UserRole
+
+    Base.metadata.create_all(engine)
+    user_ids = [f"ws-{i}" for i in range(customers + 1)]
+    with engine.begin() as conn:
+        conn.execute(insert(Role), [{"id": "role-admin", "name": "ADMIN"}, {"id": "role-client", "name": "CLIENT"}])
+        conn.execute(insert(User), [
+            {"id": user_id, "email": f"{user_id}@example.com", "password_hash": "x", "phone_number": f"09{i:08d}"}
+            for i, user_id in enumerate(user_ids)
+        ])
+        conn.execute(insert(UserRole), [
+            {"id": str(uuid.uuid4()), "user_id": user_id, "role_id": "role-admin" if i == 0 else "role-client"}
+            for i, user_id in enumerate(user_ids)
+        ])
+        conn.execute(insert(Conversation), [
+            {"id": f"conv-{user_id}", "user1_id": user_id, "user2_id": user_ids[0]} for user_id in user_ids[1:]
+        ])
+    return [create_access_token({"sub": user_id, "ver": 1})[0] for user_id in user_ids]
+
+
+async def open_connections(url: str, tokens: List[str], concurrency: int) -> tuple:
+    import websockets
+
+    semaphore = asyncio.Semaphore(concurrency)
+    connect_ms: List[float] = []
+
+    async def connect(token: str):
+        async with semaphore:
+            started = time.perf_counter()
+            ws = await websockets.connect(f"{url}?token={token}", open_timeout=30, ping_interval=None,
+                                          max_queue=None)
+            connect_ms.append((time.perf_counter() - started) * 1000)
+            return ws
+
+    sockets = await asyncio.gather(*(connect(token) for token in tokens))
+    return sockets, connect_ms
+
+
+async def send_loop(ws, conversation_id: str, rate: float, stop_at: float, sent: Dict[str, float]) -> None:
+    i = 0
+    while time.perf_counter() < stop_at:
+        client_id = f"{conversation_id}:{i}"
+        sent[client_id] = time.perf_counter()
+        await ws.send(json.dumps({"type": "message", "conversation_id": conversation_id,
+                                  "message": f"benchmark {i}", "client_id": client_id}))
+        i += 1
+        await asyncio.sleep(1 / rate)
+
+
+async def receive_loop(ws, sent: Dict[str, float], delivered: List[float], acked: List[float], counts: dict) -> None:
+    async for raw in ws:
+        event = json.loads(raw)
+        kind = event.get("type")
+        counts[kind] = counts.get(kind, 0) + 1
+        if kind == "message" and event["message"].get("client_id") in sent:
+            delivered.append((time.perf_counter() - sent[event["message"]["client_id"]]) * 1000)
+        elif kind == "ack" and event.get("client_id") in sent:
+            acked.append((time.perf_counter() - sent[event["client_id"]]) * 1000)
+
+
+async def run(args, url: str, tokens: List[str], server_pid: int) -> None:
+    rss_before = rss_kb(server_pid)
+    started = time.perf_counter()
+    sockets, connect_ms = await open_connections(url, tokens, args.connect_concurrency)
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(1)
+    rss_after = rss_kb(server_pid)
+    staff, customers = sockets[0], sockets[1:]
+    print(f"connections: {len(sockets)} mở trong {elapsed:.1f}s "
+          f"(p50 {percentile(connect_ms, 50):.1f}ms, p99 {percentile(connect_ms, 99):.1f}ms)")
+    print(f"worker RSS: {rss_before / 1024:.0f} MiB -> {rss_after / 1024:.0f} MiB "
+          f"(~{(rss_after - rss_before) / max(len(sockets), 1):.1f} KiB/kết nối)")
+
+    sent: Dict[str, float] = {}
+    delivered: List[float] = []
+    acked: List[float] = []
+    staff_counts: dict = {}
+    customer_counts: dict = {}
+    readers = [asyncio.create_task(receive_loop(staff, {}, [], [], staff_counts))]
+    readers += [asyncio.create_task(receive_loop(ws, sent, delivered, acked, customer_counts)) for ws in customers]
+    stop_at = time.perf_counter() + args.duration
+    senders = customers[:args.senders]
+    await asyncio.gather(*(
+        send_loop(ws, f"conv-ws-{i + 1}", args.rate, stop_at, sent) for i, ws in enumerate(senders)
+    ))
+    # chờ các lô ghi cuối cùng
+    await asyncio.sleep(1)
+    print(f"messages: {len(sent)} gửi ({len(sent) / args.duration:.0f}/s), "
+          f"nhân viên nhận {staff_counts.get('message', 0)}")
+    print(f"  delivered: p50 {percentile(delivered, 50):.1f}ms p99 {percentile(delivered, 99):.1f}ms ({len(delivered)})")
+    print(f"  acked:     p50 {percentile(acked, 50):.1f}ms p99 {percentile(acked, 99):.1f}ms ({len(acked)})")
+    errors = customer_counts.get("error", 0) + staff_counts.get("error", 0)
+    if errors:
+        print(f"  errors: {errors}")
+    for task in readers:
+        task.cancel()
+    await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+
+
+def main() -> int:
+    args = parse_args()
+    # mỗi kết nối là một file descriptor ở cả client và worker
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if args.connections + 100 > hard:
+        print(f"ulimit -n = {hard}: không đủ cho {args.connections} kết nối", file=sys.stderr)
+        return 1
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='ws-bench-'), 'ws.db')}"
+    configure_environment(database_url)
+    os.environ["REALTIME_MAX_CONNECTIONS"] = str(args.connections + 10)
+    tokens = prepare_database(args.connections)
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--backlog", "4096",
+         *(["--ws-per-message-deflate", "false"] if args.no_deflate else [])],
+        env={**os.environ, "PASSWORD_HASH_WORKERS": "0", "IMAGE_WORKERS": "0"},
+    )
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    print("uvicorn không khởi động được", file=sys.stderr)
+                    return 1
+                time.sleep(0.2)
+        asyncio.run(run(args, f"ws://127.0.0.1:{port}/api/v1/chat/ws", tokens, server.pid))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())